@@ -13,6 +13,8 @@ import uuid
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
+from write_behind import flush_pending, get_active_write_behind
+
 logger = logging.getLogger(__name__)
 
 
@@ -71,9 +73,19 @@ def log_activity(
         run_id: Optional indexing run ID (#6b).
 
     Returns:
-        The UUID of the log entry, or None on failure.
+        The UUID of the log entry, or None on failure. While the API
+        server's write-behind buffer runs, the row is written on its next
+        flush and None means the buffer was full.
     """
     entry_id = str(uuid.uuid4())
+    buffer = get_active_write_behind()
+    if buffer is not None:
+        queued = buffer.add_activity((
+            entry_id, datetime.now(timezone.utc), client_id, user_id, action,
+            json.dumps(details or {}), executor_scope, executor_id, root_id, run_id,
+        ))
+        return entry_id if queued else None
+
     params = (entry_id, client_id, user_id, action, json.dumps(details or {}),
               executor_scope, executor_id, root_id, run_id)
     sql = """
@@ -139,6 +151,7 @@ def get_recent(
     Returns:
         List of activity dicts, newest first.
     """
+    flush_pending()
     try:
         with _get_db_connection() as conn:
             cur = conn.cursor()
@@ -174,6 +187,7 @@ def get_activity_count(
     action: Optional[str] = None,
 ) -> int:
     """Get total count of activity log entries (for pagination)."""
+    flush_pending()
     try:
         with _get_db_connection() as conn:
             cur = conn.cursor()
@@ -198,6 +212,7 @@ def get_activity_count(
 
 def get_action_types() -> List[str]:
     """Get distinct action types in the log."""
+    flush_pending()
     try:
         with _get_db_connection() as conn:
             cur = conn.cursor()
@@ -248,20 +263,24 @@ def export_csv(
 def apply_retention(days: int) -> int:
     """Delete activity log entries older than N days.
 
+    Deletes in committed batches (see ``batched_delete``).
+
     Returns:
         Number of entries deleted.
     """
+    from batched_delete import delete_in_batches
+
     try:
-        with _get_db_connection() as conn:
-            cur = conn.cursor()
-            cur.execute(
-                "DELETE FROM activity_log WHERE ts < now() - interval '%s days'",
-                (days,),
-            )
-            deleted = cur.rowcount
-            conn.commit()
-            logger.info("Retention: deleted %d activity log entries older than %d days", deleted, days)
-            return deleted
+        stats = delete_in_batches(
+            "activity_log",
+            "activity_log",
+            "ts < now() - interval '%s days'",
+            (days,),
+            connection_factory=_get_db_connection,
+        )
+        logger.info("Retention: deleted %d activity log entries older than %d days",
+                    stats["deleted"], days)
+        return stats["deleted"]
     except Exception as e:
         logger.warning("Failed to apply retention: %s", e)
         return 0
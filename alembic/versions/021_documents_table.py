@@ -0,0 +1,285 @@
+"""021 – First-class documents table.
+
+Revision ID: 021
+Revises: 020
+Create Date: 2026-10-18
+
+Adds a ``documents`` table with one row per document. Document-level reads
+(list, get-by-id, statistics, document tree, document_stats) used to
+aggregate ``document_chunks`` with GROUP BY on every request.
+
+The table is maintained by statement-level triggers on document_chunks.
+Every writer (indexer, restore, bulk delete, quarantine, visibility and
+ownership changes, retention purge) therefore keeps it in sync inside its
+own transaction. Each trigger recomputes only the documents touched by
+the statement, using the transition tables.
+
+"First chunk" fields (source_uri, metadata, type, owner, visibility, hash,
+quarantine) follow the document_stats convention: the earliest-indexed
+chunk wins.
+
+document_stats is redefined as a plain projection of ``documents``.
+"""
+
+from alembic import op
+
+revision = "021"
+down_revision = "020"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS documents (
+            document_id TEXT PRIMARY KEY,
+            source_uri TEXT NOT NULL,
+            norm_uri TEXT NOT NULL,
+            chunk_count INTEGER NOT NULL DEFAULT 0,
+            first_indexed TIMESTAMP,
+            last_indexed TIMESTAMP,
+            last_updated TIMESTAMP,
+            document_type TEXT,
+            metadata JSONB NOT NULL DEFAULT '{}',
+            owner_id TEXT,
+            visibility TEXT,
+            file_hash TEXT,
+            canonical_source_key TEXT,
+            quarantined_at TIMESTAMPTZ,
+            quarantine_reason TEXT
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_documents_first_indexed
+            ON documents (first_indexed DESC, document_id);
+        CREATE INDEX IF NOT EXISTS idx_documents_last_updated
+            ON documents (last_updated DESC, document_id);
+        CREATE INDEX IF NOT EXISTS idx_documents_source_uri
+            ON documents (source_uri);
+        CREATE INDEX IF NOT EXISTS idx_documents_norm_uri
+            ON documents (norm_uri text_pattern_ops);
+        CREATE INDEX IF NOT EXISTS idx_documents_document_type
+            ON documents (document_type);
+        CREATE INDEX IF NOT EXISTS idx_documents_owner_id
+            ON documents (owner_id) WHERE owner_id IS NOT NULL;
+        CREATE INDEX IF NOT EXISTS idx_documents_private
+            ON documents (owner_id) WHERE visibility = 'private';
+        CREATE INDEX IF NOT EXISTS idx_documents_quarantined
+            ON documents (quarantined_at) WHERE quarantined_at IS NOT NULL;
+    """)
+
+    # Recompute the documents rows for a set of document ids.
+    #
+    # Placeholder rows are inserted and row-locked first so that two
+    # transactions writing chunks of the same document serialize; the
+    # aggregate runs as a separate statement and therefore sees chunks
+    # committed by whichever writer went first (READ COMMITTED takes a new
+    # snapshot per statement).
+    op.execute(r"""
+        CREATE OR REPLACE FUNCTION refresh_documents(doc_ids TEXT[])
+        RETURNS void AS $$
+        BEGIN
+            IF doc_ids IS NULL OR cardinality(doc_ids) = 0 THEN
+                RETURN;
+            END IF;
+
+            INSERT INTO documents (document_id, source_uri, norm_uri)
+            SELECT DISTINCT unnest(doc_ids), '', ''
+            ON CONFLICT (document_id) DO NOTHING;
+
+            PERFORM 1 FROM documents
+            WHERE document_id = ANY(doc_ids)
+            ORDER BY document_id
+            FOR UPDATE;
+
+            UPDATE documents d SET
+                source_uri = agg.source_uri,
+                norm_uri = REPLACE(REPLACE(REPLACE(REPLACE(
+                    agg.source_uri, E'\\', '/'), E'\t', '/'), E'\n', '/'), E'\r', '/'),
+                chunk_count = agg.chunk_count,
+                first_indexed = agg.first_indexed,
+                last_indexed = agg.last_indexed,
+                last_updated = agg.last_updated,
+                document_type = agg.metadata->>'type',
+                metadata = COALESCE(agg.metadata, '{}'::jsonb),
+                owner_id = agg.owner_id,
+                visibility = agg.visibility,
+                file_hash = agg.metadata->>'file_hash',
+                canonical_source_key = agg.canonical_source_key,
+                quarantined_at = agg.quarantined_at,
+                quarantine_reason = agg.quarantine_reason
+            FROM (
+                SELECT
+                    document_id,
+                    (array_agg(source_uri ORDER BY indexed_at, chunk_index))[1] AS source_uri,
+                    COUNT(*) AS chunk_count,
+                    MIN(indexed_at) AS first_indexed,
+                    MAX(indexed_at) AS last_indexed,
+                    MAX(updated_at) AS last_updated,
+                    (array_agg(metadata ORDER BY indexed_at, chunk_index))[1] AS metadata,
+                    (array_agg(owner_id ORDER BY indexed_at, chunk_index))[1] AS owner_id,
+                    (array_agg(visibility ORDER BY indexed_at, chunk_index))[1] AS visibility,
+                    (array_agg(canonical_source_key ORDER BY indexed_at, chunk_index))[1]
+                        AS canonical_source_key,
+                    (array_agg(quarantined_at ORDER BY indexed_at, chunk_index))[1] AS quarantined_at,
+                    (array_agg(quarantine_reason ORDER BY indexed_at, chunk_index))[1]
+                        AS quarantine_reason
+                FROM document_chunks
+                WHERE document_id = ANY(doc_ids)
+                GROUP BY document_id
+            ) agg
+            WHERE d.document_id = agg.document_id;
+
+            DELETE FROM documents d
+            WHERE d.document_id = ANY(doc_ids)
+              AND NOT EXISTS (
+                  SELECT 1 FROM document_chunks c WHERE c.document_id = d.document_id
+              );
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION documents_sync_insert()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            PERFORM refresh_documents(ARRAY(SELECT DISTINCT document_id FROM new_chunks));
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    # Re-aggregate only documents whose aggregated columns changed. Most
+    # chunk updates (text, embedding, re-embedding jobs) touch none of them;
+    # for those, only last_updated moves, from the updated rows alone, so
+    # the cost is O(updated rows) rather than O(chunks per document).
+    op.execute("""
+        CREATE OR REPLACE FUNCTION documents_sync_update()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            PERFORM refresh_documents(ARRAY(
+                SELECT o.document_id
+                FROM old_chunks o JOIN new_chunks n USING (chunk_id)
+                WHERE (o.document_id, o.chunk_index, o.source_uri, o.indexed_at,
+                       o.metadata, o.owner_id, o.visibility, o.canonical_source_key,
+                       o.quarantined_at, o.quarantine_reason)
+                      IS DISTINCT FROM
+                      (n.document_id, n.chunk_index, n.source_uri, n.indexed_at,
+                       n.metadata, n.owner_id, n.visibility, n.canonical_source_key,
+                       n.quarantined_at, n.quarantine_reason)
+                UNION
+                SELECT n.document_id
+                FROM old_chunks o JOIN new_chunks n USING (chunk_id)
+                WHERE o.document_id IS DISTINCT FROM n.document_id
+            ));
+
+            UPDATE documents d SET last_updated = t.last_updated
+            FROM (
+                SELECT document_id, MAX(updated_at) AS last_updated
+                FROM new_chunks
+                GROUP BY document_id
+            ) t
+            WHERE d.document_id = t.document_id
+              AND (d.last_updated IS NULL OR t.last_updated > d.last_updated);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION documents_sync_delete()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            PERFORM refresh_documents(ARRAY(SELECT DISTINCT document_id FROM old_chunks));
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION documents_sync_truncate()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            DELETE FROM documents;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    op.execute("""
+        DROP TRIGGER IF EXISTS documents_sync_insert ON document_chunks;
+        CREATE TRIGGER documents_sync_insert
+            AFTER INSERT ON document_chunks
+            REFERENCING NEW TABLE AS new_chunks
+            FOR EACH STATEMENT EXECUTE FUNCTION documents_sync_insert();
+
+        DROP TRIGGER IF EXISTS documents_sync_update ON document_chunks;
+        CREATE TRIGGER documents_sync_update
+            AFTER UPDATE ON document_chunks
+            REFERENCING OLD TABLE AS old_chunks NEW TABLE AS new_chunks
+            FOR EACH STATEMENT EXECUTE FUNCTION documents_sync_update();
+
+        DROP TRIGGER IF EXISTS documents_sync_delete ON document_chunks;
+        CREATE TRIGGER documents_sync_delete
+            AFTER DELETE ON document_chunks
+            REFERENCING OLD TABLE AS old_chunks
+            FOR EACH STATEMENT EXECUTE FUNCTION documents_sync_delete();
+
+        DROP TRIGGER IF EXISTS documents_sync_truncate ON document_chunks;
+        CREATE TRIGGER documents_sync_truncate
+            AFTER TRUNCATE ON document_chunks
+            FOR EACH STATEMENT EXECUTE FUNCTION documents_sync_truncate();
+    """)
+
+    # Backfill existing documents in one pass
+    op.execute("""
+        SELECT refresh_documents(ARRAY(SELECT DISTINCT document_id FROM document_chunks))
+    """)
+
+    op.execute("DROP VIEW IF EXISTS document_stats")
+    op.execute("""
+        CREATE VIEW document_stats AS
+        SELECT
+            document_id,
+            source_uri,
+            chunk_count::BIGINT AS chunk_count,
+            first_indexed,
+            last_updated,
+            jsonb_build_object(
+                COALESCE(metadata->>'file_type', 'unknown'),
+                1
+            ) AS metadata_summary,
+            owner_id,
+            visibility
+        FROM documents
+    """)
+
+
+def downgrade():
+    op.execute("DROP VIEW IF EXISTS document_stats")
+    op.execute("""
+        CREATE VIEW document_stats AS
+        SELECT
+            document_id,
+            source_uri,
+            COUNT(*) as chunk_count,
+            MIN(indexed_at) as first_indexed,
+            MAX(updated_at) as last_updated,
+            jsonb_object_agg(
+                COALESCE(metadata->>'file_type', 'unknown'),
+                1
+            ) as metadata_summary,
+            (array_agg(owner_id ORDER BY indexed_at ASC))[1] as owner_id,
+            (array_agg(visibility ORDER BY indexed_at ASC))[1] as visibility
+        FROM document_chunks
+        GROUP BY document_id, source_uri
+    """)
+
+    op.execute("""
+        DROP TRIGGER IF EXISTS documents_sync_truncate ON document_chunks;
+        DROP TRIGGER IF EXISTS documents_sync_delete ON document_chunks;
+        DROP TRIGGER IF EXISTS documents_sync_update ON document_chunks;
+        DROP TRIGGER IF EXISTS documents_sync_insert ON document_chunks;
+    """)
+    op.execute("DROP FUNCTION IF EXISTS documents_sync_truncate()")
+    op.execute("DROP FUNCTION IF EXISTS documents_sync_delete()")
+    op.execute("DROP FUNCTION IF EXISTS documents_sync_update()")
+    op.execute("DROP FUNCTION IF EXISTS documents_sync_insert()")
+    op.execute("DROP FUNCTION IF EXISTS refresh_documents(TEXT[])")
+    op.execute("DROP TABLE IF EXISTS documents")
@@ -0,0 +1,40 @@
+"""022 – Index the normalized source path of document_chunks.
+
+Revision ID: 022
+Revises: 021
+Create Date: 2026-10-18
+
+Folder filters compare ``path_utils.NORMALIZED_URI_SQL`` (source_uri with
+backslashes/tabs/newlines/CRs mapped to '/') against ``<prefix>/%``. The
+plain ``idx_chunks_source_uri`` cannot serve that, so every folder-scoped
+search was a sequential scan.
+
+This adds an expression index on exactly that expression with
+``text_pattern_ops``, which turns ``LIKE 'prefix/%'`` into an index range
+scan under any database collation. An expression index rather than a
+stored generated column avoids a full table rewrite, which would also
+rebuild the HNSW index. See docs/QUERY_PLANS.md for before/after plans.
+
+The expression below MUST stay byte-identical to NORMALIZED_URI_SQL or
+the planner will not match it.
+"""
+
+from alembic import op
+
+revision = "022"
+down_revision = "021"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(r"""
+        CREATE INDEX IF NOT EXISTS idx_chunks_norm_uri
+        ON document_chunks ((
+            REPLACE(REPLACE(REPLACE(REPLACE(source_uri, E'\\', '/'), E'\t', '/'), E'\n', '/'), E'\r', '/')
+        ) text_pattern_ops)
+    """)
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS idx_chunks_norm_uri")
@@ -0,0 +1,410 @@
+"""023 – Materialized folder hierarchy for the document tree.
+
+Revision ID: 023
+Revises: 022
+Create Date: 2026-10-18
+
+The document tree used to fetch every document under the expanded folder
+and group the children in Python, so expanding the root of a large corpus
+read the whole ``documents`` table.
+
+``document_folders`` holds per-(folder, visibility bucket) parent_path,
+depth, doc_count, chunk_count and latest_indexed_at. Counts are recursive
+(all documents below the folder), matching what the tree has always shown. ``documents`` gains generated ``parent_path`` and
+``file_name`` columns so the files of a level are an index lookup too.
+
+Visibility buckets: documents every caller may see are counted on the
+row with ``owner_id IS NULL`` / ``visibility = 'shared'``. Documents
+hidden from other users (non-shared with an owner) are counted on a row
+carrying that owner_id and ``visibility = 'private'``. The
+``document_visibility.visibility_where_clause`` fragment therefore
+applies unchanged to folder rows.
+
+Maintenance is incremental: statement-level triggers on ``documents``
+(which is itself trigger-maintained from document_chunks, see 021) add
+and subtract per-folder deltas for the touched documents only. Every
+document touches all of its ancestor folders, so each (folder, bucket) is
+striped over ``slot`` (the writer's backend pid modulo 16, as in
+``corpus_stats``); concurrent writers under the same root rarely share a
+row. A slot may go negative: readers sum doc_count / chunk_count and take
+the MAX of latest_indexed_at, and skip folders whose sum is zero. Inserts,
+deletes, moves and visibility/ownership changes all go through them.
+Quarantine produces no delta: a quarantined document is still listed by
+the documents list and as a file in its tree level until the retention
+purge deletes it, so folder counts keep counting it too.
+latest_indexed_at is only recomputed when the newest document of a folder
+goes away, bottom-up from direct files and child folders; slots holding a
+newer value are lowered to the result. Slots left with nothing to record
+are deleted.
+
+``rebuild_document_folders()`` recomputes the table from scratch; the
+upgrade uses it for the backfill.
+"""
+
+from alembic import op
+
+revision = "023"
+down_revision = "022"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Ancestor folders of a normalized path, outermost first. Folder paths
+    # are literal prefixes of the path, so '/home/a/x.txt' yields '/home'
+    # and '/home/a'. Empty components (leading '/', '//' in UNC paths)
+    # are folded into the next folder rather than becoming unnamed ones.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION folder_ancestors(uri TEXT)
+        RETURNS TABLE (path TEXT, parent_path TEXT, name TEXT, depth INTEGER)
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+            SELECT
+                f.path,
+                COALESCE(lag(f.path) OVER (ORDER BY f.k), ''),
+                f.name,
+                (row_number() OVER (ORDER BY f.k))::INTEGER
+            FROM (
+                SELECT k, parts[k] AS name, array_to_string(parts[1:k], '/') AS path
+                FROM (SELECT string_to_array(uri, '/') AS parts) p,
+                     generate_series(1, cardinality(p.parts) - 1) AS k
+            ) f
+            WHERE f.name <> ''
+        $$
+    """)
+    # Innermost ancestor of a path ('' at the root): the last entry of
+    # folder_ancestors, computed with one regexp because it backs a
+    # generated column written on every documents update.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION folder_parent_path(uri TEXT)
+        RETURNS TEXT
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+            SELECT CASE
+                WHEN strpos(uri, '/') = 0 THEN ''
+                ELSE regexp_replace(uri, '/+[^/]*$', '')
+            END
+        $$
+    """)
+    # Owner a document is hidden behind, or NULL when everyone may see it
+    # (mirrors document_visibility.visibility_where_clause).
+    op.execute("""
+        CREATE OR REPLACE FUNCTION folder_bucket_owner(owner_id TEXT, visibility TEXT)
+        RETURNS TEXT
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+            SELECT CASE
+                WHEN owner_id IS NOT NULL AND visibility IS NOT NULL AND visibility <> 'shared'
+                THEN owner_id
+            END
+        $$
+    """)
+
+    op.execute("""
+        ALTER TABLE documents
+            ADD COLUMN IF NOT EXISTS parent_path TEXT
+                GENERATED ALWAYS AS (folder_parent_path(norm_uri)) STORED,
+            ADD COLUMN IF NOT EXISTS file_name TEXT
+                GENERATED ALWAYS AS (regexp_replace(norm_uri, '^.*/', '')) STORED;
+
+        CREATE INDEX IF NOT EXISTS idx_documents_tree_files
+            ON documents (parent_path, lower(file_name), norm_uri, document_id);
+    """)
+
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS document_folders (
+            path TEXT NOT NULL,
+            owner_id TEXT,
+            visibility TEXT NOT NULL DEFAULT 'shared',
+            parent_path TEXT NOT NULL,
+            name TEXT NOT NULL,
+            depth INTEGER NOT NULL,
+            slot SMALLINT NOT NULL DEFAULT 0,
+            doc_count INTEGER NOT NULL DEFAULT 0,
+            chunk_count BIGINT NOT NULL DEFAULT 0,
+            latest_indexed_at TIMESTAMP
+        );
+
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_document_folders_bucket
+            ON document_folders (path, (COALESCE(owner_id, '')), slot);
+        CREATE INDEX IF NOT EXISTS idx_document_folders_children
+            ON document_folders (parent_path, lower(name), path);
+    """)
+
+    op.execute("""
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'document_folder_delta') THEN
+                CREATE TYPE document_folder_delta AS (
+                    sign INTEGER,
+                    norm_uri TEXT,
+                    chunk_count INTEGER,
+                    first_indexed TIMESTAMP,
+                    owner_id TEXT
+                );
+            END IF;
+        END
+        $$
+    """)
+
+    # Per-folder sums of +1/-1 document deltas over every ancestor folder.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION document_folder_delta_rows(deltas document_folder_delta[])
+        RETURNS TABLE (
+            path TEXT, owner_id TEXT, parent_path TEXT, name TEXT, depth INTEGER,
+            doc_delta BIGINT, chunk_delta BIGINT,
+            latest_added TIMESTAMP, latest_removed TIMESTAMP
+        )
+        LANGUAGE sql STABLE AS $$
+            SELECT
+                a.path, d.owner_id, a.parent_path, a.name, a.depth,
+                SUM(d.sign),
+                SUM(d.sign * COALESCE(d.chunk_count, 0)),
+                MAX(d.first_indexed) FILTER (WHERE d.sign > 0),
+                MAX(d.first_indexed) FILTER (WHERE d.sign < 0)
+            FROM unnest(deltas) d
+            CROSS JOIN LATERAL folder_ancestors(d.norm_uri) a
+            GROUP BY a.path, d.owner_id, a.parent_path, a.name, a.depth
+        $$
+    """)
+
+    # Apply document deltas to the writer's slot of document_folders. Rows
+    # are upserted in key order so concurrent writers lock them consistently.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION apply_document_folder_deltas(deltas document_folder_delta[])
+        RETURNS void AS $$
+        DECLARE
+            writer_slot SMALLINT := pg_backend_pid() % 16;
+            r RECORD;
+            recomputed TIMESTAMP;
+        BEGIN
+            IF deltas IS NULL OR cardinality(deltas) = 0 THEN
+                RETURN;
+            END IF;
+
+            INSERT INTO document_folders AS f (
+                path, owner_id, visibility, parent_path, name, depth, slot,
+                doc_count, chunk_count, latest_indexed_at
+            )
+            SELECT
+                d.path, d.owner_id,
+                CASE WHEN d.owner_id IS NULL THEN 'shared' ELSE 'private' END,
+                d.parent_path, d.name, d.depth, writer_slot,
+                d.doc_delta, d.chunk_delta, d.latest_added
+            FROM document_folder_delta_rows(deltas) d
+            WHERE d.doc_delta <> 0 OR d.chunk_delta <> 0 OR d.latest_added IS NOT NULL
+            ORDER BY d.path, COALESCE(d.owner_id, '')
+            ON CONFLICT (path, (COALESCE(owner_id, '')), slot) DO UPDATE SET
+                doc_count = f.doc_count + EXCLUDED.doc_count,
+                chunk_count = f.chunk_count + EXCLUDED.chunk_count,
+                latest_indexed_at = GREATEST(f.latest_indexed_at, EXCLUDED.latest_indexed_at);
+
+            IF NOT EXISTS (SELECT 1 FROM unnest(deltas) d WHERE d.sign < 0) THEN
+                RETURN;
+            END IF;
+
+            -- The newest document of a folder went away: recompute
+            -- latest_indexed_at bottom-up from the folder's direct files and
+            -- child folders, so each step is two parent_path lookups. Only
+            -- slots still holding a newer value are written.
+            FOR r IN
+                SELECT d.path, d.owner_id
+                FROM document_folder_delta_rows(deltas) d
+                WHERE d.latest_removed IS NOT NULL
+                  AND (d.latest_added IS NULL OR d.latest_added < d.latest_removed)
+                  AND d.latest_removed >= (
+                      SELECT MAX(f.latest_indexed_at) FROM document_folders f
+                      WHERE f.path = d.path AND f.owner_id IS NOT DISTINCT FROM d.owner_id
+                  )
+                ORDER BY d.depth DESC
+            LOOP
+                recomputed := GREATEST(
+                    (SELECT MAX(doc.first_indexed) FROM documents doc
+                     WHERE doc.parent_path = r.path
+                       AND folder_bucket_owner(doc.owner_id, doc.visibility)
+                           IS NOT DISTINCT FROM r.owner_id),
+                    (SELECT MAX(c.latest_indexed_at) FROM document_folders c
+                     WHERE c.parent_path = r.path
+                       AND c.owner_id IS NOT DISTINCT FROM r.owner_id)
+                );
+                UPDATE document_folders f SET latest_indexed_at = recomputed
+                WHERE f.path = r.path
+                  AND f.owner_id IS NOT DISTINCT FROM r.owner_id
+                  AND f.latest_indexed_at > COALESCE(recomputed, '-infinity');
+            END LOOP;
+
+            DELETE FROM document_folders f
+            USING document_folder_delta_rows(deltas) d
+            WHERE f.path = d.path
+              AND f.owner_id IS NOT DISTINCT FROM d.owner_id
+              AND d.doc_delta < 0
+              AND f.doc_count = 0
+              AND f.chunk_count = 0
+              AND f.latest_indexed_at IS NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION rebuild_document_folders()
+        RETURNS void AS $$
+        BEGIN
+            DELETE FROM document_folders;
+            INSERT INTO document_folders (
+                path, owner_id, visibility, parent_path, name, depth,
+                doc_count, chunk_count, latest_indexed_at
+            )
+            SELECT
+                a.path, b.owner_id,
+                CASE WHEN b.owner_id IS NULL THEN 'shared' ELSE 'private' END,
+                a.parent_path, a.name, a.depth,
+                COUNT(*), COALESCE(SUM(doc.chunk_count), 0), MAX(doc.first_indexed)
+            FROM documents doc
+            CROSS JOIN LATERAL folder_bucket_owner(doc.owner_id, doc.visibility) AS b(owner_id)
+            CROSS JOIN LATERAL folder_ancestors(doc.norm_uri) a
+            GROUP BY a.path, b.owner_id, a.parent_path, a.name, a.depth;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION document_folders_sync_insert()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            PERFORM apply_document_folder_deltas(ARRAY(
+                SELECT ROW(1, norm_uri, chunk_count, first_indexed,
+                           folder_bucket_owner(owner_id, visibility))::document_folder_delta
+                FROM new_docs
+                WHERE norm_uri <> ''
+            ));
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    # Only documents whose folder-relevant fields changed produce deltas;
+    # refresh_documents rewrites rows on every chunk statement. Its
+    # placeholder rows (norm_uri '') belong to no folder and are skipped.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION document_folders_sync_update()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            PERFORM apply_document_folder_deltas(ARRAY(
+                SELECT ROW(s.sign, s.norm_uri, s.chunk_count, s.first_indexed, s.owner_id)
+                    ::document_folder_delta
+                FROM (
+                    SELECT 1 AS sign, n.norm_uri, n.chunk_count, n.first_indexed,
+                           folder_bucket_owner(n.owner_id, n.visibility) AS owner_id
+                    FROM new_docs n JOIN old_docs o USING (document_id)
+                    WHERE (n.norm_uri, n.chunk_count, n.first_indexed,
+                           folder_bucket_owner(n.owner_id, n.visibility))
+                          IS DISTINCT FROM
+                          (o.norm_uri, o.chunk_count, o.first_indexed,
+                           folder_bucket_owner(o.owner_id, o.visibility))
+                    UNION ALL
+                    SELECT -1, o.norm_uri, o.chunk_count, o.first_indexed,
+                           folder_bucket_owner(o.owner_id, o.visibility)
+                    FROM new_docs n JOIN old_docs o USING (document_id)
+                    WHERE o.norm_uri <> ''
+                      AND (n.norm_uri, n.chunk_count, n.first_indexed,
+                           folder_bucket_owner(n.owner_id, n.visibility))
+                          IS DISTINCT FROM
+                          (o.norm_uri, o.chunk_count, o.first_indexed,
+                           folder_bucket_owner(o.owner_id, o.visibility))
+                ) s
+            ));
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION document_folders_sync_delete()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            PERFORM apply_document_folder_deltas(ARRAY(
+                SELECT ROW(-1, norm_uri, chunk_count, first_indexed,
+                           folder_bucket_owner(owner_id, visibility))::document_folder_delta
+                FROM old_docs
+                WHERE norm_uri <> ''
+            ));
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION document_folders_sync_truncate()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            DELETE FROM document_folders;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    op.execute("""
+        DROP TRIGGER IF EXISTS document_folders_sync_insert ON documents;
+        CREATE TRIGGER document_folders_sync_insert
+            AFTER INSERT ON documents
+            REFERENCING NEW TABLE AS new_docs
+            FOR EACH STATEMENT EXECUTE FUNCTION document_folders_sync_insert();
+
+        DROP TRIGGER IF EXISTS document_folders_sync_update ON documents;
+        CREATE TRIGGER document_folders_sync_update
+            AFTER UPDATE ON documents
+            REFERENCING OLD TABLE AS old_docs NEW TABLE AS new_docs
+            FOR EACH STATEMENT EXECUTE FUNCTION document_folders_sync_update();
+
+        DROP TRIGGER IF EXISTS document_folders_sync_delete ON documents;
+        CREATE TRIGGER document_folders_sync_delete
+            AFTER DELETE ON documents
+            REFERENCING OLD TABLE AS old_docs
+            FOR EACH STATEMENT EXECUTE FUNCTION document_folders_sync_delete();
+
+        DROP TRIGGER IF EXISTS document_folders_sync_truncate ON documents;
+        CREATE TRIGGER document_folders_sync_truncate
+            AFTER TRUNCATE ON documents
+            FOR EACH STATEMENT EXECUTE FUNCTION document_folders_sync_truncate();
+    """)
+
+    # TRUNCATE document_chunks now truncates documents instead of deleting
+    # row by row, so the folder table is cleared without per-row deltas.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION documents_sync_truncate()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            TRUNCATE documents;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    op.execute("SELECT rebuild_document_folders()")
+
+
+def downgrade():
+    op.execute("""
+        CREATE OR REPLACE FUNCTION documents_sync_truncate()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            DELETE FROM documents;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        DROP TRIGGER IF EXISTS document_folders_sync_truncate ON documents;
+        DROP TRIGGER IF EXISTS document_folders_sync_delete ON documents;
+        DROP TRIGGER IF EXISTS document_folders_sync_update ON documents;
+        DROP TRIGGER IF EXISTS document_folders_sync_insert ON documents;
+    """)
+    op.execute("DROP FUNCTION IF EXISTS document_folders_sync_truncate()")
+    op.execute("DROP FUNCTION IF EXISTS document_folders_sync_delete()")
+    op.execute("DROP FUNCTION IF EXISTS document_folders_sync_update()")
+    op.execute("DROP FUNCTION IF EXISTS document_folders_sync_insert()")
+    op.execute("DROP FUNCTION IF EXISTS rebuild_document_folders()")
+    op.execute("DROP FUNCTION IF EXISTS apply_document_folder_deltas(document_folder_delta[])")
+    op.execute("DROP FUNCTION IF EXISTS document_folder_delta_rows(document_folder_delta[])")
+    op.execute("DROP TYPE IF EXISTS document_folder_delta")
+    op.execute("DROP TABLE IF EXISTS document_folders")
+    op.execute("DROP INDEX IF EXISTS idx_documents_tree_files")
+    op.execute("ALTER TABLE documents DROP COLUMN IF EXISTS file_name")
+    op.execute("ALTER TABLE documents DROP COLUMN IF EXISTS parent_path")
+    op.execute("DROP FUNCTION IF EXISTS folder_bucket_owner(TEXT, TEXT)")
+    op.execute("DROP FUNCTION IF EXISTS folder_parent_path(TEXT)")
+    op.execute("DROP FUNCTION IF EXISTS folder_ancestors(TEXT)")
@@ -0,0 +1,255 @@
+"""024 – Write-time catalog of metadata keys and values.
+
+Revision ID: 024
+Revises: 023
+Create Date: 2026-10-18
+
+The metadata filter dropdowns (``/metadata/keys``, ``/metadata/values``)
+ran ``jsonb_object_keys`` / ``SELECT DISTINCT metadata->>key`` over every
+chunk row, a full-table JSONB scan per call.
+
+``metadata_catalog`` holds one row per (key, value, visibility bucket)
+with the number of documents carrying that pair. It is keyed at document
+level: the pairs come from ``documents.metadata`` (the document's first
+chunk, see 021), so a document counts once however many chunks it has.
+
+Values are stored as their ``->>`` text. JSON nulls and values longer
+than 256 characters are recorded under the empty value so the key still
+shows up; value listings skip it, as they always skipped empty values.
+
+Visibility buckets follow ``document_folders`` (023): shared documents
+count on the ``owner_id IS NULL`` row, documents hidden from other users
+on a row carrying their owner_id and ``visibility = 'private'``, so
+``document_visibility.visibility_where_clause`` applies unchanged.
+
+Statement-level triggers on ``documents`` add and subtract the pairs of
+the touched documents only. ``rebuild_metadata_catalog()`` recomputes the
+table from scratch; the upgrade uses it for the backfill and
+``scripts/rebuild_metadata_catalog.py`` exposes it.
+"""
+
+from alembic import op
+
+revision = "024"
+down_revision = "023"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS metadata_catalog (
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            owner_id TEXT,
+            visibility TEXT NOT NULL DEFAULT 'shared',
+            doc_count INTEGER NOT NULL DEFAULT 0
+        );
+
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_metadata_catalog_bucket
+            ON metadata_catalog (key, value, (COALESCE(owner_id, '')));
+        CREATE INDEX IF NOT EXISTS idx_metadata_catalog_key_prefix
+            ON metadata_catalog (key text_pattern_ops);
+        CREATE INDEX IF NOT EXISTS idx_metadata_catalog_value_prefix
+            ON metadata_catalog (key, value text_pattern_ops);
+    """)
+
+    # (key, value) pairs of one metadata object, as stored in the catalog.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION metadata_catalog_pairs(metadata JSONB)
+        RETURNS TABLE (key TEXT, value TEXT)
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+            SELECT e.key,
+                   CASE WHEN e.value IS NULL OR length(e.value) > 256 THEN ''
+                        ELSE e.value END
+            FROM jsonb_each_text(
+                CASE WHEN jsonb_typeof(metadata) = 'object' THEN metadata
+                     ELSE '{}'::jsonb END
+            ) e
+        $$
+    """)
+
+    op.execute("""
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'metadata_catalog_delta') THEN
+                CREATE TYPE metadata_catalog_delta AS (
+                    sign INTEGER,
+                    metadata JSONB,
+                    owner_id TEXT
+                );
+            END IF;
+        END
+        $$
+    """)
+
+    # Apply document deltas to metadata_catalog. Rows are upserted in key
+    # order so concurrent writers lock them consistently.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION apply_metadata_catalog_deltas(deltas metadata_catalog_delta[])
+        RETURNS void AS $$
+        BEGIN
+            IF deltas IS NULL OR cardinality(deltas) = 0 THEN
+                RETURN;
+            END IF;
+
+            INSERT INTO metadata_catalog AS c (key, value, owner_id, visibility, doc_count)
+            SELECT
+                p.key, p.value, d.owner_id,
+                CASE WHEN d.owner_id IS NULL THEN 'shared' ELSE 'private' END,
+                SUM(d.sign)
+            FROM unnest(deltas) d
+            CROSS JOIN LATERAL metadata_catalog_pairs(d.metadata) p
+            GROUP BY p.key, p.value, d.owner_id
+            HAVING SUM(d.sign) <> 0
+            ORDER BY p.key, p.value, COALESCE(d.owner_id, '')
+            ON CONFLICT (key, value, (COALESCE(owner_id, ''))) DO UPDATE SET
+                doc_count = c.doc_count + EXCLUDED.doc_count;
+
+            IF NOT EXISTS (SELECT 1 FROM unnest(deltas) d WHERE d.sign < 0) THEN
+                RETURN;
+            END IF;
+
+            DELETE FROM metadata_catalog c
+            USING (
+                SELECT DISTINCT p.key, p.value, d.owner_id
+                FROM unnest(deltas) d
+                CROSS JOIN LATERAL metadata_catalog_pairs(d.metadata) p
+                WHERE d.sign < 0
+            ) r
+            WHERE c.key = r.key
+              AND c.value = r.value
+              AND c.owner_id IS NOT DISTINCT FROM r.owner_id
+              AND c.doc_count <= 0;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION rebuild_metadata_catalog()
+        RETURNS void AS $$
+        BEGIN
+            DELETE FROM metadata_catalog;
+            INSERT INTO metadata_catalog (key, value, owner_id, visibility, doc_count)
+            SELECT
+                p.key, p.value, b.owner_id,
+                CASE WHEN b.owner_id IS NULL THEN 'shared' ELSE 'private' END,
+                COUNT(*)
+            FROM documents doc
+            CROSS JOIN LATERAL folder_bucket_owner(doc.owner_id, doc.visibility) AS b(owner_id)
+            CROSS JOIN LATERAL metadata_catalog_pairs(doc.metadata) p
+            GROUP BY p.key, p.value, b.owner_id;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION metadata_catalog_sync_insert()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            PERFORM apply_metadata_catalog_deltas(ARRAY(
+                SELECT ROW(1, metadata, folder_bucket_owner(owner_id, visibility))
+                    ::metadata_catalog_delta
+                FROM new_docs
+                WHERE metadata <> '{}'::jsonb
+            ));
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    # Only documents whose metadata or visibility bucket changed produce
+    # deltas; refresh_documents rewrites rows on every chunk statement.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION metadata_catalog_sync_update()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            PERFORM apply_metadata_catalog_deltas(ARRAY(
+                SELECT ROW(s.sign, s.metadata, s.owner_id)::metadata_catalog_delta
+                FROM (
+                    SELECT 1 AS sign, n.metadata,
+                           folder_bucket_owner(n.owner_id, n.visibility) AS owner_id
+                    FROM new_docs n JOIN old_docs o USING (document_id)
+                    WHERE (n.metadata, folder_bucket_owner(n.owner_id, n.visibility))
+                          IS DISTINCT FROM
+                          (o.metadata, folder_bucket_owner(o.owner_id, o.visibility))
+                    UNION ALL
+                    SELECT -1, o.metadata, folder_bucket_owner(o.owner_id, o.visibility)
+                    FROM new_docs n JOIN old_docs o USING (document_id)
+                    WHERE (n.metadata, folder_bucket_owner(n.owner_id, n.visibility))
+                          IS DISTINCT FROM
+                          (o.metadata, folder_bucket_owner(o.owner_id, o.visibility))
+                ) s
+                WHERE s.metadata <> '{}'::jsonb
+            ));
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION metadata_catalog_sync_delete()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            PERFORM apply_metadata_catalog_deltas(ARRAY(
+                SELECT ROW(-1, metadata, folder_bucket_owner(owner_id, visibility))
+                    ::metadata_catalog_delta
+                FROM old_docs
+                WHERE metadata <> '{}'::jsonb
+            ));
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION metadata_catalog_sync_truncate()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            DELETE FROM metadata_catalog;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    op.execute("""
+        DROP TRIGGER IF EXISTS metadata_catalog_sync_insert ON documents;
+        CREATE TRIGGER metadata_catalog_sync_insert
+            AFTER INSERT ON documents
+            REFERENCING NEW TABLE AS new_docs
+            FOR EACH STATEMENT EXECUTE FUNCTION metadata_catalog_sync_insert();
+
+        DROP TRIGGER IF EXISTS metadata_catalog_sync_update ON documents;
+        CREATE TRIGGER metadata_catalog_sync_update
+            AFTER UPDATE ON documents
+            REFERENCING OLD TABLE AS old_docs NEW TABLE AS new_docs
+            FOR EACH STATEMENT EXECUTE FUNCTION metadata_catalog_sync_update();
+
+        DROP TRIGGER IF EXISTS metadata_catalog_sync_delete ON documents;
+        CREATE TRIGGER metadata_catalog_sync_delete
+            AFTER DELETE ON documents
+            REFERENCING OLD TABLE AS old_docs
+            FOR EACH STATEMENT EXECUTE FUNCTION metadata_catalog_sync_delete();
+
+        DROP TRIGGER IF EXISTS metadata_catalog_sync_truncate ON documents;
+        CREATE TRIGGER metadata_catalog_sync_truncate
+            AFTER TRUNCATE ON documents
+            FOR EACH STATEMENT EXECUTE FUNCTION metadata_catalog_sync_truncate();
+    """)
+
+    op.execute("SELECT rebuild_metadata_catalog()")
+
+
+def downgrade():
+    op.execute("""
+        DROP TRIGGER IF EXISTS metadata_catalog_sync_truncate ON documents;
+        DROP TRIGGER IF EXISTS metadata_catalog_sync_delete ON documents;
+        DROP TRIGGER IF EXISTS metadata_catalog_sync_update ON documents;
+        DROP TRIGGER IF EXISTS metadata_catalog_sync_insert ON documents;
+    """)
+    op.execute("DROP FUNCTION IF EXISTS metadata_catalog_sync_truncate()")
+    op.execute("DROP FUNCTION IF EXISTS metadata_catalog_sync_delete()")
+    op.execute("DROP FUNCTION IF EXISTS metadata_catalog_sync_update()")
+    op.execute("DROP FUNCTION IF EXISTS metadata_catalog_sync_insert()")
+    op.execute("DROP FUNCTION IF EXISTS rebuild_metadata_catalog()")
+    op.execute("DROP FUNCTION IF EXISTS apply_metadata_catalog_deltas(metadata_catalog_delta[])")
+    op.execute("DROP TYPE IF EXISTS metadata_catalog_delta")
+    op.execute("DROP FUNCTION IF EXISTS metadata_catalog_pairs(JSONB)")
+    op.execute("DROP TABLE IF EXISTS metadata_catalog")
@@ -0,0 +1,93 @@
+"""025 – NOTIFY on authentication and authorization changes.
+
+Revision ID: 025
+Revises: 024
+Create Date: 2026-10-18
+
+API servers cache resolved principals (API key record, linked user, role
+and collection grants) in process; see principal_cache.py. Every worker
+LISTENs on ``auth_changed`` and drops its cache when a change is
+committed, so revocation, rotation, role changes and grant edits take
+effect immediately across workers.
+
+Triggers send the table name as payload:
+
+- api_keys: inserts, deletes, and updates of revoked_at / expires_at /
+  key_hash. ``last_used_at`` bookkeeping does not notify.
+- users: inserts, deletes, and updates of role / is_active / api_key_id.
+- roles, role_collection_grants: every change.
+
+NOTIFY is transactional: listeners only hear about committed changes, and
+identical payloads within one transaction are delivered once.
+"""
+
+from alembic import op
+
+revision = "025"
+down_revision = "024"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_auth_change()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            PERFORM pg_notify('auth_changed', TG_TABLE_NAME);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    op.execute("""
+        DROP TRIGGER IF EXISTS api_keys_notify_auth_change ON api_keys;
+        CREATE TRIGGER api_keys_notify_auth_change
+            AFTER INSERT OR DELETE OR TRUNCATE ON api_keys
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_auth_change();
+
+        DROP TRIGGER IF EXISTS api_keys_notify_auth_update ON api_keys;
+        CREATE TRIGGER api_keys_notify_auth_update
+            AFTER UPDATE ON api_keys
+            FOR EACH ROW
+            WHEN (OLD.revoked_at IS DISTINCT FROM NEW.revoked_at
+                  OR OLD.expires_at IS DISTINCT FROM NEW.expires_at
+                  OR OLD.key_hash IS DISTINCT FROM NEW.key_hash)
+            EXECUTE FUNCTION notify_auth_change();
+
+        DROP TRIGGER IF EXISTS users_notify_auth_change ON users;
+        CREATE TRIGGER users_notify_auth_change
+            AFTER INSERT OR DELETE OR TRUNCATE ON users
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_auth_change();
+
+        DROP TRIGGER IF EXISTS users_notify_auth_update ON users;
+        CREATE TRIGGER users_notify_auth_update
+            AFTER UPDATE ON users
+            FOR EACH ROW
+            WHEN (OLD.role IS DISTINCT FROM NEW.role
+                  OR OLD.is_active IS DISTINCT FROM NEW.is_active
+                  OR OLD.api_key_id IS DISTINCT FROM NEW.api_key_id)
+            EXECUTE FUNCTION notify_auth_change();
+
+        DROP TRIGGER IF EXISTS roles_notify_auth_change ON roles;
+        CREATE TRIGGER roles_notify_auth_change
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON roles
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_auth_change();
+
+        DROP TRIGGER IF EXISTS role_collection_grants_notify_auth_change ON role_collection_grants;
+        CREATE TRIGGER role_collection_grants_notify_auth_change
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON role_collection_grants
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_auth_change();
+    """)
+
+
+def downgrade():
+    op.execute("""
+        DROP TRIGGER IF EXISTS role_collection_grants_notify_auth_change ON role_collection_grants;
+        DROP TRIGGER IF EXISTS roles_notify_auth_change ON roles;
+        DROP TRIGGER IF EXISTS users_notify_auth_update ON users;
+        DROP TRIGGER IF EXISTS users_notify_auth_change ON users;
+        DROP TRIGGER IF EXISTS api_keys_notify_auth_update ON api_keys;
+        DROP TRIGGER IF EXISTS api_keys_notify_auth_change ON api_keys;
+    """)
+    op.execute("DROP FUNCTION IF EXISTS notify_auth_change()")
@@ -0,0 +1,41 @@
+"""026 – Shared rate-limit buckets.
+
+Revision ID: 026
+Revises: 025
+Create Date: 2026-10-18
+
+Backs API_RATE_LIMIT_BACKEND=postgres (see rate_limit.py): one token
+bucket per API key hash or client IP, refilled and spent by a single
+upsert so the limit holds across every API worker.
+
+The table is UNLOGGED: buckets are short-lived counters, so skipping WAL
+is worth losing them on a crash (every caller then starts with a full
+bucket). ``updated_at`` is the database clock in epoch seconds; idle rows
+are deleted by the limiter itself.
+"""
+
+from alembic import op
+
+revision = "026"
+down_revision = "025"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        CREATE UNLOGGED TABLE IF NOT EXISTS rate_limit_buckets (
+            bucket_key TEXT PRIMARY KEY,
+            tokens DOUBLE PRECISION NOT NULL,
+            updated_at DOUBLE PRECISION NOT NULL,
+            allowed BOOLEAN NOT NULL DEFAULT TRUE
+        )
+    """)
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_rate_limit_buckets_updated_at "
+        "ON rate_limit_buckets (updated_at)"
+    )
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS rate_limit_buckets")
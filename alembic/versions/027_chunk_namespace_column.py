@@ -0,0 +1,33 @@
+"""027 – Index namespace filters on document_chunks.
+
+Revision ID: 027
+Revises: 026
+Create Date: 2026-10-18
+
+Collection grants restrict non-admin searches to a list of namespaces with
+``metadata->>'namespace' = ANY(...)``, which extracted JSONB from every
+candidate chunk. This adds a B-tree expression index on
+``(metadata->>'namespace')``; the filters spell the expression the same way
+so the planner can use it.
+
+An expression index needs no table rewrite: the build reads
+document_chunks once and blocks writes (not reads) while it runs.
+"""
+
+from alembic import op
+
+revision = "027"
+down_revision = "026"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_chunks_namespace "
+        "ON document_chunks ((metadata->>'namespace'))"
+    )
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS idx_chunks_namespace")
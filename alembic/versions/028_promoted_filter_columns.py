@@ -0,0 +1,50 @@
+"""028 – Expression indexes for the hot filter keys on document_chunks.
+
+Revision ID: 028
+Revises: 027
+Create Date: 2026-10-18
+
+The bare ``type`` / ``category`` filters and the ``extensions`` filter
+used to be ``metadata->>'type' ILIKE %s`` and OR-chains of
+``source_uri ILIKE '%.pdf'``; neither can use an index. Following the
+namespace index of migration 027, this adds expression indexes that the
+filters in database.py (``PROMOTED_FILTER_EXPRESSIONS`` and
+``FILE_EXTENSION_EXPRESSION``) match exactly:
+
+- ``lower(metadata->>'type')``, ``lower(metadata->>'category')`` and
+  ``lower(metadata->>'namespace')`` for case-insensitive matches
+- the lower-cased ``.ext`` suffix of source_uri, with the same pattern as
+  ``get_indexed_extensions``
+
+Like 027, the build blocks writes to document_chunks while it runs but
+does not rewrite the table.
+"""
+
+from alembic import op
+
+revision = "028"
+down_revision = "027"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(r"""
+        CREATE INDEX IF NOT EXISTS idx_chunks_doc_type_lower
+            ON document_chunks (lower(metadata->>'type'));
+        CREATE INDEX IF NOT EXISTS idx_chunks_category_lower
+            ON document_chunks (lower(metadata->>'category'));
+        CREATE INDEX IF NOT EXISTS idx_chunks_namespace_lower
+            ON document_chunks (lower(metadata->>'namespace'));
+        CREATE INDEX IF NOT EXISTS idx_chunks_file_extension
+            ON document_chunks (lower(substring(source_uri from '(\.[A-Za-z0-9]{1,10})$')));
+    """)
+
+
+def downgrade():
+    op.execute("""
+        DROP INDEX IF EXISTS idx_chunks_file_extension;
+        DROP INDEX IF EXISTS idx_chunks_namespace_lower;
+        DROP INDEX IF EXISTS idx_chunks_category_lower;
+        DROP INDEX IF EXISTS idx_chunks_doc_type_lower;
+    """)
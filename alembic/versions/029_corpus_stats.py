@@ -0,0 +1,368 @@
+"""029 – Write-time corpus and indexing-run statistics.
+
+Revision ID: 029
+Revises: 028
+Create Date: 2026-10-18
+
+``/statistics``, ``/api/v1/stats``, the document tree totals, the
+empty-index check of ``/search`` and ``/health`` summed or counted the
+whole ``documents`` / ``document_chunks`` tables, and the indexing-run
+summary counted every ``indexing_runs`` row, on every poll of the desktop
+Health and Documents tabs.
+
+``corpus_stats`` holds document, chunk and quarantined-document counts
+per (visibility bucket, namespace). Buckets follow ``metadata_catalog``
+(024): shared documents count on the ``owner_id IS NULL`` row, documents
+hidden from other users on a row carrying their owner_id and
+``visibility = 'private'``, so ``document_visibility.visibility_where_clause``
+applies unchanged; ``namespace`` is ``metadata->>'namespace'`` of the
+document, so collection-grant filters apply too. Totals are the sum of
+the (few) matching rows.
+
+There is deliberately no single summary row: every indexing transaction
+would queue on its lock until commit. Each bucket is instead striped over
+``slot`` (the writer's backend pid modulo 16), so concurrent writers
+rarely touch the same row; a slot may go negative, only the sum counts.
+
+Statement-level triggers on ``documents`` (kept in sync with
+document_chunks by 021) apply per-statement deltas in the writer's
+transaction, so inserts, deletes, quarantine and visibility changes are
+reflected as soon as they commit. ``rebuild_corpus_stats()`` recomputes
+both tables from scratch; the upgrade uses it for the backfill and
+``POST /api/v1/corpus-stats/recompute`` (admin) exposes it.
+
+``indexing_run_stats`` does the same for finished indexing runs, one row
+per status, maintained by triggers on ``indexing_runs``.
+"""
+
+from alembic import op
+
+revision = "029"
+down_revision = "028"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS corpus_stats (
+            owner_id TEXT,
+            visibility TEXT NOT NULL DEFAULT 'shared',
+            namespace TEXT,
+            slot SMALLINT NOT NULL DEFAULT 0,
+            document_count BIGINT NOT NULL DEFAULT 0,
+            chunk_count BIGINT NOT NULL DEFAULT 0,
+            quarantined_count BIGINT NOT NULL DEFAULT 0
+        );
+
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_corpus_stats_bucket
+            ON corpus_stats ((COALESCE(owner_id, '')), (COALESCE(namespace, '')), slot);
+
+        CREATE TABLE IF NOT EXISTS indexing_run_stats (
+            status TEXT PRIMARY KEY,
+            run_count BIGINT NOT NULL DEFAULT 0,
+            files_added BIGINT NOT NULL DEFAULT 0,
+            files_updated BIGINT NOT NULL DEFAULT 0
+        );
+    """)
+
+    op.execute("""
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'corpus_stats_delta') THEN
+                CREATE TYPE corpus_stats_delta AS (
+                    sign INTEGER,
+                    owner_id TEXT,
+                    namespace TEXT,
+                    chunk_count BIGINT,
+                    quarantined INTEGER
+                );
+            END IF;
+            IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'indexing_run_stats_delta') THEN
+                CREATE TYPE indexing_run_stats_delta AS (
+                    sign INTEGER,
+                    status TEXT,
+                    files_added BIGINT,
+                    files_updated BIGINT
+                );
+            END IF;
+        END
+        $$
+    """)
+
+    # Apply document deltas to the writer's slot. Rows are upserted in key
+    # order so concurrent writers lock them consistently.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION apply_corpus_stats_deltas(deltas corpus_stats_delta[])
+        RETURNS void AS $$
+        DECLARE
+            writer_slot SMALLINT := pg_backend_pid() % 16;
+        BEGIN
+            IF deltas IS NULL OR cardinality(deltas) = 0 THEN
+                RETURN;
+            END IF;
+
+            INSERT INTO corpus_stats AS s
+                (owner_id, visibility, namespace, slot,
+                 document_count, chunk_count, quarantined_count)
+            SELECT
+                d.owner_id,
+                CASE WHEN d.owner_id IS NULL THEN 'shared' ELSE 'private' END,
+                d.namespace,
+                writer_slot,
+                SUM(d.sign),
+                SUM(d.sign * d.chunk_count),
+                SUM(d.sign * d.quarantined)
+            FROM unnest(deltas) d
+            GROUP BY d.owner_id, d.namespace
+            HAVING SUM(d.sign) <> 0
+                OR SUM(d.sign * d.chunk_count) <> 0
+                OR SUM(d.sign * d.quarantined) <> 0
+            ORDER BY COALESCE(d.owner_id, ''), COALESCE(d.namespace, '')
+            ON CONFLICT ((COALESCE(owner_id, '')), (COALESCE(namespace, '')), slot)
+            DO UPDATE SET
+                document_count = s.document_count + EXCLUDED.document_count,
+                chunk_count = s.chunk_count + EXCLUDED.chunk_count,
+                quarantined_count = s.quarantined_count + EXCLUDED.quarantined_count;
+
+            DELETE FROM corpus_stats
+            WHERE slot = writer_slot
+              AND document_count = 0 AND chunk_count = 0 AND quarantined_count = 0;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION corpus_stats_sync_insert()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            PERFORM apply_corpus_stats_deltas(ARRAY(
+                SELECT ROW(1, folder_bucket_owner(owner_id, visibility),
+                           NULLIF(metadata->>'namespace', ''), chunk_count,
+                           (quarantined_at IS NOT NULL)::int)::corpus_stats_delta
+                FROM new_docs
+            ));
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    # Only documents whose counted fields changed produce deltas;
+    # refresh_documents rewrites rows on every chunk statement.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION corpus_stats_sync_update()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            PERFORM apply_corpus_stats_deltas(ARRAY(
+                SELECT ROW(s.sign, s.owner_id, s.namespace, s.chunk_count, s.quarantined)
+                    ::corpus_stats_delta
+                FROM (
+                    SELECT n.document_id,
+                           folder_bucket_owner(n.owner_id, n.visibility) AS owner_id,
+                           NULLIF(n.metadata->>'namespace', '') AS namespace,
+                           n.chunk_count,
+                           (n.quarantined_at IS NOT NULL)::int AS quarantined,
+                           folder_bucket_owner(o.owner_id, o.visibility) AS old_owner_id,
+                           NULLIF(o.metadata->>'namespace', '') AS old_namespace,
+                           o.chunk_count AS old_chunk_count,
+                           (o.quarantined_at IS NOT NULL)::int AS old_quarantined
+                    FROM new_docs n JOIN old_docs o USING (document_id)
+                ) c
+                CROSS JOIN LATERAL (VALUES
+                    (1, c.owner_id, c.namespace, c.chunk_count, c.quarantined),
+                    (-1, c.old_owner_id, c.old_namespace, c.old_chunk_count, c.old_quarantined)
+                ) AS s(sign, owner_id, namespace, chunk_count, quarantined)
+                WHERE (c.owner_id, c.namespace, c.chunk_count, c.quarantined)
+                      IS DISTINCT FROM
+                      (c.old_owner_id, c.old_namespace, c.old_chunk_count, c.old_quarantined)
+            ));
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION corpus_stats_sync_delete()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            PERFORM apply_corpus_stats_deltas(ARRAY(
+                SELECT ROW(-1, folder_bucket_owner(owner_id, visibility),
+                           NULLIF(metadata->>'namespace', ''), chunk_count,
+                           (quarantined_at IS NOT NULL)::int)::corpus_stats_delta
+                FROM old_docs
+            ));
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION corpus_stats_sync_truncate()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            DELETE FROM corpus_stats;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    # Finished runs only: a run counts once it leaves 'running'.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION apply_indexing_run_stats_deltas(deltas indexing_run_stats_delta[])
+        RETURNS void AS $$
+        BEGIN
+            INSERT INTO indexing_run_stats AS s (status, run_count, files_added, files_updated)
+            SELECT d.status, SUM(d.sign), SUM(d.sign * d.files_added), SUM(d.sign * d.files_updated)
+            FROM unnest(deltas) d
+            WHERE d.status <> 'running'
+            GROUP BY d.status
+            HAVING SUM(d.sign) <> 0
+                OR SUM(d.sign * d.files_added) <> 0
+                OR SUM(d.sign * d.files_updated) <> 0
+            ORDER BY d.status
+            ON CONFLICT (status) DO UPDATE SET
+                run_count = s.run_count + EXCLUDED.run_count,
+                files_added = s.files_added + EXCLUDED.files_added,
+                files_updated = s.files_updated + EXCLUDED.files_updated;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION indexing_run_stats_sync_insert()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            PERFORM apply_indexing_run_stats_deltas(ARRAY(
+                SELECT ROW(1, status, files_added, files_updated)::indexing_run_stats_delta
+                FROM new_runs
+            ));
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION indexing_run_stats_sync_update()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            PERFORM apply_indexing_run_stats_deltas(ARRAY(
+                SELECT ROW(1, status, files_added, files_updated)::indexing_run_stats_delta
+                FROM new_runs
+                UNION ALL
+                SELECT ROW(-1, status, files_added, files_updated)::indexing_run_stats_delta
+                FROM old_runs
+            ));
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION indexing_run_stats_sync_delete()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            PERFORM apply_indexing_run_stats_deltas(ARRAY(
+                SELECT ROW(-1, status, files_added, files_updated)::indexing_run_stats_delta
+                FROM old_runs
+            ));
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION rebuild_corpus_stats()
+        RETURNS void AS $$
+        BEGIN
+            LOCK TABLE corpus_stats, indexing_run_stats IN EXCLUSIVE MODE;
+
+            DELETE FROM corpus_stats;
+            INSERT INTO corpus_stats
+                (owner_id, visibility, namespace, slot,
+                 document_count, chunk_count, quarantined_count)
+            SELECT
+                b.owner_id,
+                CASE WHEN b.owner_id IS NULL THEN 'shared' ELSE 'private' END,
+                NULLIF(doc.metadata->>'namespace', ''),
+                0,
+                COUNT(*),
+                COALESCE(SUM(doc.chunk_count), 0),
+                COUNT(*) FILTER (WHERE doc.quarantined_at IS NOT NULL)
+            FROM documents doc
+            CROSS JOIN LATERAL folder_bucket_owner(doc.owner_id, doc.visibility) AS b(owner_id)
+            GROUP BY b.owner_id, NULLIF(doc.metadata->>'namespace', '');
+
+            DELETE FROM indexing_run_stats;
+            INSERT INTO indexing_run_stats (status, run_count, files_added, files_updated)
+            SELECT status, COUNT(*), COALESCE(SUM(files_added), 0), COALESCE(SUM(files_updated), 0)
+            FROM indexing_runs
+            WHERE status <> 'running'
+            GROUP BY status;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    op.execute("""
+        DROP TRIGGER IF EXISTS corpus_stats_sync_insert ON documents;
+        CREATE TRIGGER corpus_stats_sync_insert
+            AFTER INSERT ON documents
+            REFERENCING NEW TABLE AS new_docs
+            FOR EACH STATEMENT EXECUTE FUNCTION corpus_stats_sync_insert();
+
+        DROP TRIGGER IF EXISTS corpus_stats_sync_update ON documents;
+        CREATE TRIGGER corpus_stats_sync_update
+            AFTER UPDATE ON documents
+            REFERENCING OLD TABLE AS old_docs NEW TABLE AS new_docs
+            FOR EACH STATEMENT EXECUTE FUNCTION corpus_stats_sync_update();
+
+        DROP TRIGGER IF EXISTS corpus_stats_sync_delete ON documents;
+        CREATE TRIGGER corpus_stats_sync_delete
+            AFTER DELETE ON documents
+            REFERENCING OLD TABLE AS old_docs
+            FOR EACH STATEMENT EXECUTE FUNCTION corpus_stats_sync_delete();
+
+        DROP TRIGGER IF EXISTS corpus_stats_sync_truncate ON documents;
+        CREATE TRIGGER corpus_stats_sync_truncate
+            AFTER TRUNCATE ON documents
+            FOR EACH STATEMENT EXECUTE FUNCTION corpus_stats_sync_truncate();
+
+        DROP TRIGGER IF EXISTS indexing_run_stats_sync_insert ON indexing_runs;
+        CREATE TRIGGER indexing_run_stats_sync_insert
+            AFTER INSERT ON indexing_runs
+            REFERENCING NEW TABLE AS new_runs
+            FOR EACH STATEMENT EXECUTE FUNCTION indexing_run_stats_sync_insert();
+
+        DROP TRIGGER IF EXISTS indexing_run_stats_sync_update ON indexing_runs;
+        CREATE TRIGGER indexing_run_stats_sync_update
+            AFTER UPDATE ON indexing_runs
+            REFERENCING OLD TABLE AS old_runs NEW TABLE AS new_runs
+            FOR EACH STATEMENT EXECUTE FUNCTION indexing_run_stats_sync_update();
+
+        DROP TRIGGER IF EXISTS indexing_run_stats_sync_delete ON indexing_runs;
+        CREATE TRIGGER indexing_run_stats_sync_delete
+            AFTER DELETE ON indexing_runs
+            REFERENCING OLD TABLE AS old_runs
+            FOR EACH STATEMENT EXECUTE FUNCTION indexing_run_stats_sync_delete();
+    """)
+
+    op.execute("SELECT rebuild_corpus_stats()")
+
+
+def downgrade():
+    op.execute("""
+        DROP TRIGGER IF EXISTS indexing_run_stats_sync_delete ON indexing_runs;
+        DROP TRIGGER IF EXISTS indexing_run_stats_sync_update ON indexing_runs;
+        DROP TRIGGER IF EXISTS indexing_run_stats_sync_insert ON indexing_runs;
+        DROP TRIGGER IF EXISTS corpus_stats_sync_truncate ON documents;
+        DROP TRIGGER IF EXISTS corpus_stats_sync_delete ON documents;
+        DROP TRIGGER IF EXISTS corpus_stats_sync_update ON documents;
+        DROP TRIGGER IF EXISTS corpus_stats_sync_insert ON documents;
+    """)
+    op.execute("DROP FUNCTION IF EXISTS rebuild_corpus_stats()")
+    op.execute("DROP FUNCTION IF EXISTS indexing_run_stats_sync_delete()")
+    op.execute("DROP FUNCTION IF EXISTS indexing_run_stats_sync_update()")
+    op.execute("DROP FUNCTION IF EXISTS indexing_run_stats_sync_insert()")
+    op.execute("DROP FUNCTION IF EXISTS apply_indexing_run_stats_deltas(indexing_run_stats_delta[])")
+    op.execute("DROP FUNCTION IF EXISTS corpus_stats_sync_truncate()")
+    op.execute("DROP FUNCTION IF EXISTS corpus_stats_sync_delete()")
+    op.execute("DROP FUNCTION IF EXISTS corpus_stats_sync_update()")
+    op.execute("DROP FUNCTION IF EXISTS corpus_stats_sync_insert()")
+    op.execute("DROP FUNCTION IF EXISTS apply_corpus_stats_deltas(corpus_stats_delta[])")
+    op.execute("DROP TYPE IF EXISTS indexing_run_stats_delta")
+    op.execute("DROP TYPE IF EXISTS corpus_stats_delta")
+    op.execute("DROP TABLE IF EXISTS indexing_run_stats")
+    op.execute("DROP TABLE IF EXISTS corpus_stats")
@@ -0,0 +1,49 @@
+"""030 – Stat-based file manifest for incremental folder scans.
+
+Revision ID: 030
+Revises: 029
+Create Date: 2026-10-19
+
+A watched-folder scan used to hand every file to the indexer, which read
+and hashed it (and parsed it before the hash comparison), so change
+detection cost O(bytes in the share) per scheduled run.
+
+``scan_manifest`` keeps one row per file and watched root: relative path,
+size, mtime_ns, inode, content hash, the document it was indexed as and
+the last run that saw it. A scan now stats the tree, compares against the
+manifest and only hashes files whose size, mtime or inode changed; only
+new, modified and reappeared files reach the indexer. Files that vanish
+are marked ``missing_since`` and drive quarantine.
+
+``root_key`` is the watched root's root_id, or the normalized folder path
+for scans without one.
+"""
+
+from alembic import op
+
+revision = "030"
+down_revision = "029"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS scan_manifest (
+            root_key TEXT NOT NULL,
+            rel_path TEXT NOT NULL,
+            size BIGINT NOT NULL,
+            mtime_ns BIGINT NOT NULL,
+            inode BIGINT,
+            content_hash TEXT,
+            document_id TEXT,
+            last_seen_run UUID,
+            missing_since TIMESTAMPTZ,
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            PRIMARY KEY (root_key, rel_path)
+        )
+    """)
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS scan_manifest")
@@ -0,0 +1,78 @@
+"""031 – NOTIFY on watched-folder schedule changes.
+
+Revision ID: 031
+Revises: 030
+Create Date: 2026-10-19
+
+The server scheduler keeps every server-scope root's next fire time in a
+priority queue and sleeps until the earliest one, instead of re-listing
+all watched folders every minute. It LISTENs on ``watched_folders_changed``
+to hear about edits that move a root's next fire time; see
+server_scheduler.py.
+
+The payload is the folder id. Notifications are sent for inserts,
+deletes and updates of schedule_cron / enabled / paused /
+execution_scope / folder_path, and when consecutive_failures is reset
+(resume). Scan bookkeeping (watermarks, last_scanned_at, failure
+increments) does not notify; the scheduler reschedules a root itself
+after scanning it. TRUNCATE notifies with an empty payload, which makes
+listeners reload every root.
+"""
+
+from alembic import op
+
+revision = "031"
+down_revision = "030"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_watched_folder_change()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            IF TG_OP = 'TRUNCATE' THEN
+                PERFORM pg_notify('watched_folders_changed', '');
+            ELSIF TG_OP = 'DELETE' THEN
+                PERFORM pg_notify('watched_folders_changed', OLD.id::text);
+            ELSE
+                PERFORM pg_notify('watched_folders_changed', NEW.id::text);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    op.execute("""
+        DROP TRIGGER IF EXISTS watched_folders_notify_change ON watched_folders;
+        CREATE TRIGGER watched_folders_notify_change
+            AFTER INSERT OR DELETE ON watched_folders
+            FOR EACH ROW EXECUTE FUNCTION notify_watched_folder_change();
+
+        DROP TRIGGER IF EXISTS watched_folders_notify_update ON watched_folders;
+        CREATE TRIGGER watched_folders_notify_update
+            AFTER UPDATE ON watched_folders
+            FOR EACH ROW
+            WHEN (OLD.schedule_cron IS DISTINCT FROM NEW.schedule_cron
+                  OR OLD.enabled IS DISTINCT FROM NEW.enabled
+                  OR OLD.paused IS DISTINCT FROM NEW.paused
+                  OR OLD.execution_scope IS DISTINCT FROM NEW.execution_scope
+                  OR OLD.folder_path IS DISTINCT FROM NEW.folder_path
+                  OR NEW.consecutive_failures < OLD.consecutive_failures)
+            EXECUTE FUNCTION notify_watched_folder_change();
+
+        DROP TRIGGER IF EXISTS watched_folders_notify_truncate ON watched_folders;
+        CREATE TRIGGER watched_folders_notify_truncate
+            AFTER TRUNCATE ON watched_folders
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_watched_folder_change();
+    """)
+
+
+def downgrade():
+    op.execute("""
+        DROP TRIGGER IF EXISTS watched_folders_notify_change ON watched_folders;
+        DROP TRIGGER IF EXISTS watched_folders_notify_update ON watched_folders;
+        DROP TRIGGER IF EXISTS watched_folders_notify_truncate ON watched_folders;
+        DROP FUNCTION IF EXISTS notify_watched_folder_change();
+    """)
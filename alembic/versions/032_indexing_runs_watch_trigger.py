@@ -0,0 +1,34 @@
+"""032 – Allow the "watch" trigger on indexing runs.
+
+Revision ID: 032
+Revises: 031
+Create Date: 2026-10-19
+
+Watch mode (folder_watcher.py) indexes the files it saw change as small
+runs of their own. They are recorded with trigger "watch" so they can be
+told apart from the scheduled reconciling scans.
+"""
+
+from alembic import op
+
+revision = "032"
+down_revision = "031"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        ALTER TABLE indexing_runs DROP CONSTRAINT IF EXISTS indexing_runs_trigger_check;
+        ALTER TABLE indexing_runs ADD CONSTRAINT indexing_runs_trigger_check
+            CHECK (trigger IN ('manual', 'upload', 'cli', 'scheduled', 'api', 'watch'));
+    """)
+
+
+def downgrade():
+    op.execute("""
+        DELETE FROM indexing_runs WHERE trigger = 'watch';
+        ALTER TABLE indexing_runs DROP CONSTRAINT IF EXISTS indexing_runs_trigger_check;
+        ALTER TABLE indexing_runs ADD CONSTRAINT indexing_runs_trigger_check
+            CHECK (trigger IN ('manual', 'upload', 'cli', 'scheduled', 'api'));
+    """)
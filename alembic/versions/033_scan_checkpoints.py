@@ -0,0 +1,39 @@
+"""033 – Scan checkpoints for resumable folder scans.
+
+Revision ID: 033
+Revises: 032
+Create Date: 2026-10-19
+
+Long scans now checkpoint as they go: the manifest rows of files indexed
+so far are written every SCAN_CHECKPOINT_FILES files or
+SCAN_CHECKPOINT_SECONDS, and the progress (last path in walk order, files
+done/total) is recorded in the run's metadata and in the new
+``watched_folders.scan_checkpoint`` column. A scan that dies mid-way is
+resumed by the next one, which closes the dangling run and skips the files
+already recorded. See watched_folders.scan_folder.
+
+The partial index finds a folder's runs still marked running.
+"""
+
+from alembic import op
+
+revision = "033"
+down_revision = "032"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        ALTER TABLE watched_folders ADD COLUMN IF NOT EXISTS scan_checkpoint JSONB;
+
+        CREATE INDEX IF NOT EXISTS idx_indexing_runs_running_source
+            ON indexing_runs (source_uri) WHERE status = 'running';
+    """)
+
+
+def downgrade():
+    op.execute("""
+        DROP INDEX IF EXISTS idx_indexing_runs_running_source;
+        ALTER TABLE watched_folders DROP COLUMN IF EXISTS scan_checkpoint;
+    """)
@@ -0,0 +1,62 @@
+"""034 – Indexing job queue.
+
+Revision ID: 034
+Revises: 033
+Create Date: 2026-10-19
+
+``/index``, ``/upload-and-index`` and upload finalize can now answer 202
+and leave the work to a pool of job workers (indexing_jobs.py). Each job
+is a row here: workers claim the highest-priority, oldest queued job with
+``FOR UPDATE SKIP LOCKED``, heartbeat it while it runs, and record the
+result and the indexing run it produced. A job whose worker stopped
+heartbeating is queued again, so jobs survive restarts.
+
+The partial index serves the claim query; the owner index serves the
+per-key job listing.
+"""
+
+from alembic import op
+
+revision = "034"
+down_revision = "033"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS indexing_jobs (
+            id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+            kind TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued'
+                CHECK (status IN ('queued', 'running', 'succeeded', 'failed', 'cancelled')),
+            priority INT NOT NULL DEFAULT 0,
+            source_uri TEXT,
+            payload JSONB NOT NULL DEFAULT '{}'::jsonb,
+            owner_key_id INT,
+            attempts INT NOT NULL DEFAULT 0,
+            worker_id TEXT,
+            run_id UUID,
+            result JSONB,
+            error JSONB,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            started_at TIMESTAMPTZ,
+            heartbeat_at TIMESTAMPTZ,
+            completed_at TIMESTAMPTZ
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_indexing_jobs_queued
+            ON indexing_jobs (priority DESC, created_at) WHERE status = 'queued';
+
+        CREATE INDEX IF NOT EXISTS idx_indexing_jobs_running
+            ON indexing_jobs (heartbeat_at) WHERE status = 'running';
+
+        CREATE INDEX IF NOT EXISTS idx_indexing_jobs_owner
+            ON indexing_jobs (owner_key_id, created_at DESC);
+    """)
+
+
+def downgrade():
+    op.execute("""
+        DROP TABLE IF EXISTS indexing_jobs;
+    """)
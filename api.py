@@ -185,14 +185,54 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning("Failed to start retention maintenance runner: %s", e)
 
+    # Background indexing job workers (indexing_jobs.py)
+    _indexing_job_runner = None
+    try:
+        from indexing_jobs import IndexingJobRunner, get_indexing_job_runner
+
+        if IndexingJobRunner.is_enabled():
+            _indexing_job_runner = get_indexing_job_runner()
+            await _indexing_job_runner.start()
+    except Exception as e:
+        logger.warning("Failed to start indexing job runner: %s", e)
+
+    # Buffered last_used_at / activity / indexing-run writes (write_behind.py)
+    try:
+        from write_behind import start_write_behind
+        start_write_behind()
+    except Exception as e:
+        logger.warning("Failed to start write-behind buffer: %s", e)
+
+    # Principal cache invalidation (LISTEN auth_changed); the cache stays
+    # inactive until the listener has connected.
+    try:
+        from config import get_config
+        if get_config().api.require_auth:
+            from principal_cache import start_auth_change_listener
+            start_auth_change_listener()
+    except Exception as e:
+        logger.warning("Failed to start auth change listener: %s", e)
+
     yield
     
     # Shutdown
     logger.info("Shutting down PGVectorRAGIndexer API...")
+    try:
+        from principal_cache import stop_auth_change_listener
+        stop_auth_change_listener()
+    except Exception as e:
+        logger.warning("Failed to stop auth change listener: %s", e)
     if _server_scheduler:
         await _server_scheduler.stop()
     if _retention_runner:
         await _retention_runner.stop()
+    if _indexing_job_runner:
+        await _indexing_job_runner.stop()
+    try:
+        from write_behind import stop_write_behind
+        stop_write_behind()
+    except Exception as e:
+        logger.warning("Failed to flush write-behind buffer: %s", e)
     close_db_manager()
     logger.info("Cleanup complete")
 
@@ -228,12 +268,14 @@ app.add_middleware(
     ],
 )
 
-# Add in-process API rate limiting. Set API_RATE_LIMIT_PER_MINUTE=0 to disable
-# and use reverse-proxy or shared-store limits for large multi-worker installs.
+# Add API rate limiting. Set API_RATE_LIMIT_PER_MINUTE=0 to disable, and
+# API_RATE_LIMIT_BACKEND=postgres to share the limit across workers.
 if config.api.rate_limit_per_minute > 0:
     app.add_middleware(
         RateLimitMiddleware,
         limit_per_minute=config.api.rate_limit_per_minute,
+        backend=config.api.rate_limit_backend,
+        route_costs=config.api.rate_limit_route_costs,
     )
 
 # Add license overage warning middleware (no-op for Community edition)
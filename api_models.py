@@ -32,6 +32,48 @@ class IndexResponse(BaseModel):
     indexed_at: Optional[str] = None
 
 
+class UploadSessionRequest(BaseModel):
+    """Request model for starting a resumable upload."""
+    filename: str = Field(..., min_length=1, description="Original file name")
+    size: int = Field(..., ge=0, description="Total file size in bytes")
+    force_reindex: bool = Field(default=False, description="Force reindex if exists")
+    custom_source_uri: Optional[str] = Field(default=None, description="Source path to index the file under")
+    document_type: Optional[str] = Field(default=None, description="Override for metadata.type")
+    metadata: Optional[Dict[str, Any]] = Field(default=None, description="Custom metadata")
+    ocr_mode: Optional[str] = Field(default=None, description="OCR mode for the processor")
+
+
+class UploadSessionResponse(BaseModel):
+    """State of a resumable upload; ``offset`` is where the next chunk starts."""
+    upload_id: str
+    filename: str
+    size: int
+    offset: int
+    complete: bool
+    chunk_size: int
+    max_chunk_size: int
+    expires_in_seconds: int
+
+
+class IndexingJobResponse(BaseModel):
+    """State of a background indexing job (``?background=true``)."""
+    job_id: str
+    kind: str
+    status: Literal["queued", "running", "succeeded", "failed", "cancelled"]
+    priority: int = 0
+    source_uri: Optional[str] = None
+    attempts: int = 0
+    queue_position: Optional[int] = Field(
+        default=None, description="1 = next to run; set while queued"
+    )
+    run_id: Optional[str] = Field(default=None, description="Indexing run of the job")
+    result: Optional[Dict[str, Any]] = Field(default=None, description="IndexResponse of a succeeded job")
+    error: Optional[Dict[str, Any]] = None
+    created_at: Optional[str] = None
+    started_at: Optional[str] = None
+    completed_at: Optional[str] = None
+
+
 class SearchRequest(BaseModel):
     """Request model for search."""
     query: str = Field(..., description="Search query text")
@@ -109,6 +151,39 @@ class DocumentInfo(BaseModel):
     owner_id: Optional[str] = None
 
 
+MAX_DOCUMENT_STATUS_BATCH = 1000
+
+
+class DocumentStatusItem(BaseModel):
+    """One source path to check in a batch status request."""
+    source_uri: str = Field(..., description="Source path the document was indexed under")
+    file_hash: Optional[str] = Field(default=None, description="Client-computed file hash, if known")
+
+
+class DocumentStatusBatchRequest(BaseModel):
+    """Request model for checking many documents in one round trip."""
+    items: List[DocumentStatusItem] = Field(..., max_length=MAX_DOCUMENT_STATUS_BATCH)
+
+
+class DocumentStatus(BaseModel):
+    """Indexing status of one source path.
+
+    ``status`` is "missing" if the document is not indexed (or not visible),
+    "unchanged" / "changed" if a client hash was sent, and "present" if the
+    document exists but no hash was sent to compare.
+    """
+    source_uri: str
+    document_id: str
+    status: Literal["missing", "unchanged", "changed", "present"]
+    file_hash: Optional[str] = None
+    document_type: Optional[str] = None
+
+
+class DocumentStatusBatchResponse(BaseModel):
+    """Response model for a batch status request, in request order."""
+    results: List[DocumentStatus]
+
+
 class DocumentListResponse(BaseModel):
     """Paginated list response for documents."""
     items: List[DocumentInfo]
@@ -139,6 +214,12 @@ class StatsResponse(BaseModel):
     embedding_dimension: int
 
 
+class MetadataValueCount(BaseModel):
+    """Response model for one metadata value and its document count."""
+    value: str
+    doc_count: int
+
+
 class BulkDeleteRequest(BaseModel):
     """Request model for bulk delete operations."""
     filters: Dict[str, Any] = Field(..., description="Filter criteria for deletion")
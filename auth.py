@@ -17,7 +17,7 @@ import logging
 import os
 import secrets
 import time
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 from fastapi import Depends, HTTPException, Request, Security, status
@@ -193,8 +193,41 @@ def lookup_api_key(key_hash: str) -> Optional[dict]:
         return None
 
 
+def _utc(value: Optional[datetime]) -> Optional[datetime]:
+    # api_keys timestamps are TIMESTAMP (naive, server time in UTC).
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def key_record_is_active(key_record: dict) -> bool:
+    """Re-check expiry and the rotation grace period of a looked-up key record.
+
+    Same rules as ``lookup_api_key``, for records served from the principal
+    cache after they were fetched.
+    """
+    now = datetime.now(timezone.utc)
+    expires_at = _utc(key_record.get("expires_at"))
+    if expires_at is not None and expires_at <= now:
+        return False
+    revoked_at = _utc(key_record.get("revoked_at"))
+    if revoked_at is not None and revoked_at <= now - timedelta(hours=GRACE_PERIOD_HOURS):
+        return False
+    return True
+
+
 def update_last_used(key_id: int) -> None:
-    """Update the last_used_at timestamp for a key."""
+    """Update the last_used_at timestamp for a key.
+
+    Coalesced into the write-behind buffer when it is running (API server);
+    written immediately otherwise.
+    """
+    from write_behind import get_active_write_behind
+
+    buffer = get_active_write_behind()
+    if buffer is not None:
+        buffer.touch_api_key(key_id)
+        return
     try:
         with _get_db_connection() as conn:
             cursor = conn.cursor()
@@ -281,7 +314,11 @@ def revoke_api_key(key_id: int) -> bool:
             (key_id,),
         )
         conn.commit()
-        return cursor.rowcount > 0
+        revoked = cursor.rowcount > 0
+
+    from principal_cache import invalidate_principals
+    invalidate_principals()
+    return revoked
 
 
 def rotate_api_key(key_id: int) -> Optional[dict]:
@@ -325,6 +362,9 @@ def rotate_api_key(key_id: int) -> Optional[dict]:
         new_row = cursor.fetchone()
         conn.commit()
 
+    from principal_cache import invalidate_principals
+    invalidate_principals()
+
     return {
         "key": full_key,  # Show ONCE
         "id": new_row[0],
@@ -366,15 +406,33 @@ async def require_api_key(
         from errors import raise_api_error, ErrorCode
         raise_api_error(ErrorCode.INVALID_API_KEY, message="Invalid API key format.")
 
+    from principal_cache import get_principal_cache
+
     key_hash = hash_api_key(api_key)
+    cache = get_principal_cache()
+    entry = cache.get(key_hash)
+    if entry is not None and not key_record_is_active(entry["key_record"]):
+        # Expired or past its grace period since it was cached.
+        cache.discard(key_hash)
+        entry = None
+    if entry is not None:
+        from write_behind import get_active_write_behind
+        buffer = get_active_write_behind()
+        if buffer is not None:
+            buffer.touch_api_key(entry["key_record"]["id"])
+        return dict(entry["key_record"])
+
+    generation = cache.generation
     key_record = lookup_api_key(key_hash)
 
     if not key_record:
         from errors import raise_api_error, ErrorCode
         raise_api_error(ErrorCode.INVALID_API_KEY, message="Invalid or revoked API key.")
 
-    # Update last used (fire-and-forget, don't block the request)
+    # Update last used (buffered, see write_behind). Without the buffer,
+    # cached keys are stamped once per cache fill, i.e. once per TTL.
     update_last_used(key_record["id"])
+    cache.put(key_hash, dict(key_record), generation)
 
     return key_record
 
@@ -418,14 +476,14 @@ def require_permission(permission: str):
             return None
 
         try:
-            from users import get_user_by_api_key, count_admins
+            from principal_cache import count_admins, user_for_key_record
             from role_permissions import has_permission as _has_perm
 
             # Bootstrap: if no admin users exist yet, allow
             if count_admins() == 0:
                 return key_record
 
-            user = get_user_by_api_key(key_record["id"])
+            user = user_for_key_record(key_record)
             if user and _has_perm(user.get("role", ""), permission):
                 return key_record
 
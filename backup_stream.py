@@ -0,0 +1,177 @@
+"""
+Streaming NDJSON backup format for document export/restore.
+
+A backup stream is newline-delimited JSON:
+
+1. A ``header`` record identifying the format, version, embedding encoding
+   and the filters that produced the export.
+2. One ``chunk`` record per chunk, ordered by ``(document_id, chunk_index)``
+   so that every document's chunks are contiguous.
+3. A ``footer`` record with chunk/document counts and a ``status``. An export
+   that fails mid-stream ends with ``status: "error"`` instead of
+   ``"complete"``, so truncated backups are detectable.
+
+Embeddings are little-endian float32 bytes, base64-encoded — about 40% of the
+size of the ``embedding::text`` form used by the legacy JSON backup and
+lossless. ``decode_embedding`` also accepts the legacy pgvector text form so
+hand-converted legacy backups can be replayed through the streaming restore.
+"""
+
+import base64
+import json
+import logging
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FORMAT_NAME = "pgvector-rag-backup"
+FORMAT_VERSION = 1
+EMBEDDING_ENCODING = "f32le-base64"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+RECORD_HEADER = "header"
+RECORD_CHUNK = "chunk"
+RECORD_FOOTER = "footer"
+
+STATUS_COMPLETE = "complete"
+STATUS_ERROR = "error"
+
+# Upper bound for a single NDJSON line; protects restore from unbounded
+# buffering when fed a file without newlines.
+MAX_LINE_BYTES = 64 * 1024 * 1024
+
+_REQUIRED_CHUNK_FIELDS = ("document_id", "chunk_index", "text_content", "source_uri")
+
+
+class BackupStreamError(ValueError):
+    """Raised when a backup stream is malformed."""
+
+
+def encode_embedding(embedding: Any) -> Optional[str]:
+    """Encode an embedding as base64 little-endian float32."""
+    if embedding is None:
+        return None
+    array = np.asarray(embedding, dtype="<f4")
+    return base64.b64encode(array.tobytes()).decode("ascii")
+
+
+def decode_embedding(value: Any) -> Optional[List[float]]:
+    """Decode an embedding from base64 float32, pgvector text, or a list."""
+    if value is None:
+        return None
+    if isinstance(value, list):
+        return [float(v) for v in value]
+    if not isinstance(value, str):
+        raise BackupStreamError("Embedding must be a string, list or null")
+    if value.startswith("["):
+        try:
+            return [float(v) for v in json.loads(value)]
+        except (ValueError, TypeError) as e:
+            raise BackupStreamError(f"Invalid vector literal: {e}")
+    try:
+        raw = base64.b64decode(value, validate=True)
+    except (ValueError, TypeError) as e:
+        raise BackupStreamError(f"Invalid base64 embedding: {e}")
+    if len(raw) % 4:
+        raise BackupStreamError("Embedding byte length is not a multiple of 4")
+    return np.frombuffer(raw, dtype="<f4").tolist()
+
+
+def _dump_line(record: Dict[str, Any]) -> bytes:
+    return (json.dumps(record, separators=(",", ":"), default=str) + "\n").encode("utf-8")
+
+
+def iter_export_ndjson(
+    chunks: Iterable[Dict[str, Any]],
+    filters: Dict[str, Any],
+) -> Iterator[bytes]:
+    """Serialize chunk dicts (from ``iter_export_chunks``) as NDJSON lines."""
+    yield _dump_line({
+        "type": RECORD_HEADER,
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "embedding_encoding": EMBEDDING_ENCODING,
+        "filters": filters,
+    })
+
+    chunk_count = 0
+    document_count = 0
+    last_document_id = None
+    try:
+        for chunk in chunks:
+            if chunk["document_id"] != last_document_id:
+                document_count += 1
+                last_document_id = chunk["document_id"]
+            chunk_count += 1
+            record = dict(chunk)
+            record["type"] = RECORD_CHUNK
+            record["embedding"] = encode_embedding(chunk.get("embedding"))
+            yield _dump_line(record)
+    except Exception as e:
+        # Headers are already sent, so the only way to report the failure is
+        # in-band: an error footer marks the backup as incomplete.
+        logger.error(f"Streaming export failed after {chunk_count} chunks: {e}", exc_info=True)
+        yield _dump_line({
+            "type": RECORD_FOOTER,
+            "status": STATUS_ERROR,
+            "error": str(e),
+            "chunk_count": chunk_count,
+            "document_count": document_count,
+        })
+        return
+
+    logger.info(f"Streamed export of {chunk_count} chunks ({document_count} documents)")
+    yield _dump_line({
+        "type": RECORD_FOOTER,
+        "status": STATUS_COMPLETE,
+        "chunk_count": chunk_count,
+        "document_count": document_count,
+    })
+
+
+def parse_line(line: bytes) -> Optional[Dict[str, Any]]:
+    """Parse one NDJSON line; returns None for blank lines."""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        raise BackupStreamError(f"Invalid JSON line in backup stream: {e}")
+    if not isinstance(record, dict):
+        raise BackupStreamError("Backup stream records must be JSON objects")
+    return record
+
+
+def validate_header(record: Dict[str, Any]) -> None:
+    """Check that a header record describes a stream this version can read."""
+    if record.get("type") != RECORD_HEADER or record.get("format") != FORMAT_NAME:
+        raise BackupStreamError("Backup stream must start with a header record")
+    if record.get("version") != FORMAT_VERSION:
+        raise BackupStreamError(f"Unsupported backup format version: {record.get('version')}")
+    encoding = record.get("embedding_encoding", EMBEDDING_ENCODING)
+    if encoding != EMBEDDING_ENCODING:
+        raise BackupStreamError(f"Unsupported embedding encoding: {encoding}")
+
+
+def decode_chunk(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn a chunk record into the dict shape ``restore_chunk_batch`` takes."""
+    missing = [field for field in _REQUIRED_CHUNK_FIELDS if record.get(field) is None]
+    if missing:
+        raise BackupStreamError(f"Chunk record missing fields: {', '.join(missing)}")
+    metadata = record.get("metadata")
+    if isinstance(metadata, str):
+        try:
+            metadata = json.loads(metadata)
+        except ValueError as e:
+            raise BackupStreamError(f"Invalid chunk metadata: {e}")
+    return {
+        "document_id": record["document_id"],
+        "chunk_index": int(record["chunk_index"]),
+        "text_content": record["text_content"],
+        "source_uri": record["source_uri"],
+        "embedding": decode_embedding(record.get("embedding")),
+        "metadata": metadata or {},
+    }
@@ -0,0 +1,180 @@
+"""
+Batched, bounded-transaction deletes for retention and purge jobs.
+
+A retention DELETE over a large backlog used to run as one statement: it
+held row locks for the whole backlog, wrote all of its WAL in one
+transaction and could hit ``statement_timeout``. ``delete_in_batches``
+deletes the same rows in keyed chunks instead:
+
+- each batch selects up to ``batch_size`` keys matching the predicate
+  (``FOR UPDATE SKIP LOCKED``, so rows held by a writer are left for the
+  next batch) and deletes them in its own short transaction;
+- batches are separated by a short pause so other writers and replication
+  keep up;
+- a run can be bounded by ``max_seconds``. Every batch is committed on its
+  own, so an interrupted or bounded run loses nothing: the next run
+  resumes from whatever still matches the predicate.
+
+Per-job statistics (batches, rows, per-batch timing) are kept for the
+last run of each job and exposed through ``get_last_stats``. When a run
+deleted at least ``RETENTION_ANALYZE_MIN_ROWS`` rows the table is
+ANALYZEd so the planner sees its new size; VACUUM is left to autovacuum
+and reported as a hint.
+
+Environment:
+    RETENTION_DELETE_BATCH_SIZE   (default 5000; rows per batch)
+    RETENTION_DELETE_PAUSE_MS     (default 50; pause between batches)
+    RETENTION_DELETE_MAX_SECONDS  (default 0 = unbounded; per job run)
+    RETENTION_ANALYZE_MIN_ROWS    (default 10000; 0 disables ANALYZE)
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+RETENTION_DELETE_BATCH_SIZE_ENV = "RETENTION_DELETE_BATCH_SIZE"
+RETENTION_DELETE_PAUSE_MS_ENV = "RETENTION_DELETE_PAUSE_MS"
+RETENTION_DELETE_MAX_SECONDS_ENV = "RETENTION_DELETE_MAX_SECONDS"
+RETENTION_ANALYZE_MIN_ROWS_ENV = "RETENTION_ANALYZE_MIN_ROWS"
+
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_PAUSE_MS = 50
+DEFAULT_MAX_SECONDS = 0
+DEFAULT_ANALYZE_MIN_ROWS = 10000
+
+_stats_lock = threading.Lock()
+_last_stats: Dict[str, Dict[str, Any]] = {}
+
+
+def _int_env(name: str, default: int) -> int:
+    try:
+        value = int(os.environ.get(name, str(default)))
+        return value if value >= 0 else default
+    except (TypeError, ValueError):
+        return default
+
+
+def get_batch_size() -> int:
+    """Rows per delete batch, from env (default 5000)."""
+    return max(1, _int_env(RETENTION_DELETE_BATCH_SIZE_ENV, DEFAULT_BATCH_SIZE))
+
+
+def _default_connection():
+    from database import get_db_manager
+    return get_db_manager().get_connection()
+
+
+def delete_in_batches(
+    job: str,
+    table: str,
+    where_sql: str,
+    params: Sequence[Any] = (),
+    *,
+    key_column: str = "id",
+    connection_factory: Optional[Callable[[], Any]] = None,
+    batch_size: Optional[int] = None,
+    pause_seconds: Optional[float] = None,
+    max_seconds: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Delete rows of ``table`` matching ``where_sql`` in committed batches.
+
+    Args:
+        job: Name the statistics are recorded under (e.g. "activity_log").
+        table: Table to delete from (trusted identifier, not user input).
+        where_sql: Predicate with ``%s`` placeholders for ``params``.
+        params: Predicate parameters.
+        key_column: Unique key used to address a batch.
+        connection_factory: Context manager yielding a pooled connection;
+            defaults to the shared DatabaseManager pool.
+        batch_size: Rows per batch (RETENTION_DELETE_BATCH_SIZE).
+        pause_seconds: Pause between batches (RETENTION_DELETE_PAUSE_MS).
+        max_seconds: Stop starting new batches after this long; 0 or None
+            means unbounded (RETENTION_DELETE_MAX_SECONDS).
+
+    Returns:
+        Stats dict: deleted, batches, complete, elapsed_ms, max_batch_ms,
+        analyzed, vacuum_recommended.
+
+    Raises:
+        Exception: Whatever the failing batch raised. Rows deleted by
+        earlier batches stay deleted and are counted in the job's stats.
+    """
+    connection_factory = connection_factory or _default_connection
+    batch_size = batch_size or get_batch_size()
+    if pause_seconds is None:
+        pause_seconds = _int_env(RETENTION_DELETE_PAUSE_MS_ENV, DEFAULT_PAUSE_MS) / 1000.0
+    if max_seconds is None:
+        max_seconds = _int_env(RETENTION_DELETE_MAX_SECONDS_ENV, DEFAULT_MAX_SECONDS)
+
+    sql = (
+        f"DELETE FROM {table} WHERE {key_column} IN ("
+        f"SELECT {key_column} FROM {table} WHERE {where_sql} "
+        f"LIMIT %s FOR UPDATE SKIP LOCKED)"
+    )
+    stats: Dict[str, Any] = {
+        "deleted": 0,
+        "batches": 0,
+        "complete": False,
+        "elapsed_ms": 0.0,
+        "max_batch_ms": 0.0,
+        "analyzed": False,
+        "vacuum_recommended": False,
+        "finished_at": None,
+    }
+    started = time.monotonic()
+    try:
+        while True:
+            batch_started = time.monotonic()
+            with connection_factory() as conn:
+                cur = conn.cursor()
+                cur.execute(sql, (*params, batch_size))
+                deleted = cur.rowcount
+                conn.commit()
+            batch_ms = (time.monotonic() - batch_started) * 1000
+            stats["batches"] += 1
+            stats["deleted"] += deleted
+            stats["max_batch_ms"] = round(max(stats["max_batch_ms"], batch_ms), 1)
+            logger.debug("%s: batch %d deleted %d rows in %.1f ms",
+                         job, stats["batches"], deleted, batch_ms)
+
+            if deleted < batch_size:
+                stats["complete"] = True
+                break
+            if max_seconds and time.monotonic() - started >= max_seconds:
+                logger.info("%s: stopping after %d batches (time budget); "
+                            "the next run continues", job, stats["batches"])
+                break
+            if pause_seconds:
+                time.sleep(pause_seconds)
+
+        analyze_min = _int_env(RETENTION_ANALYZE_MIN_ROWS_ENV, DEFAULT_ANALYZE_MIN_ROWS)
+        if analyze_min and stats["deleted"] >= analyze_min:
+            stats["vacuum_recommended"] = True
+            try:
+                with connection_factory() as conn:
+                    conn.cursor().execute(f"ANALYZE {table}")
+                    conn.commit()
+                stats["analyzed"] = True
+            except Exception as e:
+                logger.warning("%s: ANALYZE %s after delete failed: %s", job, table, e)
+    finally:
+        stats["elapsed_ms"] = round((time.monotonic() - started) * 1000, 1)
+        stats["finished_at"] = datetime.now(timezone.utc).isoformat()
+        with _stats_lock:
+            _last_stats[job] = dict(stats)
+
+    if stats["deleted"]:
+        logger.info("%s: deleted %d rows from %s in %d batches (%.0f ms)",
+                    job, stats["deleted"], table, stats["batches"], stats["elapsed_ms"])
+    return stats
+
+
+def get_last_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats of the last run of each job, keyed by job name."""
+    with _stats_lock:
+        return {job: dict(stats) for job, stats in _last_stats.items()}
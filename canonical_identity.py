@@ -11,6 +11,10 @@ Key format:
 
 These keys are stored on document_chunks.canonical_source_key
 and used for cross-scope deduplication and lock resolution.
+
+Environment:
+    CANONICAL_KEY_BATCH_SIZE  (default 1000; source URIs per UPDATE in
+                               bulk_set_canonical_keys)
 """
 
 import logging
@@ -19,6 +23,9 @@ from typing import Any, Dict, List, Optional
 
 logger = logging.getLogger(__name__)
 
+CANONICAL_KEY_BATCH_SIZE_ENV = "CANONICAL_KEY_BATCH_SIZE"
+DEFAULT_BATCH_SIZE = 1000
+
 
 def _get_db_connection():
     """Get a pooled database connection as a context manager.
@@ -30,6 +37,14 @@ def _get_db_connection():
     return get_db_manager().get_connection()
 
 
+def get_batch_size() -> int:
+    """Return the bulk_set_canonical_keys batch size from env, default 1000."""
+    try:
+        return max(1, int(os.environ.get(CANONICAL_KEY_BATCH_SIZE_ENV, DEFAULT_BATCH_SIZE)))
+    except (ValueError, TypeError):
+        return DEFAULT_BATCH_SIZE
+
+
 # ---------------------------------------------------------------------------
 # Key construction & parsing
 # ---------------------------------------------------------------------------
@@ -139,21 +154,29 @@ def bulk_set_canonical_keys(
     folder_path: str,
     scope: str,
     identity: str,
+    batch_size: Optional[int] = None,
 ) -> int:
     """Backfill canonical_source_key for all chunks under a watched root.
 
     Finds chunks whose source_uri starts with folder_path and sets
     canonical_source_key based on their relative path within the root.
+    Keys are computed once per source_uri and applied with one
+    ``UPDATE ... FROM (VALUES ...)`` per batch of ``batch_size`` URIs
+    (CANONICAL_KEY_BATCH_SIZE), committed together.
 
     Args:
         root_id:     UUID of the watched folder root
         folder_path: absolute path of the watched folder
         scope:       'client' or 'server'
         identity:    executor_id (client) or root_id (server)
+        batch_size:  source URIs per UPDATE
 
     Returns:
         Number of chunks updated.
     """
+    from psycopg2.extras import execute_values
+
+    batch_size = batch_size or get_batch_size()
     try:
         with _get_db_connection() as conn:
             cur = conn.cursor()
@@ -161,28 +184,40 @@ def bulk_set_canonical_keys(
             # Normalize the root for prefix matching
             root_prefix = folder_path.replace("\\", "/").rstrip("/") + "/"
 
-            # Find chunks under this root without a canonical key
+            # Find sources under this root with chunks lacking a canonical key
             cur.execute(
                 """
-                SELECT chunk_id, source_uri
+                SELECT DISTINCT source_uri
                 FROM document_chunks
                 WHERE source_uri LIKE %s
                   AND canonical_source_key IS NULL
                 """,
                 (root_prefix + "%",),
             )
-            rows = cur.fetchall()
+            keys = [
+                (source_uri, build_canonical_key(
+                    scope, identity, extract_relative_path(folder_path, source_uri),
+                ))
+                for (source_uri,) in cur.fetchall()
+            ]
 
-            if not rows:
+            if not keys:
                 return 0
 
             updated = 0
-            for chunk_id, source_uri in rows:
-                rel = extract_relative_path(folder_path, source_uri)
-                key = build_canonical_key(scope, identity, rel)
-                cur.execute(
-                    "UPDATE document_chunks SET canonical_source_key = %s WHERE chunk_id = %s",
-                    (key, chunk_id),
+            for i in range(0, len(keys), batch_size):
+                batch = keys[i:i + batch_size]
+                execute_values(
+                    cur,
+                    """
+                    UPDATE document_chunks c
+                    SET canonical_source_key = v.canonical_key
+                    FROM (VALUES %s) AS v(source_uri, canonical_key)
+                    WHERE c.source_uri = v.source_uri
+                      AND c.canonical_source_key IS NULL
+                    """,
+                    batch,
+                    page_size=len(batch),
                 )
                 updated += cur.rowcount
 
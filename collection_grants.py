@@ -2,7 +2,8 @@
 Role-based collection grants for document-set access control (Phase 4b slice).
 
 A "collection" is the existing document ``namespace`` dimension (metadata key
-in PostgreSQL, real column in the LanceDB tables). Grants give a role read
+in PostgreSQL, backed by the ``metadata->>'namespace'`` expression index of
+migration 027; real column in the LanceDB tables). Grants give a role read
 access to collections; enforcement happens at search time in
 routers/search_api.py via the ``allowed_namespaces`` filter.
 
@@ -13,6 +14,9 @@ Semantics:
 - The wildcard namespace '*' makes the role unrestricted while keeping the
   role listed in the grants table.
 - Admins (system.admin permission) are never restricted.
+
+Resolved grants are cached per role by principal_cache and dropped on every
+grant change (in this process directly, in other workers via NOTIFY).
 """
 
 import logging
@@ -66,6 +70,8 @@ def grant_collection(role: str, namespace: str) -> bool:
             (role, namespace.strip()),
         )
         conn.commit()
+    from principal_cache import invalidate_principals
+    invalidate_principals()
     return True
 
 
@@ -79,6 +85,8 @@ def revoke_collection(role: str, namespace: str) -> int:
         )
         deleted = cursor.rowcount
         conn.commit()
+    from principal_cache import invalidate_principals
+    invalidate_principals()
     return deleted
 
 
@@ -115,10 +123,10 @@ def search_allowed_namespaces_for_key_record(
     """
     if not isinstance(key_record, dict):
         return None
-    from users import get_user_by_api_key
+    from principal_cache import allowed_namespaces_for_role, user_for_key_record
     from role_permissions import has_permission
 
-    user = get_user_by_api_key(key_record["id"])
+    user = user_for_key_record(key_record)
     if user is None:
         return None
     role = user.get("role", "")
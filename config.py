@@ -173,6 +173,24 @@ class RetrievalConfig(BaseSettings):
         default=1000,
         description='Upper bound (latency ceiling) for the auto-sized semantic candidate pool.'
     )
+    prefilter_max_rows: int = Field(
+        default=10000,
+        ge=0,
+        description='Filtered Postgres searches matching at most this many chunks scan them exactly '
+                    'through the filter indexes instead of post-filtering the HNSW results (0 disables)'
+    )
+    hnsw_ef_search: int = Field(
+        default=40,
+        ge=1,
+        le=1000,
+        description='Minimum hnsw.ef_search for Postgres vector queries; raised per query from '
+                    'top_k and the estimated filter selectivity (pgvector caps it at 1000)'
+    )
+    hnsw_iterative_scan: Literal['off', 'relaxed_order', 'strict_order'] = Field(
+        default='relaxed_order',
+        description='hnsw.iterative_scan mode for filtered Postgres vector queries '
+                    '(used only on pgvector 0.8.0+)'
+    )
 
     @field_validator('top_k')
     @classmethod
@@ -271,7 +289,15 @@ class APIConfig(BaseSettings):
     )
     rate_limit_per_minute: int = Field(
         default=60,
-        description='Rate limit per minute per IP'
+        description='Rate limit per minute per API key or client IP'
+    )
+    rate_limit_backend: Literal['memory', 'postgres'] = Field(
+        default='memory',
+        description='Where rate-limit buckets live: per worker process (memory) or shared in Postgres'
+    )
+    rate_limit_route_costs: dict[str, int] = Field(
+        default_factory=dict,
+        description='Extra tokens per request by path without /api/v1, e.g. {"/search": 2}; merged over the defaults'
     )
     require_auth: bool = Field(
         default=False,
@@ -281,6 +307,21 @@ class APIConfig(BaseSettings):
         default=['*'],
         description='Allowed Host headers (TrustedHostMiddleware). Set to specific hostnames in production.'
     )
+    principal_cache_ttl_seconds: int = Field(
+        default=30,
+        ge=0,
+        description='Seconds an authenticated API key principal is cached in process (0 disables)'
+    )
+    write_behind_flush_seconds: float = Field(
+        default=1.0,
+        ge=0,
+        description='Flush interval for buffered last_used_at/activity/indexing-run writes (0 writes synchronously)'
+    )
+    write_behind_max_pending: int = Field(
+        default=10000,
+        ge=1,
+        description='Buffered bookkeeping events per process before new ones are dropped'
+    )
 
     @field_validator('rate_limit_per_minute')
     @classmethod
@@ -290,6 +331,15 @@ class APIConfig(BaseSettings):
             raise ValueError('rate_limit_per_minute must be 0 or greater')
         return v
 
+    @field_validator('rate_limit_route_costs')
+    @classmethod
+    def validate_rate_limit_route_costs(cls, v: dict[str, int]) -> dict[str, int]:
+        """Validate per-route costs; every cost must be at least 1."""
+        for path, cost in v.items():
+            if cost < 1:
+                raise ValueError(f'rate_limit_route_costs[{path!r}] must be 1 or greater')
+        return v
+
 
 class AppConfig(BaseSettings):
     """Main application configuration."""
@@ -0,0 +1,202 @@
+"""
+Cron schedule evaluation shared by the server and desktop schedulers.
+
+Watched-folder schedules are standard five-field cron expressions:
+minute, hour, day-of-month, month, day-of-week. Each field accepts ``*``,
+numbers, names (``jan``-``dec``, ``sun``-``sat``), lists (``1,15``),
+ranges (``1-5``) and steps (``*/15``, ``8-18/2``, ``5/10``). Day-of-week
+0 and 7 are both Sunday. The ``@hourly``, ``@daily`` / ``@midnight``,
+``@weekly``, ``@monthly`` and ``@yearly`` / ``@annually`` shortcuts are
+accepted. As in cron, when both day-of-month and day-of-week are
+restricted, a day matching either one fires.
+
+Schedules are evaluated in UTC, so the server and every desktop client
+agree on when a root is due whatever their local time zone. A root is due
+once the first fire time after its last scan has passed. An expression
+that cannot be parsed falls back to ``DEFAULT_SCHEDULE`` (with a warning);
+``validate_cron`` rejects such expressions when a folder is saved.
+"""
+
+import bisect
+import logging
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCHEDULE = "0 */6 * * *"
+
+# How far ahead next_fire looks before declaring a schedule impossible
+# (e.g. "0 0 30 2 *"); covers every leap-year combination.
+_MAX_SEARCH_YEARS = 8
+
+_MACROS = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+
+_MONTH_NAMES = {
+    name: i for i, name in enumerate(
+        ["jan", "feb", "mar", "apr", "may", "jun",
+         "jul", "aug", "sep", "oct", "nov", "dec"], start=1)
+}
+_DOW_NAMES = {
+    name: i for i, name in enumerate(["sun", "mon", "tue", "wed", "thu", "fri", "sat"])
+}
+
+
+class CronError(ValueError):
+    """Raised for a cron expression that cannot be parsed or never fires."""
+
+
+def _parse_value(token: str, names: dict, lo: int, hi: int, field: str) -> int:
+    value = names.get(token.lower()) if names else None
+    if value is None:
+        if not token.isdigit():
+            raise CronError(f"Invalid {field} value: {token!r}")
+        value = int(token)
+    if not lo <= value <= hi:
+        raise CronError(f"{field} value {value} out of range {lo}-{hi}")
+    return value
+
+
+def _parse_field(text: str, lo: int, hi: int, field: str, names: Optional[dict] = None) -> List[int]:
+    values = set()
+    for part in text.split(","):
+        if not part:
+            raise CronError(f"Empty entry in {field} field")
+        base, _, step_text = part.partition("/")
+        step = 1
+        if step_text:
+            if not step_text.isdigit() or int(step_text) == 0:
+                raise CronError(f"Invalid step in {field} field: {part!r}")
+            step = int(step_text)
+        if base == "*":
+            start, end = lo, hi
+        elif "-" in base:
+            first, _, last = base.partition("-")
+            start = _parse_value(first, names, lo, hi, field)
+            end = _parse_value(last, names, lo, hi, field)
+            if start > end:
+                raise CronError(f"Invalid range in {field} field: {part!r}")
+        else:
+            start = _parse_value(base, names, lo, hi, field)
+            end = hi if step_text else start
+        values.update(range(start, end + 1, step))
+    return sorted(values)
+
+
+class CronSchedule:
+    """A parsed five-field cron expression."""
+
+    def __init__(self, expr: str):
+        text = _MACROS.get(expr.strip().lower(), expr.strip())
+        parts = text.split()
+        if len(parts) != 5:
+            raise CronError(f"Expected 5 cron fields, got {len(parts)}: {expr!r}")
+        minute, hour, dom, month, dow = parts
+        self.expr = expr
+        self.minutes = _parse_field(minute, 0, 59, "minute")
+        self.hours = _parse_field(hour, 0, 23, "hour")
+        self.days = set(_parse_field(dom, 1, 31, "day-of-month"))
+        self.months = set(_parse_field(month, 1, 12, "month", _MONTH_NAMES))
+        self.weekdays = {d % 7 for d in _parse_field(dow, 0, 7, "day-of-week", _DOW_NAMES)}
+        # Cron ORs day-of-month and day-of-week only when both are restricted
+        self._dom_any = dom.startswith("*")
+        self._dow_any = dow.startswith("*")
+
+    def _day_matches(self, dt: datetime) -> bool:
+        in_dom = dt.day in self.days
+        in_dow = (dt.weekday() + 1) % 7 in self.weekdays
+        if self._dom_any or self._dow_any:
+            return in_dom and in_dow
+        return in_dom or in_dow
+
+    def next_fire(self, after: datetime) -> datetime:
+        """Return the first fire time strictly after ``after`` (UTC)."""
+        if after.tzinfo is None:
+            after = after.replace(tzinfo=timezone.utc)
+        t = after.astimezone(timezone.utc).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = t.year + _MAX_SEARCH_YEARS
+        while t.year <= limit:
+            if t.month not in self.months:
+                year, month = (t.year + 1, 1) if t.month == 12 else (t.year, t.month + 1)
+                t = t.replace(year=year, month=month, day=1, hour=0, minute=0)
+                continue
+            if not self._day_matches(t):
+                t = (t + timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            i = bisect.bisect_left(self.hours, t.hour)
+            if i == len(self.hours):
+                t = (t + timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            if self.hours[i] != t.hour:
+                t = t.replace(hour=self.hours[i], minute=0)
+            j = bisect.bisect_left(self.minutes, t.minute)
+            if j == len(self.minutes):
+                t = t.replace(minute=0) + timedelta(hours=1)
+                continue
+            return t.replace(minute=self.minutes[j])
+        raise CronError(f"Cron expression never fires: {self.expr!r}")
+
+
+@lru_cache(maxsize=256)
+def parse_cron(expr: str) -> CronSchedule:
+    """Parse (and cache) a cron expression. Raises CronError."""
+    schedule = CronSchedule(expr)
+    schedule.next_fire(datetime(2000, 1, 1, tzinfo=timezone.utc))  # rejects e.g. Feb 30
+    return schedule
+
+
+def validate_cron(expr: str) -> str:
+    """Return ``expr`` if it is a usable schedule, else raise CronError."""
+    parse_cron(expr)
+    return expr
+
+
+def parse_timestamp(value: Any) -> Optional[datetime]:
+    """Parse a last-run timestamp (ISO string or datetime) as aware UTC."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    else:
+        dt = value
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+def _schedule_or_default(expr: Optional[str]) -> CronSchedule:
+    try:
+        return parse_cron(expr or DEFAULT_SCHEDULE)
+    except CronError as e:
+        logger.warning("%s; using default schedule %r", e, DEFAULT_SCHEDULE)
+        return parse_cron(DEFAULT_SCHEDULE)
+
+
+def next_fire_time(expr: Optional[str], after: datetime) -> datetime:
+    """First fire time of ``expr`` after ``after``; invalid expressions use the default."""
+    return _schedule_or_default(expr).next_fire(after)
+
+
+def next_due_time(expr: Optional[str], last_run: Any) -> Optional[datetime]:
+    """When a root last run at ``last_run`` is next due (None = due now)."""
+    last = parse_timestamp(last_run)
+    if last is None:
+        return None
+    return next_fire_time(expr, last)
+
+
+def is_due(expr: Optional[str], last_run: Any, now: Optional[datetime] = None) -> bool:
+    """Whether a root with schedule ``expr`` last run at ``last_run`` is due."""
+    due = next_due_time(expr, last_run)
+    if due is None:
+        return True
+    return due <= (now or datetime.now(timezone.utc))
@@ -5,10 +5,14 @@ Provides connection pooling, async support, and common database operations
 for the PGVectorRAGIndexer system.
 """
 
+import io
 import logging
 import json
+import math
 import os
+import re
 import threading
+import time
 from contextlib import contextmanager, asynccontextmanager
 from typing import Optional, List, Dict, Any, Tuple, Union, Sequence
 from datetime import datetime, timezone
@@ -19,10 +23,13 @@ from psycopg2.extras import execute_values, RealDictCursor
 from pgvector.psycopg2 import register_vector
 
 from config import get_config
-from path_utils import folder_prefix_like_pattern, NORMALIZED_URI_SQL
+from path_utils import folder_prefix_like_pattern, normalized_uri_prefix_clause, NORMALIZED_URI_SQL
 
 logger = logging.getLogger(__name__)
 
+# How long DatabaseManager.database_size_bytes reuses a reading.
+DATABASE_SIZE_CACHE_SECONDS = 60
+
 
 class DatabaseError(Exception):
     """Base exception for database errors."""
@@ -93,6 +100,8 @@ class DatabaseManager:
         self._pool_semaphore: Optional[threading.BoundedSemaphore] = None
         self._pool_capacity = 0
         self._initialized = False
+        self._pgvector_version: Optional[Tuple[int, ...]] = None
+        self._database_size: Optional[Tuple[int, float]] = None
     
     def initialize(self) -> None:
         """Initialize connection pool."""
@@ -101,17 +110,7 @@ class DatabaseManager:
             return
         
         try:
-            conn_kwargs = dict(
-                host=self.config.host,
-                port=self.config.port,
-                dbname=self.config.name,
-                user=self.config.user,
-                password=self.config.password,
-                connect_timeout=self.config.connect_timeout,
-                options=f"-c statement_timeout={self.config.statement_timeout * 1000}"
-            )
-            if self.config.sslmode:
-                conn_kwargs['sslmode'] = self.config.sslmode
+            conn_kwargs = self._connection_kwargs()
             self._pool_capacity = max(
                 1,
                 int(self.config.pool_size) + max(0, int(self.config.max_overflow)),
@@ -132,6 +131,29 @@ class DatabaseManager:
             logger.error(f"Failed to initialize connection pool: {e}")
             raise ConnectionPoolError(f"Connection pool initialization failed: {e}")
     
+    def _connection_kwargs(self) -> Dict[str, Any]:
+        """psycopg2 connection parameters shared by the pool and dedicated connections."""
+        conn_kwargs = dict(
+            host=self.config.host,
+            port=self.config.port,
+            dbname=self.config.name,
+            user=self.config.user,
+            password=self.config.password,
+            connect_timeout=self.config.connect_timeout,
+            options=f"-c statement_timeout={self.config.statement_timeout * 1000}"
+        )
+        if self.config.sslmode:
+            conn_kwargs['sslmode'] = self.config.sslmode
+        return conn_kwargs
+
+    def connect_dedicated(self):
+        """Open a connection outside the pool.
+
+        For long-lived sessions such as LISTEN loops that would otherwise
+        hold a pool slot forever. The caller owns and closes it.
+        """
+        return psycopg2.connect(**self._connection_kwargs())
+
     def close(self) -> None:
         """Close all connections in the pool."""
         if self._pool:
@@ -289,19 +311,18 @@ class DatabaseManager:
                 cursor.execute("SELECT version();")
                 version = cursor.fetchone()[0]
                 
-                cursor.execute("SELECT COUNT(*) FROM document_chunks;")
-                chunk_count = cursor.fetchone()[0]
-                
+                # Write-time totals (migration 029), not table scans
                 cursor.execute(
-                    "SELECT COUNT(DISTINCT document_id) FROM document_chunks;"
+                    "SELECT COALESCE(SUM(chunk_count), 0), COALESCE(SUM(document_count), 0) "
+                    "FROM corpus_stats"
                 )
-                doc_count = cursor.fetchone()[0]
+                chunk_count, doc_count = cursor.fetchone()
                 
                 return {
                     "status": "healthy",
                     "postgres_version": version,
-                    "total_chunks": chunk_count,
-                    "total_documents": doc_count,
+                    "total_chunks": int(chunk_count),
+                    "total_documents": int(doc_count),
                     "timestamp": datetime.now(timezone.utc).isoformat()
                 }
         except Exception as e:
@@ -312,9 +333,161 @@ class DatabaseManager:
                 "timestamp": datetime.now(timezone.utc).isoformat()
             }
 
+    def database_size_bytes(self) -> int:
+        """``pg_database_size`` of the current database, cached for a minute.
+
+        The size function stats every relation file, so status polls share
+        one reading per ``DATABASE_SIZE_CACHE_SECONDS``.
+        """
+        cached = self._database_size
+        now = time.monotonic()
+        if cached is not None and now - cached[1] < DATABASE_SIZE_CACHE_SECONDS:
+            return cached[0]
+        with self.get_cursor() as cursor:
+            cursor.execute("SELECT pg_database_size(current_database())")
+            size = cursor.fetchone()[0]
+        self._database_size = (size, now)
+        return size
+
+    def pgvector_version(self) -> Tuple[int, ...]:
+        """Installed pgvector version, e.g. ``(0, 8, 0)``; ``()`` if unknown.
+
+        Read once per manager: upgrading the extension needs a restart anyway.
+        """
+        if self._pgvector_version is None:
+            try:
+                with self.get_cursor() as cursor:
+                    cursor.execute("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+                    row = cursor.fetchone()
+            except Exception as e:
+                logger.warning(f"Could not read the pgvector version: {e}")
+                return ()
+            self._pgvector_version = (
+                tuple(int(part) for part in re.findall(r"\d+", row[0])) if row else ()
+            )
+        return self._pgvector_version
+
+    def supports_hnsw_iterative_scan(self) -> bool:
+        """True when pgvector supports ``hnsw.iterative_scan`` (0.8.0+)."""
+        return self.pgvector_version() >= PGVECTOR_ITERATIVE_SCAN_VERSION
+
 
 AUTO_ANALYZE_ENABLED = os.getenv("ENABLE_DB_ANALYZE", "true").lower() in ("1", "true", "yes")
 ANALYZE_INTERVAL_SECONDS = int(os.getenv("DB_ANALYZE_INTERVAL_SECONDS", "300"))
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "500"))
+
+
+# SQL expressions of the bare filter keys. Migrations 027 and 028 index them
+# (under lower() for case-insensitive matches); queries must spell them the
+# same way for the planner to use those expression indexes.
+PROMOTED_FILTER_EXPRESSIONS = {
+    "type": "(metadata->>'type')",
+    "namespace": "(metadata->>'namespace')",
+    "category": "(metadata->>'category')",
+}
+
+# Lower-cased ".ext" suffix of source_uri, indexed by migration 028 (same
+# pattern as get_indexed_extensions); other extensions fall back to ILIKE.
+FILE_EXTENSION_EXPRESSION = r"lower(substring(source_uri from '(\.[A-Za-z0-9]{1,10})$'))"
+_INDEXED_EXTENSION_RE = re.compile(r"\.[A-Za-z0-9]{1,10}")
+
+# pgvector rejects hnsw.ef_search above this value.
+HNSW_MAX_EF_SEARCH = 1000
+
+# First pgvector release with iterative index scans (hnsw.iterative_scan).
+PGVECTOR_ITERATIVE_SCAN_VERSION = (0, 8, 0)
+
+# Filter keys with an index on document_chunks that can drive a prefilter.
+INDEXED_FILTER_KEYS = frozenset({
+    "type", "namespace", "category", "extensions", "allowed_namespaces",
+    "document_id", "source_uri", "path_prefixes", "source_uri_prefix",
+})
+
+
+def promoted_filter_clause(
+    key: str,
+    value: Any,
+    case_insensitive: bool = False,
+) -> Tuple[str, list]:
+    """WHERE clause for a promoted filter key ('type', 'namespace', 'category').
+
+    Both forms are backed by the ``lower(expression)`` indexes.
+    Case-insensitive matches compare lower-cased values, keeping ILIKE only
+    for values that contain a ``%`` wildcard; exact matches recheck the value
+    after the indexed lower() comparison.
+    """
+    column = PROMOTED_FILTER_EXPRESSIONS[key]
+    value = str(value)
+    if case_insensitive:
+        if "%" in value:
+            return f"{column} ILIKE %s", [value]
+        return f"lower({column}) = lower(%s)", [value]
+    return f"(lower({column}) = lower(%s) AND {column} = %s)", [value, value]
+
+
+def metadata_filter_clause(metadata_key: str, value: Any) -> Tuple[str, list]:
+    """WHERE clause for a ``metadata.<key>`` filter (exact match)."""
+    if metadata_key in PROMOTED_FILTER_EXPRESSIONS:
+        return promoted_filter_clause(metadata_key, value)
+    return "metadata->>%s = %s", [metadata_key, value]
+
+
+def extension_filter_clause(extensions: Sequence[str]) -> Tuple[str, list]:
+    """WHERE clause matching any of the given extensions ('.pdf' or 'pdf')."""
+    indexed: List[str] = []
+    clauses: List[str] = []
+    params: list = []
+    for ext in extensions:
+        normalized = _normalize_extension(ext)
+        if _INDEXED_EXTENSION_RE.fullmatch(normalized):
+            indexed.append(normalized.lower())
+        else:
+            clauses.append("source_uri ILIKE %s")
+            params.append(f'%{normalized}')
+    if indexed:
+        clauses.insert(0, f"{FILE_EXTENSION_EXPRESSION} = ANY(%s)")
+        params.insert(0, indexed)
+    return f"({' OR '.join(clauses)})", params
+
+
+def _normalize_extension(ext: str) -> str:
+    return ext if ext.startswith('.') else f'.{ext}'
+
+
+def filter_is_indexable(key: str, value: Any) -> bool:
+    """True when the clause search_similar builds for this filter is index-backed.
+
+    Wildcard ``type`` / ``category`` / ``namespace`` values become ILIKE, and
+    extensions outside the indexed pattern become ``source_uri ILIKE``; no
+    index serves either, so they do not qualify.
+    """
+    if key.startswith('metadata.'):
+        return key[9:] in PROMOTED_FILTER_EXPRESSIONS
+    if key in PROMOTED_FILTER_EXPRESSIONS:
+        return "%" not in str(value)
+    if key == 'extensions':
+        return bool(value) and all(
+            _INDEXED_EXTENSION_RE.fullmatch(_normalize_extension(ext)) for ext in value
+        )
+    if key not in INDEXED_FILTER_KEYS:
+        return False
+    return bool(value) if isinstance(value, list) else True
+
+
+def apply_vector_plan(cursor, plan: Dict[str, Any]) -> None:
+    """Set a DocumentRepository.plan_vector_scan plan's HNSW settings.
+
+    Uses set_config(..., is_local => true), so the settings last until the
+    cursor's transaction ends.
+    """
+    if plan.get("ef_search"):
+        cursor.execute(
+            "SELECT set_config('hnsw.ef_search', %s, true)", (str(plan["ef_search"]),)
+        )
+    if plan.get("iterative_scan"):
+        cursor.execute(
+            "SELECT set_config('hnsw.iterative_scan', %s, true)", (plan["iterative_scan"],)
+        )
 
 
 class DocumentRepository:
@@ -323,7 +496,8 @@ class DocumentRepository:
     # Filter keys that map directly to a SQL column name. Only these may be
     # interpolated into a WHERE clause as a bare identifier; every other key is
     # handled by an explicit branch (metadata.*, type/namespace/category,
-    # extensions, excluded_document_ids, allowed_namespaces, source_uri_like).
+    # extensions, excluded_document_ids, visible_to, allowed_namespaces,
+    # source_uri_like).
     # An unknown key is rejected rather than interpolated — otherwise a
     # caller-supplied filter key becomes SQL injection and can void the
     # AND-joined visibility/exclusion clauses.
@@ -488,19 +662,57 @@ class DocumentRepository:
         SELECT
             document_id,
             source_uri,
-            COUNT(*) as chunk_count,
-            MIN(indexed_at) as indexed_at,
-            (array_agg(metadata ORDER BY indexed_at ASC))[1] as metadata
-        FROM document_chunks
+            chunk_count,
+            first_indexed as indexed_at,
+            metadata
+        FROM documents
         WHERE document_id = %s {vis_sql}
-        GROUP BY document_id, source_uri
         """
 
         with self.db.get_cursor(dict_cursor=True) as cursor:
             cursor.execute(query, (document_id, *vis_params))
             result = cursor.fetchone()
             return dict(result) if result else None
-    
+
+    def get_documents_status(
+        self,
+        document_ids: List[str],
+        visibility: Optional[Tuple[str, list]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the stored file hash and type of many documents in one query.
+
+        Args:
+            document_ids: Document identifiers
+            visibility: Optional (sql_fragment, params) visibility filter;
+                hidden documents are left out as if they did not exist.
+
+        Returns:
+            document_id -> {document_id, source_uri, file_hash, type} for the
+            documents that exist (and are visible)
+        """
+        if not document_ids:
+            return {}
+        vis_sql = ""
+        vis_params: list = []
+        if visibility and visibility[0]:
+            vis_sql = f"AND {visibility[0]}"
+            vis_params = list(visibility[1])
+
+        query = f"""
+        SELECT
+            document_id,
+            source_uri,
+            COALESCE(metadata->>'file_hash', file_hash) AS file_hash,
+            metadata->>'type' AS type
+        FROM documents
+        WHERE document_id = ANY(%s) {vis_sql}
+        """
+
+        with self.db.get_cursor(dict_cursor=True) as cursor:
+            cursor.execute(query, (list(document_ids), *vis_params))
+            return {row['document_id']: dict(row) for row in cursor.fetchall()}
+
     def document_exists(self, document_id: str) -> bool:
         """
         Check if document exists in database.
@@ -511,7 +723,7 @@ class DocumentRepository:
         Returns:
             True if document exists, False otherwise
         """
-        query = "SELECT EXISTS(SELECT 1 FROM document_chunks WHERE document_id = %s)"
+        query = "SELECT EXISTS(SELECT 1 FROM documents WHERE document_id = %s)"
         result = self.db.execute_query(query, (document_id,), fetch=True)
         return result[0][0] if result else False
     
@@ -591,11 +803,11 @@ class DocumentRepository:
             List of document metadata dictionaries or tuple(items, total)
         """
         allowed_sorts = {
-            "indexed_at": "MIN(indexed_at)",
-            "last_updated": "MAX(updated_at)",
+            "indexed_at": "first_indexed",
+            "last_updated": "last_updated",
             "source_uri": "source_uri",
-            "document_type": "(array_agg(metadata->>'type' ORDER BY indexed_at ASC))[1]",
-            "chunk_count": "COUNT(*)",
+            "document_type": "document_type",
+            "chunk_count": "chunk_count",
             "document_id": "document_id",
         }
 
@@ -640,7 +852,7 @@ class DocumentRepository:
         where_params: list = []
         prefix_pattern = folder_prefix_like_pattern(source_prefix) if source_prefix else None
         if prefix_pattern is not None:
-            where_clauses.append(f"{NORMALIZED_URI_SQL} LIKE %s")
+            where_clauses.append("norm_uri LIKE %s")
             where_params.append(prefix_pattern)
         if visibility and visibility[0]:
             where_clauses.append(visibility[0])
@@ -651,15 +863,14 @@ class DocumentRepository:
         SELECT
             document_id,
             source_uri,
-            COUNT(*) as chunk_count,
-            MIN(indexed_at) as indexed_at,
-            MAX(updated_at) as last_updated,
-            (array_agg(metadata->>'type' ORDER BY indexed_at ASC))[1] as document_type,
-            (array_agg(visibility ORDER BY indexed_at ASC))[1] as visibility,
-            (array_agg(owner_id ORDER BY indexed_at ASC))[1] as owner_id
-        FROM document_chunks
+            chunk_count,
+            first_indexed as indexed_at,
+            last_updated,
+            document_type,
+            visibility,
+            owner_id
+        FROM documents
         {where_sql}
-        GROUP BY document_id, source_uri
         ORDER BY {order_by_sql}
         LIMIT %s OFFSET %s
         """
@@ -671,7 +882,7 @@ class DocumentRepository:
         if not with_total:
             return results
 
-        total_query = f"SELECT COUNT(DISTINCT document_id) FROM document_chunks {where_sql}"
+        total_query = f"SELECT COUNT(*) FROM documents {where_sql}"
         with self.db.get_cursor() as cursor:
             cursor.execute(total_query, tuple(where_params))
             total = cursor.fetchone()[0]
@@ -683,7 +894,8 @@ class DocumentRepository:
         query_embedding: List[float],
         top_k: int = 5,
         distance_metric: str = 'cosine',
-        filters: Optional[Dict[str, Any]] = None
+        filters: Optional[Dict[str, Any]] = None,
+        diagnostics: Optional[Dict[str, Any]] = None,
     ) -> List[Dict[str, Any]]:
         """
         Search for similar chunks using vector similarity.
@@ -693,6 +905,8 @@ class DocumentRepository:
             top_k: Number of results to return
             distance_metric: Distance metric ('cosine', 'l2', 'inner_product')
             filters: Optional filters (e.g., {'document_id': 'abc123'})
+            diagnostics: Optional dict that receives the ``vector_plan``
+                chosen by plan_vector_scan
             
         Returns:
             List of matching chunks with metadata
@@ -720,27 +934,33 @@ class DocumentRepository:
                 if key.startswith('metadata.'):
                     # Extract the actual metadata key (e.g., 'metadata.type' -> 'type')
                     metadata_key = key[9:]  # Remove 'metadata.' prefix
-                    where_clauses.append(f"metadata->>%s = %s")
-                    params.append(metadata_key)
-                    params.append(value)
+                    clause, clause_params = metadata_filter_clause(metadata_key, value)
+                    where_clauses.append(clause)
+                    params.extend(clause_params)
                 elif key in ['type', 'namespace', 'category']:
                     # Backward compatibility: bare key names for common metadata fields
                     # Use ILIKE for case-insensitive matching
-                    where_clauses.append(f"metadata->>'{key}' ILIKE %s")
-                    params.append(value)
+                    clause, clause_params = promoted_filter_clause(key, value, case_insensitive=True)
+                    where_clauses.append(clause)
+                    params.extend(clause_params)
                 elif key == 'extensions' and isinstance(value, list) and value:
-                    # Filter by file extension: OR across all requested extensions.
-                    # Each extension is matched case-insensitively at the end of source_uri.
-                    ext_clauses = []
-                    for ext in value:
-                        normalized = ext if ext.startswith('.') else f'.{ext}'
-                        ext_clauses.append("source_uri ILIKE %s")
-                        params.append(f'%{normalized}')
-                    where_clauses.append(f"({' OR '.join(ext_clauses)})")
+                    # Filter by file extension: OR across all requested
+                    # extensions, case-insensitive, via the indexed extension expression.
+                    clause, clause_params = extension_filter_clause(value)
+                    where_clauses.append(clause)
+                    params.extend(clause_params)
                 elif key == 'excluded_document_ids':
                     if isinstance(value, list) and value:
                         where_clauses.append("document_id != ALL(%s)")
                         params.append(list(value))
+                elif key == 'visible_to':
+                    # Access predicate from document_visibility.
+                    # search_visibility_for_key_record.
+                    if isinstance(value, dict):
+                        from document_visibility import visibility_where_clause
+                        vis_sql, vis_params = visibility_where_clause(value.get("user_id"))
+                        where_clauses.append(vis_sql)
+                        params.extend(vis_params)
                 elif key == 'allowed_namespaces':
                     if isinstance(value, list):
                         if value:
@@ -758,12 +978,11 @@ class DocumentRepository:
                             if p is not None
                         ]
                         if patterns:
-                            like_sql = f"{NORMALIZED_URI_SQL} LIKE ANY(%s)"
-                            if key == 'path_prefixes':
-                                where_clauses.append(f"({like_sql})")
-                            else:
-                                where_clauses.append(f"NOT ({like_sql})")
-                            params.append(patterns)
+                            clause, clause_params = normalized_uri_prefix_clause(
+                                patterns, exclude=(key == 'excluded_path_prefixes')
+                            )
+                            where_clauses.append(clause)
+                            params.extend(clause_params)
                 else:
                     # Direct column match (e.g., document_id, source_uri).
                     # Reject unknown keys — interpolating an arbitrary key is
@@ -774,31 +993,196 @@ class DocumentRepository:
                     params.append(value)
 
         where_sql = f"WHERE {' AND '.join(where_clauses)}" if where_clauses else ""
+        columns = "chunk_id, document_id, chunk_index, text_content, source_uri, indexed_at, metadata"
+
+        plan = self.plan_vector_scan(filters, where_clauses, params, top_k)
+        if diagnostics is not None:
+            diagnostics["vector_plan"] = plan
+
+        if plan["strategy"] == "exact":
+            # Few rows match: rank them all exactly. MATERIALIZED keeps the
+            # planner from pushing the filter under the HNSW scan.
+            query = f"""
+            WITH filtered AS MATERIALIZED (
+                SELECT {columns}, embedding
+                FROM document_chunks
+                {where_sql}
+            )
+            SELECT {columns}, embedding {operator} %s::vector AS distance
+            FROM filtered
+            ORDER BY distance
+            LIMIT %s
+            """
+            params = [*params, embedding_str, top_k]
+        else:
+            query = f"""
+            SELECT {columns}, embedding {operator} %s::vector AS distance
+            FROM document_chunks
+            {where_sql}
+            ORDER BY distance
+            LIMIT %s
+            """
+            if plan["iterative_scan"] == "relaxed_order":
+                # Relaxed iterative scans may return rows slightly out of order.
+                query = f"""
+                WITH ann AS MATERIALIZED ({query})
+                SELECT * FROM ann ORDER BY distance
+                """
+            params = [embedding_str, *params, top_k]
 
-        query = f"""
-        SELECT
-            chunk_id,
-            document_id,
-            chunk_index,
-            text_content,
-            source_uri,
-            indexed_at,
-            metadata,
-            embedding {operator} %s::vector AS distance
-        FROM document_chunks
-        {where_sql}
-        ORDER BY distance
-        LIMIT %s
-        """
-        
-        params.insert(0, embedding_str)
-        params.append(top_k)
-        
         with self.db.get_cursor(dict_cursor=True) as cursor:
+            apply_vector_plan(cursor, plan)
             cursor.execute(query, params)
             results = cursor.fetchall()
             return [dict(row) for row in results]
 
+    def _probe_filtered_rows(
+        self,
+        filters: Optional[Dict[str, Any]],
+        where_clauses: Sequence[str],
+        params: Sequence[Any],
+    ) -> Optional[int]:
+        """Count the filtered chunks, up to ``retrieval.prefilter_max_rows + 1``.
+
+        Returns None (no probe) unless some filter's clause is index-backed
+        (see filter_is_indexable), so the count never turns into a full scan.
+        """
+        max_rows = get_config().retrieval.prefilter_max_rows
+        if max_rows <= 0 or not filters or not where_clauses:
+            return None
+        if not any(filter_is_indexable(key, value) for key, value in filters.items()):
+            return None
+        with self.db.get_cursor(dict_cursor=True) as cursor:
+            cursor.execute(
+                f"""
+                SELECT COUNT(*) AS count FROM (
+                    SELECT 1 FROM document_chunks
+                    WHERE {' AND '.join(where_clauses)}
+                    LIMIT %s
+                ) AS probe
+                """,
+                [*params, max_rows + 1],
+            )
+            return cursor.fetchone()['count']
+
+    def prefilter_is_selective(
+        self,
+        filters: Optional[Dict[str, Any]],
+        where_clauses: Sequence[str],
+        params: Sequence[Any],
+    ) -> bool:
+        """Choose between an exact scan of the filtered chunks and ANN + post-filter.
+
+        With the HNSW index, pgvector applies WHERE clauses to the nearest
+        neighbours it already found, so a selective filter returns too few
+        rows. When an index-backed filter (see filter_is_indexable) matches
+        at most ``retrieval.prefilter_max_rows`` chunks (counted with a
+        bounded probe), the caller should rank those rows exactly instead.
+        """
+        matched = self._probe_filtered_rows(filters, where_clauses, params)
+        return matched is not None and matched <= get_config().retrieval.prefilter_max_rows
+
+    def _estimate_filtered_rows(
+        self,
+        where_clauses: Sequence[str],
+        params: Sequence[Any],
+    ) -> Tuple[Optional[int], Optional[int]]:
+        """Planner estimates of (filtered chunks, all chunks); Nones if unknown."""
+        with self.db.get_cursor(dict_cursor=True) as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint AS total FROM pg_class "
+                "WHERE oid = 'document_chunks'::regclass"
+            )
+            total = cursor.fetchone()['total']
+            if total is None or total <= 0:
+                # Never analyzed: there is nothing to scale by.
+                return None, None
+            cursor.execute(
+                "EXPLAIN (FORMAT JSON) SELECT 1 FROM document_chunks "
+                f"WHERE {' AND '.join(where_clauses)}",
+                list(params),
+            )
+            explain = cursor.fetchone()['QUERY PLAN']
+            if isinstance(explain, str):
+                explain = json.loads(explain)
+            return int(explain[0]['Plan']['Plan Rows']), int(total)
+
+    def plan_vector_scan(
+        self,
+        filters: Optional[Dict[str, Any]],
+        where_clauses: Sequence[str],
+        params: Sequence[Any],
+        limit: int,
+    ) -> Dict[str, Any]:
+        """Decide how a filtered ``ORDER BY embedding <op> %s LIMIT n`` should run.
+
+        An HNSW scan returns at most ``hnsw.ef_search`` neighbours before the
+        WHERE clause is applied, so with a filter matching a fraction ``s`` of
+        the chunks it yields about ``ef_search * s`` rows. The returned plan
+        (also reported in search diagnostics) has:
+
+        - ``strategy``: ``"exact"`` ranks the filtered rows in a MATERIALIZED
+          CTE; ``"hnsw"`` walks the index.
+        - ``ef_search``: ``limit / s``, at least ``retrieval.hnsw_ef_search``
+          and at most pgvector's 1000. With iterative scans the index keeps
+          going until enough rows pass the filter, so ``limit`` is enough.
+        - ``iterative_scan``: the ``hnsw.iterative_scan`` mode, on pgvector
+          0.8+ when enabled by ``retrieval.hnsw_iterative_scan``.
+        - ``matched_rows`` / ``selectivity``: the counts behind the choice,
+          from the bounded probe or, failing that, the planner estimate.
+
+        The exact scan is used when the probe finds at most
+        ``retrieval.prefilter_max_rows`` rows, or, when no probe ran, when the
+        estimate is that small and even the largest ef_search could not
+        return ``limit`` rows.
+        """
+        config = get_config().retrieval
+        plan: Dict[str, Any] = {
+            "strategy": "hnsw",
+            "ef_search": min(max(config.hnsw_ef_search, limit), HNSW_MAX_EF_SEARCH),
+            "iterative_scan": None,
+            "matched_rows": None,
+            "selectivity": None,
+        }
+        if not where_clauses:
+            return plan
+
+        matched = self._probe_filtered_rows(filters, where_clauses, params)
+        if matched is not None and matched <= config.prefilter_max_rows:
+            plan.update(strategy="exact", ef_search=None, matched_rows=matched)
+            return plan
+
+        if config.hnsw_iterative_scan != "off" and self.db.supports_hnsw_iterative_scan():
+            plan["iterative_scan"] = config.hnsw_iterative_scan
+            return plan
+
+        try:
+            estimated, total = self._estimate_filtered_rows(where_clauses, params)
+        except Exception as e:
+            # Planning must never fail a search; keep the default plan.
+            logger.warning(f"Filter selectivity estimate failed: {e}")
+            return plan
+        if estimated is None:
+            return plan
+        selectivity = min(1.0, max(estimated, 1) / total)
+        plan["matched_rows"] = estimated
+        plan["selectivity"] = round(selectivity, 6)
+        wanted = min(limit, estimated)
+        # A probe that ran already counted more than prefilter_max_rows
+        # rows, so a smaller estimate is a planner underestimate.
+        if (
+            matched is None
+            and HNSW_MAX_EF_SEARCH * selectivity < wanted
+            and estimated <= config.prefilter_max_rows
+        ):
+            plan.update(strategy="exact", ef_search=None)
+            return plan
+        plan["ef_search"] = min(
+            max(config.hnsw_ef_search, math.ceil(limit / selectivity)),
+            HNSW_MAX_EF_SEARCH,
+        )
+        return plan
+
     def get_indexed_extensions(
         self,
         visibility: Optional[Tuple[str, list]] = None
@@ -811,10 +1195,9 @@ class DocumentRepository:
             vis_params = list(visibility[1])
 
         query = f"""
-        SELECT DISTINCT
-            LOWER(CONCAT('.', (REGEXP_MATCH(source_uri, '\\.([a-zA-Z0-9]{{1,10}})$'))[1])) AS ext
+        SELECT DISTINCT {FILE_EXTENSION_EXPRESSION} AS ext
         FROM document_chunks
-        WHERE source_uri ~ '\\.([a-zA-Z0-9]{{1,10}})$' {vis_sql}
+        WHERE {FILE_EXTENSION_EXPRESSION} IS NOT NULL {vis_sql}
         ORDER BY ext
         """
         with self.db.get_cursor() as cursor:
@@ -837,48 +1220,70 @@ class DocumentRepository:
         Returns:
             Dictionary with various statistics
         """
-        vis_where = ""
-        vis_params: tuple = ()
+        totals = self.get_corpus_totals(visibility=visibility)
+        total_documents = totals["total_documents"]
+        total_chunks = totals["total_chunks"]
+        avg_chunks = round(total_chunks / total_documents) if total_documents else 0
+
+        return {
+            "total_chunks": total_chunks,
+            "total_documents": total_documents,
+            "avg_chunks_per_document": avg_chunks,
+            "database_size_bytes": self.db.database_size_bytes(),
+        }
+
+    def get_corpus_totals(
+        self,
+        visibility: Optional[Tuple[str, list]] = None
+    ) -> Dict[str, int]:
+        """
+        Document, chunk and quarantined-document totals.
+
+        Sums the few matching rows of the write-time ``corpus_stats``
+        table (migration 029) instead of scanning ``documents``.
+
+        Args:
+            visibility: Optional (sql_fragment, params) visibility filter
+
+        Returns:
+            Dict with total_documents, total_chunks, quarantined_documents
+        """
+        where = ""
+        params: list = []
         if visibility and visibility[0]:
-            vis_where = f"WHERE {visibility[0]}"
-            vis_params = tuple(visibility[1])
+            where = f"WHERE {visibility[0]}"
+            params = list(visibility[1])
 
         with self.db.get_cursor() as cursor:
-            # Total chunks
-            cursor.execute(f"SELECT COUNT(*) FROM document_chunks {vis_where}", vis_params or None)
-            total_chunks = cursor.fetchone()[0]
+            cursor.execute(f"""
+                SELECT
+                    COALESCE(SUM(document_count), 0),
+                    COALESCE(SUM(chunk_count), 0),
+                    COALESCE(SUM(quarantined_count), 0)
+                FROM corpus_stats
+                {where}
+            """, params or None)
+            documents, chunks, quarantined = cursor.fetchone()
+
+        return {
+            "total_documents": int(documents),
+            "total_chunks": int(chunks),
+            "quarantined_documents": int(quarantined),
+        }
 
-            # Total documents
-            cursor.execute(
-                f"SELECT COUNT(DISTINCT document_id) FROM document_chunks {vis_where}",
-                vis_params or None,
-            )
-            total_documents = cursor.fetchone()[0]
+    def rebuild_corpus_stats(self) -> Dict[str, int]:
+        """
+        Recompute ``corpus_stats`` and ``indexing_run_stats`` from scratch.
 
-            # Average chunks per document
-            cursor.execute(f"""
-                SELECT AVG(chunk_count)::INTEGER
-                FROM (
-                    SELECT COUNT(*) as chunk_count
-                    FROM document_chunks
-                    {vis_where}
-                    GROUP BY document_id
-                ) subq
-            """, vis_params or None)
-            avg_chunks = cursor.fetchone()[0] or 0
-            
-            # Database size in bytes
-            cursor.execute("""
-                SELECT pg_database_size(current_database())
-            """)
-            db_size_bytes = cursor.fetchone()[0]
-            
-            return {
-                "total_chunks": total_chunks,
-                "total_documents": total_documents,
-                "avg_chunks_per_document": avg_chunks,
-                "database_size_bytes": db_size_bytes
-            }
+        Both are maintained by triggers; this is for repairing them or
+        covering data written while the triggers were absent.
+
+        Returns:
+            The corpus totals after the rebuild
+        """
+        with self.db.get_cursor() as cursor:
+            cursor.execute("SELECT rebuild_corpus_stats()")
+        return self.get_corpus_totals()
     
     def get_metadata_keys(
         self,
@@ -888,6 +1293,9 @@ class DocumentRepository:
         """
         Get all unique metadata keys across all documents.
 
+        Reads the write-time ``metadata_catalog`` (migration 024) rather
+        than scanning chunk metadata.
+
         Args:
             pattern: Optional SQL LIKE pattern to filter keys (e.g., 't%' for keys starting with 't')
             visibility: Optional (sql_fragment, params) visibility filter
@@ -895,75 +1303,129 @@ class DocumentRepository:
         Returns:
             List of unique metadata keys
         """
-        vis_sql = ""
-        vis_params: list = []
+        conditions = ["doc_count > 0"]
+        params: list = []
         if visibility and visibility[0]:
-            vis_sql = f"AND {visibility[0]}"
-            vis_params = list(visibility[1])
-
-        # Use subquery to work around set-returning function limitation
+            conditions.append(visibility[0])
+            params.extend(visibility[1])
         if pattern:
-            query = f"""
-            SELECT DISTINCT key
-            FROM (
-                SELECT jsonb_object_keys(metadata) as key
-                FROM document_chunks
-                WHERE metadata IS NOT NULL AND metadata != '{{}}'::jsonb {vis_sql}
-            ) subq
-            WHERE key LIKE %s
-            ORDER BY key
-            """
-            params = vis_params + [pattern]
-        else:
-            query = f"""
-            SELECT DISTINCT jsonb_object_keys(metadata) as key
-            FROM document_chunks
-            WHERE metadata IS NOT NULL AND metadata != '{{}}'::jsonb {vis_sql}
-            ORDER BY key
-            """
-            params = vis_params
+            conditions.append("key LIKE %s")
+            params.append(pattern)
+        where = " AND ".join(conditions)
+
+        # Keys with per-document values (file_path, upload time) have one
+        # catalog row per document, so walk the distinct keys through the
+        # (key, value, owner) index instead of aggregating every row.
+        query = f"""
+        WITH RECURSIVE keys(key) AS (
+            SELECT (SELECT MIN(key) FROM metadata_catalog WHERE {where})
+            UNION ALL
+            SELECT (
+                SELECT MIN(key) FROM metadata_catalog
+                WHERE key > keys.key AND {where}
+            )
+            FROM keys
+            WHERE keys.key IS NOT NULL
+        )
+        SELECT key FROM keys WHERE key IS NOT NULL
+        """
 
         with self.db.get_cursor(dict_cursor=True) as cursor:
-            cursor.execute(query, params if params else None)
+            cursor.execute(query, params + params)
             results = cursor.fetchall()
             return [row['key'] for row in results]
 
-    def get_metadata_values(
+    def get_metadata_value_counts(
         self,
         key: str,
+        prefix: Optional[str] = None,
         limit: int = 100,
         visibility: Optional[Tuple[str, list]] = None
-    ) -> List[str]:
+    ) -> List[Dict[str, Any]]:
         """
-        Get all unique values for a specific metadata key.
+        Get the values of a metadata key with the number of documents
+        carrying each one, from ``metadata_catalog``.
+
+        Counts are per document and only include documents visible under
+        ``visibility``.
 
         Args:
             key: The metadata key to get values for
+            prefix: Optional case-sensitive value prefix
             limit: Maximum number of values to return
             visibility: Optional (sql_fragment, params) visibility filter
 
         Returns:
-            List of unique values for the key
+            List of ``{"value": ..., "doc_count": ...}`` ordered by value
         """
-        vis_sql = ""
-        vis_params: list = []
+        conditions = ["key = %s", "value <> ''", "doc_count > 0"]
+        params: list = [key]
+        if prefix:
+            conditions.append("value LIKE %s")
+            escaped = prefix.replace("\\", "\\\\").replace("%", r"\%").replace("_", r"\_")
+            params.append(escaped + "%")
         if visibility and visibility[0]:
-            vis_sql = f"AND {visibility[0]}"
-            vis_params = list(visibility[1])
+            conditions.append(visibility[0])
+            params.extend(visibility[1])
 
         query = f"""
-        SELECT DISTINCT metadata->>%s as value
-        FROM document_chunks
-        WHERE metadata->>%s IS NOT NULL {vis_sql}
+        SELECT value, SUM(doc_count)::int AS doc_count
+        FROM metadata_catalog
+        WHERE {' AND '.join(conditions)}
+        GROUP BY value
         ORDER BY value
         LIMIT %s
         """
+        params.append(limit)
 
         with self.db.get_cursor(dict_cursor=True) as cursor:
-            cursor.execute(query, (key, key, *vis_params, limit))
-            results = cursor.fetchall()
-            return [row['value'] for row in results if row['value']]
-    
+            cursor.execute(query, params)
+            return [
+                {"value": row['value'], "doc_count": row['doc_count']}
+                for row in cursor.fetchall()
+            ]
+
+    def get_metadata_values(
+        self,
+        key: str,
+        limit: int = 100,
+        visibility: Optional[Tuple[str, list]] = None,
+        prefix: Optional[str] = None
+    ) -> List[str]:
+        """
+        Get all unique values for a specific metadata key.
+
+        Args:
+            key: The metadata key to get values for
+            limit: Maximum number of values to return
+            visibility: Optional (sql_fragment, params) visibility filter
+            prefix: Optional case-sensitive value prefix
+
+        Returns:
+            List of unique values for the key
+        """
+        return [
+            row['value']
+            for row in self.get_metadata_value_counts(
+                key, prefix=prefix, limit=limit, visibility=visibility
+            )
+        ]
+
+    def rebuild_metadata_catalog(self) -> int:
+        """
+        Recompute ``metadata_catalog`` from the documents table.
+
+        The catalog is maintained by triggers; this is for repairing it or
+        covering data written while the triggers were absent.
+
+        Returns:
+            Number of catalog rows after the rebuild
+        """
+        with self.db.get_cursor() as cursor:
+            cursor.execute("SELECT rebuild_metadata_catalog()")
+            cursor.execute("SELECT COUNT(*) FROM metadata_catalog")
+            return cursor.fetchone()[0]
+
     def preview_delete(
         self,
         filters: Dict[str, Any],
@@ -986,16 +1448,16 @@ class DocumentRepository:
 
         for key, value in filters.items():
             if key.startswith('metadata.'):
-                metadata_key = key[9:]
-                where_clauses.append(f"metadata->>%s = %s")
-                params.append(metadata_key)
-                params.append(value)
+                clause, clause_params = metadata_filter_clause(key[9:], value)
+                where_clauses.append(clause)
+                params.extend(clause_params)
             elif key in ['type', 'namespace', 'category']:
                 # Skip wildcard value (match all)
                 if value == '*':
                     continue
-                where_clauses.append(f"metadata->>'{key}' = %s")
-                params.append(value)
+                clause, clause_params = promoted_filter_clause(key, value)
+                where_clauses.append(clause)
+                params.extend(clause_params)
             elif key == 'source_uri_like':
                 # Case-insensitive matching tolerant to Windows backslashes and control characters.
                 # Accept both SQL LIKE wildcards and UI glob wildcards (*, ?).
@@ -1067,16 +1529,16 @@ class DocumentRepository:
 
         for key, value in filters.items():
             if key.startswith('metadata.'):
-                metadata_key = key[9:]
-                where_clauses.append(f"metadata->>%s = %s")
-                params.append(metadata_key)
-                params.append(value)
+                clause, clause_params = metadata_filter_clause(key[9:], value)
+                where_clauses.append(clause)
+                params.extend(clause_params)
             elif key in ['type', 'namespace', 'category']:
                 # Skip wildcard value (match all)
                 if value == '*':
                     continue
-                where_clauses.append(f"metadata->>'{key}' = %s")
-                params.append(value)
+                clause, clause_params = promoted_filter_clause(key, value)
+                where_clauses.append(clause)
+                params.extend(clause_params)
             elif key == 'source_uri_like':
                 # Case-insensitive matching consistent with preview_delete
                 normalized = self._normalize_source_uri_like(value)
@@ -1114,31 +1576,27 @@ class DocumentRepository:
             logger.info(f"Bulk deleted {deleted_count} chunks matching filters: {filters}")
             return deleted_count
     
-    def export_documents(self, filters: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """
-        Export documents matching filters as JSON (for backup before delete).
-        
-        Args:
-            filters: Filter criteria (same format as search_similar)
-            
-        Returns:
-            List of document chunks with all data
+    def _export_filter_clauses(self, filters: Dict[str, Any]) -> Tuple[List[str], list]:
+        """Build WHERE clauses and params for export filters.
+
+        Shared by the buffered JSON export and the streaming export so both
+        accept exactly the same filter keys.
         """
         where_clauses = []
         params = []
         
         for key, value in filters.items():
             if key.startswith('metadata.'):
-                metadata_key = key[9:]
-                where_clauses.append(f"metadata->>%s = %s")
-                params.append(metadata_key)
-                params.append(value)
+                clause, clause_params = metadata_filter_clause(key[9:], value)
+                where_clauses.append(clause)
+                params.extend(clause_params)
             elif key in ['type', 'namespace', 'category']:
                 # Skip wildcard value (match all)
                 if value == '*':
                     continue
-                where_clauses.append(f"metadata->>'{key}' = %s")
-                params.append(value)
+                clause, clause_params = promoted_filter_clause(key, value)
+                where_clauses.append(clause)
+                params.extend(clause_params)
             elif key == 'source_uri_like':
                 # LIKE pattern matching for source_uri
                 normalized = self._normalize_source_uri_like(value)
@@ -1156,6 +1614,22 @@ class DocumentRepository:
                 where_clauses.append(f"{key} = %s")
                 params.append(value)
 
+        return where_clauses, params
+
+    def export_documents(self, filters: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Export documents matching filters as JSON (for backup before delete).
+        
+        Buffers the whole result; prefer ``iter_export_chunks`` for large
+        exports.
+        
+        Args:
+            filters: Filter criteria (same format as search_similar)
+            
+        Returns:
+            List of document chunks with all data
+        """
+        where_clauses, params = self._export_filter_clauses(filters)
         where_sql = f"WHERE {' AND '.join(where_clauses)}" if where_clauses else ""
 
         # Export all chunk data
@@ -1232,6 +1706,197 @@ class DocumentRepository:
         logger.info(f"Restored {len(chunks_to_insert)} chunks from backup")
         return len(chunks_to_insert)
 
+    def iter_export_chunks(
+        self,
+        filters: Dict[str, Any],
+        batch_size: int = EXPORT_BATCH_SIZE,
+    ):
+        """
+        Stream chunks matching filters in ``(document_id, chunk_index)`` order.
+
+        Uses keyset pagination on the ``(document_id, chunk_index)`` unique
+        index: each page is a short, independent query, so a slow consumer
+        never pins a pooled connection or an open transaction for the whole
+        export.  Embeddings are yielded as float32 numpy arrays (or None).
+
+        Args:
+            filters: Filter criteria (same format as export_documents)
+            batch_size: Rows fetched per page
+
+        Yields:
+            Dict per chunk with the same keys as export_documents
+        """
+        where_clauses, params = self._export_filter_clauses(filters)
+        batch_size = max(1, int(batch_size))
+        last_key: Optional[Tuple[str, int]] = None
+
+        while True:
+            page_clauses = list(where_clauses)
+            page_params = list(params)
+            if last_key is not None:
+                page_clauses.append("(document_id, chunk_index) > (%s, %s)")
+                page_params.extend(last_key)
+            where_sql = f"WHERE {' AND '.join(page_clauses)}" if page_clauses else ""
+            query = f"""
+            SELECT
+                chunk_id,
+                document_id,
+                chunk_index,
+                text_content,
+                source_uri,
+                embedding,
+                metadata,
+                indexed_at
+            FROM document_chunks
+            {where_sql}
+            ORDER BY document_id, chunk_index
+            LIMIT %s
+            """
+            page_params.append(batch_size)
+
+            with self.db.get_cursor(dict_cursor=True) as cursor:
+                cursor.execute(query, page_params)
+                rows = cursor.fetchall()
+
+            for row in rows:
+                embedding = row['embedding']
+                if hasattr(embedding, 'to_numpy'):
+                    # Newer pgvector adapters return a Vector wrapper
+                    embedding = embedding.to_numpy()
+                yield {
+                    'chunk_id': row['chunk_id'],
+                    'document_id': row['document_id'],
+                    'chunk_index': row['chunk_index'],
+                    'text_content': row['text_content'],
+                    'source_uri': row['source_uri'],
+                    'embedding': embedding,
+                    'metadata': row['metadata'],
+                    'indexed_at': row['indexed_at'].isoformat() if row['indexed_at'] else None
+                }
+
+            if len(rows) < batch_size:
+                return
+            last_key = (rows[-1]['document_id'], rows[-1]['chunk_index'])
+
+    def restore_chunk_batch(
+        self,
+        chunks: Sequence[Dict[str, Any]],
+        created_document_ids: Optional[set] = None,
+    ) -> int:
+        """
+        Restore one bounded batch of chunks through COPY.
+
+        Rows are COPYed into a session-local staging table and moved into
+        ``document_chunks`` with ``ON CONFLICT DO NOTHING`` in the same
+        transaction, so each batch is atomic and existing chunks are kept.
+
+        Args:
+            chunks: Chunk dicts; ``embedding`` is a sequence of floats, a
+                pgvector text literal, or None
+            created_document_ids: Documents created by this restore so far.
+                When given, restore is per document: chunks of a document
+                that already exists and is not in the set are skipped, and
+                documents this batch creates are added to the set.
+
+        Returns:
+            Number of chunks actually inserted
+        """
+        if not chunks:
+            return 0
+
+        buffer = io.StringIO()
+        for chunk in chunks:
+            metadata = chunk.get('metadata')
+            if metadata is not None and not isinstance(metadata, str):
+                metadata = json.dumps(metadata)
+            buffer.write('\t'.join((
+                _copy_text_value(chunk['document_id']),
+                _copy_text_value(int(chunk['chunk_index'])),
+                _copy_text_value(chunk['text_content']),
+                _copy_text_value(chunk['source_uri']),
+                _copy_text_value(_vector_literal(chunk.get('embedding'))),
+                _copy_text_value(metadata),
+            )))
+            buffer.write('\n')
+        buffer.seek(0)
+
+        with self.db.get_cursor() as cursor:
+            cursor.execute(
+                """
+                CREATE TEMP TABLE IF NOT EXISTS _restore_staging (
+                    document_id TEXT,
+                    chunk_index INTEGER,
+                    text_content TEXT,
+                    source_uri TEXT,
+                    embedding VECTOR,
+                    metadata JSONB
+                ) ON COMMIT DELETE ROWS
+                """
+            )
+            cursor.copy_expert(
+                "COPY _restore_staging "
+                "(document_id, chunk_index, text_content, source_uri, embedding, metadata) "
+                "FROM STDIN",
+                buffer,
+            )
+            if created_document_ids is None:
+                cursor.execute(
+                    """
+                    INSERT INTO document_chunks
+                    (document_id, chunk_index, text_content, source_uri, embedding, metadata)
+                    SELECT document_id, chunk_index, text_content, source_uri, embedding,
+                           COALESCE(metadata, '{}'::jsonb)
+                    FROM _restore_staging
+                    ON CONFLICT (document_id, chunk_index) DO NOTHING
+                    """
+                )
+                inserted = cursor.rowcount
+            else:
+                own = list({c['document_id'] for c in chunks} & created_document_ids)
+                cursor.execute(
+                    """
+                    INSERT INTO document_chunks
+                    (document_id, chunk_index, text_content, source_uri, embedding, metadata)
+                    SELECT s.document_id, s.chunk_index, s.text_content, s.source_uri,
+                           s.embedding, COALESCE(s.metadata, '{}'::jsonb)
+                    FROM _restore_staging s
+                    WHERE s.document_id = ANY(%s)
+                       OR NOT EXISTS (
+                           SELECT 1 FROM document_chunks c
+                           WHERE c.document_id = s.document_id
+                       )
+                    ON CONFLICT (document_id, chunk_index) DO NOTHING
+                    RETURNING document_id
+                    """,
+                    (own,),
+                )
+                rows = cursor.fetchall()
+                inserted = len(rows)
+                created_document_ids.update(row[0] for row in rows)
+
+        logger.info(f"Restored {inserted} of {len(chunks)} chunks from streamed backup batch")
+        return inserted
+
+
+def _copy_text_value(value: Any) -> str:
+    """Encode a value for PostgreSQL COPY text format."""
+    if value is None:
+        return '\\N'
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
+def _vector_literal(embedding: Any) -> Optional[str]:
+    """Render an embedding as a pgvector text literal."""
+    if embedding is None or isinstance(embedding, str):
+        return embedding
+    return '[' + ','.join(repr(float(v)) for v in embedding) + ']'
+
 
 # Global database manager instance
 _db_manager: Optional[DatabaseManager] = None
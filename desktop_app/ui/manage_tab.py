@@ -277,23 +277,23 @@ class ManageTab(QWidget):
         file_path = pick_save_file(
             self,
             "Save Backup File",
-            "documents_backup.json",
-            "JSON Files (*.json)"
+            "documents_backup.ndjson",
+            "Backup Files (*.ndjson)"
         )
         
         if not file_path:
             return
         
         try:
-            # Export documents
-            response = self.api_client.export_documents(filters)
-            
-            # Save to file
-            with open(file_path, 'w') as f:
-                json.dump(response, f, indent=2)
+            # Stream the export straight to disk (never buffered in memory)
+            summary = self.api_client.export_documents_to_file(filters, file_path)
             
             # Store for undo
-            self.last_backup = response
+            self.last_backup = {
+                "file_path": file_path,
+                "document_count": summary.get("document_count", 0),
+                "chunk_count": summary.get("chunk_count", 0),
+            }
             self.undo_btn.setEnabled(True)
             
             QMessageBox.information(
@@ -301,8 +301,8 @@ class ManageTab(QWidget):
                 "Backup Saved",
                 f"✅ Backup saved successfully!\n\n"
                 f"File: {file_path}\n"
-                f"Documents: {response.get('document_count', 0)}\n"
-                f"Chunks: {response.get('chunk_count', 0)}\n\n"
+                f"Documents: {summary.get('document_count', 0)}\n"
+                f"Chunks: {summary.get('chunk_count', 0)}\n\n"
                 f"You can now safely delete these documents."
             )
             
@@ -478,15 +478,19 @@ class ManageTab(QWidget):
             file_path = pick_open_file(
                 self,
                 "Select Backup File",
-                "JSON Files (*.json)"
+                "Backup Files (*.ndjson *.json)"
             )
             
             if not file_path:
                 return
             
             try:
-                with open(file_path, 'r') as f:
-                    self.last_backup = json.load(f)
+                if file_path.lower().endswith(".json"):
+                    # Legacy .json backup: the whole export as one JSON array of chunks
+                    with open(file_path, 'r') as f:
+                        self.last_backup = json.load(f)
+                else:
+                    self.last_backup = _read_stream_backup_summary(file_path)
             except Exception as e:
                 QMessageBox.critical(
                     self,
@@ -509,8 +513,10 @@ class ManageTab(QWidget):
         
         try:
             # Restore documents
-            backup_data = self.last_backup.get("backup_data", [])
-            response = self.api_client.restore_documents(backup_data)
+            if "backup_data" in self.last_backup:
+                response = self.api_client.restore_documents(self.last_backup["backup_data"])
+            else:
+                response = self.api_client.restore_documents_from_file(self.last_backup["file_path"])
             
             chunks_restored = response.get("chunks_restored", 0)
             
@@ -530,3 +536,26 @@ class ManageTab(QWidget):
                 "Restore Failed",
                 f"Failed to restore documents:\n{str(e)}"
             )
+
+
+def _read_stream_backup_summary(file_path: str) -> dict:
+    """Read document/chunk counts from the footer of an NDJSON backup.
+
+    Only the tail of the file is read, so large backups are not loaded.
+    """
+    summary = {"file_path": file_path, "document_count": 0, "chunk_count": 0}
+    with open(file_path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - 65536))
+        tail = f.read()
+    lines = [line for line in tail.splitlines() if line.strip()]
+    if lines:
+        try:
+            footer = json.loads(lines[-1])
+        except ValueError:
+            footer = None
+        if isinstance(footer, dict) and footer.get("type") == "footer":
+            summary["document_count"] = footer.get("document_count", 0)
+            summary["chunk_count"] = footer.get("chunk_count", 0)
+    return summary
@@ -1,12 +1,17 @@
 import logging
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from PySide6.QtCore import QThread, Signal
+from desktop_app.utils import app_config
+from desktop_app.utils.hash_cache import get_hash_cache
 from desktop_app.utils.hashing import calculate_file_hash
 
 logger = logging.getLogger(__name__)
 
+# Paths checked per /documents/status:batch request before uploading
+UPLOAD_STATUS_PAGE_SIZE = 250
 
 
 
@@ -126,12 +131,18 @@ class DeleteWorker(QThread):
             self.finished.emit(False, str(e))
 
 class UploadWorker(QThread):
-    """Worker thread for uploading multiple documents."""
+    """Worker thread for uploading multiple documents.
+
+    Files are checked and uploaded by a pool of ``concurrency`` threads
+    sharing the API client's session, so the server indexes one file while
+    the client reads the next. ``file_finished`` is still emitted in file
+    order.
+    """
     file_finished = Signal(int, bool, str)  # index, success, message
     all_finished = Signal()
     progress = Signal(str)
 
-    def __init__(self, api_client, files_data):
+    def __init__(self, api_client, files_data, concurrency=None, hash_cache=None):
         """
         Initialize worker.
         
@@ -143,122 +154,194 @@ class UploadWorker(QThread):
                 - force_reindex: bool
                 - document_type: str (optional)
                 - ocr_mode: str (optional) - 'auto', 'skip', or 'only'
+            concurrency: Uploads in flight at once (default: the
+                ``upload_concurrency`` setting)
+            hash_cache: HashCache for local file hashes (default: the
+                app-wide cache)
         """
         super().__init__()
         self.api_client = api_client
         self.files_data = files_data
+        if concurrency is None:
+            concurrency = app_config.get_upload_concurrency()
+        self.concurrency = max(1, int(concurrency))
+        self._hash_cache = hash_cache or get_hash_cache()
         self.is_cancelled = False
+        self._lock = threading.Lock()
+        # Remote status of the pages checked so far (source_uri -> status)
+        self._statuses = {}
+        self._status_pages = set()
+        self._batch_status = True
+        self._timings = {'metadata': 0.0, 'hash': 0.0, 'upload': 0.0}
+
+    def _remote_document(self, index, full_path):
+        """(exists, remote_hash, remote_type) of a file on the server.
+
+        Statuses are fetched a page of files at a time; servers without the
+        batch endpoint are asked one document at a time.
+        """
+        with self._lock:
+            page_no = index // UPLOAD_STATUS_PAGE_SIZE
+            if self._batch_status and page_no not in self._status_pages:
+                self._status_pages.add(page_no)
+                start = page_no * UPLOAD_STATUS_PAGE_SIZE
+                page = self.files_data[start:start + UPLOAD_STATUS_PAGE_SIZE]
+                statuses = self.api_client.get_documents_status(
+                    [fd['full_path'] for fd in page if not fd['force_reindex']]
+                )
+                if isinstance(statuses, dict):
+                    self._statuses.update(statuses)
+                else:
+                    self._batch_status = False
 
-    def run(self):
-        # Timing instrumentation
-        total_metadata_time = 0.0
-        total_hash_time = 0.0
-        total_upload_time = 0.0
-        skipped_count = 0
-        uploaded_count = 0
+            if self._batch_status:
+                entry = self._statuses.get(full_path)
+                if not entry or entry.get('status') == 'missing':
+                    return False, None, None
+                return True, entry.get('file_hash'), entry.get('document_type')
+
+        doc = self.api_client.get_document_metadata(full_path)
+        if not doc:
+            return False, None, None
+        metadata = doc.get('metadata') or {}
+        return True, metadata.get('file_hash'), metadata.get('type')
+
+    def _add_time(self, key, seconds):
+        with self._lock:
+            self._timings[key] += seconds
+
+    def _process_file(self, i, file_data):
+        """Check and upload one file (pool thread).
+
+        Returns (success, message, uploaded), or None if cancelled before
+        the file was started.
+        """
+        if self.is_cancelled:
+            return None
+
+        file_path = file_data['path']
+        full_path = file_data['full_path']
+        force_reindex = file_data['force_reindex']
+        document_type = file_data.get('document_type')
+        ocr_mode = file_data.get('ocr_mode', 'auto')
         
-        for i, file_data in enumerate(self.files_data):
-            if self.is_cancelled:
-                break
+        try:
+            # Check if exists and compare hash
+            needs_force_reindex = force_reindex  # Start with user's setting
+            if not force_reindex:
+                # Get remote document status
+                t0 = time.perf_counter()
+                exists, remote_hash, remote_type = self._remote_document(i, full_path)
+                self._add_time('metadata', time.perf_counter() - t0)
                 
-            file_path = file_data['path']
-            full_path = file_data['full_path']
-            force_reindex = file_data['force_reindex']
-            document_type = file_data.get('document_type')
-            ocr_mode = file_data.get('ocr_mode', 'auto')
-            
-            try:
-                # Check if exists and compare hash
-                needs_force_reindex = force_reindex  # Start with user's setting
-                if not force_reindex:
-                    # Get remote document metadata
+                if exists:
+                    # Local hash (from the cache while the file is unchanged)
+                    self.progress.emit(f"Checking existing document: {file_path.name}...")
                     t0 = time.perf_counter()
-                    doc = self.api_client.get_document_metadata(full_path)
-                    total_metadata_time += time.perf_counter() - t0
+                    local_hash = self._hash_cache.file_hash(file_path, calculate_file_hash)
+                    self._add_time('hash', time.perf_counter() - t0)
                     
-                    if doc:
-                        # Check hash
-                        metadata = doc.get('metadata') or {}
-                        remote_hash = metadata.get('file_hash')
-                        remote_type = metadata.get('type')
-                        
-                        # Calculate local hash
-                        self.progress.emit(f"Checking existing document: {file_path.name}...")
-                        t0 = time.perf_counter()
-                        local_hash = calculate_file_hash(file_path)
-                        total_hash_time += time.perf_counter() - t0
-                        
-                        hash_match = (remote_hash and remote_hash == local_hash)
-                        
-                        # If user specified a type, ensure it matches remote, otherwise we must update
-                        type_match = True
-                        if document_type:
-                            type_match = (remote_type == document_type)
-
-                        if hash_match and type_match:
-                            self.file_finished.emit(i, True, "Document unchanged (skipped)")
-                            skipped_count += 1
-                            continue
-                        
-                        # Hash or type mismatch detected - force reindex for this file
-                        needs_force_reindex = True
-                    # If document doesn't exist (doc is None), no need to force reindex
-
-                self.progress.emit(f"Uploading {file_path.name}...")
-                
-                # Upload (use needs_force_reindex which is True if hash/type mismatch detected)
-                file_start_time = time.perf_counter()
-                self.api_client.upload_document(
-                    file_path=file_path,
-                    custom_source_uri=full_path,
-                    force_reindex=needs_force_reindex,
-                    document_type=document_type,
-                    ocr_mode=ocr_mode
-                )
-                file_elapsed = time.perf_counter() - file_start_time
-                total_upload_time += file_elapsed
-                uploaded_count += 1
-                
-                # Include timing in success message
-                if file_elapsed < 60:
-                    time_str = f"{file_elapsed:.1f}s"
-                else:
-                    time_str = f"{file_elapsed/60:.1f}m"
-                self.file_finished.emit(i, True, f"Upload successful ({time_str})")
-                
-            except Exception as e:
-                error_msg = str(e)
-                is_encrypted = False
-                
-                # For HTTP errors, check response body for encrypted_pdf error type
-                # because exception message doesn't include response content
-                if hasattr(e, 'response') and e.response is not None:
-                    try:
-                        response_json = e.response.json()
-                        detail = response_json.get('detail', {})
-                        if isinstance(detail, dict):
-                            error_type = detail.get('error_type', '')
-                            if error_type == 'encrypted_pdf':
-                                is_encrypted = True
-                                error_msg = detail.get('message', error_msg)
-                    except Exception:
-                        pass  # Response wasn't JSON
-                
-                # Fallback: check message for encrypted/password keywords
-                if not is_encrypted and "403" in str(e):
-                    if "encrypted" in error_msg.lower() or "password" in error_msg.lower():
-                        is_encrypted = True
-                
-                if is_encrypted:
-                    error_msg = f"[ENCRYPTED_PDF]{full_path}|{error_msg}"
-                
-                logger.error(f"Upload failed for {file_path}: {e}")
-                self.file_finished.emit(i, False, error_msg)
+                    hash_match = (remote_hash and remote_hash == local_hash)
+                    
+                    # If user specified a type, ensure it matches remote, otherwise we must update
+                    type_match = True
+                    if document_type:
+                        type_match = (remote_type == document_type)
+
+                    if hash_match and type_match:
+                        return True, "Document unchanged (skipped)", False
+                    
+                    # Hash or type mismatch detected - force reindex for this file
+                    needs_force_reindex = True
+                # If document doesn't exist, no need to force reindex
+
+            self.progress.emit(f"Uploading {file_path.name}...")
+            
+            # Upload (use needs_force_reindex which is True if hash/type mismatch detected)
+            file_start_time = time.perf_counter()
+            self.api_client.upload_document(
+                file_path=file_path,
+                custom_source_uri=full_path,
+                force_reindex=needs_force_reindex,
+                document_type=document_type,
+                ocr_mode=ocr_mode
+            )
+            file_elapsed = time.perf_counter() - file_start_time
+            self._add_time('upload', file_elapsed)
+            
+            # Include timing in success message
+            if file_elapsed < 60:
+                time_str = f"{file_elapsed:.1f}s"
+            else:
+                time_str = f"{file_elapsed/60:.1f}m"
+            return True, f"Upload successful ({time_str})", True
+            
+        except Exception as e:
+            error_msg = str(e)
+            is_encrypted = False
+            
+            # For HTTP errors, check response body for encrypted_pdf error type
+            # because exception message doesn't include response content
+            if hasattr(e, 'response') and e.response is not None:
+                try:
+                    response_json = e.response.json()
+                    detail = response_json.get('detail', {})
+                    if isinstance(detail, dict):
+                        error_type = detail.get('error_type', '')
+                        if error_type == 'encrypted_pdf':
+                            is_encrypted = True
+                            error_msg = detail.get('message', error_msg)
+                except Exception:
+                    pass  # Response wasn't JSON
+            
+            # Fallback: check message for encrypted/password keywords
+            if not is_encrypted and "403" in str(e):
+                if "encrypted" in error_msg.lower() or "password" in error_msg.lower():
+                    is_encrypted = True
+            
+            if is_encrypted:
+                error_msg = f"[ENCRYPTED_PDF]{full_path}|{error_msg}"
+            
+            logger.error(f"Upload failed for {file_path}: {e}")
+            return False, error_msg, False
+
+    def run(self):
+        skipped_count = 0
+        uploaded_count = 0
+        started_at = time.perf_counter()
+
+        if self.concurrency > 1:
+            # One pooled connection per in-flight upload, plus the status checks
+            self.api_client.ensure_connection_pool(self.concurrency + 2)
+
+        # Files are queued in order; a cancelled worker leaves queued files
+        # unstarted and waits for the uploads already in flight.
+        with ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="upload"
+        ) as pool:
+            futures = [
+                pool.submit(self._process_file, i, file_data)
+                for i, file_data in enumerate(self.files_data)
+            ]
+            for i, future in enumerate(futures):
+                result = future.result()
+                if result is None:
+                    continue
+                success, message, uploaded = result
+                if uploaded:
+                    uploaded_count += 1
+                elif success:
+                    skipped_count += 1
+                self.file_finished.emit(i, success, message)
         
         # Log timing summary
+        total_metadata_time = self._timings['metadata']
+        total_hash_time = self._timings['hash']
+        total_upload_time = self._timings['upload']
         total_files = len(self.files_data)
         logger.info(f"\n=== UPLOAD TIMING SUMMARY ===")
         logger.info(f"Total files: {total_files} (uploaded: {uploaded_count}, skipped: {skipped_count})")
+        logger.info(f"Concurrency: {self.concurrency}, wall time: {time.perf_counter() - started_at:.2f}s")
         logger.info(f"Metadata API calls: {total_metadata_time:.2f}s ({total_metadata_time/max(total_files,1)*1000:.1f}ms avg)")
         logger.info(f"Local hash calc:    {total_hash_time:.2f}s ({total_hash_time/max(skipped_count,1)*1000:.1f}ms avg per skipped)")
         logger.info(f"Actual uploads:     {total_upload_time:.2f}s ({total_upload_time/max(uploaded_count,1)*1000:.1f}ms avg)")
@@ -156,6 +156,10 @@ class APIClient:
         self._server_version = self._system._server_version  # Sync deprecated legacy property
         return compatible, msg
 
+    def ensure_connection_pool(self, size: int) -> None:
+        """Keep at least ``size`` pooled connections for parallel uploads."""
+        self._base.ensure_pool_size(size)
+
     def check_document_exists(self, source_uri: str) -> bool:
         """Check if a document with the given source URI already exists."""
         return self._document.check_document_exists(source_uri)
@@ -163,6 +167,14 @@ class APIClient:
     def get_document_metadata(self, source_uri: str) -> Optional[Dict[str, Any]]:
         """Get metadata for a document by source URI."""
         return self._document.get_document_metadata(source_uri)
+
+    def get_documents_status(
+        self,
+        source_uris: List[str],
+        file_hashes: Optional[Dict[str, str]] = None,
+    ) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Check many source URIs in one request (None if unsupported)."""
+        return self._document.get_documents_status(source_uris, file_hashes)
     
     def upload_document(
         self,
@@ -177,6 +189,19 @@ class APIClient:
             file_path, custom_source_uri, force_reindex, document_type, ocr_mode
         )
     
+    def upload_document_resumable(
+        self,
+        file_path: Path,
+        custom_source_uri: Optional[str] = None,
+        force_reindex: bool = False,
+        document_type: Optional[str] = None,
+        ocr_mode: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Upload a document in resumable chunks (None if unsupported)."""
+        return self._document.upload_document_resumable(
+            file_path, custom_source_uri, force_reindex, document_type, ocr_mode
+        )
+    
     def search(
         self,
         query: str,
@@ -253,14 +278,22 @@ class APIClient:
     def restore_documents(self, backup_data: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Restore documents from backup."""
         return self._document.restore_documents(backup_data)
+
+    def export_documents_to_file(self, filters: Dict[str, Any], file_path: str) -> Dict[str, Any]:
+        """Stream an NDJSON backup of documents matching filters to disk."""
+        return self._document.export_documents_to_file(filters, file_path)
+
+    def restore_documents_from_file(self, file_path: str) -> Dict[str, Any]:
+        """Restore documents from an NDJSON backup file."""
+        return self._document.restore_documents_from_file(file_path)
     
     def get_metadata_keys(self, pattern: Optional[str] = None) -> List[str]:
         """Get all unique metadata keys."""
         return self._metadata.get_metadata_keys(pattern=pattern)
     
-    def get_metadata_values(self, key: str) -> List[str]:
+    def get_metadata_values(self, key: str, prefix: Optional[str] = None) -> List[str]:
         """Get all unique values for a metadata key."""
-        return self._metadata.get_metadata_values(key=key)
+        return self._metadata.get_metadata_values(key=key, prefix=prefix)
 
     # ------------------------------------------------------------------
     # Health Dashboard (#4)
@@ -278,6 +311,29 @@ class APIClient:
         """Get details of a single indexing run."""
         return self._indexing.get_indexing_run_detail(run_id=run_id)
 
+    def get_indexing_job(self, job_id: str) -> Dict[str, Any]:
+        """Get the state of a background indexing job."""
+        return self._indexing.get_indexing_job(job_id=job_id)
+
+    def list_indexing_jobs(self, status: Optional[str] = None, limit: int = 50) -> Dict[str, Any]:
+        """List this key's background indexing jobs, with queue statistics."""
+        return self._indexing.list_indexing_jobs(status=status, limit=limit)
+
+    def cancel_indexing_job(self, job_id: str) -> Dict[str, Any]:
+        """Cancel a queued background indexing job."""
+        return self._indexing.cancel_indexing_job(job_id=job_id)
+
+    def wait_for_indexing_job(
+        self,
+        job_id: str,
+        timeout: Optional[float] = None,
+        poll_interval: float = 2.0,
+    ) -> Dict[str, Any]:
+        """Poll a background job until it finishes."""
+        return self._indexing.wait_for_indexing_job(
+            job_id=job_id, timeout=timeout, poll_interval=poll_interval
+        )
+
     # ------------------------------------------------------------------
     # Current Identity
     # ------------------------------------------------------------------
@@ -453,9 +509,10 @@ class APIClient:
         limit: int = 200,
         offset: int = 0,
         source: str = "postgres",
+        cursor: Optional[str] = None,
     ) -> Dict[str, Any]:
         """Get one level of the document tree under parent_path."""
-        return self._document.get_document_tree(parent_path, limit, offset, source)
+        return self._document.get_document_tree(parent_path, limit, offset, source, cursor)
 
     def get_document_tree_stats(self, source: str = "postgres") -> Dict[str, Any]:
         """Get overall document tree statistics."""
@@ -1,8 +1,10 @@
 import logging
+import threading
 import time
 from typing import Optional, Dict, Any
 
 import requests
+from requests.adapters import DEFAULT_POOLSIZE, HTTPAdapter
 
 from desktop_app.utils.errors import APIError, APIConnectionError, APIAuthenticationError, APIRateLimitError
 
@@ -21,6 +23,10 @@ class BaseAPIClient:
     def __init__(self, base_url: str = "http://localhost:8000", api_key: Optional[str] = None, timeout: int = 7200):
         self._session = requests.Session()
         self._timeout = timeout
+        self._pool_size = DEFAULT_POOLSIZE
+        # A 429 on any thread pauses every rate-limit-aware request until then
+        self._rate_limit_lock = threading.Lock()
+        self._rate_limited_until = 0.0
         
         # Initialize properties. Base URL setter handles 'api_base' derivation as well.
         self._api_base: str = ""
@@ -74,6 +80,26 @@ class BaseAPIClient:
         else:
             self._session.headers.pop("X-API-Key", None)
 
+    def ensure_pool_size(self, size: int) -> None:
+        """Keep at least ``size`` pooled connections per host for parallel requests."""
+        if size <= self._pool_size:
+            return
+        for prefix in ("http://", "https://"):
+            self._session.mount(prefix, HTTPAdapter(pool_maxsize=size))
+        self._pool_size = size
+
+    def _wait_for_rate_limit(self) -> None:
+        with self._rate_limit_lock:
+            delay = self._rate_limited_until - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _pause_for_rate_limit(self, delay: float) -> None:
+        with self._rate_limit_lock:
+            self._rate_limited_until = max(
+                self._rate_limited_until, time.monotonic() + delay
+            )
+
     def request(self, method: str, url: str, **kwargs) -> requests.Response:
         """
         Executes HTTP requests mapped via the shared session, enforcing standard timeout
@@ -88,6 +114,9 @@ class BaseAPIClient:
 
         try:
             while True:
+                if retry_on_rate_limit:
+                    # Another thread may have been rate limited; don't stampede
+                    self._wait_for_rate_limit()
                 response = self._session.request(method, url, **kwargs)
 
                 if (
@@ -97,6 +126,7 @@ class BaseAPIClient:
                 ):
                     attempts += 1
                     delay = _rate_limit_retry_delay(response, attempts)
+                    self._pause_for_rate_limit(delay)
                     logger.warning(
                         "Rate limited during %s %s; retrying in %.1fs "
                         "(attempt %d/%d)",
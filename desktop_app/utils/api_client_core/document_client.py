@@ -1,13 +1,25 @@
+import json
 import logging
+import os
 from typing import Dict, Any, List, Optional
 from pathlib import Path
 
 from desktop_app.utils.hashing import calculate_source_id
 from desktop_app.utils.api_client_core.base_client import BaseAPIClient
+from desktop_app.utils.errors import APIError, APIConnectionError
 from desktop_app.utils.api_client_core.request_headers import BULK_INDEXING_HEADERS
 
 logger = logging.getLogger(__name__)
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+EXPORT_DOWNLOAD_CHUNK_BYTES = 1024 * 1024
+# Files at least this large are sent in resumable chunks (POST /uploads)
+RESUMABLE_UPLOAD_MIN_BYTES = 32 * 1024 * 1024
+# A chunk that stalls this long is retried from the server's offset
+UPLOAD_CHUNK_TIMEOUT_SECONDS = 300
+# Consecutive failed chunks before the upload gives up
+UPLOAD_CHUNK_RETRIES = 5
+
 
 class DocumentClient:
     """Domain client for document CRUD, tree management, and locks."""
@@ -38,6 +50,41 @@ class DocumentClient:
             logger.error(f"Error checking document status: {e}")
             return None
     
+    def get_documents_status(
+        self,
+        source_uris: List[str],
+        file_hashes: Optional[Dict[str, str]] = None,
+    ) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Check many source URIs in one request.
+
+        Returns source_uri -> {status, document_id, file_hash, document_type},
+        with status "missing", "unchanged", "changed" (when a hash was sent)
+        or "present". Returns None if the server has no batch endpoint or the
+        request failed, so callers can fall back to per-document lookups.
+        """
+        file_hashes = file_hashes or {}
+        items = []
+        for source_uri in source_uris:
+            item = {"source_uri": source_uri}
+            if file_hashes.get(source_uri):
+                item["file_hash"] = file_hashes[source_uri]
+            items.append(item)
+        try:
+            response = self._base.request(
+                "POST",
+                f"{self._base.api_base}/documents/status:batch",
+                json={"items": items},
+                headers=BULK_INDEXING_HEADERS,
+                retry_on_rate_limit=True,
+            )
+            return {r["source_uri"]: r for r in response.json().get("results", [])}
+        except Exception as e:
+            if getattr(e, "status_code", None) in (404, 405):
+                logger.info("Server has no batch document status endpoint")
+            else:
+                logger.error(f"Error checking document status batch: {e}")
+            return None
+
     def upload_document(
         self,
         file_path: Path,
@@ -46,9 +93,25 @@ class DocumentClient:
         document_type: Optional[str] = None,
         ocr_mode: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Upload and index a document."""
+        """Upload and index a document.
+
+        Large files go through a resumable upload session, so a dropped
+        connection only resends the chunk in flight; servers without
+        ``/uploads`` get a single multipart request.
+        """
         logger.info(f"Uploading document: {file_path} (type: {document_type}, ocr: {ocr_mode})")
-        
+
+        try:
+            large = os.path.getsize(file_path) >= RESUMABLE_UPLOAD_MIN_BYTES
+        except OSError:
+            large = False  # let open() below report it
+        if large:
+            result = self.upload_document_resumable(
+                file_path, custom_source_uri, force_reindex, document_type, ocr_mode
+            )
+            if result is not None:
+                return result
+
         with open(file_path, 'rb') as f:
             files = {'file': (file_path.name, f)}
             data = {'force_reindex': str(force_reindex).lower()}
@@ -70,6 +133,91 @@ class DocumentClient:
             )
             return response.json()
     
+    def upload_document_resumable(
+        self,
+        file_path: Path,
+        custom_source_uri: Optional[str] = None,
+        force_reindex: bool = False,
+        document_type: Optional[str] = None,
+        ocr_mode: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Upload in chunks through an upload session, then index.
+
+        A failed chunk is resent from the offset the server reports.
+        Returns None if the server has no upload session endpoint.
+        """
+        size = os.path.getsize(file_path)
+        try:
+            response = self._base.request(
+                "POST",
+                f"{self._base.api_base}/uploads",
+                json={
+                    "filename": file_path.name,
+                    "size": size,
+                    "force_reindex": force_reindex,
+                    "custom_source_uri": custom_source_uri,
+                    "document_type": document_type,
+                    "ocr_mode": ocr_mode,
+                },
+                headers=BULK_INDEXING_HEADERS,
+                retry_on_rate_limit=True,
+            )
+        except APIError as e:
+            if getattr(e, "status_code", None) in (404, 405):
+                logger.info("Server has no resumable upload endpoint")
+                return None
+            raise
+        session = response.json()
+        upload_url = f"{self._base.api_base}/uploads/{session['upload_id']}"
+        chunk_size = min(session["chunk_size"], session["max_chunk_size"])
+        offset = session["offset"]
+        failures = 0
+
+        with open(file_path, 'rb') as f:
+            while offset < size:
+                f.seek(offset)
+                chunk = f.read(chunk_size)
+                headers = dict(BULK_INDEXING_HEADERS)
+                headers["Content-Range"] = f"bytes {offset}-{offset + len(chunk) - 1}/{size}"
+                headers["Content-Type"] = "application/octet-stream"
+                try:
+                    response = self._base.request(
+                        "PUT",
+                        upload_url,
+                        data=chunk,
+                        headers=headers,
+                        timeout=UPLOAD_CHUNK_TIMEOUT_SECONDS,
+                        retry_on_rate_limit=True,
+                    )
+                    offset = response.json()["offset"]
+                    failures = 0
+                except APIError as e:
+                    status_code = getattr(e, "status_code", None)
+                    failures += 1
+                    if failures > UPLOAD_CHUNK_RETRIES or (
+                        status_code is not None and status_code != 409 and status_code < 500
+                    ):
+                        raise
+                    logger.warning(
+                        f"Chunk at {offset} of {file_path.name} failed ({e}); resuming"
+                    )
+                    try:
+                        offset = self._base.request(
+                            "GET", upload_url, headers=BULK_INDEXING_HEADERS,
+                            retry_on_rate_limit=True,
+                        ).json()["offset"]
+                    except APIConnectionError:
+                        # Resend from here; a 409 will report the real offset
+                        pass
+
+        response = self._base.request(
+            "POST",
+            f"{upload_url}/finalize",
+            headers=BULK_INDEXING_HEADERS,
+            retry_on_rate_limit=True,
+        )
+        return response.json()
+
     def list_documents(
         self,
         *,
@@ -131,7 +279,7 @@ class DocumentClient:
                     "_total_estimated": data.get("total") is None,
                 }
 
-        from desktop_app.utils.errors import APIError
+        from desktop_app.utils.errors import APIError, APIConnectionError
         raise APIError("Unexpected response structure from /documents endpoint")
     
     def get_document(self, document_id: str) -> Dict[str, Any]:
@@ -184,6 +332,59 @@ class DocumentClient:
         )
         return response.json()
 
+    def export_documents_to_file(self, filters: Dict[str, Any], file_path: str) -> Dict[str, Any]:
+        """Stream an NDJSON backup of documents matching filters to disk.
+
+        The body is written as it arrives into ``<file_path>.part`` and only
+        moved into place once the server's footer reports a complete export,
+        so a failed or truncated export never leaves a plausible-looking
+        backup behind.
+
+        Returns:
+            The footer record (``chunk_count``, ``document_count``, ``status``).
+        """
+        partial_path = f"{file_path}.part"
+        response = self._base.request(
+            "POST",
+            f"{self._base.api_base}/documents/export/stream",
+            json={"filters": filters},
+            stream=True,
+        )
+        tail = b""
+        try:
+            with open(partial_path, "wb") as f:
+                for block in response.iter_content(chunk_size=EXPORT_DOWNLOAD_CHUNK_BYTES):
+                    if not block:
+                        continue
+                    f.write(block)
+                    # Keep just enough to recover the last (footer) line.
+                    tail = (tail + block)[-EXPORT_DOWNLOAD_CHUNK_BYTES:]
+        except Exception:
+            _remove_quietly(partial_path)
+            raise
+        finally:
+            response.close()
+
+        footer = _parse_footer(tail)
+        if footer is None or footer.get("status") != "complete":
+            _remove_quietly(partial_path)
+            reason = (footer or {}).get("error") or "export stream ended without a footer"
+            raise APIError(f"Export incomplete: {reason}")
+
+        os.replace(partial_path, file_path)
+        return footer
+
+    def restore_documents_from_file(self, file_path: str) -> Dict[str, Any]:
+        """Restore documents by streaming an NDJSON backup file to the server."""
+        with open(file_path, "rb") as f:
+            response = self._base.request(
+                "POST",
+                f"{self._base.api_base}/documents/restore/stream",
+                data=f,
+                headers={"Content-Type": NDJSON_MEDIA_TYPE},
+            )
+        return response.json()
+
     # ------------------------------------------------------------------
     # Document Tree (#7)
     # ------------------------------------------------------------------
@@ -194,12 +395,19 @@ class DocumentClient:
         limit: int = 200,
         offset: int = 0,
         source: str = "postgres",
+        cursor: Optional[str] = None,
     ) -> Dict[str, Any]:
-        """Get one level of the document tree under parent_path."""
+        """Get one level of the document tree under parent_path.
+
+        Pass the previous page's ``next_cursor`` as ``cursor`` to continue.
+        """
+        params = {"parent_path": parent_path, "limit": limit, "offset": offset, "source": source}
+        if cursor:
+            params["cursor"] = cursor
         response = self._base.request(
             "GET",
             f"{self._base.api_base}/documents/tree",
-            params={"parent_path": parent_path, "limit": limit, "offset": offset, "source": source}
+            params=params
         )
         return response.json()
 
@@ -344,3 +552,24 @@ class DocumentClient:
             json={"document_ids": document_ids, "visibility": visibility}
         )
         return response.json()
+
+
+def _parse_footer(tail: bytes) -> Optional[Dict[str, Any]]:
+    """Return the footer record from the last line of an NDJSON backup."""
+    lines = [line for line in tail.splitlines() if line.strip()]
+    if not lines:
+        return None
+    try:
+        record = json.loads(lines[-1])
+    except ValueError:
+        return None
+    if isinstance(record, dict) and record.get("type") == "footer":
+        return record
+    return None
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -1,3 +1,4 @@
+import time
 from typing import Dict, Any, Optional
 
 from desktop_app.utils.api_client_core.base_client import BaseAPIClient
@@ -32,3 +33,51 @@ class IndexingClient:
             f"{self._base.api_base}/indexing/runs/{run_id}"
         )
         return response.json()
+
+    def get_indexing_job(self, job_id: str) -> Dict[str, Any]:
+        """Get the state of a background indexing job."""
+        response = self._base.request(
+            "GET",
+            f"{self._base.api_base}/indexing/jobs/{job_id}"
+        )
+        return response.json()
+
+    def list_indexing_jobs(self, status: Optional[str] = None, limit: int = 50) -> Dict[str, Any]:
+        """List this key's background indexing jobs, with queue statistics."""
+        params: Dict[str, Any] = {"limit": limit}
+        if status:
+            params["status"] = status
+        response = self._base.request(
+            "GET",
+            f"{self._base.api_base}/indexing/jobs",
+            params=params
+        )
+        return response.json()
+
+    def cancel_indexing_job(self, job_id: str) -> Dict[str, Any]:
+        """Cancel a queued background indexing job."""
+        response = self._base.request(
+            "DELETE",
+            f"{self._base.api_base}/indexing/jobs/{job_id}"
+        )
+        return response.json()
+
+    def wait_for_indexing_job(
+        self,
+        job_id: str,
+        timeout: Optional[float] = None,
+        poll_interval: float = 2.0,
+    ) -> Dict[str, Any]:
+        """Poll a background job until it succeeded, failed or was cancelled.
+
+        Raises TimeoutError if it is still queued or running after ``timeout``
+        seconds.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            job = self.get_indexing_job(job_id)
+            if job.get("status") in ("succeeded", "failed", "cancelled"):
+                return job
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"Indexing job {job_id} is still {job.get('status')}")
+            time.sleep(poll_interval)
@@ -20,11 +20,14 @@ class MetadataClient:
         )
         return response.json()
 
-    def get_metadata_values(self, key: str) -> List[str]:
+    def get_metadata_values(self, key: str, prefix: Optional[str] = None) -> List[str]:
         """Get all unique values for a specific metadata key."""
+        params = {"key": key}
+        if prefix:
+            params["prefix"] = prefix
         response = self._base.request(
             "GET",
             f"{self._base.api_base}/metadata/values",
-            params={"key": key}
+            params=params
         )
         return response.json()
@@ -125,3 +125,22 @@ def is_remote_mode() -> bool:
     return get_backend_mode() == BACKEND_MODE_REMOTE
 
 
+# ---------------------------------------------------------------------------
+# Convenience: uploads
+# ---------------------------------------------------------------------------
+
+DEFAULT_UPLOAD_CONCURRENCY = 4
+MAX_UPLOAD_CONCURRENCY = 8
+
+
+def get_upload_concurrency() -> int:
+    """Return how many files the Upload tab sends at once (1-8)."""
+    try:
+        value = int(get("upload_concurrency", DEFAULT_UPLOAD_CONCURRENCY))
+    except (TypeError, ValueError):
+        return DEFAULT_UPLOAD_CONCURRENCY
+    return max(1, min(value, MAX_UPLOAD_CONCURRENCY))
+
+
+def set_upload_concurrency(value: int) -> None:
+    set("upload_concurrency", max(1, min(int(value), MAX_UPLOAD_CONCURRENCY)))
@@ -8,11 +8,12 @@ service (systemd/launchd) required.
 """
 
 import logging
-from datetime import datetime, timezone
 from typing import Optional
 
 from PySide6.QtCore import QObject, QTimer, Signal
 
+from cron_schedule import is_due
+
 logger = logging.getLogger(__name__)
 
 # Default check interval: every 60 seconds
@@ -20,62 +21,14 @@ _DEFAULT_CHECK_INTERVAL_MS = 60_000
 
 
 def _cron_is_due(cron_expr: str, last_scanned_at: Optional[str]) -> bool:
-    """Check whether a cron expression is due for execution.
-
-    Supports a simplified subset of cron:
-        - ``*/N`` in the hours field  → every N hours
-        - ``0 0 * * *``              → daily at midnight
-        - ``0 */6 * * *``            → every 6 hours
-
-    If *last_scanned_at* is None the folder has never been scanned and is
-    always considered due.
+    """Check whether a folder with schedule *cron_expr* is due for a scan.
 
-    For a full cron parser, consider the ``croniter`` package.  This
-    lightweight implementation covers the most common scheduling patterns
-    without adding a dependency.
+    Uses the evaluator shared with the server scheduler (cron_schedule), so
+    both agree on due times: a folder is due once the first fire time after
+    its last scan has passed, and a never-scanned folder is always due.
     """
-    if last_scanned_at is None:
-        return True
-
     try:
-        if isinstance(last_scanned_at, str):
-            # Handle ISO format with or without timezone
-            last_dt = datetime.fromisoformat(last_scanned_at.replace("Z", "+00:00"))
-        else:
-            last_dt = last_scanned_at
-
-        # Ensure timezone-aware
-        if last_dt.tzinfo is None:
-            last_dt = last_dt.replace(tzinfo=timezone.utc)
-
-        now = datetime.now(timezone.utc)
-        elapsed_hours = (now - last_dt).total_seconds() / 3600.0
-
-        parts = cron_expr.strip().split()
-        if len(parts) < 5:
-            logger.warning("Invalid cron expression: %s", cron_expr)
-            return False
-
-        _minute, hour_field, _dom, _month, _dow = parts[:5]
-
-        # Parse hour field for interval
-        if hour_field.startswith("*/"):
-            try:
-                interval_hours = int(hour_field[2:])
-                return elapsed_hours >= interval_hours
-            except ValueError:
-                pass
-
-        # Exact hour match (e.g. "0 0 * * *" = daily at midnight)
-        if hour_field.isdigit():
-            # Due if more than 24 hours since last scan
-            return elapsed_hours >= 24.0
-
-        # Wildcard = every hour
-        if hour_field == "*":
-            return elapsed_hours >= 1.0
-
-        return False
+        return is_due(cron_expr, last_scanned_at)
     except Exception as e:
         logger.warning("Error parsing cron/last_scanned: %s", e)
         return False
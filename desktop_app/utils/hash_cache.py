@@ -0,0 +1,177 @@
+"""
+Persistent cache of local file hashes for the desktop app.
+
+Uploading a folder compares each already-indexed file's xxHash64 with the
+server's, which used to mean reading every file on every rescan. The cache
+remembers the hash of each path keyed by its size and modification time
+(ns), so a file that has not been touched is checked with a single stat.
+
+The cache is an SQLite file in the app's config directory. Entries are
+replaced when a file changes; once it grows past ``max_entries`` the
+oldest-hashed entries are pruned. Failures never block an upload: if the
+database cannot be opened or written, hashes are simply computed.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from . import app_config
+from .hashing import calculate_file_hash
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 200_000
+# Entries stored between checks of the cache size
+_PRUNE_EVERY = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS file_hashes (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    xxh64 TEXT NOT NULL,
+    hashed_at REAL NOT NULL
+)
+"""
+
+
+def _cache_path() -> Path:
+    """Return the path to the local hash cache database."""
+    return app_config._get_config_dir() / "hash_cache.sqlite3"
+
+
+class HashCache:
+    """(path, size, mtime_ns) -> xxHash64 cache, safe to share across threads."""
+
+    def __init__(self, path: Optional[Path] = None, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = Path(path) if path else _cache_path()
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._disabled = False
+        self._stored = 0
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        """Open the database on first use; None if it is unavailable."""
+        if self._conn is None and not self._disabled:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(str(self.path), check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute(_SCHEMA)
+                conn.commit()
+                self._conn = conn
+            except (OSError, sqlite3.Error) as e:
+                logger.warning("Hash cache unavailable (%s), hashing every file: %s", self.path, e)
+                self._disabled = True
+        return self._conn
+
+    def get(self, path: str, size: int, mtime_ns: int) -> Optional[str]:
+        """Cached hash of ``path`` if its size and mtime still match."""
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return None
+            try:
+                row = conn.execute(
+                    "SELECT xxh64 FROM file_hashes WHERE path = ? AND size = ? AND mtime_ns = ?",
+                    (path, size, mtime_ns),
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.debug("Hash cache lookup failed: %s", e)
+                return None
+            return row[0] if row else None
+
+    def put(self, path: str, size: int, mtime_ns: int, file_hash: str) -> None:
+        """Remember the hash of ``path`` at this size and mtime."""
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO file_hashes (path, size, mtime_ns, xxh64, hashed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (path, size, mtime_ns, file_hash, time.time()),
+                )
+                conn.commit()
+                self._stored += 1
+                if self._stored % _PRUNE_EVERY == 0:
+                    self._prune(conn)
+            except sqlite3.Error as e:
+                logger.debug("Hash cache write failed: %s", e)
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        """Drop the oldest entries once the cache is over ``max_entries``."""
+        count = conn.execute("SELECT COUNT(*) FROM file_hashes").fetchone()[0]
+        excess = count - self.max_entries
+        if excess <= 0:
+            return
+        # Prune to 90% so the next few inserts don't prune again
+        excess += self.max_entries // 10
+        conn.execute(
+            "DELETE FROM file_hashes WHERE path IN "
+            "(SELECT path FROM file_hashes ORDER BY hashed_at LIMIT ?)",
+            (excess,),
+        )
+        conn.commit()
+        logger.info("Pruned %d entries from the hash cache", excess)
+
+    def prune(self) -> None:
+        with self._lock:
+            conn = self._connection()
+            if conn is not None:
+                try:
+                    self._prune(conn)
+                except sqlite3.Error as e:
+                    logger.debug("Hash cache prune failed: %s", e)
+
+    def file_hash(
+        self, path: Path, hash_func: Callable[[Path], str] = calculate_file_hash,
+    ) -> str:
+        """Hash of a file, from the cache when it has not changed.
+
+        A file modified while it was being hashed is not cached.
+        """
+        try:
+            before = os.stat(path)
+        except OSError:
+            return hash_func(path)
+        key = os.path.abspath(path)
+        cached = self.get(key, before.st_size, before.st_mtime_ns)
+        if cached:
+            return cached
+
+        file_hash = hash_func(path)
+        try:
+            after = os.stat(path)
+        except OSError:
+            return file_hash
+        if (after.st_size, after.st_mtime_ns) == (before.st_size, before.st_mtime_ns):
+            self.put(key, before.st_size, before.st_mtime_ns, file_hash)
+        return file_hash
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_cache: Optional[HashCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_hash_cache() -> HashCache:
+    """Return the app-wide hash cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = HashCache()
+        return _cache
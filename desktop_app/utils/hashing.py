@@ -3,11 +3,16 @@ Shared utilities for file hashing.
 Uses xxHash for high-performance non-cryptographic hashing.
 """
 
+import mmap
+import os
 import xxhash
 from pathlib import Path
 import hashlib
 
-def calculate_file_hash(path: Path, chunk_size: int = 8192) -> str:
+# Files at least this large are hashed through a read-only memory map
+MMAP_MIN_BYTES = 64 * 1024 * 1024
+
+def calculate_file_hash(path: Path, chunk_size: int = 1024 * 1024) -> str:
     """
     Calculate xxHash64 of a file.
     
@@ -20,6 +25,13 @@ def calculate_file_hash(path: Path, chunk_size: int = 8192) -> str:
     """
     hasher = xxhash.xxh64()
     with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size >= MMAP_MIN_BYTES:
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    hasher.update(mapped)
+                return hasher.hexdigest()
+            except (OSError, ValueError):
+                pass  # Not mappable (e.g. some network shares): read it instead
         while chunk := f.read(chunk_size):
             hasher.update(chunk)
     return hasher.hexdigest()
@@ -1,16 +1,19 @@
 """
 Document Tree module (#7).
 
-Builds a hierarchical folder tree from document source_uri paths.
-Supports lazy loading (one level at a time) and aggregated counts
+Serves the hierarchical folder tree of document source_uri paths from the
+materialized ``document_folders`` table (migration 023). Supports lazy
+loading (one level at a time, keyset-paginated) and aggregated counts
 per folder for the Hierarchical Document Browser.
 """
 
+import base64
+import json
 import logging
 import posixpath
 from typing import Any, Dict, List, Optional, Tuple
 
-from path_utils import folder_prefix_like_pattern, normalize_path, NORMALIZED_URI_SQL
+from path_utils import normalize_path
 
 logger = logging.getLogger(__name__)
 
@@ -41,15 +44,27 @@ def _visibility_sql(visibility: Optional[Tuple[str, list]]) -> Tuple[str, list]:
     return "", []
 
 
-def _filter_hidden_docs(
-    docs: List[Dict[str, Any]],
-    hidden_document_ids: Optional[List[str]],
-) -> List[Dict[str, Any]]:
-    """Drop LanceDB-sourced docs the caller must not see (private, other owner)."""
-    if not hidden_document_ids:
-        return docs
-    hidden = set(hidden_document_ids)
-    return [doc for doc in docs if doc.get("document_id") not in hidden]
+# Sort key of a cursor: (lower(name), path) for folders,
+# (lower(file_name), norm_uri, document_id) for files.
+_CURSOR_KEY_LENGTHS = {"folder": 2, "file": 3}
+
+
+def _encode_tree_cursor(kind: str, sort_key: List[Any]) -> str:
+    payload = json.dumps({"k": kind, "v": sort_key}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def _decode_tree_cursor(cursor: str) -> Tuple[str, List[Any]]:
+    """Decode a ``next_cursor`` token; raises ValueError when malformed."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        kind, sort_key = payload["k"], payload["v"]
+    except Exception:
+        raise ValueError("Invalid tree cursor")
+    expected = _CURSOR_KEY_LENGTHS.get(kind)
+    if expected is None or not isinstance(sort_key, list) or len(sort_key) != expected:
+        raise ValueError("Invalid tree cursor")
+    return kind, sort_key
 
 
 def get_tree_children(
@@ -58,177 +73,145 @@ def get_tree_children(
     offset: int = 0,
     source: str = "postgres",
     visibility: Optional[Tuple[str, list]] = None,
-    hidden_document_ids: Optional[List[str]] = None,
+    cursor: Optional[str] = None,
 ) -> Dict[str, Any]:
     """Get one level of the document tree under parent_path.
 
-    Returns folders and files at the immediate next level.
+    Returns folders and files at the immediate next level, folders first,
+    each sorted case-insensitively by name.
     Each folder includes aggregated document count and latest indexed_at.
     Each file includes document_id, chunk_count, and indexed_at.
 
+    Both sources read the materialized folder hierarchy (``document_folders``)
+    and the ``documents`` table: LanceDB mirrors Postgres, so one level is
+    two indexed lookups on parent_path either way.
+
     Args:
         parent_path: The parent folder path (empty string for root).
                      Uses forward slashes, no trailing slash.
         limit: Max items to return.
-        offset: Pagination offset.
+        offset: Pagination offset (ignored when ``cursor`` is given).
         source: The database source ('postgres' or 'lancedb').
-        visibility: Optional (sql_fragment, params) visibility filter for the
-            Postgres source.
-        hidden_document_ids: Document ids the caller must not see; used to
-            filter the LanceDB source (which has no visibility columns).
+        visibility: Optional (sql_fragment, params) visibility filter.
+        cursor: ``next_cursor`` from a previous page (keyset pagination).
 
     Returns:
-        Dict with 'folders', 'files', 'total_folders', 'total_files'.
+        Dict with 'children', 'total_folders', 'total_files', 'total' and
+        'next_cursor' (None on the last page).
+
+    Raises:
+        ValueError: If ``cursor`` is malformed.
     """
+    after = _decode_tree_cursor(cursor) if cursor else None
     try:
         # Normalize parent
         parent = _normalize_path(parent_path).rstrip("/")
-
-        if source == "lancedb":
-            from services import get_lancedb_adapter
-            from datetime import datetime
-
-            adapter = get_lancedb_adapter()
-            docs = _filter_hidden_docs(adapter.list_documents(prefix=parent), hidden_document_ids)
-
-            
-            # Format rows: (norm_uri, document_id, chunk_count, indexed_at, last_updated)
-            all_rows = []
-            for doc in docs:
-                norm_uri = _normalize_path(doc["source_uri"])
-                
-                # Parse datetime if present
-                indexed_at = None
-                if doc.get("indexed_at"):
-                    try:
-                        indexed_at = datetime.fromisoformat(doc["indexed_at"])
-                    except Exception:
-                        pass
-                
-                all_rows.append((norm_uri, doc["document_id"], doc["chunk_count"], indexed_at, indexed_at))
-                
-            # Filter in Python if parent is set
-            rows = []
-            for row in all_rows:
-                norm_uri = row[0]
-                if parent:
-                    if norm_uri.startswith(parent + "/"):
-                        rows.append(row)
-                else:
-                    rows.append(row)
-        else:
-            with _get_db_connection() as conn:
-                cur = conn.cursor()
-                if parent:
-                    # Escaped so folder names containing %/_ match literally;
-                    # the Python-side startswith() below stays the exact gate.
-                    like_prefix = folder_prefix_like_pattern(parent) or "%"
-                else:
-                    like_prefix = "%"
-
-                vis_sql, vis_params = _visibility_sql(visibility)
-
-                # Get all distinct normalized source_uri paths under this parent
+        vis_sql, vis_params = _visibility_sql(visibility)
+
+        with _get_db_connection() as conn:
+            cur = conn.cursor()
+
+            cur.execute(
+                f"""
+                SELECT
+                    (SELECT COUNT(*) FROM (
+                        SELECT path FROM document_folders
+                        WHERE parent_path = %s {vis_sql}
+                        GROUP BY path HAVING SUM(doc_count) > 0
+                     ) folders),
+                    (SELECT COUNT(*) FROM documents
+                     WHERE parent_path = %s {vis_sql})
+                """,
+                (parent, *vis_params, parent, *vis_params),
+            )
+            total_folders, total_files = cur.fetchone()
+
+            folder_rows: List[tuple] = []
+            if after is None or after[0] == "folder":
+                keyset_sql, keyset_params = "", []
+                if after:
+                    keyset_sql = "AND (lower(name), path) > (%s, %s)"
+                    keyset_params = after[1]
                 cur.execute(
                     f"""
                     SELECT
-                        {NORMALIZED_URI_SQL} AS norm_uri,
-                        document_id,
-                        COUNT(*) AS chunk_count,
-                        MIN(indexed_at) AS indexed_at,
-                        MAX(indexed_at) AS last_updated
-                    FROM document_chunks
-                    WHERE {NORMALIZED_URI_SQL} LIKE %s {vis_sql}
-                    GROUP BY norm_uri, document_id
-                    ORDER BY norm_uri
+                        path, name, lower(name),
+                        SUM(doc_count), SUM(chunk_count), MAX(latest_indexed_at)
+                    FROM document_folders
+                    WHERE parent_path = %s {vis_sql} {keyset_sql}
+                    GROUP BY path, name
+                    HAVING SUM(doc_count) > 0
+                    ORDER BY lower(name), path
+                    LIMIT %s OFFSET %s
                     """,
-                    (like_prefix, *vis_params),
+                    (parent, *vis_params, *keyset_params, limit, 0 if after else offset),
                 )
-                rows = cur.fetchall()
-
-        # Build tree level
-        folders: Dict[str, Dict[str, Any]] = {}
-        files: List[Dict[str, Any]] = []
-
-        parent_depth = len(parent.split("/")) if parent else 0
-
-        for norm_uri, document_id, chunk_count, indexed_at, last_updated in rows:
-            # Strip the parent prefix to get relative path
-            if parent:
-                if not norm_uri.startswith(parent + "/"):
-                    continue
-                relative = norm_uri[len(parent) + 1:]
-            else:
-                relative = norm_uri
-
-            # Handle absolute Linux paths: /home/... → treat "/" as a root folder
-            # so the first split component isn't an empty string.
-            if not parent and relative.startswith("/"):
-                relative = relative.lstrip("/")
-                # Reconstruct with "/" prefix for folder_path below
-                _linux_root = True
-            else:
-                _linux_root = False
-
-            parts = relative.split("/")
-
-            if len(parts) == 1:
-                # Direct child file
-                files.append({
-                    "name": parts[0],
-                    "path": norm_uri,
-                    "type": "file",
-                    "document_id": document_id,
-                    "chunk_count": chunk_count,
-                    "indexed_at": indexed_at.isoformat() if indexed_at else None,
-                    "last_updated": last_updated.isoformat() if last_updated else None,
-                })
-            else:
-                # Child is inside a subfolder
-                folder_name = parts[0]
-                if _linux_root:
-                    # Use "/" prefix so expanding this folder fetches the right children
-                    folder_path = "/" + folder_name
-                elif parent:
-                    folder_path = parent + "/" + folder_name
+                folder_rows = cur.fetchall()
+
+            file_rows: List[tuple] = []
+            remaining = limit - len(folder_rows)
+            if remaining > 0:
+                keyset_sql, keyset_params = "", []
+                if after and after[0] == "file":
+                    keyset_sql = "AND (lower(file_name), norm_uri, document_id) > (%s, %s, %s)"
+                    keyset_params = after[1]
+                    file_offset = 0
+                elif after:
+                    file_offset = 0
                 else:
-                    folder_path = folder_name
-
-                if folder_name not in folders:
-                    folders[folder_name] = {
-                        "name": folder_name,
-                        "path": folder_path,
-                        "type": "folder",
-                        "document_count": 0,
-                        "latest_indexed_at": None,
-                    }
-
-                folders[folder_name]["document_count"] += 1
-                if indexed_at:
-                    ts = indexed_at.isoformat()
-                    prev = folders[folder_name]["latest_indexed_at"]
-                    if prev is None or ts > prev:
-                        folders[folder_name]["latest_indexed_at"] = ts
-
-        # Sort folders alphabetically, files alphabetically
-        sorted_folders = sorted(folders.values(), key=lambda f: f["name"].lower())
-        sorted_files = sorted(files, key=lambda f: f["name"].lower())
-
-        total_folders = len(sorted_folders)
-        total_files = len(sorted_files)
-
-        # Combine and paginate
-        all_items = sorted_folders + sorted_files
-        paginated = all_items[offset:offset + limit]
+                    file_offset = max(0, offset - total_folders)
+                cur.execute(
+                    f"""
+                    SELECT
+                        norm_uri, file_name, lower(file_name), document_id,
+                        chunk_count, first_indexed, last_indexed
+                    FROM documents
+                    WHERE parent_path = %s {vis_sql} {keyset_sql}
+                    ORDER BY lower(file_name), norm_uri, document_id
+                    LIMIT %s OFFSET %s
+                    """,
+                    (parent, *vis_params, *keyset_params, remaining, file_offset),
+                )
+                file_rows = cur.fetchall()
+
+        children: List[Dict[str, Any]] = []
+        for path, name, _sort_key, doc_count, _chunks, latest in folder_rows:
+            children.append({
+                "name": name,
+                "path": path,
+                "type": "folder",
+                "document_count": int(doc_count),
+                "latest_indexed_at": latest.isoformat() if latest else None,
+            })
+        for norm_uri, name, _sort_key, document_id, chunk_count, indexed_at, last_updated in file_rows:
+            children.append({
+                "name": name,
+                "path": norm_uri,
+                "type": "file",
+                "document_id": document_id,
+                "chunk_count": chunk_count,
+                "indexed_at": indexed_at.isoformat() if indexed_at else None,
+                "last_updated": last_updated.isoformat() if last_updated else None,
+            })
+
+        next_cursor = None
+        if len(children) == limit:
+            if file_rows:
+                last = file_rows[-1]
+                next_cursor = _encode_tree_cursor("file", [last[2], last[0], last[3]])
+            elif folder_rows:
+                last = folder_rows[-1]
+                next_cursor = _encode_tree_cursor("folder", [last[2], last[0]])
 
         return {
             "parent_path": parent,
-            "children": paginated,
+            "children": children,
             "total_folders": total_folders,
             "total_files": total_files,
             "total": total_folders + total_files,
             "limit": limit,
             "offset": offset,
+            "next_cursor": next_cursor,
         }
     except Exception as e:
         logger.warning("Failed to get tree children for '%s': %s", parent_path, e)
@@ -240,86 +223,70 @@ def get_tree_children(
             "total": 0,
             "limit": limit,
             "offset": offset,
+            "next_cursor": None,
         }
 
 
 def get_tree_stats(
     source: str = "postgres",
     visibility: Optional[Tuple[str, list]] = None,
-    hidden_document_ids: Optional[List[str]] = None,
+    visible_to: Optional[Dict[str, Optional[str]]] = None,
 ) -> Dict[str, Any]:
     """Get overall tree statistics.
 
+    Totals for the LanceDB source come from LanceDB itself, so comparing
+    the two sources still reveals drift; top-level items come from the
+    shared folder hierarchy for both.
+
     Returns:
         Dict with total_documents, total_folders (top-level), total_chunks.
     """
     try:
-        if source == "lancedb":
-            from services import get_lancedb_adapter
-            adapter = get_lancedb_adapter()
-            docs = _filter_hidden_docs(adapter.list_documents(), hidden_document_ids)
-
-            # Count distinct top-level folders/files
-            top_levels = set()
-            for doc in docs:
-                norm_uri = _normalize_path(doc["source_uri"]).lstrip("/")
-                parts = norm_uri.split("/")
-                if parts:
-                    top_levels.add(parts[0])
-            top_level_count = len(top_levels)
-
-            if hidden_document_ids:
-                # Compute counts from the filtered listing so hidden documents
-                # are not reflected in the caller's totals.
-                total_documents = len(docs)
-                total_chunks = sum(doc.get("chunk_count") or 0 for doc in docs)
-            else:
-                stats = adapter.get_statistics()
-                total_documents = stats["total_documents"]
-                total_chunks = stats["total_chunks"]
-
-            return {
-                "total_documents": total_documents,
-                "total_chunks": total_chunks,
-                "top_level_items": top_level_count,
-            }
-        else:
-            vis_sql, vis_params = _visibility_sql(visibility)
-            vis_where = f"WHERE TRUE {vis_sql}" if vis_sql else ""
-
-            with _get_db_connection() as conn:
-                cur = conn.cursor()
-
+        vis_sql, vis_params = _visibility_sql(visibility)
+
+        with _get_db_connection() as conn:
+            cur = conn.cursor()
+
+            cur.execute(
+                f"""
+                SELECT
+                    (SELECT COUNT(*) FROM (
+                        SELECT path FROM document_folders
+                        WHERE parent_path = '' {vis_sql}
+                        GROUP BY path HAVING SUM(doc_count) > 0
+                     ) folders),
+                    (SELECT COUNT(*) FROM documents
+                     WHERE parent_path = '' {vis_sql})
+                """,
+                tuple(vis_params + vis_params) or None,
+            )
+            top_folders, root_files = cur.fetchone()
+            if source != "lancedb":
+                # Write-time totals (migration 029)
                 cur.execute(
-                    f"SELECT COUNT(DISTINCT document_id) FROM document_chunks {vis_where}",
+                    f"""
+                    SELECT COALESCE(SUM(document_count), 0), COALESCE(SUM(chunk_count), 0)
+                    FROM corpus_stats
+                    WHERE TRUE {vis_sql}
+                    """,
                     tuple(vis_params) or None,
                 )
-                total_docs = cur.fetchone()[0]
+                total_documents, total_chunks = cur.fetchone()
 
-                cur.execute(
-                    f"SELECT COUNT(*) FROM document_chunks {vis_where}",
-                    tuple(vis_params) or None,
-                )
-                total_chunks = cur.fetchone()[0]
-
-                # Count distinct top-level folders
-                cur.execute(f"""
-                    SELECT COUNT(DISTINCT
-                        SPLIT_PART(
-                            {NORMALIZED_URI_SQL},
-                            '/', 1
-                        )
-                    )
-                    FROM document_chunks
-                    {vis_where}
-                """, tuple(vis_params) or None)
-                top_level_count = cur.fetchone()[0]
-
-                return {
-                    "total_documents": total_docs,
-                    "total_chunks": total_chunks,
-                    "top_level_items": top_level_count,
-                }
+        if source == "lancedb":
+            from services import get_lancedb_adapter
+            stats = get_lancedb_adapter().get_statistics(visible_to=visible_to)
+            total_documents = stats["total_documents"]
+            total_chunks = stats["total_chunks"]
+        else:
+            total_documents = int(total_documents)
+            total_chunks = int(total_chunks)
+
+        return {
+            "total_documents": total_documents,
+            "total_chunks": total_chunks,
+            "top_level_items": top_folders + root_files,
+        }
     except Exception as e:
         logger.warning("Failed to get tree stats: %s", e)
         return {
@@ -334,7 +301,7 @@ def search_tree(
     limit: int = 50,
     source: str = "postgres",
     visibility: Optional[Tuple[str, list]] = None,
-    hidden_document_ids: Optional[List[str]] = None,
+    visible_to: Optional[Dict[str, Optional[str]]] = None,
 ) -> List[Dict[str, Any]]:
     """Search for documents matching a path pattern.
 
@@ -345,7 +312,7 @@ def search_tree(
             from services import get_lancedb_adapter
             from datetime import datetime
             adapter = get_lancedb_adapter()
-            docs = _filter_hidden_docs(adapter.list_documents(), hidden_document_ids)
+            docs = adapter.list_documents(visible_to=visible_to)
             
             pattern = _normalize_path(query).lower()
             results = []
@@ -376,13 +343,12 @@ def search_tree(
                 cur.execute(
                     f"""
                     SELECT
-                        {NORMALIZED_URI_SQL} AS norm_uri,
+                        norm_uri,
                         document_id,
-                        COUNT(*) AS chunk_count,
-                        MIN(indexed_at) AS indexed_at
-                    FROM document_chunks
-                    WHERE {NORMALIZED_URI_SQL} ILIKE %s {vis_sql}
-                    GROUP BY norm_uri, document_id
+                        chunk_count,
+                        first_indexed AS indexed_at
+                    FROM documents
+                    WHERE norm_uri ILIKE %s {vis_sql}
                     ORDER BY norm_uri
                     LIMIT %s
                     """,
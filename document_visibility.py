@@ -7,6 +7,8 @@ Provides per-user document scoping:
 - NULL owner_id = system/shared document (backward compatible)
 - Admins can see all documents regardless of visibility
 - Visibility filters can be injected into search/list queries
+- owner_id/visibility are mirrored into the LanceDB tables, so LanceDB
+  search filters on the same predicate instead of a hidden-id list
 
 Visibility rules:
 1. shared docs: visible to everyone
@@ -103,7 +105,7 @@ def get_hidden_document_ids(user_id: Optional[str] = None, is_admin: bool = Fals
             if user_id:
                 cursor.execute(
                     """
-                    SELECT DISTINCT document_id FROM document_chunks
+                    SELECT document_id FROM documents
                     WHERE visibility = 'private' AND owner_id IS NOT NULL AND owner_id != %s
                     """,
                     (user_id,),
@@ -111,7 +113,7 @@ def get_hidden_document_ids(user_id: Optional[str] = None, is_admin: bool = Fals
             else:
                 cursor.execute(
                     """
-                    SELECT DISTINCT document_id FROM document_chunks
+                    SELECT document_id FROM documents
                     WHERE visibility = 'private' AND owner_id IS NOT NULL
                     """
                 )
@@ -131,9 +133,9 @@ def resolve_user_id_for_key_record(key_record: Optional[Dict[str, Any]]) -> Opti
     """
     if not isinstance(key_record, dict):
         return None
-    from users import get_user_by_api_key
+    from principal_cache import user_for_key_record
 
-    user = get_user_by_api_key(key_record["id"])
+    user = user_for_key_record(key_record)
     return user["id"] if user else None
 
 
@@ -149,10 +151,10 @@ def visibility_clause_for_key_record(key_record: Optional[Dict[str, Any]]) -> Tu
     """
     if not isinstance(key_record, dict):
         return "", []
-    from users import get_user_by_api_key
+    from principal_cache import user_for_key_record
     from role_permissions import has_permission
 
-    user = get_user_by_api_key(key_record["id"])
+    user = user_for_key_record(key_record)
     if user is None:
         return visibility_where_clause(None, False)
     is_admin = has_permission(user.get("role", ""), "system.admin")
@@ -163,10 +165,10 @@ def document_visible_for_key_record(document_id: str, key_record: Optional[Dict[
     """Return True if document_id is visible to the caller represented by key_record."""
     if not isinstance(key_record, dict):
         return True
-    from users import get_user_by_api_key
+    from principal_cache import user_for_key_record
     from role_permissions import has_permission
 
-    user = get_user_by_api_key(key_record["id"])
+    user = user_for_key_record(key_record)
     if user is None:
         sql, params = visibility_where_clause_for_document(document_id, None, False)
     else:
@@ -177,7 +179,7 @@ def document_visible_for_key_record(document_id: str, key_record: Optional[Dict[
         with _get_db_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
-                f"SELECT EXISTS(SELECT 1 FROM document_chunks WHERE {sql})",
+                f"SELECT EXISTS(SELECT 1 FROM documents WHERE {sql})",
                 params,
             )
             row = cursor.fetchone()
@@ -195,15 +197,44 @@ def is_admin_key_record(key_record: Optional[Dict[str, Any]]) -> bool:
     """
     if not isinstance(key_record, dict):
         return True
-    from users import get_user_by_api_key
+    from principal_cache import user_for_key_record
     from role_permissions import has_permission
 
-    user = get_user_by_api_key(key_record["id"])
+    user = user_for_key_record(key_record)
     if user is None:
         return False
     return has_permission(user.get("role", ""), "system.admin")
 
 
+def search_visibility_for_key_record(
+    key_record: Optional[Dict[str, Any]],
+) -> Optional[Dict[str, Optional[str]]]:
+    """Resolve the searching identity into the ``visible_to`` filter value.
+
+    Returns None when no filtering is needed, else ``{"user_id": ...}``:
+    the search sees shared documents plus, when user_id is set, that user's
+    own private documents. Unlike search_exclusions_for_key_record this does
+    not grow with the number of private documents; the stores evaluate it
+    against their owner_id/visibility columns.
+
+    - key_record not a dict (auth disabled / local mode / test sentinel): None.
+    - Key linked to an admin user: None.
+    - Key linked to a regular user: {"user_id": <user id>}.
+    - Key not linked to any user: {"user_id": None} (shared docs only).
+    """
+    if not isinstance(key_record, dict):
+        return None
+    from principal_cache import user_for_key_record
+    from role_permissions import has_permission
+
+    user = user_for_key_record(key_record)
+    if user is None:
+        return {"user_id": None}
+    if has_permission(user.get("role", ""), "system.admin"):
+        return None
+    return {"user_id": user["id"]}
+
+
 def search_exclusions_for_key_record(key_record: Optional[Dict[str, Any]]) -> List[str]:
     """Resolve the searching identity from an API key record and return the
     document_ids that must be excluded from their search results.
@@ -219,10 +250,10 @@ def search_exclusions_for_key_record(key_record: Optional[Dict[str, Any]]) -> Li
     """
     if not isinstance(key_record, dict):
         return []
-    from users import get_user_by_api_key
+    from principal_cache import user_for_key_record
     from role_permissions import has_permission
 
-    user = get_user_by_api_key(key_record["id"])
+    user = user_for_key_record(key_record)
     if user is None:
         return get_hidden_document_ids(user_id=None, is_admin=False)
     is_admin = has_permission(user.get("role", ""), "system.admin")
@@ -253,6 +284,69 @@ def filter_entries_by_hidden_source(
     ]
 
 
+# ---------------------------------------------------------------------------
+# LanceDB access columns
+# ---------------------------------------------------------------------------
+
+
+def _lancedb_enabled() -> bool:
+    from config import get_config
+    return bool(getattr(get_config().retrieval, "lancedb_enabled", False))
+
+
+def _sync_lancedb_access(cursor, document_ids: List[str]) -> None:
+    """Mirror owner_id/visibility of the given documents into LanceDB.
+
+    Called inside the Postgres transaction, before commit, so a LanceDB
+    failure rolls the change back instead of leaving the stores disagreeing.
+    """
+    if not document_ids or not _lancedb_enabled():
+        return
+    cursor.execute(
+        "SELECT document_id, owner_id, visibility FROM documents WHERE document_id = ANY(%s)",
+        (list(document_ids),),
+    )
+    rows = [tuple(row) for row in cursor.fetchall()]
+    if rows:
+        from services import get_lancedb_adapter
+        get_lancedb_adapter().set_document_access(rows)
+
+
+def sync_lancedb_access(document_ids: List[str]) -> None:
+    """Re-read owner_id/visibility from Postgres and write them to LanceDB.
+
+    For writers that rebuild LanceDB rows from data without access columns
+    (e.g. restore), where an existing document keeps its Postgres values.
+
+    Best-effort: it runs after the documents are committed, so a failure is
+    logged rather than raised into the caller's rollback.
+    """
+    try:
+        with _get_db_connection() as conn:
+            _sync_lancedb_access(conn.cursor(), document_ids)
+    except Exception as e:
+        logger.warning(
+            "Could not mirror owner/visibility of %d document(s) into LanceDB: %s",
+            len(document_ids), e,
+        )
+
+
+def backfill_lancedb_access(adapter) -> None:
+    """Fill LanceDB access columns left NULL by tables that predate them."""
+    if not adapter.needs_access_backfill():
+        return
+    with _get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            SELECT document_id, owner_id, visibility FROM documents
+            WHERE visibility = 'private' AND owner_id IS NOT NULL
+            """
+        )
+        private_documents = [tuple(row) for row in cursor.fetchall()]
+    adapter.backfill_access(private_documents)
+
+
 # ---------------------------------------------------------------------------
 # Ownership management
 # ---------------------------------------------------------------------------
@@ -275,8 +369,10 @@ def set_document_owner(document_id: str, owner_id: str) -> int:
                 "UPDATE document_chunks SET owner_id = %s WHERE document_id = %s",
                 (owner_id, document_id),
             )
+            updated = cursor.rowcount
+            _sync_lancedb_access(cursor, [document_id])
             conn.commit()
-            return cursor.rowcount
+            return updated
     except Exception as e:
         # Re-raise: returning 0 here made a DB failure indistinguishable from
         # "document not found" (the API maps 0 to 404). Endpoints return 500.
@@ -305,8 +401,10 @@ def set_document_visibility(document_id: str, visibility: str) -> int:
                 "UPDATE document_chunks SET visibility = %s WHERE document_id = %s",
                 (visibility, document_id),
             )
+            updated = cursor.rowcount
+            _sync_lancedb_access(cursor, [document_id])
             conn.commit()
-            return cursor.rowcount
+            return updated
     except Exception as e:
         # Re-raise: returning 0 here made a DB failure indistinguishable from
         # "document not found" (the API maps 0 to 404). Endpoints return 500.
@@ -333,8 +431,10 @@ def set_document_owner_and_visibility(
                 "UPDATE document_chunks SET owner_id = %s, visibility = %s WHERE document_id = %s",
                 (owner_id, visibility, document_id),
             )
+            updated = cursor.rowcount
+            _sync_lancedb_access(cursor, [document_id])
             conn.commit()
-            return cursor.rowcount
+            return updated
     except Exception as e:
         # Re-raise: returning 0 here made a DB failure indistinguishable from
         # "document not found" (the API maps 0 to 404). Endpoints return 500.
@@ -353,13 +453,9 @@ def get_document_visibility(document_id: str) -> Optional[Dict[str, Any]]:
             cursor = conn.cursor()
             cursor.execute(
                 """
-                SELECT
-                    (array_agg(owner_id ORDER BY indexed_at ASC))[1] as owner_id,
-                    (array_agg(visibility ORDER BY indexed_at ASC))[1] as visibility,
-                    COUNT(*) as chunk_count
-                FROM document_chunks
+                SELECT owner_id, visibility, chunk_count
+                FROM documents
                 WHERE document_id = %s
-                GROUP BY document_id
                 """,
                 (document_id,),
             )
@@ -412,14 +508,13 @@ def list_user_documents(
                 SELECT
                     document_id,
                     source_uri,
-                    COUNT(*) as chunk_count,
-                    MIN(indexed_at) as indexed_at,
-                    MAX(updated_at) as last_updated,
-                    (array_agg(visibility ORDER BY indexed_at ASC))[1] as visibility
-                FROM document_chunks
+                    chunk_count,
+                    first_indexed as indexed_at,
+                    last_updated,
+                    visibility
+                FROM documents
                 {where}
-                GROUP BY document_id, source_uri
-                ORDER BY MAX(updated_at) DESC
+                ORDER BY last_updated DESC, document_id
                 LIMIT %s OFFSET %s
                 """,
                 params,
@@ -459,8 +554,10 @@ def bulk_set_visibility(document_ids: List[str], visibility: str) -> int:
                 "UPDATE document_chunks SET visibility = %s WHERE document_id = ANY(%s)",
                 (visibility, document_ids),
             )
+            updated = cursor.rowcount
+            _sync_lancedb_access(cursor, document_ids)
             conn.commit()
-            return cursor.rowcount
+            return updated
     except Exception as e:
         # Re-raise: returning 0 here made a DB failure indistinguishable from
         # "document not found" (the API maps 0 to 404). Endpoints return 500.
@@ -481,8 +578,10 @@ def transfer_ownership(document_id: str, new_owner_id: str) -> int:
                 "UPDATE document_chunks SET owner_id = %s WHERE document_id = %s",
                 (new_owner_id, document_id),
             )
+            updated = cursor.rowcount
+            _sync_lancedb_access(cursor, [document_id])
             conn.commit()
-            return cursor.rowcount
+            return updated
     except Exception as e:
         logger.error("Failed to transfer ownership: %s", e)
         return 0
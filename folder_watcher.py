@@ -0,0 +1,344 @@
+"""
+Real-time watch mode for server-scope watched folders (Linux, inotify).
+
+Scheduled scans make an edit wait up to a root's cron interval before it
+becomes searchable, and every scan re-walks the tree. With watch mode on,
+the server scheduler also watches each scheduled server-scope root with
+inotify (through watchdog) and indexes just the files that changed:
+
+- Events are coalesced per relative path. Create, modify, move and delete
+  all only mark a path as changed; the batch is statted when it runs, so
+  the final state of each path wins. Directory creates, deletes and moves
+  mark the whole subtree.
+- A root's batch runs once the root has been quiet for the debounce
+  period, or after the maximum delay during a continuous burst, through
+  ``scan_folder(paths=...)``: the same manifest plan, indexing and
+  quarantine as a scan, restricted to those paths.
+- A burst larger than the pending-path cap, or the root directory itself
+  moving or vanishing, queues a full scan of the root instead.
+
+The scheduled scans keep running as the reconciling safety net for
+changes inotify does not report (network filesystems, queue overflows,
+edits made while the server was down). inotify needs one watch per
+directory; roots with very many directories may need
+``fs.inotify.max_user_watches`` raised. A root that cannot be watched logs
+a warning and is left to its scheduled scans.
+
+Environment:
+    SERVER_SCHEDULER_WATCH                   (default false)
+    SERVER_SCHEDULER_WATCH_DEBOUNCE_SECONDS  (default 2)
+    SERVER_SCHEDULER_WATCH_MAX_DELAY_SECONDS (default 30)
+    SERVER_SCHEDULER_WATCH_MAX_PENDING       (default 10000; per root)
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+WATCH_ENABLED_ENV = "SERVER_SCHEDULER_WATCH"
+DEBOUNCE_SECONDS_ENV = "SERVER_SCHEDULER_WATCH_DEBOUNCE_SECONDS"
+MAX_DELAY_SECONDS_ENV = "SERVER_SCHEDULER_WATCH_MAX_DELAY_SECONDS"
+MAX_PENDING_ENV = "SERVER_SCHEDULER_WATCH_MAX_PENDING"
+
+DEFAULT_DEBOUNCE_SECONDS = 2.0
+DEFAULT_MAX_DELAY_SECONDS = 30.0
+DEFAULT_MAX_PENDING = 10000
+
+# Events that never change a file's content or existence
+_IGNORED_EVENTS = ("opened", "closed_no_write")
+
+
+def is_enabled() -> bool:
+    """Check if watch mode is enabled via env var."""
+    return os.environ.get(WATCH_ENABLED_ENV, "false").lower() in ("true", "1", "yes")
+
+
+def _float_env(name: str, default: float) -> float:
+    try:
+        return max(0.0, float(os.environ.get(name, default)))
+    except (ValueError, TypeError):
+        return default
+
+
+def get_debounce_seconds() -> float:
+    """Quiet period before a root's changes are indexed, default 2s."""
+    return _float_env(DEBOUNCE_SECONDS_ENV, DEFAULT_DEBOUNCE_SECONDS)
+
+
+def get_max_delay_seconds() -> float:
+    """Longest a change waits during a continuous burst, default 30s."""
+    return _float_env(MAX_DELAY_SECONDS_ENV, DEFAULT_MAX_DELAY_SECONDS)
+
+
+def get_max_pending() -> int:
+    """Changed paths per root before a full scan is queued instead."""
+    try:
+        return max(1, int(os.environ.get(MAX_PENDING_ENV, DEFAULT_MAX_PENDING)))
+    except (ValueError, TypeError):
+        return DEFAULT_MAX_PENDING
+
+
+class PendingChanges:
+    """Changed paths of one root waiting to be indexed (thread-safe).
+
+    Paths are relative with forward slashes; one ending in "/" stands for
+    a directory subtree.
+    """
+
+    def __init__(self, max_pending: int):
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._paths: Set[str] = set()
+        self._full_scan = False
+        self._first_at: Optional[float] = None
+        self._last_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._paths)
+
+    def add(self, rel_paths: Iterable[str], now: float) -> bool:
+        """Record changed paths. Returns True if this starts a new batch."""
+        with self._lock:
+            started = self._first_at is None
+            if not self._full_scan:
+                self._paths.update(rel_paths)
+                if len(self._paths) > self.max_pending:
+                    self._paths = set()
+                    self._full_scan = True
+            if started:
+                self._first_at = now
+            self._last_at = now
+            return started
+
+    def request_full_scan(self, now: float) -> bool:
+        """Replace the batch with a full scan. Returns True if newly requested."""
+        with self._lock:
+            requested = not self._full_scan
+            self._paths = set()
+            self._full_scan = True
+            if self._first_at is None:
+                self._first_at = now
+            self._last_at = now
+            return requested
+
+    def ready_at(self, debounce: float, max_delay: float) -> Optional[float]:
+        """Monotonic time the batch becomes ready, or None if empty."""
+        with self._lock:
+            if self._first_at is None:
+                return None
+            if self._full_scan:
+                return self._first_at
+            return min(self._last_at + debounce, self._first_at + max_delay)
+
+    def drain(self) -> Tuple[Set[str], bool]:
+        """Take the batch: (paths, full_scan)."""
+        with self._lock:
+            batch = (self._paths, self._full_scan)
+            self._paths = set()
+            self._full_scan = False
+            self._first_at = None
+            self._last_at = None
+            return batch
+
+
+class _RootEventHandler:
+    """watchdog event handler feeding one root's PendingChanges."""
+
+    def __init__(self, folder_path: str, pending: PendingChanges, on_batch: Callable[[], None]):
+        self.folder_path = os.path.abspath(folder_path)
+        self.pending = pending
+        self._on_batch = on_batch
+
+    def _rel_path(self, path: Any) -> Optional[str]:
+        if isinstance(path, bytes):
+            path = os.fsdecode(path)
+        if not path:
+            return None
+        rel_path = os.path.relpath(os.path.abspath(path), self.folder_path)
+        if rel_path == os.curdir:
+            return ""
+        if rel_path == os.pardir or rel_path.startswith(os.pardir + os.sep):
+            return None
+        return rel_path.replace(os.sep, "/")
+
+    def dispatch(self, event: Any) -> None:
+        if event.event_type in _IGNORED_EVENTS:
+            return
+        if event.is_directory and event.event_type == "modified":
+            return  # Entries changing inside a directory arrive as their own events
+        changed = []
+        for path in (event.src_path, getattr(event, "dest_path", "")):
+            rel_path = self._rel_path(path)
+            if rel_path == "":
+                # The root itself moved or vanished
+                if self.pending.request_full_scan(time.monotonic()):
+                    self._on_batch()
+                return
+            if rel_path is not None:
+                changed.append(rel_path + "/" if event.is_directory else rel_path)
+        if changed and self.pending.add(changed, time.monotonic()):
+            self._on_batch()
+
+
+def _default_observer():
+    from watchdog.observers.inotify import InotifyObserver
+    return InotifyObserver()
+
+
+class FolderWatcher:
+    """Watches server-scope roots and batches their changes.
+
+    ``on_batch`` is called (from an observer thread) whenever a root
+    starts a new batch, so the scheduler can wake up and sleep until the
+    batch is ready.
+    """
+
+    def __init__(
+        self,
+        on_batch: Callable[[], None],
+        observer_factory: Optional[Callable[[], Any]] = None,
+        debounce: Optional[float] = None,
+        max_delay: Optional[float] = None,
+        max_pending: Optional[int] = None,
+    ):
+        self._on_batch = on_batch
+        self._observer_factory = observer_factory or _default_observer
+        self.debounce = get_debounce_seconds() if debounce is None else debounce
+        self.max_delay = get_max_delay_seconds() if max_delay is None else max_delay
+        self.max_pending = max_pending or get_max_pending()
+        self._observer = None
+        self._lock = threading.Lock()
+        # folder_id -> (folder_path, watchdog watch, PendingChanges)
+        self._roots: Dict[str, Tuple[str, Any, PendingChanges]] = {}
+        # folder_id -> folder_path that could not be watched
+        self._failed: Dict[str, str] = {}
+
+    def start(self) -> bool:
+        """Start the observer. Returns False if inotify is unavailable."""
+        try:
+            self._observer = self._observer_factory()
+            self._observer.start()
+        except Exception as e:
+            logger.warning("Watch mode unavailable, relying on scheduled scans: %s", e)
+            self._observer = None
+            return False
+        return True
+
+    def stop(self) -> None:
+        observer, self._observer = self._observer, None
+        with self._lock:
+            self._roots = {}
+        if observer is not None:
+            try:
+                observer.stop()
+                observer.join(5)
+            except Exception as e:
+                logger.debug("Error stopping folder observer: %s", e)
+
+    @property
+    def running(self) -> bool:
+        return self._observer is not None
+
+    def watched(self) -> Dict[str, str]:
+        """folder_id -> folder_path of the roots being watched."""
+        with self._lock:
+            return {folder_id: root[0] for folder_id, root in self._roots.items()}
+
+    def needs_sync(self, desired: Dict[str, str]) -> bool:
+        """Whether ``sync(desired)`` would watch or unwatch anything."""
+        if not self.running:
+            return False
+        watched = self.watched()
+        return any(
+            watched.get(folder_id) != path and self._failed.get(folder_id) != path
+            for folder_id, path in desired.items()
+        ) or any(folder_id not in desired for folder_id in watched)
+
+    def sync(self, desired: Dict[str, str]) -> None:
+        """Watch exactly the roots in ``desired`` (folder_id -> folder_path).
+
+        Adding a watch walks the root's directories, so call this off the
+        event loop. Roots that failed to be watched are not retried until
+        ``clear_failures``.
+        """
+        for folder_id, path in self.watched().items():
+            if desired.get(folder_id) != path:
+                self.unwatch(folder_id)
+        for folder_id, path in desired.items():
+            if folder_id not in self._roots and self._failed.get(folder_id) != path:
+                self.watch(folder_id, path)
+
+    def clear_failures(self) -> None:
+        self._failed = {}
+
+    def watch(self, folder_id: str, folder_path: str) -> bool:
+        """Start watching a root recursively. Returns True on success."""
+        if self._observer is None:
+            return False
+        pending = PendingChanges(self.max_pending)
+        handler = _RootEventHandler(folder_path, pending, self._on_batch)
+        try:
+            watch = self._observer.schedule(handler, folder_path, recursive=True)
+        except Exception as e:
+            logger.warning(
+                "Cannot watch %s, relying on its scheduled scans: %s", folder_path, e
+            )
+            self._failed[folder_id] = folder_path
+            return False
+        self._failed.pop(folder_id, None)
+        with self._lock:
+            self._roots[folder_id] = (folder_path, watch, pending)
+        logger.info("Watching %s for changes", folder_path)
+        return True
+
+    def unwatch(self, folder_id: str) -> None:
+        with self._lock:
+            root = self._roots.pop(folder_id, None)
+        if root is None or self._observer is None:
+            return
+        try:
+            self._observer.unschedule(root[1])
+        except Exception as e:
+            logger.debug("Error unwatching %s: %s", root[0], e)
+
+    def next_ready(self, busy: Iterable[str] = ()) -> Optional[float]:
+        """Monotonic time the earliest pending batch of a free root becomes ready."""
+        busy = set(busy)
+        with self._lock:
+            roots = [root for folder_id, root in self._roots.items() if folder_id not in busy]
+        times = [
+            t for t in (pending.ready_at(self.debounce, self.max_delay)
+                        for _path, _watch, pending in roots)
+            if t is not None
+        ]
+        return min(times) if times else None
+
+    def pop_ready(
+        self, now: float, busy: Iterable[str] = (),
+    ) -> List[Tuple[str, Set[str], bool]]:
+        """Take every batch ready at ``now`` as (folder_id, paths, full_scan).
+
+        Roots in ``busy`` (being scanned) keep their batch until they are free.
+        """
+        busy = set(busy)
+        with self._lock:
+            roots = list(self._roots.items())
+        batches = []
+        for folder_id, (_path, _watch, pending) in roots:
+            if folder_id in busy:
+                continue
+            ready = pending.ready_at(self.debounce, self.max_delay)
+            if ready is not None and ready <= now:
+                paths, full_scan = pending.drain()
+                batches.append((folder_id, paths, full_scan))
+        return batches
+
+    def pending_paths(self) -> int:
+        with self._lock:
+            roots = list(self._roots.values())
+        return sum(len(pending) for _path, _watch, pending in roots)
@@ -7,6 +7,7 @@ This is the v2 indexer that uses the new modular architecture.
 import argparse
 import logging
 import sys
+import time
 from typing import Optional, List, Dict, Any, Callable
 from datetime import datetime, timezone
 
@@ -65,7 +66,8 @@ class DocumentIndexer:
         custom_metadata: Optional[Dict[str, Any]] = None,
         ocr_mode: Optional[str] = None,
         rebuild_fts: bool = True,
-        may_replace: Optional[Callable[[str], bool]] = None
+        may_replace: Optional[Callable[[str], bool]] = None,
+        timings: Optional[Dict[str, float]] = None
     ) -> Dict[str, Any]:
         """
         Index a single document.
@@ -79,6 +81,8 @@ class DocumentIndexer:
                 document_id before an existing document is replaced. Returning
                 False raises ReplacementNotAuthorizedError. Identical-hash
                 skips never invoke it.
+            timings: Optional dict filled with the seconds spent in each
+                stage reached ('parse', 'embed', 'write').
 
         Returns:
             Dictionary with indexing results
@@ -89,8 +93,11 @@ class DocumentIndexer:
         """
         try:
             # Process document
+            timings = timings if timings is not None else {}
             logger.info(f"Processing document: {source_uri}")
+            stage_started = time.perf_counter()
             processed_doc = self.processor.process(source_uri, custom_metadata, ocr_mode=ocr_mode)
+            timings['parse'] = round(time.perf_counter() - stage_started, 3)
 
             # Check if document already exists
             existing_doc = self.repository.get_document_by_id(processed_doc.document_id)
@@ -129,10 +136,12 @@ class DocumentIndexer:
             # Generate embeddings
             logger.info(f"Generating embeddings for {len(processed_doc.chunks)} chunks...")
             chunk_texts = processed_doc.get_chunk_texts()
+            stage_started = time.perf_counter()
             embeddings = self.embedding_service.encode_batch(
                 chunk_texts,
                 show_progress=True
             )
+            timings['embed'] = round(time.perf_counter() - stage_started, 3)
 
             # Prepare chunks for insertion
             chunks_data = []
@@ -149,6 +158,7 @@ class DocumentIndexer:
                 ))
 
             from indexing_write_transaction import write_indexed_document
+            stage_started = time.perf_counter()
             write_indexed_document(
                 repository=self.repository,
                 document_id=processed_doc.document_id,
@@ -160,6 +170,7 @@ class DocumentIndexer:
                 rebuild_fts=rebuild_fts,
                 operation_label="document",
             )
+            timings['write'] = round(time.perf_counter() - stage_started, 3)
 
             logger.info(f"✓ Successfully indexed document: {processed_doc.document_id}")
 
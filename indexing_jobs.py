@@ -0,0 +1,732 @@
+"""
+Asynchronous indexing jobs.
+
+``/index``, ``/upload-and-index`` and ``/uploads/{id}/finalize`` normally
+hold the request open for the whole parse + OCR + embed + write cycle.
+With ``?background=true`` they persist the input instead (an uploaded file
+is moved to ``INDEXING_JOB_DIR``), enqueue a job in ``indexing_jobs``
+(migration 034) and answer 202 with the job id. Clients poll
+``GET /indexing/jobs/{id}`` or stream ``/indexing/jobs/{id}/events``.
+
+Each API process runs a bounded pool of job workers (IndexingJobRunner).
+A worker claims the highest-priority, oldest queued job with
+``FOR UPDATE SKIP LOCKED``, so several processes can share one queue, and
+runs it in a thread so parsing and embedding do not stall the event loop.
+Running jobs are heartbeated; a job whose heartbeat stops (the process
+died) is queued again until it has been attempted
+``INDEXING_JOB_MAX_ATTEMPTS`` times, so queued and interrupted jobs
+survive restarts. On shutdown, running jobs get SHUTDOWN_GRACE_SECONDS to
+finish before they are released to the queue. A stored upload is removed
+only by the worker that records the job's outcome, so a released job that
+another process claims still finds its file.
+
+Every job records an indexing run whose metadata carries the job id,
+priority, attempt, queue wait and queue depth at claim time; the run's
+``metadata.stages`` holds the per-stage durations.
+
+Job kinds are handled by functions registered with
+``register_job_handler`` (routers/indexing_api.py registers "index" and
+"upload").
+
+Environment:
+    INDEXING_JOBS_ENABLED          (default true; false = enqueue only,
+                                    leave the jobs to other processes)
+    INDEXING_JOB_WORKERS           (default 2)
+    INDEXING_JOB_POLL_SECONDS      (default 2)
+    INDEXING_JOB_STALE_SECONDS     (default 300)
+    INDEXING_JOB_MAX_ATTEMPTS      (default 3)
+    INDEXING_JOB_RETENTION_DAYS    (default 7; finished jobs are then deleted)
+    INDEXING_JOB_DIR               (default <system temp>/pgvector_indexing_jobs)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import shutil
+import socket
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+INDEXING_JOBS_ENABLED_ENV = "INDEXING_JOBS_ENABLED"
+JOB_WORKERS_ENV = "INDEXING_JOB_WORKERS"
+JOB_POLL_SECONDS_ENV = "INDEXING_JOB_POLL_SECONDS"
+JOB_STALE_SECONDS_ENV = "INDEXING_JOB_STALE_SECONDS"
+JOB_MAX_ATTEMPTS_ENV = "INDEXING_JOB_MAX_ATTEMPTS"
+JOB_RETENTION_DAYS_ENV = "INDEXING_JOB_RETENTION_DAYS"
+JOB_DIR_ENV = "INDEXING_JOB_DIR"
+
+DEFAULT_JOB_WORKERS = 2
+DEFAULT_JOB_POLL_SECONDS = 2
+DEFAULT_JOB_STALE_SECONDS = 300
+DEFAULT_JOB_MAX_ATTEMPTS = 3
+DEFAULT_JOB_RETENTION_DAYS = 7
+PURGE_INTERVAL_SECONDS = 3600
+# How long stop() waits for running jobs to finish before releasing them
+SHUTDOWN_GRACE_SECONDS = 30
+
+TERMINAL_STATUSES = ("succeeded", "failed", "cancelled")
+
+_JOB_COLUMNS = (
+    "id, kind, status, priority, source_uri, payload, owner_key_id, attempts, "
+    "worker_id, run_id, result, error, created_at, started_at, heartbeat_at, completed_at"
+)
+
+# handler(payload, key_record, run_id) -> result dict
+JobHandler = Callable[[Dict[str, Any], Optional[dict], str], Awaitable[Dict[str, Any]]]
+
+# kind -> (handler, indexing run trigger)
+_handlers: Dict[str, Tuple[JobHandler, str]] = {}
+
+
+def _int_env(name: str, default: int) -> int:
+    try:
+        value = int(os.environ.get(name, default))
+        return value if value > 0 else default
+    except (ValueError, TypeError):
+        return default
+
+
+def get_job_dir() -> Path:
+    """Directory holding the files of queued upload jobs."""
+    configured = os.environ.get(JOB_DIR_ENV)
+    if configured:
+        return Path(configured)
+    return Path(tempfile.gettempdir()) / "pgvector_indexing_jobs"
+
+
+def get_stale_seconds() -> int:
+    """Heartbeat age after which a running job is considered abandoned."""
+    return _int_env(JOB_STALE_SECONDS_ENV, DEFAULT_JOB_STALE_SECONDS)
+
+
+def get_max_attempts() -> int:
+    """Attempts before an abandoned job is failed instead of queued again."""
+    return _int_env(JOB_MAX_ATTEMPTS_ENV, DEFAULT_JOB_MAX_ATTEMPTS)
+
+
+def get_retention_days() -> int:
+    """Days finished jobs are kept, default 7."""
+    return _int_env(JOB_RETENTION_DAYS_ENV, DEFAULT_JOB_RETENTION_DAYS)
+
+
+def register_job_handler(kind: str, handler: JobHandler, trigger: str = "api") -> None:
+    """Register the coroutine that runs jobs of ``kind``.
+
+    ``trigger`` is recorded on the job's indexing run.
+    """
+    _handlers[kind] = (handler, trigger)
+
+
+def _get_db_connection():
+    from database import get_db_manager
+    return get_db_manager().get_connection()
+
+
+def _valid_job_id(job_id: str) -> bool:
+    try:
+        uuid.UUID(str(job_id))
+        return True
+    except ValueError:
+        return False
+
+
+def _job_to_dict(columns: List[str], row: tuple) -> Dict[str, Any]:
+    d = dict(zip(columns, row))
+    d["job_id"] = str(d.pop("id"))
+    if d.get("run_id") is not None:
+        d["run_id"] = str(d["run_id"])
+    for key in ("created_at", "started_at", "heartbeat_at", "completed_at"):
+        if d.get(key) is not None:
+            d[key] = d[key].isoformat() if hasattr(d[key], "isoformat") else str(d[key])
+    return d
+
+
+# ---------------------------------------------------------------------------
+# Job files
+# ---------------------------------------------------------------------------
+
+
+def store_job_file(path: str, filename: Optional[str]) -> str:
+    """Move a received upload into the job directory. Returns the new path.
+
+    The original extension is kept; the document processor dispatches on it.
+    """
+    root = get_job_dir()
+    root.mkdir(parents=True, exist_ok=True)
+    suffix = os.path.splitext(filename or "")[1] or os.path.splitext(path)[1]
+    target = root / f"{uuid.uuid4().hex}{suffix}"
+    shutil.move(path, target)
+    return str(target)
+
+
+def remove_job_file(payload: Optional[Dict[str, Any]]) -> None:
+    """Delete the stored upload of a job that finished or will not run."""
+    path = (payload or {}).get("file_path")
+    if not path:
+        return
+    try:
+        if Path(path).resolve().parent == get_job_dir().resolve():
+            os.remove(path)
+    except OSError:
+        pass
+
+
+# ---------------------------------------------------------------------------
+# Queue
+# ---------------------------------------------------------------------------
+
+
+def enqueue_job(
+    kind: str,
+    payload: Dict[str, Any],
+    *,
+    priority: int = 0,
+    source_uri: Optional[str] = None,
+    owner_key_id: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Queue a job. Higher ``priority`` runs first; ties run oldest first.
+
+    Raises on database errors: the caller has nothing to fall back to.
+    """
+    with _get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                INSERT INTO indexing_jobs (kind, priority, source_uri, payload, owner_key_id)
+                VALUES (%s, %s, %s, %s::jsonb, %s)
+                RETURNING {_JOB_COLUMNS}
+                """,
+                (kind, priority, source_uri, json.dumps(payload, default=str), owner_key_id),
+            )
+            columns = [d[0] for d in cur.description]
+            row = cur.fetchone()
+            conn.commit()
+    job = _job_to_dict(columns, row)
+    logger.info("Queued %s job %s for %s (priority %d)", kind, job["job_id"], source_uri, priority)
+    return job
+
+
+def claim_next_job(worker_id: str) -> Optional[Dict[str, Any]]:
+    """Claim the next queued job for ``worker_id``, or None.
+
+    Jobs locked by a concurrent claim are skipped rather than waited for.
+    The returned job carries ``queue_depth``: jobs still queued after it.
+    """
+    try:
+        with _get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"""
+                    UPDATE indexing_jobs AS j
+                    SET status = 'running',
+                        attempts = j.attempts + 1,
+                        worker_id = %s,
+                        started_at = now(),
+                        heartbeat_at = now()
+                    FROM (
+                        SELECT id FROM indexing_jobs
+                        WHERE status = 'queued'
+                        ORDER BY priority DESC, created_at
+                        LIMIT 1
+                        FOR UPDATE SKIP LOCKED
+                    ) AS next
+                    WHERE j.id = next.id
+                    RETURNING {", ".join("j." + c for c in _JOB_COLUMNS.split(", "))}
+                    """,
+                    (worker_id,),
+                )
+                columns = [d[0] for d in cur.description]
+                row = cur.fetchone()
+                if row is None:
+                    conn.commit()
+                    return None
+                cur.execute("SELECT count(*) FROM indexing_jobs WHERE status = 'queued'")
+                queue_depth = cur.fetchone()[0]
+                conn.commit()
+    except Exception as e:
+        logger.warning("Failed to claim indexing job: %s", e)
+        return None
+    job = dict(zip(columns, row))
+    wait = (job["started_at"] - job["created_at"]).total_seconds()
+    job = _job_to_dict(columns, row)
+    job["queue_depth"] = queue_depth
+    job["queue_wait_seconds"] = round(wait, 3)
+    return job
+
+
+def attach_run(job_id: str, run_id: str) -> None:
+    """Record the indexing run of a running job."""
+    try:
+        with _get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "UPDATE indexing_jobs SET run_id = %s WHERE id = %s",
+                    (run_id, job_id),
+                )
+                conn.commit()
+    except Exception as e:
+        logger.warning("Failed to record run of indexing job %s: %s", job_id, e)
+
+
+def heartbeat_jobs(job_ids: List[str]) -> int:
+    """Mark running jobs as alive. Returns how many were updated."""
+    if not job_ids:
+        return 0
+    try:
+        with _get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    UPDATE indexing_jobs SET heartbeat_at = now()
+                    WHERE id = ANY(%s::uuid[]) AND status = 'running'
+                    """,
+                    (list(job_ids),),
+                )
+                updated = cur.rowcount
+                conn.commit()
+        return updated
+    except Exception as e:
+        logger.warning("Failed to heartbeat indexing jobs: %s", e)
+        return 0
+
+
+def finish_job(
+    job_id: str,
+    worker_id: str,
+    status: str,
+    *,
+    result: Optional[Dict[str, Any]] = None,
+    error: Optional[Dict[str, Any]] = None,
+) -> bool:
+    """Record the outcome of a job claimed by ``worker_id``.
+
+    Also applies to a job released back to the queue by the same worker
+    (shutdown while it ran), so a job that did complete is not run again.
+    """
+    try:
+        with _get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    UPDATE indexing_jobs
+                    SET status = %s, result = %s::jsonb, error = %s::jsonb,
+                        completed_at = now(), heartbeat_at = NULL
+                    WHERE id = %s AND worker_id = %s AND status IN ('running', 'queued')
+                    """,
+                    (
+                        status,
+                        json.dumps(result, default=str) if result is not None else None,
+                        json.dumps(error, default=str) if error is not None else None,
+                        job_id,
+                        worker_id,
+                    ),
+                )
+                updated = cur.rowcount
+                conn.commit()
+        return updated > 0
+    except Exception as e:
+        logger.warning("Failed to record outcome of indexing job %s: %s", job_id, e)
+        return False
+
+
+def release_job(job_id: str) -> None:
+    """Put a job cut off by shutdown back in the queue without using an attempt."""
+    try:
+        with _get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    UPDATE indexing_jobs
+                    SET status = 'queued', attempts = GREATEST(attempts - 1, 0),
+                        started_at = NULL, heartbeat_at = NULL
+                    WHERE id = %s AND status = 'running'
+                    """,
+                    (job_id,),
+                )
+                conn.commit()
+    except Exception as e:
+        logger.warning("Failed to release indexing job %s: %s", job_id, e)
+
+
+def requeue_stale_jobs(
+    stale_seconds: Optional[int] = None,
+    max_attempts: Optional[int] = None,
+) -> Dict[str, int]:
+    """Queue again running jobs whose heartbeat stopped.
+
+    Jobs that already used ``max_attempts`` are failed instead and their
+    stored upload is removed.
+    """
+    stale_seconds = stale_seconds or get_stale_seconds()
+    max_attempts = max_attempts or get_max_attempts()
+    try:
+        with _get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    UPDATE indexing_jobs
+                    SET status = CASE WHEN attempts < %s THEN 'queued' ELSE 'failed' END,
+                        error = CASE WHEN attempts < %s THEN error
+                                ELSE jsonb_build_object(
+                                    'detail', 'Worker stopped responding; attempts exhausted')
+                                END,
+                        completed_at = CASE WHEN attempts < %s THEN NULL ELSE now() END,
+                        started_at = CASE WHEN attempts < %s THEN NULL ELSE started_at END,
+                        heartbeat_at = NULL
+                    WHERE status = 'running'
+                      AND heartbeat_at < now() - make_interval(secs => %s)
+                    RETURNING id, status, payload
+                    """,
+                    (max_attempts, max_attempts, max_attempts, max_attempts, stale_seconds),
+                )
+                rows = cur.fetchall()
+                conn.commit()
+    except Exception as e:
+        logger.warning("Failed to requeue stale indexing jobs: %s", e)
+        return {"requeued": 0, "failed": 0}
+    failed = [payload for _, status, payload in rows if status == "failed"]
+    for payload in failed:
+        remove_job_file(payload)
+    if rows:
+        logger.warning(
+            "Recovered %d abandoned indexing job(s): %d queued again, %d failed",
+            len(rows), len(rows) - len(failed), len(failed),
+        )
+    return {"requeued": len(rows) - len(failed), "failed": len(failed)}
+
+
+def get_job(job_id: str, owner_key_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """A job of ``owner_key_id``, with ``queue_position`` (1 = next) while queued."""
+    if not _valid_job_id(job_id):
+        return None
+    try:
+        with _get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"""
+                    SELECT {_JOB_COLUMNS},
+                           CASE WHEN status = 'queued' THEN (
+                               SELECT count(*) + 1 FROM indexing_jobs q
+                               WHERE q.status = 'queued'
+                                 AND (q.priority > j.priority
+                                      OR (q.priority = j.priority AND q.created_at < j.created_at))
+                           ) END AS queue_position
+                    FROM indexing_jobs j
+                    WHERE id = %s AND owner_key_id IS NOT DISTINCT FROM %s
+                    """,
+                    (job_id, owner_key_id),
+                )
+                columns = [d[0] for d in cur.description]
+                row = cur.fetchone()
+        return _job_to_dict(columns, row) if row else None
+    except Exception as e:
+        logger.warning("Failed to load indexing job %s: %s", job_id, e)
+        return None
+
+
+def list_jobs(
+    owner_key_id: Optional[int] = None,
+    status: Optional[str] = None,
+    limit: int = 50,
+) -> List[Dict[str, Any]]:
+    """Most recent jobs of ``owner_key_id``, optionally of one status."""
+    where = "owner_key_id IS NOT DISTINCT FROM %s"
+    params: List[Any] = [owner_key_id]
+    if status:
+        where += " AND status = %s"
+        params.append(status)
+    params.append(limit)
+    try:
+        with _get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"""
+                    SELECT {_JOB_COLUMNS} FROM indexing_jobs
+                    WHERE {where}
+                    ORDER BY created_at DESC
+                    LIMIT %s
+                    """,
+                    params,
+                )
+                columns = [d[0] for d in cur.description]
+                return [_job_to_dict(columns, row) for row in cur.fetchall()]
+    except Exception as e:
+        logger.warning("Failed to list indexing jobs: %s", e)
+        return []
+
+
+def cancel_job(job_id: str, owner_key_id: Optional[int] = None) -> bool:
+    """Cancel a queued job. Returns False if it is not (or no longer) queued."""
+    if not _valid_job_id(job_id):
+        return False
+    with _get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE indexing_jobs SET status = 'cancelled', completed_at = now()
+                WHERE id = %s AND status = 'queued'
+                  AND owner_key_id IS NOT DISTINCT FROM %s
+                RETURNING payload
+                """,
+                (job_id, owner_key_id),
+            )
+            row = cur.fetchone()
+            conn.commit()
+    if row is None:
+        return False
+    remove_job_file(row[0])
+    return True
+
+
+def queue_stats() -> Dict[str, Any]:
+    """Queued and running job counts and the age of the oldest queued job."""
+    try:
+        with _get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    SELECT count(*) FILTER (WHERE status = 'queued'),
+                           count(*) FILTER (WHERE status = 'running'),
+                           EXTRACT(EPOCH FROM now() - min(created_at)
+                                   FILTER (WHERE status = 'queued'))
+                    FROM indexing_jobs
+                    WHERE status IN ('queued', 'running')
+                    """
+                )
+                queued, running, oldest = cur.fetchone()
+        return {
+            "queued": queued,
+            "running": running,
+            "oldest_queued_seconds": round(float(oldest), 3) if oldest is not None else None,
+        }
+    except Exception as e:
+        logger.warning("Failed to read indexing job queue stats: %s", e)
+        return {"queued": None, "running": None, "oldest_queued_seconds": None}
+
+
+def purge_finished_jobs(days: Optional[int] = None) -> int:
+    """Delete jobs finished more than ``days`` ago. Returns how many."""
+    from batched_delete import delete_in_batches
+
+    days = days or get_retention_days()
+    try:
+        stats = delete_in_batches(
+            "indexing_jobs",
+            "indexing_jobs",
+            "status IN ('succeeded', 'failed', 'cancelled') "
+            "AND completed_at < now() - make_interval(days => %s)",
+            (days,),
+            connection_factory=_get_db_connection,
+        )
+        return stats["deleted"]
+    except Exception as e:
+        logger.warning("Failed to purge finished indexing jobs: %s", e)
+        return 0
+
+
+# ---------------------------------------------------------------------------
+# Workers
+# ---------------------------------------------------------------------------
+
+
+def _run_job(job: Dict[str, Any], worker_id: str) -> str:
+    """Run one claimed job to completion (called in a worker thread)."""
+    from indexing_runs import start_run
+
+    job_id = job["job_id"]
+    handler, trigger = _handlers.get(job["kind"], (None, "api"))
+    run_id = start_run(
+        trigger=trigger,
+        source_uri=job.get("source_uri"),
+        metadata={"job": {
+            "id": job_id,
+            "kind": job["kind"],
+            "priority": job["priority"],
+            "attempt": job["attempts"],
+            "queue_wait_seconds": job.get("queue_wait_seconds"),
+            "queue_depth": job.get("queue_depth"),
+            "worker": worker_id,
+        }},
+    )
+    attach_run(job_id, run_id)
+
+    owner = job.get("owner_key_id")
+    key_record = {"id": owner} if owner is not None else None
+    result = error = None
+    try:
+        if handler is None:
+            raise LookupError(f"No handler for indexing job kind {job['kind']!r}")
+        result = asyncio.run(handler(job.get("payload") or {}, key_record, run_id))
+        status = "succeeded"
+    except Exception as e:
+        status = "failed"
+        error = {
+            "status_code": getattr(e, "status_code", None),
+            "detail": getattr(e, "detail", None) or str(e),
+        }
+        logger.warning("Indexing job %s failed: %s", job_id, error["detail"])
+    # If the outcome was not recorded, the job was released and claimed by
+    # another worker, which now owns the stored upload.
+    if finish_job(job_id, worker_id, status, result=result, error=error):
+        remove_job_file(job.get("payload"))
+    return status
+
+
+class IndexingJobRunner:
+    """Bounded pool of workers consuming the indexing job queue."""
+
+    def __init__(self):
+        self._tasks: List[asyncio.Task] = []
+        self._maintainer: Optional[asyncio.Task] = None
+        self._running = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake_event: Optional[asyncio.Event] = None
+        # job_id -> worker_id of the jobs this process is running
+        self._active: Dict[str, str] = {}
+        self._worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self._last_purge: Optional[float] = None
+        self._completed = 0
+        self._failed = 0
+
+    @staticmethod
+    def is_enabled() -> bool:
+        val = os.environ.get(INDEXING_JOBS_ENABLED_ENV, "true")
+        return val.lower() in ("true", "1", "yes")
+
+    @staticmethod
+    def worker_count() -> int:
+        return _int_env(JOB_WORKERS_ENV, DEFAULT_JOB_WORKERS)
+
+    @staticmethod
+    def poll_interval_seconds() -> int:
+        return _int_env(JOB_POLL_SECONDS_ENV, DEFAULT_JOB_POLL_SECONDS)
+
+    async def start(self) -> None:
+        if self._running:
+            return
+        self._running = True
+        self._loop = asyncio.get_running_loop()
+        self._wake_event = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._worker(f"{self._worker_prefix}:{n}"))
+            for n in range(self.worker_count())
+        ]
+        self._maintainer = asyncio.create_task(self._maintain())
+        logger.info("Indexing job runner started with %d worker(s)", self.worker_count())
+
+    async def stop(self) -> None:
+        """Stop claiming jobs and wind the workers down.
+
+        Running jobs are given SHUTDOWN_GRACE_SECONDS to finish (and are
+        heartbeated meanwhile). Jobs still running after that go back to
+        the queue for the next process.
+        """
+        self._running = False
+        if self._wake_event is not None:
+            self._wake_event.set()
+        if self._tasks:
+            await asyncio.wait(self._tasks, timeout=SHUTDOWN_GRACE_SECONDS)
+        in_flight = list(self._active)
+        for task in [*self._tasks, self._maintainer]:
+            if task is None:
+                continue
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        self._maintainer = None
+        # The threads of these jobs cannot be interrupted; if one still
+        # finishes, finish_job records it unless another worker claimed it.
+        for job_id in in_flight:
+            await asyncio.to_thread(release_job, job_id)
+        self._active.clear()
+        logger.info("Indexing job runner stopped")
+
+    def wake(self) -> None:
+        """Let idle workers look for a job now instead of at the next poll."""
+        if self._loop is None or self._wake_event is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._wake_event.set)
+        except RuntimeError:
+            pass  # loop closed
+
+    def get_status(self) -> dict:
+        return {
+            "enabled": self.is_enabled(),
+            "running": self._running,
+            "workers": self.worker_count() if self._running else 0,
+            "active_jobs": list(self._active),
+            "completed": self._completed,
+            "failed": self._failed,
+            "poll_interval_seconds": self.poll_interval_seconds(),
+        }
+
+    async def _idle(self) -> None:
+        try:
+            await asyncio.wait_for(self._wake_event.wait(), timeout=self.poll_interval_seconds())
+        except asyncio.TimeoutError:
+            pass
+        self._wake_event.clear()
+
+    async def _worker(self, worker_id: str) -> None:
+        while self._running:
+            try:
+                job = await asyncio.to_thread(claim_next_job, worker_id)
+                if job is None:
+                    await self._idle()
+                    continue
+                self._active[job["job_id"]] = worker_id
+                try:
+                    status = await asyncio.to_thread(_run_job, job, worker_id)
+                finally:
+                    self._active.pop(job["job_id"], None)
+                if status == "succeeded":
+                    self._completed += 1
+                else:
+                    self._failed += 1
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.warning("Indexing job worker %s failed: %s", worker_id, e)
+                await asyncio.sleep(self.poll_interval_seconds())
+
+    async def _maintain(self) -> None:
+        """Heartbeat our jobs, recover abandoned ones, purge old ones."""
+        interval = max(1, min(get_stale_seconds() // 3, 30))
+        # Keeps heartbeating jobs that run on during stop()'s grace period
+        while self._running or self._active:
+            try:
+                await asyncio.to_thread(heartbeat_jobs, list(self._active))
+                recovered = await asyncio.to_thread(requeue_stale_jobs)
+                if recovered["requeued"]:
+                    self.wake()
+                now = time.monotonic()
+                if self._last_purge is None or now - self._last_purge >= PURGE_INTERVAL_SECONDS:
+                    self._last_purge = now
+                    await asyncio.to_thread(purge_finished_jobs)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.warning("Indexing job maintenance failed: %s", e)
+            await asyncio.sleep(interval)
+
+
+_runner: Optional[IndexingJobRunner] = None
+
+
+def get_indexing_job_runner() -> IndexingJobRunner:
+    global _runner
+    if _runner is None:
+        _runner = IndexingJobRunner()
+    return _runner
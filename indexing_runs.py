@@ -29,7 +29,8 @@ def start_run(
     """Record the start of an indexing run.
 
     Args:
-        trigger: What initiated the run ('manual', 'upload', 'cli', 'scheduled', 'api').
+        trigger: What initiated the run ('manual', 'upload', 'cli', 'scheduled', 'api',
+            'watch').
         source_uri: Optional source being indexed (file path, folder, etc.).
         metadata: Optional extra metadata to store with the run.
         client_id: Optional client identity that initiated the run (#8).
@@ -66,6 +67,7 @@ def complete_run(
     files_skipped: int = 0,
     files_failed: int = 0,
     errors: Optional[List[Dict[str, Any]]] = None,
+    metadata: Optional[Dict[str, Any]] = None,
 ) -> None:
     """Record the completion of an indexing run.
 
@@ -78,6 +80,8 @@ def complete_run(
         files_skipped: Files skipped (already indexed, unsupported, etc.).
         files_failed: Files that failed to index.
         errors: List of error dicts [{source_uri, error, ...}].
+        metadata: Extra run metadata (e.g. phase timings), merged into the
+            metadata recorded by start_run().
     """
     db = get_db_manager()
     try:
@@ -93,7 +97,8 @@ def complete_run(
                         files_updated = %s,
                         files_skipped = %s,
                         files_failed = %s,
-                        errors = %s::jsonb
+                        errors = %s::jsonb,
+                        metadata = COALESCE(metadata, '{}'::jsonb) || %s::jsonb
                     WHERE id = %s
                     """,
                     (
@@ -104,6 +109,7 @@ def complete_run(
                         files_skipped,
                         files_failed,
                         _json_dumps(errors or []),
+                        _json_dumps(metadata or {}),
                         run_id,
                     ),
                 )
@@ -113,6 +119,101 @@ def complete_run(
         logger.warning("Failed to record indexing run completion: %s", e)
 
 
+def checkpoint_run(
+    run_id: str,
+    *,
+    files_scanned: int = 0,
+    files_added: int = 0,
+    files_updated: int = 0,
+    files_skipped: int = 0,
+    files_failed: int = 0,
+    checkpoint: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Record the progress of a run that is still going.
+
+    Updates the file counters and stores ``checkpoint`` (last path done,
+    files done/total, time) as ``metadata.checkpoint``. Runs that have
+    already completed are left alone.
+    """
+    db = get_db_manager()
+    try:
+        with db.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    UPDATE indexing_runs
+                    SET files_scanned = %s,
+                        files_added = %s,
+                        files_updated = %s,
+                        files_skipped = %s,
+                        files_failed = %s,
+                        metadata = COALESCE(metadata, '{}'::jsonb)
+                            || jsonb_build_object('checkpoint', %s::jsonb)
+                    WHERE id = %s AND status = 'running'
+                    """,
+                    (
+                        files_scanned,
+                        files_added,
+                        files_updated,
+                        files_skipped,
+                        files_failed,
+                        _json_dumps(checkpoint or {}),
+                        run_id,
+                    ),
+                )
+                conn.commit()
+    except Exception as e:
+        logger.warning("Failed to record indexing run checkpoint: %s", e)
+
+
+def close_interrupted_runs(
+    source_uri: str,
+    resumed_by: str,
+    stale_seconds: float = 0,
+) -> Optional[Dict[str, Any]]:
+    """Close runs of ``source_uri`` left running by a scan that died.
+
+    A run counts as interrupted when its last checkpoint (or its start, if
+    it never checkpointed) is more than ``stale_seconds`` old; 0 treats
+    every other running run of the source as interrupted, for callers that
+    know no other scan of it can be running. Interrupted runs are marked
+    'partial' with ``metadata.interrupted`` and ``metadata.resumed_by``.
+
+    Returns:
+        {"run_id", "checkpoint"} of the most recent interrupted run, or
+        None if there was none (or on failure).
+    """
+    db = get_db_manager()
+    try:
+        with db.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    UPDATE indexing_runs
+                    SET status = 'partial',
+                        completed_at = now(),
+                        metadata = COALESCE(metadata, '{}'::jsonb)
+                            || jsonb_build_object('interrupted', true, 'resumed_by', %s::text)
+                    WHERE status = 'running'
+                      AND source_uri = %s
+                      AND id <> %s::uuid
+                      AND COALESCE((metadata->'checkpoint'->>'at')::timestamptz, started_at)
+                          <= now() - make_interval(secs => %s)
+                    RETURNING id, started_at, metadata->'checkpoint'
+                    """,
+                    (resumed_by, source_uri, resumed_by, stale_seconds),
+                )
+                rows = cur.fetchall()
+                conn.commit()
+    except Exception as e:
+        logger.warning("Failed to close interrupted indexing runs: %s", e)
+        return None
+    if not rows:
+        return None
+    run_id, _started_at, checkpoint = max(rows, key=lambda row: row[1])
+    return {"run_id": str(run_id), "checkpoint": checkpoint or {}}
+
+
 # ---------------------------------------------------------------------------
 # Queries
 # ---------------------------------------------------------------------------
@@ -189,21 +290,28 @@ def get_run_summary() -> Dict[str, Any]:
     try:
         with db.get_connection() as conn:
             with conn.cursor() as cur:
+                # Per-status counters maintained by triggers (migration 029);
+                # last_run_at walks the started_at index.
                 cur.execute("""
                     SELECT
-                        COUNT(*) AS total_runs,
-                        COUNT(*) FILTER (WHERE status = 'success') AS successful,
-                        COUNT(*) FILTER (WHERE status = 'failed') AS failed,
-                        COUNT(*) FILTER (WHERE status = 'partial') AS partial,
+                        COALESCE(SUM(run_count), 0) AS total_runs,
+                        COALESCE(SUM(run_count) FILTER (WHERE status = 'success'), 0) AS successful,
+                        COALESCE(SUM(run_count) FILTER (WHERE status = 'failed'), 0) AS failed,
+                        COALESCE(SUM(run_count) FILTER (WHERE status = 'partial'), 0) AS partial,
                         COALESCE(SUM(files_added), 0) AS total_files_added,
                         COALESCE(SUM(files_updated), 0) AS total_files_updated,
-                        MAX(started_at) AS last_run_at
-                    FROM indexing_runs
-                    WHERE status != 'running'
+                        (SELECT started_at FROM indexing_runs
+                         WHERE status != 'running'
+                         ORDER BY started_at DESC LIMIT 1) AS last_run_at
+                    FROM indexing_run_stats
                 """)
                 row = cur.fetchone()
                 columns = [desc[0] for desc in cur.description]
-                return dict(zip(columns, row))
+                summary = dict(zip(columns, row))
+                for key, value in summary.items():
+                    if key != "last_run_at":
+                        summary[key] = int(value)
+                return summary
     except Exception as e:
         logger.error("Failed to get run summary: %s", e)
         return {
@@ -225,29 +333,29 @@ def apply_retention(days: int) -> int:
     - Deletes only terminal states: success, partial, failed.
     - Uses COALESCE(completed_at, started_at) as the age timestamp.
 
+    Deletes in committed batches (see ``batched_delete``).
+
     Returns:
         Number of rows deleted.
     """
+    from batched_delete import delete_in_batches
+
     db = get_db_manager()
     try:
-        with db.get_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    """
-                    DELETE FROM indexing_runs
-                    WHERE status IN ('success', 'partial', 'failed')
-                      AND COALESCE(completed_at, started_at) < now() - interval '%s days'
-                    """,
-                    (days,),
-                )
-                deleted = cur.rowcount
-                conn.commit()
+        stats = delete_in_batches(
+            "indexing_runs",
+            "indexing_runs",
+            """status IN ('success', 'partial', 'failed')
+               AND COALESCE(completed_at, started_at) < now() - interval '%s days'""",
+            (days,),
+            connection_factory=db.get_connection,
+        )
         logger.info(
             "Retention: deleted %d indexing run rows older than %d days",
-            deleted,
+            stats["deleted"],
             days,
         )
-        return deleted
+        return stats["deleted"]
     except Exception as e:
         logger.warning("Failed to apply indexing run retention: %s", e)
         return 0
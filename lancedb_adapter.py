@@ -9,6 +9,7 @@ import logging
 import math
 import os
 import json
+import re
 import xxhash
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple, Sequence, Iterable
@@ -22,6 +23,17 @@ PARENT_TABLE = "parent_documents"
 CHUNK_TABLE = "document_chunks"
 VECTOR_METRIC = "cosine"
 
+# Mirrored from PostgreSQL so search can filter on access without an id list.
+ACCESS_COLUMNS = ("owner_id", "visibility")
+
+# Lower-cased ".ext" suffix of source_uri, as in Postgres migration 028.
+# The SQL form fills the column on tables created before it existed.
+_FILE_EXTENSION_RE = re.compile(r"\.[A-Za-z0-9]{1,10}$")
+FILE_EXTENSION_SQL = "lower(regexp_match(source_uri, '(\\.[A-Za-z0-9]{1,10})$')[1])"
+
+# Low-cardinality filter columns, indexed so prefiltered searches skip scans.
+FILTER_INDEX_COLUMNS = ("document_type", "namespace", "category", "file_extension")
+
 # Defaults for the auto-sized semantic rescue pool (see auto_semantic_pool).
 SEMANTIC_POOL_FLOOR_DEFAULT = 100
 SEMANTIC_POOL_CAP_DEFAULT = 1000
@@ -45,6 +57,23 @@ def auto_semantic_pool(
     return max(floor, min(cap, round(math.sqrt(chunk_count))))
 
 
+def lancedb_visibility(owner_id: Optional[str], visibility: Optional[str]) -> str:
+    """Effective visibility stored in the LanceDB ``visibility`` column.
+
+    Mirrors the Postgres rules: only a private document with an owner is
+    hidden from other users, so everything else is stored as 'shared'. NULL
+    is reserved for rows written before the column existed; the access
+    predicate treats those as hidden until backfilled.
+    """
+    return "private" if visibility == "private" and owner_id else "shared"
+
+
+def file_extension(source_uri: str) -> Optional[str]:
+    """Return the lower-cased extension of a source URI ('.pdf'), or None."""
+    match = _FILE_EXTENSION_RE.search(source_uri or "")
+    return match.group(0).lower() if match else None
+
+
 def generate_chunk_id(document_id: str, chunk_index: int) -> int:
     """Generate a deterministic, unique positive int64 ID for a chunk."""
     h = xxhash.xxh64(f"{document_id}:{chunk_index}")
@@ -77,7 +106,10 @@ class BackendLanceDBAdapter:
             pa.field("document_type", pa.string(), nullable=True),
             pa.field("namespace", pa.string(), nullable=True),
             pa.field("category", pa.string(), nullable=True),
-            pa.field("metadata", pa.string(), nullable=False)  # JSON-serialized metadata
+            pa.field("file_extension", pa.string(), nullable=True),
+            pa.field("metadata", pa.string(), nullable=False),  # JSON-serialized metadata
+            pa.field("owner_id", pa.string(), nullable=True),
+            pa.field("visibility", pa.string(), nullable=True),
         ])
 
         self.chunk_schema = pa.schema([
@@ -90,7 +122,10 @@ class BackendLanceDBAdapter:
             pa.field("document_type", pa.string(), nullable=True),
             pa.field("namespace", pa.string(), nullable=True),
             pa.field("category", pa.string(), nullable=True),
-            pa.field("metadata", pa.string(), nullable=False)  # JSON-serialized metadata
+            pa.field("file_extension", pa.string(), nullable=True),
+            pa.field("metadata", pa.string(), nullable=False),  # JSON-serialized metadata
+            pa.field("owner_id", pa.string(), nullable=True),
+            pa.field("visibility", pa.string(), nullable=True),
         ])
 
         # Auto-create tables on init
@@ -109,16 +144,31 @@ class BackendLanceDBAdapter:
                 chunk_table = self.db.create_table(CHUNK_TABLE, schema=self.chunk_schema)
                 chunk_table.create_fts_index("text_content", with_position=True)
 
-            # Create scalar indexes to speed up pre-filtered queries
-            try:
-                self.db.open_table(PARENT_TABLE).create_scalar_index("document_id")
-            except Exception as e:
-                logger.warning(f"Failed to create scalar index on parent table document_id: {e}")
+            # Tables created before owner_id/visibility existed get the columns
+            # as NULL (hidden from non-admins until backfill_access runs).
+            for table_name in (PARENT_TABLE, CHUNK_TABLE):
+                table = self.db.open_table(table_name)
+                missing = [c for c in ACCESS_COLUMNS if c not in table.schema.names]
+                if missing:
+                    logger.info(f"Adding access columns {missing} to LanceDB table: {table_name}")
+                    table.add_columns({c: "CAST(NULL AS STRING)" for c in missing})
+                if "file_extension" not in table.schema.names:
+                    logger.info(f"Adding file_extension column to LanceDB table: {table_name}")
+                    table.add_columns({"file_extension": FILE_EXTENSION_SQL})
 
-            try:
-                self.db.open_table(CHUNK_TABLE).create_scalar_index("document_id")
-            except Exception as e:
-                logger.warning(f"Failed to create scalar index on chunk table document_id: {e}")
+            # Create scalar indexes to speed up pre-filtered queries
+            for table_name, label in ((PARENT_TABLE, "parent"), (CHUNK_TABLE, "chunk")):
+                table = self.db.open_table(table_name)
+                for column, index_type in (
+                    ("document_id", "BTREE"),
+                    ("owner_id", "BTREE"),
+                    ("visibility", "BITMAP"),
+                    *((column, "BITMAP") for column in FILTER_INDEX_COLUMNS),
+                ):
+                    try:
+                        table.create_scalar_index(column, index_type=index_type)
+                    except Exception as e:
+                        logger.warning(f"Failed to create scalar index on {label} table {column}: {e}")
 
     def _table_exists(self, table_name: str) -> bool:
         """Return True when a LanceDB table is listed or can be opened from disk."""
@@ -151,12 +201,16 @@ class BackendLanceDBAdapter:
         source_uri: str,
         chunks: List[Tuple[int, str, List[float], Dict[str, Any]]],
         aggregated_text: str,
-        doc_metadata: Dict[str, Any]
+        doc_metadata: Dict[str, Any],
+        owner_id: Optional[str] = None,
+        visibility: Optional[str] = None,
     ) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
         """Build pyarrow parent and chunk row dictionaries for a document."""
         doc_type = doc_metadata.get("type") or doc_metadata.get("document_type")
         namespace = doc_metadata.get("namespace")
         category = doc_metadata.get("category")
+        extension = file_extension(source_uri)
+        access = {"owner_id": owner_id, "visibility": lancedb_visibility(owner_id, visibility)}
         
         # Prepare parent row
         parent_row = {
@@ -167,7 +221,9 @@ class BackendLanceDBAdapter:
             "document_type": doc_type,
             "namespace": namespace,
             "category": category,
-            "metadata": json.dumps(doc_metadata)
+            "file_extension": extension,
+            "metadata": json.dumps(doc_metadata),
+            **access,
         }
         
         # Prepare chunk rows
@@ -193,7 +249,9 @@ class BackendLanceDBAdapter:
                 "document_type": c_type,
                 "namespace": c_namespace,
                 "category": c_category,
-                "metadata": json.dumps(merged_meta)
+                "file_extension": extension,
+                "metadata": json.dumps(merged_meta),
+                **access,
             })
             
         return parent_row, chunk_rows
@@ -204,13 +262,17 @@ class BackendLanceDBAdapter:
         source_uri: str,
         chunks: List[Tuple[int, str, List[float], Dict[str, Any]]],
         aggregated_text: str,
-        doc_metadata: Dict[str, Any]
+        doc_metadata: Dict[str, Any],
+        owner_id: Optional[str] = None,
+        visibility: Optional[str] = None,
     ) -> None:
         """
         Insert or update a document in LanceDB.
         
         Deletes any pre-existing rows for the document_id before inserting.
         Acquires a write lock to prevent concurrent modifications from multiple workers.
+        owner_id/visibility default to the Postgres defaults for a freshly
+        inserted document (unowned, shared).
         """
         with self.write_lock:
             parent_table = self.db.open_table(PARENT_TABLE)
@@ -225,7 +287,8 @@ class BackendLanceDBAdapter:
                 return
 
             parent_row, chunk_rows = self._build_doc_rows(
-                document_id, source_uri, chunks, aggregated_text, doc_metadata
+                document_id, source_uri, chunks, aggregated_text, doc_metadata,
+                owner_id=owner_id, visibility=visibility,
             )
             
             # Append new records to tables
@@ -243,7 +306,8 @@ class BackendLanceDBAdapter:
     ) -> None:
         """Bulk-append many documents to EMPTY/fresh tables (no per-doc delete).
         `documents` is an iterable of
-        (document_id, source_uri, chunks, aggregated_text, doc_metadata).
+        (document_id, source_uri, chunks, aggregated_text, doc_metadata), optionally
+        followed by (owner_id, visibility).
         Caller guarantees no pre-existing rows for these ids (used for from-empty
         rebuild) — duplicates are NOT prevented here."""
         with self.write_lock:
@@ -253,11 +317,11 @@ class BackendLanceDBAdapter:
             parent_rows = []
             chunk_rows = []
             
-            for doc_id, source_uri, chunks, aggregated_text, doc_metadata in documents:
+            for doc_id, source_uri, chunks, aggregated_text, doc_metadata, *access in documents:
                 if not chunks:
                     continue
                 parent_row, doc_chunks = self._build_doc_rows(
-                    doc_id, source_uri, chunks, aggregated_text, doc_metadata
+                    doc_id, source_uri, chunks, aggregated_text, doc_metadata, *access
                 )
                 parent_rows.append(parent_row)
                 chunk_rows.extend(doc_chunks)
@@ -305,12 +369,18 @@ class BackendLanceDBAdapter:
             logger.info(f"Deleted document {document_id} from LanceDB.")
             return chunk_count
 
-    def list_documents(self, prefix: Optional[str] = None) -> List[Dict[str, Any]]:
+    def list_documents(
+        self,
+        prefix: Optional[str] = None,
+        visible_to: Optional[Dict[str, Optional[str]]] = None,
+    ) -> List[Dict[str, Any]]:
         """
         List all parent documents in LanceDB, projecting only necessary columns.
         
         Args:
             prefix: Optional path prefix filter to reduce scan size.
+            visible_to: Only documents visible to this caller (same value as
+                the ``visible_to`` filter key); None lists everything.
             
         Returns a list of dicts with document_id, source_uri, chunk_count, 
         and indexed_at (parsed from metadata).
@@ -318,12 +388,17 @@ class BackendLanceDBAdapter:
         parent_table = self.db.open_table(PARENT_TABLE)
         query = parent_table.search().select(["document_id", "source_uri", "chunk_count", "metadata"])
         
+        clauses = []
         if prefix:
             safe_prefix_forward = prefix.replace('\\', '/').replace("'", "''")
             safe_prefix_backward = prefix.replace('/', '\\').replace("'", "''")
-            query = query.where(
-                f"starts_with(source_uri, '{safe_prefix_forward}') OR starts_with(source_uri, '{safe_prefix_backward}')"
+            clauses.append(
+                f"(starts_with(source_uri, '{safe_prefix_forward}') OR starts_with(source_uri, '{safe_prefix_backward}'))"
             )
+        if visible_to is not None:
+            clauses.append(self._access_clause(visible_to.get("user_id")))
+        if clauses:
+            query = query.where(" AND ".join(clauses))
 
         rows = query.to_arrow().to_pylist()
         
@@ -374,6 +449,64 @@ class BackendLanceDBAdapter:
             logger.info(f"Bulk deleted {deleted_count} documents matching filters from LanceDB.")
             return deleted_count
 
+    @staticmethod
+    def _document_id_in(document_ids: Sequence[str]) -> str:
+        quoted = ", ".join(
+            "'{}'".format(str(doc_id).replace("'", "''")) for doc_id in document_ids
+        )
+        return f"document_id IN ({quoted})"
+
+    def set_document_access(
+        self,
+        documents: Iterable[Tuple[str, Optional[str], Optional[str]]],
+        batch_size: int = 500,
+    ) -> None:
+        """Update owner_id/visibility for existing documents.
+
+        `documents` is an iterable of (document_id, owner_id, visibility) as
+        stored in Postgres. Documents sharing the same access values are
+        updated together, in batches of `batch_size` ids per table update.
+        """
+        groups: Dict[Tuple[Optional[str], str], List[str]] = {}
+        for document_id, owner_id, visibility in documents:
+            key = (owner_id, lancedb_visibility(owner_id, visibility))
+            groups.setdefault(key, []).append(document_id)
+        if not groups:
+            return
+
+        with self.write_lock:
+            tables = [self.db.open_table(PARENT_TABLE), self.db.open_table(CHUNK_TABLE)]
+            for (owner_id, visibility), document_ids in groups.items():
+                values = {"owner_id": owner_id, "visibility": visibility}
+                for i in range(0, len(document_ids), batch_size):
+                    where = self._document_id_in(document_ids[i:i + batch_size])
+                    for table in tables:
+                        table.update(where=where, values=values)
+
+    def needs_access_backfill(self) -> bool:
+        """True when some rows predate the access columns (visibility IS NULL)."""
+        return any(
+            self.db.open_table(name).count_rows("visibility IS NULL") > 0
+            for name in (PARENT_TABLE, CHUNK_TABLE)
+        )
+
+    def backfill_access(
+        self, private_documents: Iterable[Tuple[str, Optional[str], Optional[str]]]
+    ) -> None:
+        """Fill the access columns of rows written before they existed.
+
+        `private_documents` lists the (document_id, owner_id, visibility) of
+        every private document in Postgres; all other NULL rows become shared.
+        """
+        self.set_document_access(private_documents)
+        with self.write_lock:
+            for name in (PARENT_TABLE, CHUNK_TABLE):
+                self.db.open_table(name).update(
+                    where="visibility IS NULL",
+                    values={"owner_id": None, "visibility": "shared"},
+                )
+        logger.info("Backfilled LanceDB owner_id/visibility columns.")
+
     def search_parent_child(
         self,
         query_text: str,
@@ -557,20 +690,34 @@ class BackendLanceDBAdapter:
             f"starts_with(source_uri, '{safe_bwd}'))"
         )
 
+    @staticmethod
+    def _access_clause(user_id: Optional[str]) -> str:
+        """Rows visible to a non-admin caller: shared, or owned by user_id."""
+        if not user_id:
+            return "visibility = 'shared'"
+        safe_user = str(user_id).replace("'", "''")
+        return f"(visibility = 'shared' OR owner_id = '{safe_user}')"
+
     def _build_lancedb_filter_clause(self, filters: Dict[str, Any]) -> Optional[str]:
         """Convert standard filters to a SQL-like string compatible with LanceDB/DataFusion."""
         clauses = []
         for key, value in filters.items():
             if key == 'extensions' and isinstance(value, list) and value:
+                indexed = []
                 ext_clauses = []
                 for ext in value:
                     normalized = ext if ext.startswith('.') else f'.{ext}'
-                    # Defensive comparison using lower() to prevent ILIKE variations.
-                    # Note: LIKE wildcards (%/_) in the value are not escaped —
-                    # extensions come from the indexed-extensions dropdown, not
-                    # free text, so only quotes need escaping here.
                     safe_ext = normalized.lower().replace("'", "''")
-                    ext_clauses.append(f"lower(source_uri) LIKE '%{safe_ext}'")
+                    if _FILE_EXTENSION_RE.fullmatch(normalized):
+                        indexed.append(f"'{safe_ext}'")
+                    else:
+                        # Not representable in file_extension (e.g. '.tar.gz').
+                        # LIKE wildcards (%/_) in the value are not escaped —
+                        # extensions come from the indexed-extensions dropdown,
+                        # not free text, so only quotes need escaping here.
+                        ext_clauses.append(f"lower(source_uri) LIKE '%{safe_ext}'")
+                if indexed:
+                    ext_clauses.insert(0, f"file_extension IN ({', '.join(indexed)})")
                 clauses.append(f"({' OR '.join(ext_clauses)})")
             elif key in ['type', 'namespace', 'category']:
                 col_name = "document_type" if key == "type" else key
@@ -634,6 +781,12 @@ class BackendLanceDBAdapter:
                 prefix_clause = self._path_prefix_clause(value)
                 if prefix_clause is not None:
                     clauses.append(prefix_clause)
+            elif key == 'visible_to':
+                # Compact access predicate (see document_visibility.
+                # search_visibility_for_key_record); NULL visibility rows
+                # (not yet backfilled) never match.
+                if isinstance(value, dict):
+                    clauses.append(self._access_clause(value.get("user_id")))
             elif key == 'allowed_namespaces':
                 if isinstance(value, list):
                     if value:
@@ -699,13 +852,33 @@ class BackendLanceDBAdapter:
         # Explicitly rebuild FTS indexes to restore query freshness
         self.rebuild_fts_index()
 
-    def get_statistics(self) -> Dict[str, Any]:
-        """Get statistics of the LanceDB index."""
+    def get_statistics(
+        self,
+        exclude_document_ids: Optional[List[str]] = None,
+        visible_to: Optional[Dict[str, Optional[str]]] = None,
+    ) -> Dict[str, Any]:
+        """Get statistics of the LanceDB index.
+
+        Args:
+            exclude_document_ids: Documents left out of the counts.
+            visible_to: Count only documents visible to this caller (same
+                value as the ``visible_to`` filter key); None counts everything.
+        """
         parents = self.db.open_table(PARENT_TABLE)
         chunks = self.db.open_table(CHUNK_TABLE)
-        
-        total_documents = parents.count_rows()
-        total_chunks = chunks.count_rows()
+
+        clauses = []
+        if exclude_document_ids:
+            quoted = ", ".join(
+                "'" + doc_id.replace("'", "''") + "'" for doc_id in exclude_document_ids
+            )
+            clauses.append(f"document_id NOT IN ({quoted})")
+        if visible_to is not None:
+            clauses.append(self._access_clause(visible_to.get("user_id")))
+        where = " AND ".join(clauses) if clauses else None
+
+        total_documents = parents.count_rows(where)
+        total_chunks = chunks.count_rows(where)
         avg_chunks = int(total_chunks / total_documents) if total_documents > 0 else 0
         
         return {
@@ -79,6 +79,7 @@ class MCPAPIClient:
         path: Path,
         force: bool,
         document_type: Optional[str],
+        background: bool = False,
     ) -> dict[str, Any]:
         data: dict[str, str] = {
             "force_reindex": str(force).lower(),
@@ -92,10 +93,14 @@ class MCPAPIClient:
             return self._request(
                 "POST",
                 "/upload-and-index",
+                params={"background": "true"} if background else None,
                 files=files,
                 data=data,
             ).json()
 
+    def get_indexing_job(self, *, job_id: str) -> dict[str, Any]:
+        return self._request("GET", f"/indexing/jobs/{job_id}").json()
+
     def list_documents(self, *, limit: int) -> dict[str, Any]:
         return self._request(
             "GET",
@@ -232,10 +237,18 @@ def index_document_impl(
     path: str,
     force: bool = False,
     document_type: Optional[str] = None,
+    background: bool = False,
 ) -> dict[str, Any]:
-    """Upload and index a local file through the public REST API."""
+    """Upload and index a local file through the public REST API.
+
+    With ``background`` the upload returns as soon as the file is queued;
+    follow the returned job with ``get_indexing_job_impl``.
+    """
 
-    logger.info("Indexing via API upload: path=%r force=%s type=%s", path, force, document_type)
+    logger.info(
+        "Indexing via API upload: path=%r force=%s type=%s background=%s",
+        path, force, document_type, background,
+    )
     file_path = Path(path).expanduser()
     if not file_path.exists() or not file_path.is_file():
         return {
@@ -249,7 +262,10 @@ def index_document_impl(
             path=file_path,
             force=force,
             document_type=document_type,
+            background=background,
         )
+        if background:
+            return _format_job(data)
         return {
             "ok": data.get("status") != "error",
             "status": data.get("status"),
@@ -264,6 +280,17 @@ def index_document_impl(
         return _error_result("index", exc)
 
 
+def get_indexing_job_impl(job_id: str) -> dict[str, Any]:
+    """Report the state of a background indexing job."""
+
+    logger.info("Getting indexing job via API: job_id=%r", job_id)
+    try:
+        return _format_job(_get_api_client().get_indexing_job(job_id=job_id))
+    except Exception as exc:
+        logger.error("Getting indexing job failed: %s", exc)
+        return _error_result("get_indexing_job", exc)
+
+
 def list_documents_impl(limit: int = 20) -> dict[str, Any]:
     """List visible indexed documents through the public REST API."""
 
@@ -319,6 +346,19 @@ def _format_document(row: dict[str, Any]) -> dict[str, Any]:
     }
 
 
+def _format_job(row: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "ok": row.get("status") not in ("failed", "cancelled"),
+        "job_id": row.get("job_id"),
+        "status": row.get("status"),
+        "source_uri": row.get("source_uri"),
+        "queue_position": row.get("queue_position"),
+        "run_id": row.get("run_id"),
+        "result": row.get("result"),
+        "error": row.get("error"),
+    }
+
+
 def _error_result(operation: str, exc: Exception) -> dict[str, Any]:
     result: dict[str, Any] = {
         "ok": False,
@@ -360,9 +400,19 @@ def create_mcp_server():
         path: str,
         force: bool = False,
         document_type: Optional[str] = None,
+        background: bool = False,
     ) -> dict[str, Any]:
-        """Upload and index a local document via the configured PGVectorRAGIndexer API."""
-        return index_document_impl(path, force, document_type)
+        """Upload and index a local document via the configured PGVectorRAGIndexer API.
+
+        Set background for large files: the call returns a queued job id to
+        follow with get_indexing_job instead of waiting for indexing.
+        """
+        return index_document_impl(path, force, document_type, background)
+
+    @mcp.tool()
+    def get_indexing_job(job_id: str) -> dict[str, Any]:
+        """Get the status and result of a background indexing job."""
+        return get_indexing_job_impl(job_id)
 
     @mcp.tool()
     def list_documents(limit: int = 20) -> dict[str, Any]:
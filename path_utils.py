@@ -39,6 +39,25 @@ NORMALIZED_URI_SQL: str = (
     "REPLACE(REPLACE(REPLACE(REPLACE("
     "source_uri, E'\\\\', '/'), E'\\t', '/'), E'\\n', '/'), E'\\r', '/')"
 )
+# document_chunks has an expression index on exactly this expression
+# (idx_chunks_norm_uri, text_pattern_ops; migration 022), so
+# ``NORMALIZED_URI_SQL LIKE 'prefix/%'`` is an index range scan. Changing the
+# expression requires a migration that recreates the index.
+
+
+def normalized_uri_prefix_clause(patterns: list[str], exclude: bool = False) -> tuple[str, list]:
+    """(clause, params) matching NORMALIZED_URI_SQL against LIKE *patterns*.
+
+    Includes are emitted as an OR of single ``LIKE %s`` arms: each arm is an
+    index range scan on idx_chunks_norm_uri and the planner combines them
+    with a BitmapOr (``LIKE ANY(array)`` is never indexable). Excludes cannot
+    use the index anyway, so they keep ``NOT (... LIKE ANY(%s))`` which
+    evaluates the expression once per row.
+    """
+    if exclude:
+        return f"NOT ({NORMALIZED_URI_SQL} LIKE ANY(%s))", [list(patterns)]
+    arms = " OR ".join(f"{NORMALIZED_URI_SQL} LIKE %s" for _ in patterns)
+    return f"({arms})", list(patterns)
 
 
 def folder_prefix_like_pattern(prefix: str) -> str | None:
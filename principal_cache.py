@@ -0,0 +1,380 @@
+"""
+In-process cache of authenticated principals.
+
+An authenticated request used to look up its API key, stamp last_used_at,
+count admins, fetch the linked user and read the role's collection grants
+before doing any work. This module keeps the resolved principal per key
+hash for a short TTL (API_PRINCIPAL_CACHE_TTL_SECONDS, default 30):
+
+- the API key record,
+- the linked user (and so the role) — filled on first use,
+- the active admin count used by the bootstrap rule,
+
+and, per role, the namespaces its collection grants allow, so every key of
+a role shares one lookup.
+
+Invalidation is immediate. Every API worker runs an AuthChangeListener that
+LISTENs on ``auth_changed``; triggers (migration 025) NOTIFY it when keys,
+users, roles or collection grants change. The writing process also clears
+its own cache directly. The cache only serves hits while the listener is
+connected, so a worker that cannot hear about revocations falls back to
+querying on every request instead of serving stale grants.
+
+The document-visibility exclusion list depends on documents, not on the
+principal, and is not cached here.
+"""
+
+import logging
+import select
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+AUTH_CHANGE_CHANNEL = "auth_changed"
+
+_UNSET = object()
+
+
+class PrincipalCache:
+    """Thread-safe TTL cache of principals keyed by API key hash.
+
+    Entries are dicts holding ``key_record`` and, once resolved, ``user``.
+    Role grants are cached separately per role name. Lookups that raced with an
+    invalidation are not stored: callers read ``generation`` before going
+    to the database and pass it back to ``put``.
+    """
+
+    def __init__(self, ttl_seconds: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._by_hash: Dict[str, Dict[str, Any]] = {}
+        self._by_key_id: Dict[Any, Dict[str, Any]] = {}
+        self._admin_count: Optional[tuple] = None
+        self._role_namespaces: Dict[str, tuple] = {}
+        self._generation = 0
+        self._active = False
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        """True when hits may be served (TTL > 0 and the listener is connected)."""
+        return self._active and self.ttl_seconds > 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def set_active(self, active: bool) -> None:
+        """Enable or disable serving hits; always drops current entries."""
+        with self._lock:
+            self._active = active
+            self._clear_locked()
+
+    def invalidate(self) -> None:
+        """Drop every cached principal and the admin count."""
+        with self._lock:
+            self._clear_locked()
+            self.invalidations += 1
+
+    def _clear_locked(self) -> None:
+        self._by_hash.clear()
+        self._by_key_id.clear()
+        self._admin_count = None
+        self._role_namespaces.clear()
+        self._generation += 1
+
+    def _live(self, entry: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if entry is None or entry["expires_at"] <= self._clock():
+            return None
+        return entry
+
+    def get(self, key_hash: str) -> Optional[Dict[str, Any]]:
+        """Return the live entry for a key hash, or None."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._live(self._by_hash.get(key_hash))
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return entry
+
+    def get_by_key_id(self, key_id: Any) -> Optional[Dict[str, Any]]:
+        """Return the live entry for an API key id, or None."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            return self._live(self._by_key_id.get(key_id))
+
+    def put(self, key_hash: str, key_record: Dict[str, Any], generation: int) -> Optional[Dict[str, Any]]:
+        """Store a freshly looked-up key record; returns the new entry.
+
+        Nothing is stored if the cache is disabled or was invalidated since
+        ``generation`` was read.
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            if generation != self._generation:
+                return None
+            entry = {
+                "key_record": key_record,
+                "user": _UNSET,
+                "expires_at": self._clock() + self.ttl_seconds,
+            }
+            self._by_hash[key_hash] = entry
+            self._by_key_id[key_record["id"]] = entry
+            return entry
+
+    def discard(self, key_hash: str) -> None:
+        """Drop the entry of one key hash, if any."""
+        with self._lock:
+            entry = self._by_hash.pop(key_hash, None)
+            if entry is not None and self._by_key_id.get(entry["key_record"]["id"]) is entry:
+                del self._by_key_id[entry["key_record"]["id"]]
+
+    def set_field(self, key_id: Any, field: str, value: Any, generation: int) -> None:
+        """Record a lazily resolved field on an existing entry."""
+        with self._lock:
+            if generation != self._generation:
+                return
+            entry = self._live(self._by_key_id.get(key_id))
+            if entry is not None:
+                entry[field] = value
+
+    def get_admin_count(self) -> Optional[int]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            if self._admin_count and self._admin_count[1] > self._clock():
+                return self._admin_count[0]
+            return None
+
+    def put_admin_count(self, count: int, generation: int) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation == self._generation:
+                self._admin_count = (count, self._clock() + self.ttl_seconds)
+
+    def get_role_namespaces(self, role: str) -> Any:
+        """Return the cached grants of a role, or _UNSET when not cached."""
+        if not self.enabled:
+            return _UNSET
+        with self._lock:
+            cached = self._role_namespaces.get(role)
+            if cached is None or cached[1] <= self._clock():
+                return _UNSET
+            return cached[0]
+
+    def put_role_namespaces(self, role: str, namespaces: Optional[list], generation: int) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation == self._generation:
+                self._role_namespaces[role] = (namespaces, self._clock() + self.ttl_seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._by_hash),
+                "roles": len(self._role_namespaces),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+
+class AuthChangeListener:
+    """Background thread that LISTENs for auth changes and clears the cache.
+
+    Uses a dedicated connection outside the pool. While disconnected the
+    cache is inactive; after (re)connecting it starts empty, since changes
+    made while disconnected were not heard.
+    """
+
+    def __init__(
+        self,
+        cache: PrincipalCache,
+        connect: Optional[Callable[[], Any]] = None,
+        poll_interval: float = 5.0,
+        retry_interval: float = 5.0,
+    ):
+        self.cache = cache
+        self._connect = connect or _default_connect
+        self.poll_interval = poll_interval
+        self.retry_interval = retry_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._conn = None
+
+    @property
+    def connected(self) -> bool:
+        return self._conn is not None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="auth-change-listener", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self._listen()
+            except Exception as e:
+                logger.warning("Auth change listener disconnected: %s", e)
+            finally:
+                self.cache.set_active(False)
+                self._close()
+            self._stop.wait(self.retry_interval)
+
+    def _listen(self) -> None:
+        conn = self._connect()
+        self._conn = conn
+        conn.autocommit = True
+        cursor = conn.cursor()
+        cursor.execute(f"LISTEN {AUTH_CHANGE_CHANNEL}")
+        self.cache.set_active(True)
+        logger.info("Principal cache active (listening on %s)", AUTH_CHANGE_CHANNEL)
+
+        while not self._stop.is_set():
+            if select.select([conn], [], [], self.poll_interval) == ([], [], []):
+                continue
+            conn.poll()
+            tables = set()
+            while conn.notifies:
+                tables.add(conn.notifies.pop(0).payload)
+            if tables:
+                handle_auth_change(self.cache, tables)
+
+    def _close(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+def _default_connect():
+    from database import get_db_manager
+    return get_db_manager().connect_dedicated()
+
+
+def handle_auth_change(cache: PrincipalCache, tables) -> None:
+    """Apply an auth change notification (payload = table names)."""
+    cache.invalidate()
+    if "roles" in tables:
+        from role_permissions import invalidate_role_config
+        invalidate_role_config()
+
+
+# ---------------------------------------------------------------------------
+# Principal resolution (used by auth, document_visibility, collection_grants)
+# ---------------------------------------------------------------------------
+
+
+def user_for_key_record(key_record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Return the active user linked to an API key record, cached per key."""
+    import users
+
+    cache = get_principal_cache()
+    entry = cache.get_by_key_id(key_record["id"])
+    if entry is not None and entry["user"] is not _UNSET:
+        return entry["user"]
+    generation = cache.generation
+    user = users.get_user_by_api_key(key_record["id"])
+    cache.set_field(key_record["id"], "user", user, generation)
+    return user
+
+
+def allowed_namespaces_for_role(role: str):
+    """Return collection_grants.allowed_namespaces_for_role(role), cached per role."""
+    import collection_grants
+
+    cache = get_principal_cache()
+    namespaces = cache.get_role_namespaces(role)
+    if namespaces is not _UNSET:
+        return namespaces
+    generation = cache.generation
+    namespaces = collection_grants.allowed_namespaces_for_role(role)
+    cache.put_role_namespaces(role, namespaces, generation)
+    return namespaces
+
+
+def count_admins() -> int:
+    """users.count_admins(), cached until the next auth change or TTL."""
+    import users
+
+    cache = get_principal_cache()
+    count = cache.get_admin_count()
+    if count is not None:
+        return count
+    generation = cache.generation
+    count = users.count_admins()
+    cache.put_admin_count(count, generation)
+    return count
+
+
+# ---------------------------------------------------------------------------
+# Singletons
+# ---------------------------------------------------------------------------
+
+_cache: Optional[PrincipalCache] = None
+_listener: Optional[AuthChangeListener] = None
+_singleton_lock = threading.Lock()
+
+
+def get_principal_cache() -> PrincipalCache:
+    global _cache
+    if _cache is None:
+        with _singleton_lock:
+            if _cache is None:
+                from config import get_config
+                _cache = PrincipalCache(get_config().api.principal_cache_ttl_seconds)
+    return _cache
+
+
+def invalidate_principals() -> None:
+    """Clear this process's cache after an auth write (others hear NOTIFY)."""
+    if _cache is not None:
+        _cache.invalidate()
+
+
+def start_auth_change_listener() -> Optional[AuthChangeListener]:
+    """Start the LISTEN thread for this process; no-op when caching is off."""
+    global _listener
+    cache = get_principal_cache()
+    if cache.ttl_seconds <= 0:
+        return None
+    with _singleton_lock:
+        if _listener is None:
+            _listener = AuthChangeListener(cache)
+        _listener.start()
+    return _listener
+
+
+def stop_auth_change_listener() -> None:
+    global _listener
+    with _singleton_lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
@@ -8,6 +8,8 @@ After a configurable retention window they can be permanently purged.
 
 Environment:
     QUARANTINE_RETENTION_DAYS  (default 30)
+    QUARANTINE_BATCH_SIZE      (default 1000; source URIs per UPDATE in
+                                reconcile_sources)
 """
 
 import logging
@@ -19,6 +21,8 @@ logger = logging.getLogger(__name__)
 
 QUARANTINE_RETENTION_DAYS_ENV = "QUARANTINE_RETENTION_DAYS"
 DEFAULT_RETENTION_DAYS = 30
+QUARANTINE_BATCH_SIZE_ENV = "QUARANTINE_BATCH_SIZE"
+DEFAULT_BATCH_SIZE = 1000
 
 
 def _get_db_connection():
@@ -39,6 +43,14 @@ def get_retention_days() -> int:
         return DEFAULT_RETENTION_DAYS
 
 
+def get_batch_size() -> int:
+    """Return the reconcile_sources batch size from env, default 1000."""
+    try:
+        return max(1, int(os.environ.get(QUARANTINE_BATCH_SIZE_ENV, DEFAULT_BATCH_SIZE)))
+    except (ValueError, TypeError):
+        return DEFAULT_BATCH_SIZE
+
+
 # ---------------------------------------------------------------------------
 # Quarantine operations
 # ---------------------------------------------------------------------------
@@ -110,6 +122,70 @@ def restore_chunks(source_uri: str) -> int:
         return 0
 
 
+def reconcile_sources(
+    quarantine_uris: List[str],
+    restore_uris: List[str],
+    reason: str = "source_file_missing",
+    batch_size: Optional[int] = None,
+) -> Dict[str, int]:
+    """Quarantine and restore many source_uris in one transaction.
+
+    The set-based form of quarantine_chunks/restore_chunks used after a
+    folder scan: one ``UPDATE ... WHERE source_uri = ANY(%s)`` per batch of
+    ``batch_size`` URIs (QUARANTINE_BATCH_SIZE), committed together.
+
+    Returns:
+        Dict with ``quarantined`` and ``restored`` chunk counts.
+    """
+    batch_size = batch_size or get_batch_size()
+    result = {"quarantined": 0, "restored": 0}
+    if not quarantine_uris and not restore_uris:
+        return result
+
+    try:
+        with _get_db_connection() as conn:
+            cur = conn.cursor()
+            for i in range(0, len(quarantine_uris), batch_size):
+                cur.execute(
+                    """
+                    UPDATE document_chunks
+                    SET quarantined_at = now(),
+                        quarantine_reason = %s
+                    WHERE source_uri = ANY(%s)
+                      AND quarantined_at IS NULL
+                    """,
+                    (reason, list(quarantine_uris[i:i + batch_size])),
+                )
+                result["quarantined"] += cur.rowcount
+            for i in range(0, len(restore_uris), batch_size):
+                cur.execute(
+                    """
+                    UPDATE document_chunks
+                    SET quarantined_at = NULL,
+                        quarantine_reason = NULL
+                    WHERE source_uri = ANY(%s)
+                      AND quarantined_at IS NOT NULL
+                    """,
+                    (list(restore_uris[i:i + batch_size]),),
+                )
+                result["restored"] += cur.rowcount
+            conn.commit()
+    except Exception as e:
+        logger.warning(
+            "Failed to reconcile quarantine for %d sources: %s",
+            len(quarantine_uris) + len(restore_uris), e,
+        )
+        return {"quarantined": 0, "restored": 0}
+
+    if result["quarantined"] or result["restored"]:
+        logger.info(
+            "Quarantined %d and restored %d chunks (%d/%d sources): %s",
+            result["quarantined"], result["restored"],
+            len(quarantine_uris), len(restore_uris), reason,
+        )
+    return result
+
+
 def list_quarantined(
     limit: int = 50,
     offset: int = 0,
@@ -163,31 +239,33 @@ def list_quarantined(
 def purge_expired(retention_days: Optional[int] = None) -> int:
     """Hard-delete chunks quarantined longer than the retention window.
 
+    Deletes in committed batches (see ``batched_delete``), so each batch's
+    documents/folder/stats trigger work stays bounded too.
+
     Args:
         retention_days: Override; defaults to QUARANTINE_RETENTION_DAYS env.
 
     Returns:
         Number of chunks permanently deleted.
     """
+    from batched_delete import delete_in_batches
+
     days = retention_days if retention_days is not None else get_retention_days()
     try:
-        with _get_db_connection() as conn:
-            cur = conn.cursor()
-            cur.execute(
-                """
-                DELETE FROM document_chunks
-                WHERE quarantined_at IS NOT NULL
-                  AND quarantined_at < now() - interval '%s days'
-                """,
-                (days,),
+        stats = delete_in_batches(
+            "quarantine",
+            "document_chunks",
+            "quarantined_at IS NOT NULL AND quarantined_at < now() - interval '%s days'",
+            (days,),
+            key_column="chunk_id",
+            connection_factory=_get_db_connection,
+        )
+        count = stats["deleted"]
+        if count > 0:
+            logger.info(
+                "Purged %d chunks quarantined > %d days", count, days,
             )
-            count = cur.rowcount
-            conn.commit()
-            if count > 0:
-                logger.info(
-                    "Purged %d chunks quarantined > %d days", count, days,
-                )
-            return count
+        return count
     except Exception as e:
         logger.warning("Failed to purge expired quarantined chunks: %s", e)
         return 0
@@ -1,23 +1,45 @@
 """
-In-process rate limiting middleware for the FastAPI API.
+API rate limiting middleware for the FastAPI API.
 
-This is intentionally lightweight: it protects single-process desktop and
-small-server deployments without adding an external service dependency. Larger
-multi-worker deployments should still add reverse-proxy or shared-store limits.
+Requests are limited per API key hash (or client IP) with a token bucket:
+each caller holds up to ``limit_per_minute`` tokens, refilled continuously
+at ``limit_per_minute`` per minute. Unlike a fixed window, a caller can
+never spend more than one minute's budget in any 60-second span.
+
+Each request spends a route-dependent cost (``DEFAULT_ROUTE_COSTS``,
+extended by API_RATE_LIMIT_ROUTE_COSTS), so indexing calls consume more of
+the budget than cheap reads. Health probes and trusted bulk-indexing calls
+are never limited.
+
+Two backends are available (API_RATE_LIMIT_BACKEND):
+
+- ``memory`` (default): buckets live in each worker process. With
+  API_WORKERS > 1 every worker enforces the limit separately.
+- ``postgres``: buckets live in the UNLOGGED ``rate_limit_buckets`` table
+  (migration 026) and are refilled and spent in one atomic upsert, so the
+  limit holds across all workers and hosts sharing the database. If the
+  database is unreachable the worker falls back to its in-memory buckets.
+
+``scripts/benchmark_rate_limit.py`` measures checks/sec for both backends.
 """
 
 from __future__ import annotations
 
 import hashlib
+import logging
+import math
 import threading
 import time
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Callable, Dict, Tuple
+from typing import Callable, Dict, Mapping, Optional, Tuple
 
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
 from starlette.responses import JSONResponse, Response
 
+logger = logging.getLogger(__name__)
 
 RATE_LIMIT_HEADER = "X-RateLimit-Limit"
 RATE_LIMIT_REMAINING_HEADER = "X-RateLimit-Remaining"
@@ -26,6 +48,15 @@ RETRY_AFTER_HEADER = "Retry-After"
 TRUSTED_OPERATION_HEADER = "X-PGVectorRAGIndexer-Operation"
 TRUSTED_BULK_INDEXING_OPERATION = "bulk-indexing"
 
+RATE_LIMIT_BACKENDS = ("memory", "postgres")
+
+# Tokens spent per request, keyed by path without the /api/v1 prefix.
+# Anything not listed costs 1.
+DEFAULT_ROUTE_COSTS: Dict[str, int] = {
+    "/upload-and-index": 5,
+    "/index": 5,
+}
+
 
 @dataclass(frozen=True)
 class RateLimitDecision:
@@ -33,10 +64,37 @@ class RateLimitDecision:
     limit: int
     remaining: int
     reset_at: int
+    retry_after: int = 0
+
+
+def _decision(
+    limit: int,
+    tokens: float,
+    allowed: bool,
+    cost: float,
+    rate: float,
+    now: float,
+) -> RateLimitDecision:
+    """Build a decision from a bucket's state after the check.
 
+    ``reset_at`` is when the bucket will be full again; ``retry_after`` is
+    how long until a denied request's cost is available.
+    """
+    reset_at = int(math.ceil(now + (limit - tokens) / rate))
+    retry_after = 0 if allowed else int(math.ceil((cost - tokens) / rate))
+    return RateLimitDecision(allowed, limit, max(0, int(tokens)), reset_at, retry_after)
 
-class FixedWindowRateLimiter:
-    """Thread-safe fixed-window limiter keyed by API key hash or client IP."""
+
+class TokenBucketRateLimiter:
+    """Thread-safe in-process token-bucket limiter.
+
+    Buckets are kept in an OrderedDict in last-use order. A bucket idle for
+    a whole window has refilled completely and is equivalent to no bucket,
+    so each check pops such buckets from the front: every bucket is removed
+    at most once, making expiry amortized O(1) per check.
+    """
+
+    blocking = False
 
     def __init__(
         self,
@@ -47,35 +105,137 @@ class FixedWindowRateLimiter:
     ):
         self.limit = max(0, int(limit_per_minute))
         self.window_seconds = max(1, int(window_seconds))
+        self._rate = self.limit / self.window_seconds
         self._clock = clock
         self._lock = threading.Lock()
-        self._counts: Dict[Tuple[str, int], int] = {}
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
 
-    def check(self, key: str) -> RateLimitDecision:
-        now = self._clock()
-        window = int(now // self.window_seconds)
-        reset_at = int((window + 1) * self.window_seconds)
+    def __len__(self) -> int:
+        return len(self._buckets)
 
+    def check(self, key: str, cost: float = 1) -> RateLimitDecision:
+        now = self._clock()
         if self.limit <= 0:
-            return RateLimitDecision(True, 0, 0, reset_at)
+            return RateLimitDecision(True, 0, 0, int(now))
+        cost = min(cost, self.limit)
 
         with self._lock:
-            self._purge_old_windows(window)
-            bucket = (key, window)
-            current = self._counts.get(bucket, 0)
-
-            if current >= self.limit:
-                return RateLimitDecision(False, self.limit, 0, reset_at)
+            self._expire_idle(now)
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                tokens = float(self.limit)
+            else:
+                elapsed = max(0.0, now - bucket[1])
+                tokens = min(float(self.limit), bucket[0] + elapsed * self._rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+
+        return _decision(self.limit, tokens, allowed, cost, self._rate, now)
+
+    def _expire_idle(self, now: float) -> None:
+        cutoff = now - self.window_seconds
+        buckets = self._buckets
+        while buckets:
+            key, (_tokens, updated_at) = next(iter(buckets.items()))
+            if updated_at > cutoff:
+                break
+            del buckets[key]
+
+
+class PostgresTokenBucketRateLimiter:
+    """Token-bucket limiter shared by every worker through Postgres.
+
+    One ``INSERT ... ON CONFLICT DO UPDATE`` per check refills and spends
+    the caller's bucket under the row lock, using the database clock so
+    workers on different hosts agree on elapsed time. Buckets idle for a
+    whole window are deleted at most once per window per worker.
+    """
+
+    blocking = True
+
+    _CHECK_SQL = """
+        INSERT INTO rate_limit_buckets AS b (bucket_key, tokens, updated_at, allowed)
+        VALUES (%(key)s, %(limit)s - %(cost)s,
+                EXTRACT(EPOCH FROM clock_timestamp())::double precision, TRUE)
+        ON CONFLICT (bucket_key) DO UPDATE SET
+            tokens = CASE WHEN {refilled} >= %(cost)s
+                          THEN {refilled} - %(cost)s ELSE {refilled} END,
+            allowed = {refilled} >= %(cost)s,
+            updated_at = EXCLUDED.updated_at
+        RETURNING tokens, updated_at, allowed
+    """.format(
+        refilled=(
+            "LEAST(%(limit)s::double precision, b.tokens + "
+            "GREATEST(0, EXCLUDED.updated_at - b.updated_at) * %(rate)s)"
+        )
+    )
 
-            current += 1
-            self._counts[bucket] = current
-            remaining = max(0, self.limit - current)
-            return RateLimitDecision(True, self.limit, remaining, reset_at)
+    def __init__(
+        self,
+        limit_per_minute: int,
+        *,
+        window_seconds: int = 60,
+        connection_factory=None,
+        fallback: Optional[TokenBucketRateLimiter] = None,
+    ):
+        self.limit = max(0, int(limit_per_minute))
+        self.window_seconds = max(1, int(window_seconds))
+        self._rate = self.limit / self.window_seconds
+        self._connection_factory = connection_factory or _default_connection
+        self._fallback = fallback or TokenBucketRateLimiter(
+            limit_per_minute, window_seconds=window_seconds
+        )
+        self._next_purge_at = 0.0
+        self._last_error_logged_at = 0.0
 
-    def _purge_old_windows(self, current_window: int) -> None:
-        stale = [bucket for bucket in self._counts if bucket[1] < current_window]
-        for bucket in stale:
-            del self._counts[bucket]
+    def check(self, key: str, cost: float = 1) -> RateLimitDecision:
+        if self.limit <= 0:
+            return RateLimitDecision(True, 0, 0, int(time.time()))
+        cost = min(cost, self.limit)
+        try:
+            with self._connection_factory() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    self._CHECK_SQL,
+                    {"key": key, "limit": float(self.limit), "cost": float(cost), "rate": self._rate},
+                )
+                tokens, now, allowed = cursor.fetchone()
+                if now >= self._next_purge_at:
+                    self._next_purge_at = now + self.window_seconds
+                    cursor.execute(
+                        "DELETE FROM rate_limit_buckets WHERE updated_at < %s",
+                        (now - self.window_seconds,),
+                    )
+                conn.commit()
+        except Exception as e:
+            now = time.time()
+            if now - self._last_error_logged_at >= self.window_seconds:
+                self._last_error_logged_at = now
+                logger.warning("Shared rate limiter unavailable, using in-process buckets: %s", e)
+            return self._fallback.check(key, cost)
+        return _decision(self.limit, tokens, allowed, cost, self._rate, now)
+
+
+def _default_connection():
+    from database import get_db_manager
+    return get_db_manager().get_connection()
+
+
+def build_rate_limiter(
+    backend: str,
+    limit_per_minute: int,
+    *,
+    window_seconds: int = 60,
+):
+    """Return the limiter for an API_RATE_LIMIT_BACKEND value."""
+    if backend == "memory":
+        return TokenBucketRateLimiter(limit_per_minute, window_seconds=window_seconds)
+    if backend == "postgres":
+        return PostgresTokenBucketRateLimiter(limit_per_minute, window_seconds=window_seconds)
+    raise ValueError(f"Unknown rate limit backend: {backend!r}")
 
 
 class RateLimitMiddleware(BaseHTTPMiddleware):
@@ -87,12 +247,17 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         *,
         limit_per_minute: int,
         window_seconds: int = 60,
+        backend: str = "memory",
+        route_costs: Optional[Mapping[str, int]] = None,
+        limiter=None,
     ):
         super().__init__(app)
-        self._limiter = FixedWindowRateLimiter(
+        self._limiter = limiter or build_rate_limiter(
+            backend,
             limit_per_minute,
             window_seconds=window_seconds,
         )
+        self._route_costs = {**DEFAULT_ROUTE_COSTS, **(route_costs or {})}
 
     async def dispatch(self, request: Request, call_next) -> Response:
         if (
@@ -103,13 +268,16 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         ):
             return await call_next(request)
 
-        decision = self._limiter.check(_rate_limit_key(request))
+        key = _rate_limit_key(request)
+        cost = _route_cost(request, self._route_costs)
+        if self._limiter.blocking:
+            decision = await run_in_threadpool(self._limiter.check, key, cost)
+        else:
+            decision = self._limiter.check(key, cost)
         headers = _rate_limit_headers(decision)
 
         if not decision.allowed:
-            headers[RETRY_AFTER_HEADER] = str(
-                max(0, decision.reset_at - int(time.time()))
-            )
+            headers[RETRY_AFTER_HEADER] = str(decision.retry_after)
             return JSONResponse(
                 status_code=429,
                 content={
@@ -118,6 +286,7 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
                     "details": {
                         "limit_per_minute": decision.limit,
                         "reset_at": decision.reset_at,
+                        "cost": cost,
                     },
                 },
                 headers=headers,
@@ -139,6 +308,11 @@ def _rate_limit_key(request: Request) -> str:
     return f"ip:{client_host}"
 
 
+def _route_cost(request: Request, route_costs: Mapping[str, int]) -> int:
+    path = _without_api_prefix(request.url.path.rstrip("/"))
+    return max(1, int(route_costs.get(path, 1)))
+
+
 def _is_trusted_bulk_indexing_request(request: Request) -> bool:
     """Skip throttling for first-party bulk indexing/probe calls."""
     if request.headers.get(TRUSTED_OPERATION_HEADER) != TRUSTED_BULK_INDEXING_OPERATION:
@@ -26,6 +26,7 @@ class RetentionMaintenanceRunner:
         self._task: Optional[asyncio.Task] = None
         self._running = False
         self._last_run_at: Optional[str] = None
+        self._last_result: Optional[dict] = None
 
     @staticmethod
     def is_enabled() -> bool:
@@ -69,14 +70,20 @@ class RetentionMaintenanceRunner:
             "running": self._running,
             "last_run_at": self._last_run_at,
             "poll_interval_seconds": self.poll_interval_seconds(),
+            "last_result": self._last_result,
         }
 
     async def run_once(self) -> dict:
-        """Run one retention cycle in a worker thread."""
+        """Run one retention cycle in a worker thread.
+
+        The deletes are batched (see ``batched_delete``); a cycle cut short
+        by RETENTION_DELETE_MAX_SECONDS is continued by the next one.
+        """
         from retention_policy import apply_retention
 
         result = await asyncio.to_thread(apply_retention)
         self._last_run_at = datetime.now(timezone.utc).isoformat()
+        self._last_result = result
         return result
 
     async def _loop(self) -> None:
@@ -8,6 +8,8 @@ Configuration sources (current):
     - Environment variables: ``ACTIVITY_RETENTION_DAYS``,
       ``INDEXING_RUNS_RETENTION_DAYS``
     - Quarantine retention via ``quarantine.get_retention_days()``
+    - Batch size, pause and time budget of the deletes via the
+      ``RETENTION_DELETE_*`` variables (see ``batched_delete``)
 
 Note:
     Migration 017 creates a ``retention_policies`` DB table, but it is
@@ -76,7 +78,8 @@ def apply_retention(
     """Apply retention actions across supported data classes.
 
     Returns:
-        Dict with deletion/cleanup counters and the policy days used.
+        Dict with deletion/cleanup counters, the policy days used, and
+        ``batches``: per-job batch statistics of the last run.
     """
     from activity_log import apply_retention as apply_activity_retention
     from indexing_runs import apply_retention as apply_indexing_runs_retention
@@ -112,4 +115,6 @@ def apply_retention(
         result["ok"] = False
         result["error"] = str(e)
 
+    from batched_delete import get_last_stats
+    result["batches"] = get_last_stats()
     return result
@@ -15,9 +15,16 @@ from typing import List, Dict, Any, Optional, Tuple, Mapping
 from dataclasses import dataclass, replace
 
 from config import get_config
-from database import get_db_manager, DocumentRepository
+from database import (
+    get_db_manager,
+    DocumentRepository,
+    apply_vector_plan,
+    extension_filter_clause,
+    metadata_filter_clause,
+    promoted_filter_clause,
+)
 from embeddings import get_embedding_service
-from path_utils import folder_prefix_like_pattern, NORMALIZED_URI_SQL
+from path_utils import folder_prefix_like_pattern, normalized_uri_prefix_clause
 
 # Configure logging
 logging.basicConfig(
@@ -532,18 +539,17 @@ class DocumentRetriever:
         if filters:
             for key, value in filters.items():
                 if key == 'extensions' and isinstance(value, list) and value:
-                    ext_clauses = []
-                    for ext in value:
-                        normalized = ext if ext.startswith('.') else f'.{ext}'
-                        ext_clauses.append("source_uri ILIKE %s")
-                        filter_params.append(f'%{normalized}')
-                    filter_clauses.append(f"({' OR '.join(ext_clauses)})")
+                    clause, clause_params = extension_filter_clause(value)
+                    filter_clauses.append(clause)
+                    filter_params.extend(clause_params)
                 elif key in ['type', 'namespace', 'category']:
-                    filter_clauses.append(f"metadata->>'{key}' ILIKE %s")
-                    filter_params.append(value)
+                    clause, clause_params = promoted_filter_clause(key, value, case_insensitive=True)
+                    filter_clauses.append(clause)
+                    filter_params.extend(clause_params)
                 elif key.startswith('metadata.'):
-                    filter_clauses.append("metadata->>%s = %s")
-                    filter_params.extend([key[9:], value])
+                    clause, clause_params = metadata_filter_clause(key[9:], value)
+                    filter_clauses.append(clause)
+                    filter_params.extend(clause_params)
                 elif key in ['document_id', 'source_uri']:
                     filter_clauses.append(f"{key} = %s")
                     filter_params.append(value)
@@ -551,6 +557,12 @@ class DocumentRetriever:
                     if isinstance(value, list) and value:
                         filter_clauses.append("document_id != ALL(%s)")
                         filter_params.append(list(value))
+                elif key == 'visible_to':
+                    if isinstance(value, dict):
+                        from document_visibility import visibility_where_clause
+                        vis_sql, vis_params = visibility_where_clause(value.get("user_id"))
+                        filter_clauses.append(vis_sql)
+                        filter_params.extend(vis_params)
                 elif key == 'allowed_namespaces':
                     if isinstance(value, list):
                         if value:
@@ -563,14 +575,11 @@ class DocumentRetriever:
                     if isinstance(value, list) and value:
                         patterns = path_prefix_like_patterns(value)
                         if patterns:
-                            # LIKE ANY evaluates the REPLACE chain once per row
-                            # regardless of how many prefixes are selected.
-                            like_sql = f"{NORMALIZED_URI_SQL} LIKE ANY(%s)"
-                            if key == 'path_prefixes':
-                                filter_clauses.append(f"({like_sql})")
-                            else:
-                                filter_clauses.append(f"NOT ({like_sql})")
-                            filter_params.append(patterns)
+                            clause, clause_params = normalized_uri_prefix_clause(
+                                patterns, exclude=(key == 'excluded_path_prefixes')
+                            )
+                            filter_clauses.append(clause)
+                            filter_params.extend(clause_params)
                 else:
                     raise ValueError(
                         f"Unsupported filter key '{key}' for hybrid search. "
@@ -580,18 +589,29 @@ class DocumentRetriever:
                     )
         return filter_clauses, filter_params
 
+    def _plan_vector_scan(self, filters: Optional[Dict[str, Any]], limit: int) -> Dict[str, Any]:
+        """See DocumentRepository.plan_vector_scan."""
+        filter_clauses, filter_params = self._build_chunk_filter_clauses(filters)
+        return self.repository.plan_vector_scan(filters, filter_clauses, filter_params, limit)
+
     def _build_filtered_docs_context(
         self,
         filters: Optional[Dict[str, Any]],
+        prefilter: bool = False,
     ) -> Tuple[str, str, List[Any]]:
-        """Build a filtered document_chunks CTE shared by hybrid search variants."""
+        """Build a filtered document_chunks CTE shared by hybrid search variants.
+
+        With ``prefilter`` the CTE is MATERIALIZED, so the filtered rows are
+        ranked exactly instead of post-filtering the HNSW scan.
+        """
         filter_clauses, filter_params = self._build_chunk_filter_clauses(filters)
 
         if not filter_clauses:
             return "", "document_chunks", filter_params
 
         filter_where_sql = f"WHERE {' AND '.join(filter_clauses)}"
-        filtered_docs_cte = f"""filtered_docs AS (
+        materialized = "MATERIALIZED " if prefilter else ""
+        filtered_docs_cte = f"""filtered_docs AS {materialized}(
             SELECT
                 chunk_id,
                 document_id,
@@ -631,7 +651,10 @@ class DocumentRetriever:
         dense_limit = min(max(top_k * 50, 500), 5000)
         lexical_limit = min(max(top_k * 50, 500), 5000)
         query_embedding = self.embedding_service.encode(query)
-        filtered_docs_cte, candidate_source, filter_params = self._build_filtered_docs_context(filters)
+        vector_plan = self._plan_vector_scan(filters, dense_limit)
+        filtered_docs_cte, candidate_source, filter_params = self._build_filtered_docs_context(
+            filters, prefilter=vector_plan["strategy"] == "exact"
+        )
         cte_prefix = f"{filtered_docs_cte}," if filtered_docs_cte else ""
         standalone_cte = f"WITH {filtered_docs_cte}" if filtered_docs_cte else ""
 
@@ -670,6 +693,7 @@ class DocumentRetriever:
         lexical_rows: List[Dict[str, Any]] = []
         term_stats: List[Dict[str, Any]] = []
         with self.db_manager.get_cursor(dict_cursor=True) as cursor:
+            apply_vector_plan(cursor, vector_plan)
             cursor.execute(
                 dense_sql,
                 [*filter_params, query_embedding, query_embedding, dense_limit],
@@ -814,7 +838,8 @@ class DocumentRetriever:
                         "lexical_limit": lexical_limit,
                         "query_terms": term_stats,
                         "top_explanations": [],
-                    }
+                    },
+                    "vector_plan": vector_plan,
                 }
                 return [], diagnostics
 
@@ -882,7 +907,8 @@ class DocumentRetriever:
                 "lexical_limit": lexical_limit,
                 "query_terms": term_stats,
                 "top_explanations": top_explanations[:20],
-            }
+            },
+            "vector_plan": vector_plan,
         }
         logger.info(f"Found {len(results)} relevant chunks (hybrid fusion v0)")
         return results, diagnostics
@@ -980,7 +1006,8 @@ class DocumentRetriever:
         top_k: Optional[int] = None,
         filters: Optional[Dict[str, Any]] = None,
         min_score: Optional[float] = None,
-        source: str = "lancedb"
+        source: str = "lancedb",
+        diagnostics: Optional[Dict[str, Any]] = None,
     ) -> List[SearchResult]:
         """
         Search for relevant document chunks.
@@ -991,6 +1018,7 @@ class DocumentRetriever:
             filters: Optional filters (e.g., {'document_id': 'abc123'})
             min_score: Minimum relevance score (0-1)
             source: Search backend override ('lancedb' or 'postgres')
+            diagnostics: Optional dict that receives the Postgres ``vector_plan``
 
         Returns:
             List of SearchResult objects
@@ -1013,12 +1041,15 @@ class DocumentRetriever:
         # Generate query embedding
         query_embedding = self.embedding_service.encode(query)
 
-        # Perform vector search
+        # Perform vector search. plan_vector_scan sizes ef_search (or picks an
+        # exact scan) so a filtered query still returns top_k rows; min_score
+        # only drops the tail, so there is no need to over-fetch.
         raw_results = self.repository.search_similar(
             query_embedding=query_embedding,
-            top_k=top_k * 2,  # Get more results for filtering
+            top_k=top_k,
             distance_metric=distance_metric,
-            filters=filters
+            filters=filters,
+            diagnostics=diagnostics,
         )
 
         # Convert to SearchResult objects with relevance scores
@@ -1084,10 +1115,15 @@ class DocumentRetriever:
         # Build a pre-filter CTE so both the vector and fulltext candidate branches
         # are constrained before the LIMIT, preventing missing results in large indexes.
         filter_clauses, filter_params = self._build_chunk_filter_clauses(filters)
+        candidate_limit = max(top_k * 100, 1000)  # At least 1000, or 100x top_k
+        vector_plan = self.repository.plan_vector_scan(
+            filters, filter_clauses, filter_params, candidate_limit
+        )
 
         if filter_clauses:
             filter_where_sql = f"WHERE {' AND '.join(filter_clauses)}"
-            filtered_docs_cte = f"""filtered_docs AS (
+            materialized = "MATERIALIZED " if vector_plan["strategy"] == "exact" else ""
+            filtered_docs_cte = f"""filtered_docs AS {materialized}(
                 SELECT chunk_id, embedding, text_content
                 FROM document_chunks
                 {filter_where_sql}
@@ -1151,8 +1187,6 @@ class DocumentRetriever:
         # Build the full SQL query
         # Strategy: Get candidates from BOTH vector and fulltext search via UNION,
         # then compute combined scores. This ensures exact text matches are never lost.
-        candidate_limit = max(top_k * 100, 1000)  # At least 1000, or 100x top_k
-
         query_sql = f"""
         WITH {filtered_docs_cte}
         candidates AS (
@@ -1246,6 +1280,7 @@ class DocumentRetriever:
         params.extend([alpha, 1 - alpha, alpha, top_k])
 
         with self.db_manager.get_cursor(dict_cursor=True) as cursor:
+            apply_vector_plan(cursor, vector_plan)
             cursor.execute(query_sql, params)
             raw_results = cursor.fetchall()
 
@@ -1288,7 +1323,7 @@ class DocumentRetriever:
             use_hybrid: Use hybrid search
             source: Search backend override ('lancedb' or 'postgres')
             filters: Optional filters, including the access-control keys
-                (excluded_document_ids / allowed_namespaces) the API layer
+                (visible_to / allowed_namespaces) the API layer
                 injects for visibility and collection grants
 
         Returns:
@@ -219,6 +219,12 @@ def load_role_config(force_reload: bool = False) -> Dict[str, Dict[str, Any]]:
     return _role_config
 
 
+def invalidate_role_config() -> None:
+    """Drop the cached role config so the next lookup re-reads it."""
+    global _role_config
+    _role_config = None
+
+
 def save_role_config(config: Optional[Dict[str, Dict[str, Any]]] = None) -> bool:
     """Save the current role config to the JSON file (legacy fallback).
 
@@ -2,6 +2,7 @@
 API Key, Client, and User management routes for PGVectorRAGIndexer.
 """
 
+import asyncio
 import logging
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
@@ -753,7 +754,7 @@ async def saml_cleanup_sessions():
     """Remove expired SAML sessions (admin only)."""
     from saml_auth import cleanup_expired_sessions
     try:
-        deleted = cleanup_expired_sessions()
+        deleted = await asyncio.to_thread(cleanup_expired_sessions)
         return {"deleted": deleted, "ok": True}
     except Exception as e:
         logger.error(f"Failed to cleanup SAML sessions: {e}")
@@ -5,14 +5,24 @@ Indexing and Document Locking routes for PGVectorRAGIndexer.
 import logging
 import os
 import tempfile
+import asyncio
 import hashlib
 import json
+import re
+import time
 from datetime import datetime, timezone
 from typing import Optional, Any
 import xxhash
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, status, Request, Query
-
-from api_models import IndexRequest, IndexResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from api_models import (
+    IndexRequest,
+    IndexResponse,
+    IndexingJobResponse,
+    UploadSessionRequest,
+    UploadSessionResponse,
+)
 from services import get_indexer, encrypted_pdfs_encountered
 from auth import require_api_key, require_permission
 from document_processor import (
@@ -71,15 +81,40 @@ def _assign_owner_if_authenticated(key_record: Optional[dict], document_id: Opti
         logger.warning(f"Could not auto-assign owner for document {document_id}: {e}")
 
 
-@indexing_router.post("/index", response_model=IndexResponse)
+_JOB_ACCEPTED = {202: {"model": IndexingJobResponse, "description": "Queued as a background job"}}
+
+
+@indexing_router.post("/index", response_model=IndexResponse, responses=_JOB_ACCEPTED)
 async def index_document(
     request: IndexRequest,
+    background: bool = False,
+    priority: int = 0,
     key_record: Optional[dict] = Depends(require_permission("documents.write")),
 ):
-    """Index a document from URI. Requires the documents.write permission."""
+    """Index a document from URI. Requires the documents.write permission.
+
+    With ``?background=true`` the document is indexed by a job worker and
+    the answer is 202 with the queued job (see ``/indexing/jobs``).
+    """
+    if background:
+        _check_priority(priority)
+        return await _enqueue_indexing_job(
+            "index", request.model_dump(),
+            source_uri=request.source_uri, priority=priority, key_record=key_record,
+        )
+    return await _index_source(request, key_record)
+
+
+async def _index_source(
+    request: IndexRequest,
+    key_record: Optional[dict],
+    run_id: Optional[str] = None,
+) -> IndexResponse:
+    """Index a document from URI; shared by /index and its background jobs."""
     from indexing_runs import start_run, complete_run
     from indexer_v2 import ReplacementNotAuthorizedError
-    run_id = start_run(trigger="api", source_uri=request.source_uri)
+    run_id = run_id or start_run(trigger="api", source_uri=request.source_uri)
+    timings: dict = {}
     try:
         idx = get_indexer()
         # Same overwrite guard as /upload-and-index: replacing an existing
@@ -90,12 +125,14 @@ async def index_document(
             source_uri=request.source_uri,
             force_reindex=request.force_reindex,
             custom_metadata=request.metadata,
-            may_replace=lambda doc_id: _may_replace_document(key_record, doc_id)
+            may_replace=lambda doc_id: _may_replace_document(key_record, doc_id),
+            timings=timings,
         )
 
         if result['status'] == 'error':
             complete_run(run_id, status="failed", files_scanned=1, files_failed=1,
-                         errors=[{"source_uri": request.source_uri, "error": result.get('message', '')}])
+                         errors=[{"source_uri": request.source_uri, "error": result.get('message', '')}],
+                         metadata={"stages": timings})
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=result['message']
@@ -106,7 +143,8 @@ async def index_document(
         if added:
             _assign_owner_if_authenticated(key_record, result.get('document_id'))
         complete_run(run_id, status="success", files_scanned=1,
-                     files_added=added, files_skipped=skipped)
+                     files_added=added, files_skipped=skipped,
+                     metadata={"stages": timings})
         return IndexResponse(**result)
     except HTTPException:
         raise
@@ -128,33 +166,17 @@ async def index_document(
         )
 
 
-@indexing_router.post("/upload-and-index", response_model=IndexResponse)
-async def upload_and_index(
-    file: UploadFile = File(...),
-    force_reindex: Any = Form(default=False),
-    custom_source_uri: Optional[str] = Form(default=None),
-    document_type: Optional[str] = Form(default=None),
-    metadata_json: Optional[str] = Form(default=None, alias="metadata"),
-    ocr_mode: Optional[str] = Form(default=None),
-    key_record: Optional[dict] = Depends(require_permission("documents.write")),
-):
-    """
-    Upload a file and index it immediately.
-    """
-    from indexing_runs import start_run, complete_run
+async def _receive_upload_file(file: UploadFile):
+    """Stream an upload to a temp file, hashing it on the way.
 
-    # Robust bool conversion for Form data
-    if isinstance(force_reindex, str):
-        force_reindex = force_reindex.lower() in ("true", "1", "t", "y", "yes")
-
-    source = custom_source_uri or file.filename or "upload"
-    run_id = start_run(trigger="upload", source_uri=source)
+    Returns (temp path, bytes written, xxh64 hex digest).
+    """
+    # Create temporary file with original extension
+    suffix = os.path.splitext(file.filename)[1] if file.filename else '.tmp'
+    bytes_written = 0
+    hasher = xxhash.xxh64()
     temp_path = None
     try:
-        # Create temporary file with original extension
-        suffix = os.path.splitext(file.filename)[1] if file.filename else '.tmp'
-        bytes_written = 0
-        hasher = xxhash.xxh64()
         with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
             temp_path = temp_file.name
             while True:
@@ -164,12 +186,50 @@ async def upload_and_index(
                 bytes_written += len(chunk)
                 hasher.update(chunk)
                 temp_file.write(chunk)
-        uploaded_file_hash = hasher.hexdigest()
+    except BaseException:
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return temp_path, bytes_written, hasher.hexdigest()
+
+
+async def _index_upload(
+    *,
+    filename: Optional[str],
+    receive,
+    force_reindex: bool,
+    custom_source_uri: Optional[str],
+    document_type: Optional[str],
+    metadata_json: Optional[str],
+    ocr_mode: Optional[str],
+    key_record: Optional[dict],
+    upload_method: str = "http_upload",
+    run_id: Optional[str] = None,
+    keep_file: bool = False,
+) -> IndexResponse:
+    """Index an uploaded file; shared by /upload-and-index, /uploads and
+    their background jobs.
+
+    ``receive`` is an async callable returning (path, bytes, xxh64 hex
+    digest) of the received file. The file is removed afterwards unless
+    ``keep_file`` is set (job uploads, removed when the job's outcome is
+    recorded). Stage durations are recorded in the run's ``metadata.stages``.
+    """
+    from indexing_runs import start_run, complete_run
 
-        logger.info(f"Uploaded file: {file.filename} ({bytes_written} bytes) -> {temp_path}")
+    source = custom_source_uri or filename or "upload"
+    run_id = run_id or start_run(trigger="upload", source_uri=source)
+    temp_path = None
+    stages: dict = {}
+    stage_started = time.perf_counter()
+    try:
+        temp_path, bytes_written, uploaded_file_hash = await receive()
+        stages["receive"] = round(time.perf_counter() - stage_started, 3)
+
+        logger.info(f"Uploaded file: {filename} ({bytes_written} bytes) -> {temp_path}")
 
         # Determine the source URI to use (custom path or filename)
-        display_name = custom_source_uri or file.filename or "upload"
+        display_name = custom_source_uri or filename or "upload"
         logger.info(f"upload_and_index: force_reindex={force_reindex} (type={type(force_reindex)})")
 
         # Process the file using temp path, but with custom source_uri for document_id
@@ -200,8 +260,8 @@ async def upload_and_index(
 
         metadata = dict(user_metadata)
         metadata.update({
-            'upload_method': 'http_upload',
-            'original_filename': file.filename,
+            'upload_method': upload_method,
+            'original_filename': filename,
             'display_name': display_name,
             'file_hash': uploaded_file_hash,
             'temp_path': temp_path
@@ -217,7 +277,8 @@ async def upload_and_index(
         if not force_reindex and existing_doc:
             existing_hash = (existing_doc.get('metadata') or {}).get('file_hash')
             if existing_hash and existing_hash == uploaded_file_hash:
-                complete_run(run_id, status="success", files_scanned=1, files_skipped=1)
+                complete_run(run_id, status="success", files_scanned=1, files_skipped=1,
+                             metadata={"stages": stages})
                 return IndexResponse(
                     status='skipped',
                     document_id=document_id,
@@ -240,11 +301,13 @@ async def upload_and_index(
             )
 
         # Process document from temp file
+        stage_started = time.perf_counter()
         processed_doc = idx.processor.process(
             source_uri=temp_path,
             custom_metadata=metadata,
             ocr_mode=ocr_mode  # Pass OCR mode to processor
         )
+        stages["parse"] = round(time.perf_counter() - stage_started, 3)
 
         # Regenerate document_id based on the display name (not temp path)
         processed_doc.document_id = document_id
@@ -257,7 +320,9 @@ async def upload_and_index(
         # Generate embeddings
         logger.info(f"Generating embeddings for {len(processed_doc.chunks)} chunks...")
         chunk_texts = processed_doc.get_chunk_texts()
+        stage_started = time.perf_counter()
         embeddings = idx.embedding_service.encode_batch(chunk_texts, show_progress=False)
+        stages["embed"] = round(time.perf_counter() - stage_started, 3)
 
         # Prepare chunks for insertion
         chunks_data = []
@@ -274,6 +339,7 @@ async def upload_and_index(
         from config import get_config
         config = get_config()
         from indexing_write_transaction import write_indexed_document
+        stage_started = time.perf_counter()
         write_indexed_document(
             repository=idx.repository,
             document_id=processed_doc.document_id,
@@ -285,13 +351,15 @@ async def upload_and_index(
             rebuild_fts=True,
             operation_label="uploaded document",
         )
+        stages["write"] = round(time.perf_counter() - stage_started, 3)
 
         logger.info(f"✓ Successfully indexed document: {processed_doc.document_id}")
 
         _assign_owner_if_authenticated(key_record, processed_doc.document_id)
         complete_run(run_id, status="success", files_scanned=1,
                      files_added=1 if not force_reindex else 0,
-                     files_updated=1 if force_reindex else 0)
+                     files_updated=1 if force_reindex else 0,
+                     metadata={"stages": stages})
         return IndexResponse(
             status='success',
             document_id=processed_doc.document_id,
@@ -299,19 +367,23 @@ async def upload_and_index(
             chunks_indexed=len(chunks_data)
         )
 
-    except HTTPException:
+    except HTTPException as e:
+        # Rejected before indexing (bad metadata, replacement not allowed)
+        complete_run(run_id, status="failed", files_scanned=1, files_failed=1,
+                     errors=[{"source_uri": source, "error": str(e.detail)}],
+                     metadata={"stages": stages})
         raise
     except EncryptedPDFError as e:
         from errors import raise_api_error, ErrorCode
         # Return 403 with specific error type for encrypted PDFs
-        source = custom_source_uri or file.filename
+        source = custom_source_uri or filename
         logger.warning(f"Encrypted PDF detected: {source}")
 
         # Record for later querying (uploader recorded so the listing can be
         # scoped to the caller's own entries in team mode)
         encrypted_pdfs_encountered.append({
             "source_uri": source,
-            "filename": file.filename,
+            "filename": filename,
             "detected_at": datetime.now(timezone.utc).isoformat(),
             "uploader_key_id": key_record["id"] if isinstance(key_record, dict) else None,
         })
@@ -330,13 +402,14 @@ async def upload_and_index(
 
         # Check if this is an OCR mode "only" skip (not an error, just skipped)
         if error_message.startswith("Skipped:"):
-            logger.info(f"File skipped due to OCR mode: {file.filename}")
+            logger.info(f"File skipped due to OCR mode: {filename}")
             # Return success with 0 chunks to indicate skip
-            complete_run(run_id, status="success", files_scanned=1, files_skipped=1)
+            complete_run(run_id, status="success", files_scanned=1, files_skipped=1,
+                         metadata={"stages": stages})
             return IndexResponse(
                 status='skipped',
                 document_id='',
-                source_uri=custom_source_uri if custom_source_uri else (file.filename or ''),
+                source_uri=custom_source_uri if custom_source_uri else (filename or ''),
                 chunks_indexed=0,
                 message=error_message
             )
@@ -362,7 +435,7 @@ async def upload_and_index(
         )
     finally:
         # Clean up temporary file
-        if temp_path and os.path.exists(temp_path):
+        if temp_path and not keep_file and os.path.exists(temp_path):
             try:
                 os.remove(temp_path)
                 logger.debug(f"Cleaned up temp file: {temp_path}")
@@ -370,6 +443,425 @@ async def upload_and_index(
                 logger.warning(f"Failed to clean up temp file {temp_path}: {e}")
 
 
+@indexing_router.post("/upload-and-index", response_model=IndexResponse, responses=_JOB_ACCEPTED)
+async def upload_and_index(
+    file: UploadFile = File(...),
+    force_reindex: Any = Form(default=False),
+    custom_source_uri: Optional[str] = Form(default=None),
+    document_type: Optional[str] = Form(default=None),
+    metadata_json: Optional[str] = Form(default=None, alias="metadata"),
+    ocr_mode: Optional[str] = Form(default=None),
+    background: bool = False,
+    priority: int = 0,
+    key_record: Optional[dict] = Depends(require_permission("documents.write")),
+):
+    """
+    Upload a file and index it immediately.
+
+    With ``?background=true`` the file is stored, indexed by a job worker,
+    and the answer is 202 with the queued job.
+    """
+    # Robust bool conversion for Form data
+    if isinstance(force_reindex, str):
+        force_reindex = force_reindex.lower() in ("true", "1", "t", "y", "yes")
+
+    if background:
+        _check_priority(priority)
+        temp_path, bytes_written, file_hash = await _receive_upload_file(file)
+        return await _enqueue_indexing_job(
+            "upload",
+            {
+                "filename": file.filename,
+                "bytes": bytes_written,
+                "file_hash": file_hash,
+                "force_reindex": force_reindex,
+                "custom_source_uri": custom_source_uri,
+                "document_type": document_type,
+                "metadata_json": metadata_json,
+                "ocr_mode": ocr_mode,
+                "upload_method": "http_upload",
+            },
+            source_uri=custom_source_uri or file.filename,
+            priority=priority,
+            key_record=key_record,
+            upload_path=temp_path,
+        )
+
+    return await _index_upload(
+        filename=file.filename,
+        receive=lambda: _receive_upload_file(file),
+        force_reindex=force_reindex,
+        custom_source_uri=custom_source_uri,
+        document_type=document_type,
+        metadata_json=metadata_json,
+        ocr_mode=ocr_mode,
+        key_record=key_record,
+    )
+
+
+def _upload_owner(key_record: Optional[dict]):
+    return key_record["id"] if isinstance(key_record, dict) else None
+
+
+def _upload_not_found(upload_id: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Upload session not found: {upload_id}",
+    )
+
+
+def _offset_conflict(e) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail={"message": str(e), "offset": e.offset},
+    )
+
+
+_CONTENT_RANGE_RE = re.compile(r"^bytes (\d+)-(\d+)/(\d+|\*)$")
+
+
+@indexing_router.post("/uploads", response_model=UploadSessionResponse, status_code=201)
+async def create_upload_session(
+    request: UploadSessionRequest,
+    key_record: Optional[dict] = Depends(require_permission("documents.write")),
+):
+    """Start a resumable upload. Send the file with PUT /uploads/{upload_id}."""
+    import upload_sessions
+    params = request.model_dump(exclude={"filename", "size"})
+    return await asyncio.to_thread(
+        upload_sessions.create_session,
+        request.filename, request.size, params, _upload_owner(key_record),
+    )
+
+
+@indexing_router.put("/uploads/{upload_id}", response_model=UploadSessionResponse)
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    key_record: Optional[dict] = Depends(require_permission("documents.write")),
+):
+    """Append one chunk (``Content-Range: bytes start-end/size``).
+
+    A chunk that does not start at the current offset gets 409 with the
+    offset to resume from. The body is read as it arrives and rejected with
+    413 as soon as it runs past the Content-Range.
+    """
+    import upload_sessions
+    match = _CONTENT_RANGE_RE.match(request.headers.get("content-range", "").strip())
+    if not match:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Content-Range header of the form 'bytes start-end/size' is required",
+        )
+    start, end = int(match.group(1)), int(match.group(2))
+    max_bytes = upload_sessions.get_chunk_max_bytes()
+    if end < start:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid Content-Range")
+    if end - start + 1 > max_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Chunks are limited to {max_bytes} bytes",
+        )
+    owner = _upload_owner(key_record)
+    try:
+        session = await asyncio.to_thread(upload_sessions.get_session, upload_id, owner)
+    except upload_sessions.UploadSessionNotFound:
+        raise _upload_not_found(upload_id)
+    if match.group(3) != "*" and int(match.group(3)) != session["size"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Content-Range size {match.group(3)} does not match the upload size {session['size']}",
+        )
+
+    expected = end - start + 1
+    data = bytearray()
+    async for piece in request.stream():
+        data += piece
+        if len(data) > expected:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Body is longer than the {expected} bytes of its Content-Range",
+            )
+    if len(data) != expected:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Content-Range covers {expected} bytes but {len(data)} were sent",
+        )
+    try:
+        return await asyncio.to_thread(
+            upload_sessions.append_chunk, upload_id, start, bytes(data), owner,
+        )
+    except upload_sessions.UploadSessionNotFound:
+        raise _upload_not_found(upload_id)
+    except upload_sessions.UploadOffsetMismatch as e:
+        raise _offset_conflict(e)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@indexing_router.get("/uploads/{upload_id}", response_model=UploadSessionResponse)
+async def get_upload_session(
+    upload_id: str,
+    key_record: Optional[dict] = Depends(require_permission("documents.write")),
+):
+    """Status of a resumable upload, including the offset to resume from."""
+    import upload_sessions
+    try:
+        return upload_sessions.get_session(upload_id, _upload_owner(key_record))
+    except upload_sessions.UploadSessionNotFound:
+        raise _upload_not_found(upload_id)
+
+
+@indexing_router.post("/uploads/{upload_id}/finalize", response_model=IndexResponse, responses=_JOB_ACCEPTED)
+async def finalize_upload(
+    upload_id: str,
+    background: bool = False,
+    priority: int = 0,
+    key_record: Optional[dict] = Depends(require_permission("documents.write")),
+):
+    """Index a fully received upload and remove its session.
+
+    The file was hashed as it arrived, so it is not read again before
+    processing. ``?background=true`` queues it as a job (202) instead.
+    """
+    import upload_sessions
+    if background:
+        _check_priority(priority)
+    try:
+        data_path, file_hash, session = await asyncio.to_thread(
+            upload_sessions.finalize_session, upload_id, _upload_owner(key_record),
+        )
+    except upload_sessions.UploadSessionNotFound:
+        raise _upload_not_found(upload_id)
+    except upload_sessions.UploadOffsetMismatch as e:
+        raise _offset_conflict(e)
+
+    params = session.get("params") or {}
+    metadata_json = json.dumps(params["metadata"]) if params.get("metadata") else None
+
+    async def receive():
+        return data_path, session["size"], file_hash
+
+    try:
+        if background:
+            return await _enqueue_indexing_job(
+                "upload",
+                {
+                    "filename": session["filename"],
+                    "bytes": session["size"],
+                    "file_hash": file_hash,
+                    "force_reindex": bool(params.get("force_reindex")),
+                    "custom_source_uri": params.get("custom_source_uri"),
+                    "document_type": params.get("document_type"),
+                    "metadata_json": metadata_json,
+                    "ocr_mode": params.get("ocr_mode"),
+                    "upload_method": "resumable_upload",
+                },
+                source_uri=params.get("custom_source_uri") or session["filename"],
+                priority=priority,
+                key_record=key_record,
+                upload_path=data_path,
+            )
+        return await _index_upload(
+            filename=session["filename"],
+            receive=receive,
+            force_reindex=bool(params.get("force_reindex")),
+            custom_source_uri=params.get("custom_source_uri"),
+            document_type=params.get("document_type"),
+            metadata_json=metadata_json,
+            ocr_mode=params.get("ocr_mode"),
+            key_record=key_record,
+            upload_method="resumable_upload",
+        )
+    finally:
+        upload_sessions.delete_session(upload_id)
+
+
+@indexing_router.delete("/uploads/{upload_id}")
+async def cancel_upload(
+    upload_id: str,
+    key_record: Optional[dict] = Depends(require_permission("documents.write")),
+):
+    """Abandon a resumable upload and discard the received bytes."""
+    import upload_sessions
+    try:
+        upload_sessions.get_session(upload_id, _upload_owner(key_record))
+    except upload_sessions.UploadSessionNotFound:
+        raise _upload_not_found(upload_id)
+    upload_sessions.delete_session(upload_id)
+    return {"status": "deleted", "upload_id": upload_id}
+
+
+# ---------------------------------------------------------------------------
+# Background indexing jobs (indexing_jobs.py)
+# ---------------------------------------------------------------------------
+
+JOB_PRIORITY_MIN, JOB_PRIORITY_MAX = -100, 100
+JOB_EVENTS_POLL_SECONDS = 1.0
+
+
+def _check_priority(priority: int) -> None:
+    if not JOB_PRIORITY_MIN <= priority <= JOB_PRIORITY_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"priority must be between {JOB_PRIORITY_MIN} and {JOB_PRIORITY_MAX}",
+        )
+
+
+async def _enqueue_indexing_job(
+    kind: str,
+    payload: dict,
+    *,
+    source_uri: Optional[str],
+    priority: int,
+    key_record: Optional[dict],
+    upload_path: Optional[str] = None,
+) -> JSONResponse:
+    """Queue a job and answer 202 with it.
+
+    ``upload_path`` (a received file) is moved to the job directory; it is
+    removed if the job cannot be queued.
+    """
+    import indexing_jobs
+    try:
+        if upload_path:
+            payload["file_path"] = await asyncio.to_thread(
+                indexing_jobs.store_job_file, upload_path, payload.get("filename"),
+            )
+        job = await asyncio.to_thread(
+            indexing_jobs.enqueue_job, kind, payload,
+            priority=priority, source_uri=source_uri, owner_key_id=_upload_owner(key_record),
+        )
+    except Exception as e:
+        indexing_jobs.remove_job_file(payload)
+        if upload_path and os.path.exists(upload_path):
+            os.remove(upload_path)
+        logger.error(f"Failed to queue indexing job: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to queue indexing job: {str(e)}",
+        )
+    indexing_jobs.get_indexing_job_runner().wake()
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=IndexingJobResponse(**job).model_dump(),
+    )
+
+
+async def _run_index_job(payload: dict, key_record: Optional[dict], run_id: str) -> dict:
+    response = await _index_source(IndexRequest(**payload), key_record, run_id=run_id)
+    return response.model_dump()
+
+
+async def _run_upload_job(payload: dict, key_record: Optional[dict], run_id: str) -> dict:
+    async def receive():
+        return payload["file_path"], payload["bytes"], payload["file_hash"]
+
+    response = await _index_upload(
+        filename=payload.get("filename"),
+        receive=receive,
+        force_reindex=bool(payload.get("force_reindex")),
+        custom_source_uri=payload.get("custom_source_uri"),
+        document_type=payload.get("document_type"),
+        metadata_json=payload.get("metadata_json"),
+        ocr_mode=payload.get("ocr_mode"),
+        key_record=key_record,
+        upload_method=payload.get("upload_method") or "http_upload",
+        run_id=run_id,
+        keep_file=True,
+    )
+    return response.model_dump()
+
+
+def _job_not_found(job_id: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Indexing job not found: {job_id}",
+    )
+
+
+@indexing_router.get("/indexing/jobs")
+async def list_indexing_jobs(
+    job_status: Optional[str] = Query(default=None, alias="status"),
+    limit: int = Query(default=50, ge=1, le=500),
+    key_record: Optional[dict] = Depends(require_api_key),
+):
+    """The caller's recent background jobs, with queue depth and wait."""
+    import indexing_jobs
+    jobs = await asyncio.to_thread(
+        indexing_jobs.list_jobs, _upload_owner(key_record), job_status, limit,
+    )
+    queue = await asyncio.to_thread(indexing_jobs.queue_stats)
+    return {
+        "jobs": [IndexingJobResponse(**job).model_dump() for job in jobs],
+        "count": len(jobs),
+        "queue": queue,
+        "workers": indexing_jobs.get_indexing_job_runner().get_status(),
+    }
+
+
+@indexing_router.get("/indexing/jobs/{job_id}", response_model=IndexingJobResponse)
+async def get_indexing_job(
+    job_id: str,
+    key_record: Optional[dict] = Depends(require_api_key),
+):
+    """Status of a background job; ``result`` holds its IndexResponse."""
+    import indexing_jobs
+    job = await asyncio.to_thread(indexing_jobs.get_job, job_id, _upload_owner(key_record))
+    if job is None:
+        raise _job_not_found(job_id)
+    return job
+
+
+@indexing_router.get("/indexing/jobs/{job_id}/events")
+async def stream_indexing_job(
+    job_id: str,
+    request: Request,
+    key_record: Optional[dict] = Depends(require_api_key),
+):
+    """Stream a job's state as NDJSON, one line per change, until it finishes."""
+    import indexing_jobs
+    owner = _upload_owner(key_record)
+    job = await asyncio.to_thread(indexing_jobs.get_job, job_id, owner)
+    if job is None:
+        raise _job_not_found(job_id)
+
+    async def events():
+        current, last = job, None
+        while current is not None:
+            state = IndexingJobResponse(**current).model_dump()
+            if state != last:
+                yield json.dumps(state) + "\n"
+                last = state
+            if current["status"] in indexing_jobs.TERMINAL_STATUSES:
+                return
+            if await request.is_disconnected():
+                return
+            await asyncio.sleep(JOB_EVENTS_POLL_SECONDS)
+            current = await asyncio.to_thread(indexing_jobs.get_job, job_id, owner)
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+@indexing_router.delete("/indexing/jobs/{job_id}")
+async def cancel_indexing_job(
+    job_id: str,
+    key_record: Optional[dict] = Depends(require_permission("documents.write")),
+):
+    """Cancel a queued job. A job that already started gets 409."""
+    import indexing_jobs
+    owner = _upload_owner(key_record)
+    job = await asyncio.to_thread(indexing_jobs.get_job, job_id, owner)
+    if job is None:
+        raise _job_not_found(job_id)
+    if not await asyncio.to_thread(indexing_jobs.cancel_job, job_id, owner):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job {job_id} is {job['status']} and can no longer be cancelled",
+        )
+    return {"status": "cancelled", "job_id": job_id}
+
+
 @indexing_router.post("/documents/locks/acquire", tags=["Document Locks"], dependencies=[Depends(require_api_key)])
 async def acquire_document_lock(request: Request):
     """Acquire a lock on a document for indexing."""
@@ -507,3 +999,12 @@ async def cleanup_expired_document_locks():
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to cleanup locks: {str(e)}",
         )
+
+
+def _register_job_handlers() -> None:
+    from indexing_jobs import register_job_handler
+    register_job_handler("index", _run_index_job, trigger="api")
+    register_job_handler("upload", _run_upload_job, trigger="upload")
+
+
+_register_job_handlers()
@@ -2,6 +2,7 @@
 Maintenance, Retention, Quarantine, and Compliance routes for PGVectorRAGIndexer.
 """
 
+import asyncio
 import logging
 from typing import Optional
 from datetime import datetime
@@ -128,7 +129,8 @@ async def apply_activity_retention(request: Request, response: Response):
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="days must be a positive integer",
             )
-        result = apply_retention_policy(
+        result = await asyncio.to_thread(
+            apply_retention_policy,
             activity_days=days,
             cleanup_saml_sessions=False,
         )
@@ -156,7 +158,8 @@ async def run_retention_policy(request: RetentionRunRequest):
     """Run retention orchestration once with optional per-category overrides."""
     from retention_policy import apply_retention
 
-    result = apply_retention(
+    result = await asyncio.to_thread(
+        apply_retention,
         activity_days=request.activity_days,
         quarantine_days=request.quarantine_days,
         indexing_runs_days=request.indexing_runs_days,
@@ -242,7 +245,9 @@ async def purge_quarantine(response: Response, retention_days: Optional[int] = Q
     """
     _add_deprecation_headers(response)
     from retention_policy import apply_retention
-    result = apply_retention(quarantine_days=retention_days, cleanup_saml_sessions=False)
+    result = await asyncio.to_thread(
+        apply_retention, quarantine_days=retention_days, cleanup_saml_sessions=False,
+    )
     count = result.get("quarantine_purged", 0)
     return {"purged": count}
 
@@ -255,3 +260,22 @@ async def quarantine_stats(
     from quarantine import get_quarantine_stats
     from document_visibility import visibility_clause_for_key_record
     return get_quarantine_stats(visibility=visibility_clause_for_key_record(key_record))
+
+
+@maintenance_router.post("/corpus-stats/recompute", tags=["Maintenance"], dependencies=[Depends(require_admin)])
+async def recompute_corpus_stats():
+    """Recompute the write-time corpus and indexing-run statistics (admin only).
+
+    The counters are kept current by triggers; this repairs them after
+    manual SQL with the triggers disabled or a restore from an old dump.
+    """
+    from database import DocumentRepository
+    try:
+        totals = DocumentRepository(get_db_manager()).rebuild_corpus_stats()
+    except Exception as e:
+        logger.error(f"Failed to recompute corpus statistics: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to recompute corpus statistics: {str(e)}",
+        )
+    return {"recomputed": True, **totals}
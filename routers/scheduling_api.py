@@ -117,6 +117,11 @@ async def update_watched_folder(folder_id: str, request: Request):
         )
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
     except Exception as e:
         logger.error(f"Failed to update watched folder: {e}")
         raise HTTPException(
@@ -149,7 +154,7 @@ async def delete_watched_folder(folder_id: str):
 @scheduling_router.post("/watched-folders/{folder_id}/scan", dependencies=[Depends(require_api_key)])
 async def scan_watched_folder(folder_id: str, request: Request, dry_run: bool = Query(default=False)):
     """Trigger an immediate scan of a watched folder."""
-    from watched_folders import get_folder, scan_folder, mark_scanned
+    from watched_folders import get_folder, scan_folder, mark_scanned, update_scan_watermarks
     try:
         folder = get_folder(folder_id)
         if not folder:
@@ -191,9 +196,13 @@ async def scan_watched_folder(folder_id: str, request: Request, dry_run: bool =
             client_id=client_id,
             root_id=folder.get("root_id"),
             dry_run=dry_run,
+            on_checkpoint=lambda checkpoint: update_scan_watermarks(
+                folder_id, checkpoint=dict(checkpoint, state="running"),
+            ),
         )
         if not dry_run and result.get("run_id"):
             mark_scanned(folder_id, run_id=result["run_id"])
+            update_scan_watermarks(folder_id, clear_checkpoint=True)
         return result
     except HTTPException:
         raise
@@ -2,23 +2,28 @@
 Search, Document, and Metadata routes for PGVectorRAGIndexer.
 """
 
+import asyncio
+import hashlib
 import logging
 import re
 import time
 from datetime import datetime
 from typing import List, Optional, Dict, Any
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 
 from api_models import (
     SearchRequest, SearchResponse, SearchResultModel,
     DocumentInfo, DocumentListResponse, BulkDeleteRequest,
-    ExportRequest, RestoreRequest, APIErrorResponse
+    ExportRequest, RestoreRequest, APIErrorResponse, MetadataValueCount,
+    DocumentStatus, DocumentStatusBatchRequest, DocumentStatusBatchResponse,
 )
 from services import get_indexer, get_retriever
 from retriever_v2 import LanceDBNotReadyError
 from auth import require_api_key, require_admin, require_permission
 from database import get_db_manager, DocumentRepository
 from embeddings import get_embedding_service
+import backup_stream
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +34,7 @@ DEFAULT_LITERAL_TAIL_THRESHOLD = 0.1
 DEFAULT_FUSION_LITERAL_ANCHOR_THRESHOLD = 0.01
 DEFAULT_FUSION_LITERAL_TAIL_THRESHOLD = 0.005
 DOCUMENT_GROUPING_BACKEND_MULTIPLIER = 20
+RESTORE_STREAM_BATCH_SIZE = 500
 HYBRID_MODE_LEGACY = "legacy"
 HYBRID_MODE_LEXICAL_FUSION_V0 = "lexical-fusion-v0"
 HYBRID_MODE_RERANK_V0 = "rerank-v0"
@@ -162,19 +168,21 @@ def _apply_identifier_tail_suppression(
 def _apply_access_filters(key_record: Optional[dict], base_filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
     """Merge per-user access-control filters into request filters.
 
-    Injects the visibility exclusion list and collection-grant namespace
-    allowlist for the calling identity. Fails closed — a DB error aborts the
-    request rather than leaking. Client-supplied allowed_namespaces is
-    overwritten; it must never widen access.
+    Injects the visibility predicate (``visible_to``) and collection-grant
+    namespace allowlist for the calling identity. Fails closed — a DB error
+    aborts the request rather than leaking. Client-supplied visible_to and
+    allowed_namespaces are overwritten; they must never widen access.
     """
-    from document_visibility import search_exclusions_for_key_record
+    from document_visibility import search_visibility_for_key_record
     from collection_grants import search_allowed_namespaces_for_key_record
 
     effective_filters = dict(base_filters) if base_filters else {}
 
-    excluded_ids = search_exclusions_for_key_record(key_record)
-    if excluded_ids:
-        effective_filters["excluded_document_ids"] = excluded_ids
+    visible_to = search_visibility_for_key_record(key_record)
+    if visible_to is not None:
+        effective_filters["visible_to"] = visible_to
+    elif "visible_to" in effective_filters:
+        del effective_filters["visible_to"]
 
     allowed_namespaces = search_allowed_namespaces_for_key_record(key_record)
     if allowed_namespaces is not None:
@@ -298,12 +306,14 @@ async def search_documents(
                     source=request.source,
                 )
         else:
+            retrieval_diagnostics = {}
             results = ret.search(
                 query=request.query,
                 top_k=search_top_k,
                 filters=effective_filters,
                 min_score=request.min_score,
                 source=request.source,
+                diagnostics=retrieval_diagnostics,
             )
 
         diagnostics = dict(retrieval_diagnostics) if retrieval_diagnostics else None
@@ -363,8 +373,8 @@ async def search_documents(
                     pass
             else:
                 try:
-                    from document_tree import get_tree_stats
-                    total_documents = get_tree_stats(source="postgres").get("total_documents", 0)
+                    repo = DocumentRepository(get_db_manager())
+                    total_documents = repo.get_corpus_totals()["total_documents"]
                 except Exception:
                     pass
 
@@ -529,15 +539,15 @@ async def list_encrypted_pdfs(
 
 
 def _tree_read_filters(key_record: Optional[dict], source: str):
-    """Visibility filters for tree reads: SQL clause for Postgres, hidden-id
-    exclusion list for LanceDB (which has no visibility columns)."""
+    """Visibility filters for tree reads: SQL clause for Postgres, visible_to
+    predicate for LanceDB."""
     from document_visibility import (
         visibility_clause_for_key_record,
-        search_exclusions_for_key_record,
+        search_visibility_for_key_record,
     )
     visibility = visibility_clause_for_key_record(key_record)
-    hidden_ids = search_exclusions_for_key_record(key_record) if source == "lancedb" else None
-    return visibility, hidden_ids
+    visible_to = search_visibility_for_key_record(key_record) if source == "lancedb" else None
+    return visibility, visible_to
 
 
 @search_router.get("/documents/tree", tags=["Document Tree"])
@@ -546,17 +556,25 @@ async def get_document_tree(
     limit: int = Query(default=200, ge=1, le=1000),
     offset: int = Query(default=0, ge=0),
     source: str = Query(default="postgres"),
+    cursor: Optional[str] = Query(default=None),
     key_record: Optional[dict] = Depends(require_api_key),
 ):
-    """Get one level of the document tree (visibility-filtered)."""
+    """Get one level of the document tree (visibility-filtered).
+
+    Pass the returned ``next_cursor`` as ``cursor`` to fetch the next page.
+    """
     from document_tree import get_tree_children
+    from document_visibility import visibility_clause_for_key_record
     try:
-        visibility, hidden_ids = _tree_read_filters(key_record, source)
+        # Both sources read the shared folder hierarchy, which carries the
+        # visibility columns; no hidden-id list is needed.
         result = get_tree_children(
             parent_path=parent_path, limit=limit, offset=offset, source=source,
-            visibility=visibility, hidden_document_ids=hidden_ids,
+            visibility=visibility_clause_for_key_record(key_record), cursor=cursor,
         )
         return result
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f"Failed to get document tree: {e}")
         raise HTTPException(
@@ -573,9 +591,9 @@ async def get_document_tree_stats(
     """Get overall document tree statistics (visibility-filtered)."""
     from document_tree import get_tree_stats
     try:
-        visibility, hidden_ids = _tree_read_filters(key_record, source)
+        visibility, visible_to = _tree_read_filters(key_record, source)
         return get_tree_stats(
-            source=source, visibility=visibility, hidden_document_ids=hidden_ids,
+            source=source, visibility=visibility, visible_to=visible_to,
         )
     except Exception as e:
         logger.error(f"Failed to get tree stats: {e}")
@@ -595,10 +613,10 @@ async def search_document_tree(
     """Search for documents matching a path pattern (visibility-filtered)."""
     from document_tree import search_tree
     try:
-        visibility, hidden_ids = _tree_read_filters(key_record, source)
+        visibility, visible_to = _tree_read_filters(key_record, source)
         results = search_tree(
             query=q, limit=limit, source=source,
-            visibility=visibility, hidden_document_ids=hidden_ids,
+            visibility=visibility, visible_to=visible_to,
         )
         return {"results": results, "count": len(results), "query": q}
     except Exception as e:
@@ -609,6 +627,56 @@ async def search_document_tree(
         )
 
 
+@search_router.post("/documents/status:batch", response_model=DocumentStatusBatchResponse, tags=["Documents"])
+async def get_documents_status(
+    request: DocumentStatusBatchRequest,
+    key_record: Optional[dict] = Depends(require_api_key),
+):
+    """Check which source paths are missing, unchanged or changed in one query.
+
+    Lets a client decide what to upload for a whole page of files instead of
+    one ``GET /documents/{document_id}`` per file. Hidden documents are
+    reported as missing.
+    """
+    from document_visibility import visibility_clause_for_key_record
+    try:
+        document_ids = [
+            hashlib.sha256(item.source_uri.encode()).hexdigest()[:16]
+            for item in request.items
+        ]
+        repo = DocumentRepository(get_db_manager())
+        found = repo.get_documents_status(
+            list(set(document_ids)),
+            visibility=visibility_clause_for_key_record(key_record),
+        )
+
+        results = []
+        for item, document_id in zip(request.items, document_ids):
+            doc = found.get(document_id)
+            if doc is None:
+                state = "missing"
+            elif item.file_hash is None:
+                state = "present"
+            elif doc.get("file_hash") and doc["file_hash"] == item.file_hash:
+                state = "unchanged"
+            else:
+                state = "changed"
+            results.append(DocumentStatus(
+                source_uri=item.source_uri,
+                document_id=document_id,
+                status=state,
+                file_hash=doc.get("file_hash") if doc else None,
+                document_type=doc.get("type") if doc else None,
+            ))
+        return DocumentStatusBatchResponse(results=results)
+    except Exception as e:
+        logger.error(f"Failed to get document status: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get document status: {str(e)}"
+        )
+
+
 @search_router.get("/documents/{document_id}", response_model=DocumentInfo, tags=["Documents"])
 async def get_document(
     document_id: str,
@@ -779,6 +847,7 @@ async def get_metadata_keys(
 async def get_metadata_values(
     key: str = Query(..., description="Metadata key to get values for"),
     limit: int = Query(default=100, ge=1, le=1000, description="Maximum values to return"),
+    prefix: Optional[str] = Query(default=None, description="Only values starting with this prefix"),
     key_record: Optional[dict] = Depends(require_api_key),
 ):
     """
@@ -794,6 +863,7 @@ async def get_metadata_values(
             key=key,
             limit=limit,
             visibility=visibility_clause_for_key_record(key_record),
+            prefix=prefix,
         )
         return values
     except Exception as e:
@@ -804,6 +874,35 @@ async def get_metadata_values(
         )
 
 
+@search_router.get("/metadata/values/counts", response_model=List[MetadataValueCount], tags=["Metadata"])
+async def get_metadata_value_counts(
+    key: str = Query(..., description="Metadata key to get values for"),
+    limit: int = Query(default=100, ge=1, le=1000, description="Maximum values to return"),
+    prefix: Optional[str] = Query(default=None, description="Only values starting with this prefix"),
+    key_record: Optional[dict] = Depends(require_api_key),
+):
+    """
+    Get values for a metadata key with the number of visible documents
+    carrying each one.
+    """
+    from document_visibility import visibility_clause_for_key_record
+    try:
+        db_manager = get_db_manager()
+        repo = DocumentRepository(db_manager)
+        return repo.get_metadata_value_counts(
+            key=key,
+            prefix=prefix,
+            limit=limit,
+            visibility=visibility_clause_for_key_record(key_record),
+        )
+    except Exception as e:
+        logger.error(f"Failed to get metadata value counts for key '{key}': {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get metadata value counts: {str(e)}"
+        )
+
+
 @search_router.post("/documents/bulk-delete", tags=["Documents"], dependencies=[Depends(require_permission("documents.delete"))])
 async def bulk_delete_documents(
     request: BulkDeleteRequest,
@@ -817,7 +916,7 @@ async def bulk_delete_documents(
     """
     from document_visibility import (
         visibility_clause_for_key_record,
-        search_exclusions_for_key_record,
+        search_visibility_for_key_record,
     )
     try:
         db_manager = get_db_manager()
@@ -846,16 +945,14 @@ async def bulk_delete_documents(
             try:
                 # Dual-delete from LanceDB first if enabled to prevent split-brain if LanceDB fails.
                 # Scope the LanceDB delete to the same visible set as the Postgres delete via the
-                # caller's hidden-document exclusion list, so the two stores can't drift.
+                # caller's visible_to predicate, so the two stores can't drift.
                 if getattr(config.retrieval, "lancedb_enabled", False):
                     try:
                         lancedb_filters = dict(request.filters)
-                        hidden_ids = search_exclusions_for_key_record(key_record)
-                        if hidden_ids:
-                            existing = lancedb_filters.get("excluded_document_ids") or []
-                            lancedb_filters["excluded_document_ids"] = list(
-                                set(existing) | set(hidden_ids)
-                            )
+                        lancedb_filters.pop("visible_to", None)
+                        visible_to = search_visibility_for_key_record(key_record)
+                        if visible_to is not None:
+                            lancedb_filters["visible_to"] = visible_to
                         from services import get_lancedb_adapter
                         get_lancedb_adapter().bulk_delete(lancedb_filters)
                     except Exception as e:
@@ -921,6 +1018,243 @@ async def export_documents(request: ExportRequest):
         )
 
 
+@search_router.post("/documents/export/stream", tags=["Documents"], dependencies=[Depends(require_admin)])
+async def export_documents_stream(request: ExportRequest):
+    """Stream documents matching filter criteria as an NDJSON backup.
+
+    Same filters and admin gate as /documents/export, but chunks are read
+    with keyset pagination and written as they are fetched, so memory use is
+    bounded by one page regardless of export size. See ``backup_stream`` for
+    the line format.
+    """
+    repo = DocumentRepository(get_db_manager())
+    try:
+        chunks = repo.iter_export_chunks(request.filters)
+        # Pull the first page eagerly so filter and connection errors still
+        # surface as an HTTP error instead of an in-band error footer.
+        first = await asyncio.to_thread(next, chunks, None)
+    except Exception as e:
+        logger.error(f"Failed to export documents: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to export documents: {str(e)}"
+        )
+
+    def _chunks():
+        if first is None:
+            return
+        yield first
+        yield from chunks
+
+    return StreamingResponse(
+        backup_stream.iter_export_ndjson(_chunks(), request.filters),
+        media_type=backup_stream.NDJSON_MEDIA_TYPE,
+    )
+
+
+async def _iter_backup_records(request: Request):
+    """Yield parsed NDJSON records from a streamed request body."""
+    buffer = bytearray()
+    async for piece in request.stream():
+        # Only the new bytes can hold a newline; the carried tail has none.
+        search_from = len(buffer)
+        buffer += piece
+        start = 0
+        while True:
+            newline = buffer.find(b"\n", search_from)
+            if newline < 0:
+                break
+            record = backup_stream.parse_line(buffer[start:newline])
+            start = search_from = newline + 1
+            if record is not None:
+                yield record
+        del buffer[:start]
+        if len(buffer) > backup_stream.MAX_LINE_BYTES:
+            raise backup_stream.BackupStreamError("Backup stream line exceeds maximum size")
+    record = backup_stream.parse_line(buffer)
+    if record is not None:
+        yield record
+
+
+@search_router.post("/documents/restore/stream", tags=["Documents"], dependencies=[Depends(require_admin)])
+async def restore_documents_stream(
+    request: Request,
+    batch_size: int = Query(RESTORE_STREAM_BATCH_SIZE, ge=1, le=5000),
+):
+    """Restore documents from an NDJSON backup produced by /documents/export/stream.
+
+    The body is consumed incrementally and written to PostgreSQL through
+    COPY in batches of ``batch_size`` chunks, each committed on its own.
+    LanceDB is upserted one document at a time once its chunks are committed,
+    which relies on the export's ``(document_id, chunk_index)`` ordering.
+
+    Restore is per document: documents that already exist are left untouched
+    (neither store is written for them). A stream without a ``complete``
+    footer is rejected with 400. On any failure only the documents this
+    request created are deleted from both stores, so pre-existing documents
+    survive a failed restore.
+    """
+    from config import get_config
+    from retriever_v2 import invalidate_lancedb_cache
+    repo = DocumentRepository(get_db_manager())
+    config = get_config()
+    lancedb_enabled = bool(getattr(config.retrieval, "lancedb_enabled", False))
+    adapter = None
+    if lancedb_enabled:
+        from retriever_v2 import begin_lancedb_mutation
+        from services import get_lancedb_adapter
+        adapter = get_lancedb_adapter()
+        begin_lancedb_mutation()
+
+    seen_doc_ids: List[str] = []
+    seen_set = set()
+    created_ids: set = set()
+    batch: List[Dict[str, Any]] = []
+    # Documents whose chunks are all read, waiting for their batch to commit
+    # so we know whether this request created them.
+    pending_docs: List[Dict[str, Any]] = []
+    current_doc: Optional[Dict[str, Any]] = None
+    chunks_read = 0
+    chunks_restored = 0
+    header_seen = False
+    footer: Optional[Dict[str, Any]] = None
+
+    async def _flush_batch():
+        nonlocal batch, pending_docs, chunks_restored
+        if batch:
+            chunks_restored += await asyncio.to_thread(
+                repo.restore_chunk_batch, batch, created_ids
+            )
+            batch = []
+        for doc in pending_docs:
+            if doc["document_id"] not in created_ids:
+                continue
+            c_list = sorted(doc["chunks"], key=lambda x: x[0])
+            await asyncio.to_thread(
+                adapter.upsert_document,
+                document_id=doc["document_id"],
+                source_uri=doc["source_uri"],
+                chunks=c_list,
+                aggregated_text="\n\n".join(x[1] for x in c_list),
+                doc_metadata=doc["metadata"],
+            )
+        pending_docs = []
+
+    def _flush_document():
+        nonlocal current_doc
+        if adapter is not None and current_doc is not None:
+            pending_docs.append(current_doc)
+        current_doc = None
+
+    try:
+        try:
+            async for record in _iter_backup_records(request):
+                record_type = record.get("type")
+                if not header_seen:
+                    backup_stream.validate_header(record)
+                    header_seen = True
+                    continue
+                if footer is not None:
+                    raise backup_stream.BackupStreamError("Records found after backup footer")
+                if record_type == backup_stream.RECORD_FOOTER:
+                    footer = record
+                    continue
+                if record_type != backup_stream.RECORD_CHUNK:
+                    raise backup_stream.BackupStreamError(f"Unknown record type: {record_type}")
+
+                chunk = backup_stream.decode_chunk(record)
+                doc_id = chunk["document_id"]
+                if current_doc is None or current_doc["document_id"] != doc_id:
+                    if doc_id in seen_set:
+                        raise backup_stream.BackupStreamError(
+                            f"Chunks for document {doc_id} are not contiguous; "
+                            "backup stream must be ordered by document_id"
+                        )
+                    _flush_document()
+                    seen_set.add(doc_id)
+                    seen_doc_ids.append(doc_id)
+                    current_doc = {
+                        "document_id": doc_id,
+                        "source_uri": chunk["source_uri"],
+                        "metadata": chunk["metadata"],
+                        "chunks": [],
+                    }
+                if adapter is not None:
+                    current_doc["chunks"].append((
+                        chunk["chunk_index"],
+                        chunk["text_content"],
+                        chunk["embedding"],
+                        chunk["metadata"],
+                    ))
+
+                batch.append(chunk)
+                chunks_read += 1
+                if len(batch) >= batch_size:
+                    await _flush_batch()
+
+            if not header_seen:
+                raise backup_stream.BackupStreamError("Backup stream is empty")
+            if footer is None:
+                raise backup_stream.BackupStreamError(
+                    "Backup stream ended without a footer; the backup is truncated"
+                )
+            if footer.get("status") != backup_stream.STATUS_COMPLETE:
+                raise backup_stream.BackupStreamError(
+                    f"Backup footer reports status {footer.get('status')!r}: "
+                    f"{footer.get('error') or 'the export did not complete'}"
+                )
+            _flush_document()
+            await _flush_batch()
+            if adapter is not None and created_ids:
+                # Mirror the Postgres owner/visibility onto the new rows.
+                from document_visibility import sync_lancedb_access
+                await asyncio.to_thread(
+                    sync_lancedb_access, [d for d in seen_doc_ids if d in created_ids]
+                )
+            invalidate_lancedb_cache()
+        except Exception as e:
+            logger.error(
+                f"Streaming restore failed after {chunks_read} chunks: {e}. Rolling back restored documents...",
+                exc_info=True,
+            )
+            try:
+                for doc_id in seen_doc_ids:
+                    if doc_id not in created_ids:
+                        continue
+                    await asyncio.to_thread(repo.delete_document, doc_id)
+                    if adapter is not None:
+                        await asyncio.to_thread(adapter.delete_document, doc_id)
+            except Exception as rollback_err:
+                logger.critical(f"Streaming restore rollback failed: {rollback_err}", exc_info=True)
+            invalidate_lancedb_cache()
+            raise
+        finally:
+            if lancedb_enabled:
+                from retriever_v2 import end_lancedb_mutation
+                end_lancedb_mutation()
+    except backup_stream.BackupStreamError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid backup stream: {str(e)}"
+        )
+    except Exception as e:
+        logger.error(f"Failed to restore documents: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to restore documents: {str(e)}"
+        )
+
+    return {
+        "status": "success",
+        "chunks_read": chunks_read,
+        "chunks_restored": chunks_restored,
+        "document_count": len(seen_doc_ids),
+        "documents_created": len(created_ids),
+        "documents_skipped": len(seen_doc_ids) - len(created_ids),
+        "complete": True,
+    }
+
+
 @search_router.post("/documents/restore", tags=["Documents"], dependencies=[Depends(require_admin)])
 async def restore_documents(request: RestoreRequest):
     """Restore documents from a backup.
@@ -982,6 +1316,10 @@ async def restore_documents(request: RestoreRequest):
                         doc_metadata=docs_meta[doc_id]
                     )
 
+                # Existing documents keep their Postgres owner/visibility.
+                from document_visibility import sync_lancedb_access
+                sync_lancedb_access(list(docs_chunks))
+
             # Invalidate readiness cache on successful restore
             from retriever_v2 import invalidate_lancedb_cache
             invalidate_lancedb_cache()
@@ -52,6 +52,10 @@ def _get_system_metrics() -> dict:
         except Exception:
             pass
             
+    from write_behind import get_active_write_behind
+    buffer = get_active_write_behind()
+    if buffer is not None:
+        metrics["write_behind"] = buffer.stats()
     return metrics
 
 from version import __version__
@@ -416,15 +416,19 @@ def expire_user_sessions(user_id: str) -> int:
 
 
 def cleanup_expired_sessions() -> int:
-    """Remove expired sessions from the database. Returns count deleted."""
+    """Remove expired sessions from the database. Returns count deleted.
+
+    Deletes in committed batches (see ``batched_delete``).
+    """
+    from batched_delete import delete_in_batches
+
     try:
-        with _get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "DELETE FROM saml_sessions WHERE expires_at < now() OR is_active = false"
-            )
-            conn.commit()
-            return cursor.rowcount
+        return delete_in_batches(
+            "saml_sessions",
+            "saml_sessions",
+            "expires_at < now() OR is_active = false",
+            connection_factory=_get_db_connection,
+        )["deleted"]
     except Exception as e:
         logger.error("Failed to cleanup expired sessions: %s", e)
         return 0
@@ -0,0 +1,469 @@
+"""
+Stat-based file manifest for incremental watched-folder scans.
+
+A scan used to hand every file under a watched root to the indexer, which
+read, hashed and parsed it just to find out nothing had changed. The
+``scan_manifest`` table (migration 030) remembers, per root and relative
+path, the size, mtime_ns and inode a file had when it was last indexed,
+its content hash and the document it became. A scan now:
+
+1. walks the root with ``os.scandir`` and only stats files (``walk_root``);
+2. compares the stats with the manifest (``plan_scan``): files whose size,
+   mtime and inode all match are unchanged and never opened; only files
+   whose stat changed are hashed, and a matching hash just refreshes the
+   stored stat;
+3. hands new, modified and reappeared files to the indexer, and reports
+   manifest entries that vanished so they can be quarantined without
+   re-querying ``document_chunks``;
+4. writes the outcome back in one transaction (``apply_scan``).
+
+A watch-mode batch (folder_watcher.py) runs the same plan over just the
+paths it heard about: ``stat_paths`` stats them and ``load_manifest``
+loads only their rows, so files outside the batch are neither statted
+nor reported as deleted.
+
+Files the indexer failed on keep their previous manifest row (or none),
+so the next scan retries them.
+
+Long scans checkpoint: rows for files indexed so far are written every
+SCAN_CHECKPOINT_FILES files or SCAN_CHECKPOINT_SECONDS
+(``record_indexed``), so a scan that dies is resumed by the next one
+without re-indexing them.
+
+Environment:
+    SCAN_MANIFEST_BATCH_SIZE  (default 1000; rows per manifest upsert page)
+    SCAN_CHECKPOINT_FILES     (default 200)
+    SCAN_CHECKPOINT_SECONDS   (default 60)
+"""
+
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCAN_MANIFEST_BATCH_SIZE_ENV = "SCAN_MANIFEST_BATCH_SIZE"
+DEFAULT_BATCH_SIZE = 1000
+
+CHECKPOINT_FILES_ENV = "SCAN_CHECKPOINT_FILES"
+CHECKPOINT_SECONDS_ENV = "SCAN_CHECKPOINT_SECONDS"
+DEFAULT_CHECKPOINT_FILES = 200
+DEFAULT_CHECKPOINT_SECONDS = 60
+
+# A running scan that has not checkpointed for this many intervals is
+# presumed dead when another scan of the same folder starts.
+STALE_CHECKPOINT_INTERVALS = 10
+
+
+@dataclass(frozen=True)
+class FileStat:
+    """What a scan knows about a file without opening it."""
+
+    path: str
+    size: int
+    mtime_ns: int
+    inode: int
+
+
+@dataclass
+class ScanPlan:
+    """Classification of one walk against the manifest.
+
+    ``to_index`` holds (rel_path, FileStat, content_hash, kind) for the
+    files the indexer must see; kind is "new", "modified" or "reappeared".
+    ``content_hash`` is None when hashing failed and the indexer should
+    hash the file itself.
+    """
+
+    unchanged: List[str] = field(default_factory=list)
+    touched: Dict[str, Tuple[FileStat, str]] = field(default_factory=dict)
+    to_index: List[Tuple[str, FileStat, Optional[str], str]] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    restored: List[str] = field(default_factory=list)
+    hashed: int = 0
+
+    def counts(self) -> Dict[str, int]:
+        kinds = [kind for _rel, _st, _h, kind in self.to_index]
+        return {
+            "unchanged": len(self.unchanged) + len(self.touched),
+            "new": kinds.count("new"),
+            "modified": kinds.count("modified"),
+            "reappeared": kinds.count("reappeared") + len(self.restored),
+            "deleted": len(self.deleted),
+            "hashed": self.hashed,
+        }
+
+
+def _get_db_connection():
+    """Get a pooled database connection as a context manager.
+
+    Always use with ``with _get_db_connection() as conn:`` to ensure
+    the connection is returned to the pool after use.
+    """
+    from database import get_db_manager
+    return get_db_manager().get_connection()
+
+
+def get_batch_size() -> int:
+    """Return the manifest upsert page size from env, default 1000."""
+    try:
+        return max(1, int(os.environ.get(SCAN_MANIFEST_BATCH_SIZE_ENV, DEFAULT_BATCH_SIZE)))
+    except (ValueError, TypeError):
+        return DEFAULT_BATCH_SIZE
+
+
+def get_checkpoint_files() -> int:
+    """Files indexed between scan checkpoints, default 200."""
+    try:
+        return max(1, int(os.environ.get(CHECKPOINT_FILES_ENV, DEFAULT_CHECKPOINT_FILES)))
+    except (ValueError, TypeError):
+        return DEFAULT_CHECKPOINT_FILES
+
+
+def get_checkpoint_seconds() -> int:
+    """Longest time between scan checkpoints, default 60s."""
+    try:
+        return max(1, int(os.environ.get(CHECKPOINT_SECONDS_ENV, DEFAULT_CHECKPOINT_SECONDS)))
+    except (ValueError, TypeError):
+        return DEFAULT_CHECKPOINT_SECONDS
+
+
+def get_stale_run_seconds() -> int:
+    """Age of the last checkpoint after which a running scan is presumed dead."""
+    return STALE_CHECKPOINT_INTERVALS * get_checkpoint_seconds()
+
+
+def get_root_key(folder_path: str, root_id: Optional[str] = None) -> str:
+    """Key manifest rows by root_id when known, else by the folder path."""
+    if root_id:
+        return root_id
+    from watched_folders import normalize_folder_path
+    return normalize_folder_path(folder_path)
+
+
+def source_path(folder_path: str, rel_path: str) -> str:
+    """The path the indexer records as source_uri for a manifest entry."""
+    return os.path.join(folder_path, *rel_path.split("/"))
+
+
+def walk_root(folder_path: str, prefix: str = "") -> Dict[str, FileStat]:
+    """Stat every file under ``folder_path`` without opening any of them.
+
+    Directory symlinks are not followed (as with ``os.walk``); unreadable
+    directories are skipped.
+
+    Args:
+        folder_path: Directory to walk.
+        prefix: Prepended to every relative path (for walking a
+            subdirectory of a root; ends with "/").
+
+    Returns:
+        Mapping of relative path (forward slashes) to FileStat.
+    """
+    files: Dict[str, FileStat] = {}
+    stack = [(folder_path, prefix)]
+    while stack:
+        directory, prefix = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    rel_path = prefix + entry.name
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append((entry.path, rel_path + "/"))
+                        elif entry.is_file():
+                            st = entry.stat()
+                            files[rel_path] = FileStat(
+                                entry.path, st.st_size, st.st_mtime_ns, st.st_ino,
+                            )
+                    except OSError as e:
+                        logger.debug("Skipping %s: %s", entry.path, e)
+        except OSError as e:
+            logger.warning("Cannot scan directory %s: %s", directory, e)
+    return files
+
+
+def stat_paths(folder_path: str, rel_paths: Iterable[str]) -> Dict[str, FileStat]:
+    """Stat just ``rel_paths`` under a root, like a walk restricted to them.
+
+    A path ending in "/" (or naming a directory) stands for its whole
+    subtree, which is walked. Paths that no longer exist are omitted, so
+    ``plan_scan`` reports their manifest rows as deleted.
+    """
+    files: Dict[str, FileStat] = {}
+    for rel_path in sorted(set(rel_paths)):
+        path = source_path(folder_path, rel_path.rstrip("/"))
+        try:
+            if os.path.isdir(path) and not os.path.islink(path):
+                files.update(walk_root(path, rel_path.rstrip("/") + "/"))
+            elif not rel_path.endswith("/") and os.path.isfile(path):
+                st = os.stat(path)
+                files[rel_path] = FileStat(path, st.st_size, st.st_mtime_ns, st.st_ino)
+        except OSError as e:
+            logger.debug("Skipping %s: %s", path, e)
+    return files
+
+
+def _like_prefix(prefix: str) -> str:
+    escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "%"
+
+
+def has_manifest(root_key: str) -> Optional[bool]:
+    """Whether a root has any manifest rows (None if it could not be read)."""
+    try:
+        with _get_db_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "SELECT EXISTS (SELECT 1 FROM scan_manifest WHERE root_key = %s)",
+                (root_key,),
+            )
+            return bool(cur.fetchone()[0])
+    except Exception as e:
+        logger.warning("Failed to check scan manifest for %s: %s", root_key, e)
+        return None
+
+
+def load_manifest(
+    root_key: str, rel_paths: Optional[Iterable[str]] = None,
+) -> Optional[Dict[str, dict]]:
+    """Load the manifest of a root, keyed by relative path.
+
+    Args:
+        root_key: Manifest root key.
+        rel_paths: Only load these paths; one ending in "/" loads every row
+            under that directory instead. None loads the whole root.
+
+    Returns:
+        The rows (size, mtime_ns, inode, content_hash, document_id,
+        missing) or None if the manifest could not be read, in which case
+        the caller falls back to a full scan.
+    """
+    query = (
+        "SELECT rel_path, size, mtime_ns, inode, content_hash, document_id, "
+        "missing_since IS NOT NULL FROM scan_manifest WHERE root_key = %s"
+    )
+    params: tuple = (root_key,)
+    if rel_paths is not None:
+        rel_paths = set(rel_paths)
+        files = sorted(p for p in rel_paths if not p.endswith("/"))
+        prefixes = sorted(_like_prefix(p) for p in rel_paths if p.endswith("/"))
+        query += " AND (rel_path = ANY(%s) OR rel_path LIKE ANY(%s))"
+        params = (root_key, files, prefixes)
+    try:
+        with _get_db_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(query, params)
+            rows = cur.fetchall()
+    except Exception as e:
+        logger.warning("Failed to load scan manifest for %s: %s", root_key, e)
+        return None
+    return {
+        row[0]: {
+            "size": row[1],
+            "mtime_ns": row[2],
+            "inode": row[3],
+            "content_hash": row[4],
+            "document_id": row[5],
+            "missing": row[6],
+        }
+        for row in rows
+    }
+
+
+def existing_document_ids(document_ids: Iterable[str]) -> Optional[set]:
+    """Return which of ``document_ids`` are still indexed (None on failure)."""
+    ids = sorted({d for d in document_ids if d})
+    if not ids:
+        return set()
+    try:
+        with _get_db_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "SELECT document_id FROM documents WHERE document_id = ANY(%s)",
+                (ids,),
+            )
+            return {row[0] for row in cur.fetchall()}
+    except Exception as e:
+        logger.warning("Failed to check manifest documents: %s", e)
+        return None
+
+
+def _default_hasher(path: str) -> str:
+    from pathlib import Path
+    from document_processor import calculate_file_hash
+    return calculate_file_hash(Path(path))
+
+
+def plan_scan(
+    current: Dict[str, FileStat],
+    manifest: Dict[str, dict],
+    live_document_ids: Optional[set] = None,
+    hasher: Optional[Callable[[str], str]] = None,
+) -> ScanPlan:
+    """Classify a walk against the manifest, hashing only changed files.
+
+    Args:
+        current: Result of ``walk_root``.
+        manifest: Result of ``load_manifest``.
+        live_document_ids: Document ids still indexed; entries whose
+            document has been deleted or purged are indexed again. None
+            skips the check.
+        hasher: Content hash function (defaults to the indexer's xxh64).
+    """
+    hasher = hasher or _default_hasher
+    plan = ScanPlan()
+
+    def content_hash(st: FileStat) -> Optional[str]:
+        plan.hashed += 1
+        try:
+            return hasher(st.path)
+        except OSError as e:
+            logger.debug("Cannot hash %s: %s", st.path, e)
+            return None
+
+    for rel_path in sorted(current):
+        st = current[rel_path]
+        entry = manifest.get(rel_path)
+        if entry is None or (
+            live_document_ids is not None and entry["document_id"] not in live_document_ids
+        ):
+            plan.to_index.append((rel_path, st, content_hash(st), "new"))
+            continue
+
+        same_stat = (
+            entry["size"] == st.size
+            and entry["mtime_ns"] == st.mtime_ns
+            and (entry["inode"] in (None, 0) or st.inode in (0, entry["inode"]))
+        )
+        if same_stat:
+            digest = entry["content_hash"]
+        else:
+            digest = content_hash(st)
+
+        if digest is not None and digest == entry["content_hash"]:
+            if entry["missing"]:
+                plan.restored.append(rel_path)
+                if not same_stat:
+                    plan.touched[rel_path] = (st, digest)
+            elif same_stat:
+                plan.unchanged.append(rel_path)
+            else:
+                plan.touched[rel_path] = (st, digest)
+        else:
+            kind = "reappeared" if entry["missing"] else "modified"
+            plan.to_index.append((rel_path, st, digest, kind))
+
+    plan.deleted = sorted(
+        rel_path for rel_path, entry in manifest.items()
+        if rel_path not in current and not entry["missing"]
+    )
+    return plan
+
+
+def apply_scan(
+    root_key: str,
+    run_id: Optional[str],
+    plan: ScanPlan,
+    indexed: Dict[str, Tuple[FileStat, Optional[str], Optional[str]]],
+    batch_size: Optional[int] = None,
+    seen: Optional[Iterable[str]] = None,
+) -> bool:
+    """Write a scan's outcome to the manifest in one transaction.
+
+    Args:
+        root_key: Manifest root key.
+        run_id: indexing_runs id stamped as last_seen_run.
+        plan: The scan plan.
+        indexed: rel_path -> (FileStat, content_hash, document_id) for the
+            files the indexer accepted (indexed or skipped as unchanged).
+            Planned files missing here failed and keep their old row.
+        batch_size: Rows per upsert page (SCAN_MANIFEST_BATCH_SIZE).
+        seen: For a scan of selected paths, the paths it saw; only these
+            are stamped with ``run_id``. None stamps every present row.
+
+    Returns:
+        True if the manifest was updated.
+    """
+    from psycopg2.extras import execute_values
+
+    batch_size = batch_size or get_batch_size()
+    rows = [
+        (root_key, rel_path, st.size, st.mtime_ns, st.inode or None, digest, document_id)
+        for rel_path, (st, digest, document_id) in indexed.items()
+    ]
+    rows += [
+        (root_key, rel_path, st.size, st.mtime_ns, st.inode or None, digest, None)
+        for rel_path, (st, digest) in plan.touched.items()
+        if rel_path not in indexed
+    ]
+    started = time.monotonic()
+    try:
+        with _get_db_connection() as conn:
+            cur = conn.cursor()
+            if plan.deleted:
+                cur.execute(
+                    "UPDATE scan_manifest SET missing_since = now(), updated_at = now() "
+                    "WHERE root_key = %s AND rel_path = ANY(%s) AND missing_since IS NULL",
+                    (root_key, plan.deleted),
+                )
+            if plan.restored:
+                cur.execute(
+                    "UPDATE scan_manifest SET missing_since = NULL, updated_at = now() "
+                    "WHERE root_key = %s AND rel_path = ANY(%s)",
+                    (root_key, plan.restored),
+                )
+            for i in range(0, len(rows), batch_size):
+                batch = rows[i:i + batch_size]
+                execute_values(
+                    cur,
+                    """
+                    INSERT INTO scan_manifest AS m
+                        (root_key, rel_path, size, mtime_ns, inode, content_hash, document_id)
+                    VALUES %s
+                    ON CONFLICT (root_key, rel_path) DO UPDATE SET
+                        size = EXCLUDED.size,
+                        mtime_ns = EXCLUDED.mtime_ns,
+                        inode = EXCLUDED.inode,
+                        content_hash = EXCLUDED.content_hash,
+                        document_id = COALESCE(EXCLUDED.document_id, m.document_id),
+                        missing_since = NULL,
+                        updated_at = now()
+                    """,
+                    batch,
+                    page_size=len(batch),
+                )
+            if run_id and seen is None:
+                cur.execute(
+                    "UPDATE scan_manifest SET last_seen_run = %s "
+                    "WHERE root_key = %s AND missing_since IS NULL",
+                    (run_id, root_key),
+                )
+            elif run_id:
+                cur.execute(
+                    "UPDATE scan_manifest SET last_seen_run = %s "
+                    "WHERE root_key = %s AND rel_path = ANY(%s) AND missing_since IS NULL",
+                    (run_id, root_key, sorted(seen)),
+                )
+            conn.commit()
+    except Exception as e:
+        logger.warning("Failed to update scan manifest for %s: %s", root_key, e)
+        return False
+    logger.debug("Scan manifest for %s: %d rows written in %.1f ms",
+                 root_key, len(rows), (time.monotonic() - started) * 1000)
+    return True
+
+
+def record_indexed(
+    root_key: str,
+    indexed: Dict[str, Tuple[FileStat, Optional[str], Optional[str]]],
+    batch_size: Optional[int] = None,
+) -> bool:
+    """Write manifest rows for files indexed so far (a scan checkpoint).
+
+    Only upserts; deletions and run stamps are left to ``apply_scan`` at
+    the end of the scan.
+    """
+    return apply_scan(root_key, None, ScanPlan(), indexed, batch_size)
@@ -0,0 +1,83 @@
+"""
+Micro-benchmark for the API rate limiters (rate_limit.py).
+
+Reports checks/sec for the in-process token bucket (single thread and
+contended) and, when the database is reachable, for the shared Postgres
+backend.
+
+Usage:
+    python scripts/benchmark_rate_limit.py [--checks 200000] [--keys 10000]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+# Add parent directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rate_limit import PostgresTokenBucketRateLimiter, TokenBucketRateLimiter
+
+
+def _run(limiter, checks, keys, threads=1):
+    per_thread = checks // threads
+
+    def worker(offset):
+        for i in range(per_thread):
+            limiter.check(f"bench:{(offset + i) % keys}")
+
+    pool = [threading.Thread(target=worker, args=(t * 7919,)) for t in range(threads)]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return per_thread * threads / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--checks", type=int, default=200000)
+    parser.add_argument("--keys", type=int, default=10000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--db-checks", type=int, default=2000)
+    args = parser.parse_args()
+
+    print("=== Rate limiter benchmark ===")
+    print(f"{args.checks} checks over {args.keys} keys")
+
+    memory = TokenBucketRateLimiter(60)
+    print(f"memory, 1 thread:   {_run(memory, args.checks, args.keys):>12,.0f} checks/sec")
+    memory = TokenBucketRateLimiter(60)
+    rate = _run(memory, args.checks, args.keys, threads=args.threads)
+    print(f"memory, {args.threads} threads:  {rate:>12,.0f} checks/sec")
+
+    try:
+        from database import get_db_manager
+        with get_db_manager().get_cursor() as cursor:
+            cursor.execute("SELECT 1 FROM rate_limit_buckets LIMIT 1")
+    except Exception as e:
+        print(f"postgres: skipped ({e})")
+        return
+    shared = PostgresTokenBucketRateLimiter(60, fallback=_RaisingFallback())
+    print(f"{args.db_checks} shared checks")
+    try:
+        rate = _run(shared, args.db_checks, args.keys, threads=args.threads)
+        print(f"postgres, {args.threads} threads: {rate:>11,.0f} checks/sec")
+    finally:
+        with get_db_manager().get_cursor() as cursor:
+            cursor.execute("DELETE FROM rate_limit_buckets WHERE bucket_key LIKE 'bench:%%'")
+
+
+class _RaisingFallback:
+    """Fail loudly instead of silently benchmarking the in-memory fallback."""
+
+    def check(self, key, cost=1):
+        raise RuntimeError("shared rate limiter unavailable; is migration 026 applied?")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Rebuild the metadata key/value catalog from the documents table.
+
+The catalog behind /metadata/keys and /metadata/values is maintained by
+triggers (migration 024). Run this after restoring a database dump taken
+without the triggers, or if the catalog is suspected to have drifted.
+"""
+
+import sys
+import os
+import argparse
+import logging
+
+# Add parent directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import get_db_manager, DocumentRepository
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("rebuild_metadata_catalog")
+
+
+def rebuild_metadata_catalog() -> int:
+    """Recompute metadata_catalog and return its row count."""
+    repo = DocumentRepository(get_db_manager())
+    logger.info("Rebuilding metadata catalog...")
+    rows = repo.rebuild_metadata_catalog()
+    logger.info(f"✓ Metadata catalog rebuilt ({rows} rows).")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the metadata key/value catalog")
+    parser.parse_args()
+
+    rebuild_metadata_catalog()
+
+
+if __name__ == "__main__":
+    main()
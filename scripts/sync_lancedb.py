@@ -63,7 +63,7 @@ def sync_postgres_to_lancedb(batch_size: int = 200, force: bool = False) -> None
         adapter._ensure_tables_exist()
 
     logger.info("Fetching unique document IDs from PostgreSQL...")
-    doc_ids_query = "SELECT DISTINCT document_id, source_uri FROM document_chunks"
+    doc_ids_query = "SELECT document_id, source_uri, owner_id, visibility FROM documents"
     
     try:
         with db_manager.get_cursor(dict_cursor=True) as cursor:
@@ -111,6 +111,9 @@ def sync_postgres_to_lancedb(batch_size: int = 200, force: bool = False) -> None
     for i in range(0, total_docs, batch_size):
         batch_docs = all_docs[i:i + batch_size]
         batch_ids = [doc["document_id"] for doc in batch_docs]
+        batch_access = {
+            doc["document_id"]: (doc["owner_id"], doc["visibility"]) for doc in batch_docs
+        }
         
         try:
             with db_manager.get_cursor(dict_cursor=True) as cursor:
@@ -156,7 +159,8 @@ def sync_postgres_to_lancedb(batch_size: int = 200, force: bool = False) -> None
                     source_uri,
                     lancedb_chunks,
                     aggregated_text,
-                    doc_metadata
+                    doc_metadata,
+                    *batch_access[doc_id],
                 ))
             
             if batch_tuples:
@@ -197,7 +201,9 @@ def sync_postgres_to_lancedb(batch_size: int = 200, force: bool = False) -> None
                         source_uri=source_uri,
                         chunks=lancedb_chunks,
                         aggregated_text=aggregated_text,
-                        doc_metadata=doc_metadata
+                        doc_metadata=doc_metadata,
+                        owner_id=batch_access[doc_id][0],
+                        visibility=batch_access[doc_id][1],
                     )
                     synced_docs += 1
                     synced_chunks += len(lancedb_chunks)
@@ -5,15 +5,55 @@ In-process background scheduler for server-scope watched folders.
 Uses a PostgreSQL advisory lock to guarantee singleton execution
 across multiple API replicas.
 
-Enabled by SERVER_SCHEDULER_ENABLED=true (default: disabled).
+Due roots are scanned concurrently, bounded by a global worker budget.
+Each root runs at most once at a time, and a root's failure or slow
+share does not hold up the others. Due roots queue oldest-scan-first.
+With more than one worker, roots whose last scan took longer than
+SERVER_SCHEDULER_LONG_SCAN_SECONDS may occupy at most all but one worker,
+so small roots are never stuck behind large ones. A scan that exceeds
+SERVER_SCHEDULER_SCAN_MAX_SECONDS stops after the file in progress and
+the run is recorded as partial. Files it did not reach are picked up by
+the next scan.
+
+Scans checkpoint their progress into the root's scan_checkpoint. A root
+whose checkpoint still says running when the scheduler loads it (the
+process died or shut down mid-scan) is due at once, and the new scan
+resumes where the old one stopped (see watched_folders.scan_folder).
+
+Schedules are real cron expressions (see cron_schedule.py, shared with the
+desktop scheduler). Each root's next fire time is kept in a priority
+queue and the loop sleeps until the earliest one. A root is rescheduled
+after each of its scans, and schedule edits arrive as
+``watched_folders_changed`` notifications (migration 031). The full list
+of roots is only reloaded at start, after the listener (re)connects, and
+every SERVER_SCHEDULER_RESYNC_SECONDS as a safety net. While the listener
+is disconnected, the scheduler falls back to reloading every
+POLL_INTERVAL.
+
+With SERVER_SCHEDULER_WATCH on, scheduled roots are also watched for
+changes (folder_watcher.py) and changed files are indexed within seconds
+as small "watch" runs; the cron scans stay as the reconciling pass.
+
+Environment:
+    SERVER_SCHEDULER_ENABLED              (default false)
+    SERVER_SCHEDULER_MAX_CONCURRENT_SCANS (default 2; global worker budget)
+    SERVER_SCHEDULER_SCAN_MAX_SECONDS     (default 14400; 0 = unbounded)
+    SERVER_SCHEDULER_LONG_SCAN_SECONDS    (default 600)
+    SERVER_SCHEDULER_RESYNC_SECONDS       (default 3600)
+    SERVER_SCHEDULER_WATCH                (default false; see folder_watcher.py)
 """
 
 import asyncio
+import heapq
 import logging
 import os
+import select
+import threading
 import time
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from cron_schedule import next_due_time
 
 logger = logging.getLogger(__name__)
 
@@ -23,9 +63,15 @@ SERVER_SCHEDULER_LOCK_ID = 2050923308
 # Environment variable to enable the server scheduler
 SERVER_SCHEDULER_ENABLED_ENV = "SERVER_SCHEDULER_ENABLED"
 
-# Poll interval in seconds
+# Reload interval in seconds while schedule-change notifications are
+# unavailable
 POLL_INTERVAL = 60
 
+# Channel the watched_folders triggers NOTIFY (migration 031)
+FOLDER_CHANGE_CHANNEL = "watched_folders_changed"
+RESYNC_SECONDS_ENV = "SERVER_SCHEDULER_RESYNC_SECONDS"
+DEFAULT_RESYNC_SECONDS = 3600
+
 # Maximum consecutive failures before backoff (skip root for 1 hour)
 MAX_FAILURE_STREAK = 5
 FAILURE_BACKOFF_SECONDS = 3600  # 1 hour
@@ -33,6 +79,144 @@ FAILURE_BACKOFF_SECONDS = 3600  # 1 hour
 # Quarantine purge interval (once per 24h)
 PURGE_INTERVAL_SECONDS = 86400
 
+# Concurrent scanning
+MAX_CONCURRENT_SCANS_ENV = "SERVER_SCHEDULER_MAX_CONCURRENT_SCANS"
+DEFAULT_MAX_CONCURRENT_SCANS = 2
+SCAN_MAX_SECONDS_ENV = "SERVER_SCHEDULER_SCAN_MAX_SECONDS"
+DEFAULT_SCAN_MAX_SECONDS = 4 * 3600
+LONG_SCAN_SECONDS_ENV = "SERVER_SCHEDULER_LONG_SCAN_SECONDS"
+DEFAULT_LONG_SCAN_SECONDS = 600
+
+# How long stop() waits for running scans to wind down before releasing
+# the lease
+SHUTDOWN_GRACE_SECONDS = 30
+
+
+def _int_env(name: str, default: int) -> int:
+    try:
+        value = int(os.environ.get(name, str(default)))
+        return value if value >= 0 else default
+    except (TypeError, ValueError):
+        return default
+
+
+def get_max_concurrent_scans() -> int:
+    """Global scan worker budget from env, default 2."""
+    return max(1, _int_env(MAX_CONCURRENT_SCANS_ENV, DEFAULT_MAX_CONCURRENT_SCANS))
+
+
+def get_scan_max_seconds() -> int:
+    """Per-root scan runtime limit from env (0 = unbounded), default 4h."""
+    return _int_env(SCAN_MAX_SECONDS_ENV, DEFAULT_SCAN_MAX_SECONDS)
+
+
+def get_long_scan_seconds() -> int:
+    """Scan duration above which a root counts as large, default 600s."""
+    return _int_env(LONG_SCAN_SECONDS_ENV, DEFAULT_LONG_SCAN_SECONDS)
+
+
+def get_resync_seconds() -> int:
+    """Safety-net interval for reloading every root, default 1h."""
+    return max(POLL_INTERVAL, _int_env(RESYNC_SECONDS_ENV, DEFAULT_RESYNC_SECONDS))
+
+
+def _to_timestamp(value: Any) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        if isinstance(value, str):
+            return datetime.fromisoformat(value).timestamp()
+        return value.timestamp()
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+class FolderChangeListener:
+    """Background thread that LISTENs for watched-folder schedule changes.
+
+    Uses a dedicated connection outside the pool. Each batch of changed
+    folder ids is handed to ``on_change``; ``on_connect`` runs after every
+    (re)connect, since changes made while disconnected were not heard.
+    """
+
+    def __init__(
+        self,
+        on_change: Callable[[Set[str]], None],
+        on_connect: Callable[[], None],
+        connect: Optional[Callable[[], Any]] = None,
+        poll_interval: float = 5.0,
+        retry_interval: float = 5.0,
+    ):
+        self._on_change = on_change
+        self._on_connect = on_connect
+        self._connect = connect or _default_connect
+        self.poll_interval = poll_interval
+        self.retry_interval = retry_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._conn = None
+
+    @property
+    def connected(self) -> bool:
+        return self._conn is not None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="folder-change-listener", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self._listen()
+            except Exception as e:
+                logger.warning("Watched-folder change listener disconnected: %s", e)
+            finally:
+                self._close()
+            self._stop.wait(self.retry_interval)
+
+    def _listen(self) -> None:
+        conn = self._connect()
+        self._conn = conn
+        conn.autocommit = True
+        cursor = conn.cursor()
+        cursor.execute(f"LISTEN {FOLDER_CHANGE_CHANNEL}")
+        self._on_connect()
+        logger.info("Server scheduler listening on %s", FOLDER_CHANGE_CHANNEL)
+
+        while not self._stop.is_set():
+            if select.select([conn], [], [], self.poll_interval) == ([], [], []):
+                continue
+            conn.poll()
+            folder_ids = set()
+            while conn.notifies:
+                folder_ids.add(conn.notifies.pop(0).payload)
+            if folder_ids:
+                self._on_change(folder_ids)
+
+    def _close(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+def _default_connect():
+    from database import get_db_manager
+    return get_db_manager().connect_dedicated()
+
 
 class ServerScheduler:
     """In-process scheduler for server-scope watched folders.
@@ -40,16 +224,42 @@ class ServerScheduler:
     Runs as an asyncio background task within the FastAPI process.
     Uses pg_try_advisory_lock for singleton guarantee.
     Wraps synchronous scan_folder() in asyncio.to_thread() to avoid
-    blocking the event loop.
+    blocking the event loop; up to ``max_concurrent_scans`` roots are
+    scanned at once, each in its own task.
     """
 
     def __init__(self):
         self._task: Optional[asyncio.Task] = None
         self._running = False
+        self._stopping = False
         self._lease_held = False
         self._last_poll_at: Optional[str] = None
         self._last_purge_at: float = 0.0
-        self._active_scans: int = 0
+        self._max_concurrent_scans = get_max_concurrent_scans()
+        self._slots = asyncio.Semaphore(self._max_concurrent_scans)
+        self._wakeup = asyncio.Event()
+        # folder_id -> state of the running scan (started_at, progress, ...)
+        self._scans: Dict[str, Dict[str, Any]] = {}
+        self._scan_tasks: Dict[str, asyncio.Task] = {}
+        # Due roots waiting for a worker, in dispatch order
+        self._queue: List[Dict[str, Any]] = []
+        # folder_id -> summary of the last finished scan
+        self._history: Dict[str, Dict[str, Any]] = {}
+        # Schedule: (next fire epoch, folder_id) heap with lazy deletion;
+        # _due_at holds each scheduled root's current entry.
+        self._heap: List[Tuple[float, str]] = []
+        self._due_at: Dict[str, float] = {}
+        self._folders: Dict[str, Dict[str, Any]] = {}
+        self._synced_at: Optional[float] = None
+        self._needs_sync = False
+        self._changed: Set[str] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._listener: Optional[FolderChangeListener] = None
+        self._watcher = None  # folder_watcher.FolderWatcher in watch mode
+
+    @property
+    def _active_scans(self) -> int:
+        return len(self._scans)
 
     @staticmethod
     def is_enabled() -> bool:
@@ -63,12 +273,28 @@ class ServerScheduler:
             logger.warning("Server scheduler already running")
             return
         self._running = True
+        self._loop = asyncio.get_running_loop()
+        self._listener = FolderChangeListener(
+            on_change=self._on_folder_change_threadsafe,
+            on_connect=self._on_listener_connect_threadsafe,
+        )
+        self._listener.start()
+        import folder_watcher
+        if folder_watcher.is_enabled():
+            watcher = folder_watcher.FolderWatcher(on_batch=self._wake_threadsafe)
+            if await asyncio.to_thread(watcher.start):
+                self._watcher = watcher
         self._task = asyncio.create_task(self._scheduler_loop())
         logger.info("Server scheduler started")
 
     async def stop(self) -> None:
-        """Stop the scheduler and release the advisory lock."""
+        """Stop the scheduler and release the advisory lock.
+
+        Running scans are asked to stop after their current file and given
+        SHUTDOWN_GRACE_SECONDS to finish before the lease is released.
+        """
         self._running = False
+        self._stopping = True
         if self._task:
             self._task.cancel()
             try:
@@ -76,19 +302,74 @@ class ServerScheduler:
             except asyncio.CancelledError:
                 pass
             self._task = None
+        if self._listener:
+            await asyncio.to_thread(self._listener.stop)
+            self._listener = None
+        if self._watcher:
+            await asyncio.to_thread(self._watcher.stop)
+            self._watcher = None
+        if self._scan_tasks:
+            await asyncio.wait(list(self._scan_tasks.values()), timeout=SHUTDOWN_GRACE_SECONDS)
+        self._queue = []
+        self._stopping = False
         if self._lease_held:
             await self._release_lease()
         logger.info("Server scheduler stopped")
 
     def get_status(self) -> dict:
         """Return current scheduler status for the admin API."""
+        now = time.time()
+        scans = []
+        for folder_id, scan in self._scans.items():
+            elapsed = now - scan["started_ts"]
+            scans.append({
+                "folder_id": folder_id,
+                "root_id": scan["root_id"],
+                "folder_path": scan["folder_path"],
+                "started_at": scan["started_at"],
+                "elapsed_seconds": round(elapsed, 1),
+                "files_done": scan["files_done"],
+                "files_total": scan["files_total"],
+                "files_per_second": round(scan["files_done"] / elapsed, 2) if elapsed > 0 else 0.0,
+                "large_root": scan["large_root"],
+                "kind": scan.get("kind", "scheduled"),
+            })
         return {
             "enabled": self.is_enabled(),
             "running": self._running,
             "lease_held": self._lease_held,
             "last_poll_at": self._last_poll_at,
             "active_scans": self._active_scans,
+            "max_concurrent_scans": self._max_concurrent_scans,
+            "scan_max_seconds": get_scan_max_seconds(),
             "poll_interval_seconds": POLL_INTERVAL,
+            "listening": bool(self._listener and self._listener.connected),
+            "scheduled_roots": len(self._due_at),
+            "next_due": [
+                {
+                    "folder_id": folder_id,
+                    "root_id": self._folders.get(folder_id, {}).get("root_id"),
+                    "due_at": datetime.fromtimestamp(due, timezone.utc).isoformat(),
+                }
+                for due, folder_id in sorted((due, fid) for fid, due in self._due_at.items())[:20]
+            ],
+            "scans": scans,
+            "queue": [
+                {
+                    "position": position,
+                    "folder_id": folder["id"],
+                    "root_id": folder.get("root_id"),
+                    "folder_path": folder.get("folder_path"),
+                    "large_root": self._is_large_root(folder["id"]),
+                }
+                for position, folder in enumerate(self._queue, start=1)
+            ],
+            "recent": [dict(entry, folder_id=folder_id) for folder_id, entry in self._history.items()],
+            "watch": {
+                "enabled": self._watcher is not None,
+                "watched_roots": len(self._watcher.watched()) if self._watcher else 0,
+                "pending_paths": self._watcher.pending_paths() if self._watcher else 0,
+            },
         }
 
     async def _scheduler_loop(self) -> None:
@@ -120,6 +401,8 @@ class ServerScheduler:
                         await asyncio.sleep(POLL_INTERVAL)
                         continue
 
+                if self._sync_due():
+                    self._needs_sync = True
                 await self._run_pending_scans()
 
                 # Periodic quarantine purge (once per 24h)
@@ -131,7 +414,60 @@ class ServerScheduler:
             except Exception as e:
                 logger.error("Server scheduler loop error: %s", e)
 
-            await asyncio.sleep(POLL_INTERVAL)
+            # Sleep until the earliest root is due, a schedule changes, or
+            # a finished scan frees a worker for a queued root.
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._sleep_seconds())
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def _listening(self) -> bool:
+        return bool(self._listener and self._listener.connected)
+
+    def _sync_due(self) -> bool:
+        """Whether the full root list should be reloaded now."""
+        if self._synced_at is None:
+            return True
+        interval = get_resync_seconds() if self._listening() else POLL_INTERVAL
+        return time.monotonic() - self._synced_at >= interval
+
+    def _sleep_seconds(self) -> float:
+        """Seconds until the loop has something to do."""
+        timeout = float(get_resync_seconds() if self._listening() else POLL_INTERVAL)
+        next_due = self._peek_due()
+        if next_due is not None:
+            timeout = min(timeout, next_due - time.time())
+        purge_in = self._last_purge_at + PURGE_INTERVAL_SECONDS - time.time()
+        if purge_in > 0:
+            timeout = min(timeout, purge_in)
+        if self._watcher:
+            ready = self._watcher.next_ready(set(self._scans) | set(self._scan_tasks))
+            if ready is not None:
+                # Changes are batched for seconds, so a shorter floor applies
+                return max(0.1, min(timeout, ready - time.monotonic()))
+        return max(1.0, timeout)
+
+    # -- Schedule change notifications (called from the listener thread) --
+
+    def _on_folder_change_threadsafe(self, folder_ids: Set[str]) -> None:
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._on_folder_change, folder_ids)
+
+    def _wake_threadsafe(self) -> None:
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def _on_listener_connect_threadsafe(self) -> None:
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._on_folder_change, {""})
+
+    def _on_folder_change(self, folder_ids: Set[str]) -> None:
+        """Note changed roots (an empty id means reload all) and wake the loop."""
+        if "" in folder_ids:
+            self._needs_sync = True
+        self._changed.update(f for f in folder_ids if f)
+        self._wakeup.set()
 
     def _sync_try_acquire_lease(self) -> bool:
         """Synchronous part of lease acquisition."""
@@ -171,7 +507,55 @@ class ServerScheduler:
             logger.debug("Failed to release advisory lock: %s", e)
 
     async def _run_pending_scans(self) -> None:
-        """Find due server-scope roots and scan them."""
+        """Queue due server-scope roots and start scans for free workers.
+
+        Loads the schedule on first use (and when a reload is due), applies
+        pending change notifications, then moves roots whose fire time has
+        passed from the heap to the run queue. Scans run as background
+        tasks; this returns once they are started.
+        """
+        if self._synced_at is None or self._needs_sync:
+            await self._sync_folders()
+        if self._changed:
+            changed, self._changed = self._changed, set()
+            for folder_id in changed:
+                await self._refresh_folder(folder_id)
+
+        queued = {folder["id"] for folder in self._queue}
+        for folder in self._pop_due(time.time()):
+            if folder["id"] not in queued:
+                self._queue.append(folder)
+                queued.add(folder["id"])
+        if self._watcher:
+            await self._run_watch_batches(queued)
+        self._dispatch()
+
+    async def _run_watch_batches(self, queued: Set[str]) -> None:
+        """Keep the watched roots in step with the schedule and start ready batches.
+
+        Every scheduled root is watched. A ready batch starts right away
+        (taking a worker when one is free); a root whose batch asked for a
+        full scan joins the run queue instead.
+        """
+        desired = {folder_id: folder["folder_path"] for folder_id, folder in self._folders.items()}
+        if self._watcher.needs_sync(desired):
+            await asyncio.to_thread(self._watcher.sync, desired)
+
+        busy = set(self._scans) | set(self._scan_tasks)
+        for folder_id, paths, full_scan in self._watcher.pop_ready(time.monotonic(), busy):
+            folder = self._folders.get(folder_id)
+            if folder is None or folder_id in queued:
+                continue
+            if full_scan:
+                logger.info("Server scheduler: change burst under %s, queueing a full scan",
+                            folder["folder_path"])
+                self._queue.append(folder)
+                queued.add(folder_id)
+            elif paths and not self._stopping:
+                self._start_scan(folder, paths)
+
+    async def _sync_folders(self) -> None:
+        """Reload every enabled server-scope root and rebuild the schedule."""
         from watched_folders import list_folders
 
         # Offload list_folders to thread
@@ -180,144 +564,319 @@ class ServerScheduler:
             enabled_only=True,
             execution_scope="server",
         )
+        self._heap = []
+        self._due_at = {}
+        self._folders = {}
+        self._queue = []
+        if self._watcher:
+            self._watcher.clear_failures()
+        for folder in folders:
+            self._schedule(folder)
+        self._synced_at = time.monotonic()
+        self._needs_sync = False
 
-        now = time.time()
+    async def _refresh_folder(self, folder_id: str) -> None:
+        """Reload one root and reschedule it (or drop it if no longer scheduled)."""
+        from watched_folders import get_folder
 
-        for folder in folders:
-            if folder.get("paused"):
-                continue
+        try:
+            folder = await asyncio.to_thread(get_folder, folder_id)
+        except Exception as e:
+            logger.warning("Server scheduler: failed to reload root %s: %s", folder_id, e)
+            self._needs_sync = True
+            return
+        self._queue = [f for f in self._queue if f["id"] != folder_id]
+        if folder is None:
+            self._unschedule(folder_id)
+        else:
+            self._schedule(folder)
+
+    def _next_due_ts(self, folder: dict) -> Optional[float]:
+        """Epoch seconds at which a root is next due, or None if unscheduled.
+
+        Never-scanned roots, and roots whose last scan was interrupted
+        (its checkpoint still says running), are due immediately; roots in
+        failure backoff are held until the backoff expires.
+        """
+        if folder.get("paused") or not folder.get("enabled", True):
+            return None
+        if folder.get("execution_scope", "server") != "server":
+            return None
+        try:
+            due = next_due_time(folder.get("schedule_cron"), folder.get("last_scanned_at"))
+        except (ValueError, TypeError, OSError):
+            due = None  # Unparseable last scan: scan anyway
+        due_ts = due.timestamp() if due else 0.0
+        if (folder.get("scan_checkpoint") or {}).get("state") == "running":
+            due_ts = 0.0  # Resume the interrupted scan
+
+        # Hold roots in failure backoff
+        failures = folder.get("consecutive_failures", 0) or 0
+        if failures >= MAX_FAILURE_STREAK:
+            error_ts = _to_timestamp(folder.get("last_error_at"))
+            if error_ts is not None:
+                due_ts = max(due_ts, error_ts + FAILURE_BACKOFF_SECONDS)
+        return due_ts
+
+    def _schedule(self, folder: dict) -> None:
+        folder_id = folder["id"]
+        due = self._next_due_ts(folder)
+        if due is None:
+            self._unschedule(folder_id)
+            return
+        self._folders[folder_id] = folder
+        self._due_at[folder_id] = due
+        heapq.heappush(self._heap, (due, folder_id))
 
-            # Skip roots in failure backoff
-            failures = folder.get("consecutive_failures", 0)
-            if failures >= MAX_FAILURE_STREAK:
-                last_error = folder.get("last_error_at")
-                if last_error:
-                    try:
-                        if isinstance(last_error, str):
-                            error_ts = datetime.fromisoformat(
-                                last_error
-                            ).timestamp()
-                        else:
-                            error_ts = last_error.timestamp()
-                        if now - error_ts < FAILURE_BACKOFF_SECONDS:
-                            logger.debug(
-                                "Skipping root %s — in failure backoff "
-                                "(%d consecutive failures)",
-                                folder["id"], failures,
-                            )
-                            continue
-                    except (ValueError, OSError):
-                        pass
-
-            # Check if scan is due based on cron schedule
-            if not self._is_scan_due(folder):
-                continue
+    def _unschedule(self, folder_id: str) -> None:
+        self._folders.pop(folder_id, None)
+        self._due_at.pop(folder_id, None)
 
-            # Run the scan
-            await self._run_scan(folder)
+    def _peek_due(self) -> Optional[float]:
+        """Earliest scheduled fire time, dropping superseded heap entries."""
+        while self._heap and self._due_at.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
 
-    def _is_scan_due(self, folder: dict) -> bool:
-        """Check if a folder is due for scanning based on its cron schedule.
+    def _pop_due(self, now: float) -> List[dict]:
+        """Remove and return roots due at ``now``, earliest first.
 
-        Simple interval-based check: compare last_scanned_at against
-        the cron interval. For MVP, we parse common cron patterns.
+        Running roots are dropped here; they are rescheduled when their
+        scan finishes.
+        """
+        due = []
+        while True:
+            next_due = self._peek_due()
+            if next_due is None or next_due > now:
+                return due
+            _, folder_id = heapq.heappop(self._heap)
+            del self._due_at[folder_id]
+            if folder_id in self._scans or folder_id in self._scan_tasks:
+                continue  # Already scanning; never run a root twice at once
+            due.append(self._folders[folder_id])
+
+    def _is_large_root(self, folder_id: str) -> bool:
+        last = self._history.get(folder_id)
+        return bool(last) and last["duration_seconds"] >= get_long_scan_seconds()
+
+    def _dispatch(self) -> None:
+        """Start queued scans while workers are free.
+
+        With more than one worker, large roots may take at most all but
+        one of them, keeping a worker for small roots.
         """
-        last_scanned = folder.get("last_scanned_at")
-        if not last_scanned:
-            return True  # Never scanned
+        if self._stopping:
+            return
+        budget = self._max_concurrent_scans
+        large_limit = budget - 1 if budget > 1 else budget
+        remaining = []
+        for folder in self._queue:
+            busy = self._busy_roots()
+            if len(busy) >= budget:
+                remaining.append(folder)
+                continue
+            if self._is_large_root(folder["id"]) and sum(busy.values()) >= large_limit:
+                remaining.append(folder)
+                continue
+            self._start_scan(folder)
+        self._queue = remaining
 
-        try:
-            if isinstance(last_scanned, str):
-                last_ts = datetime.fromisoformat(last_scanned).timestamp()
-            else:
-                last_ts = last_scanned.timestamp()
+    def _busy_roots(self) -> Dict[str, bool]:
+        """Roots holding or about to take a worker, mapped to whether they are large."""
+        busy = {folder_id: self._is_large_root(folder_id) for folder_id in self._scan_tasks}
+        busy.update({folder_id: scan["large_root"] for folder_id, scan in self._scans.items()})
+        return busy
 
-            interval = self._cron_to_seconds(folder.get("schedule_cron", ""))
-            return time.time() - last_ts >= interval
-        except (ValueError, OSError):
-            return True  # On parse error, scan anyway
+    def _start_scan(self, folder: dict, paths: Optional[Set[str]] = None) -> None:
+        folder_id = folder["id"]
+        if paths is None:
+            task = asyncio.create_task(self._run_scan(folder))
+        else:
+            task = asyncio.create_task(self._run_watch_batch(folder, paths))
+        self._scan_tasks[folder_id] = task
 
-    @staticmethod
-    def _cron_to_seconds(cron: str) -> int:
-        """Convert common cron patterns to an interval in seconds.
+        def _done(t: asyncio.Task, folder_id: str = folder_id) -> None:
+            if self._scan_tasks.get(folder_id) is t:
+                del self._scan_tasks[folder_id]
+            self._wakeup.set()
 
-        Handles: '0 */N * * *' (every N hours), '*/N * * * *' (every N min).
-        Falls back to 6 hours for unrecognized patterns.
-        """
-        parts = cron.strip().split()
-        if len(parts) < 5:
-            return 6 * 3600  # Default 6 hours
+        task.add_done_callback(_done)
 
-        try:
-            # Every N hours: '0 */N * * *'
-            if parts[1].startswith("*/"):
-                hours = int(parts[1][2:])
-                return hours * 3600
-            # Every N minutes: '*/N * * * *'
-            if parts[0].startswith("*/"):
-                minutes = int(parts[0][2:])
-                return minutes * 60
-        except (ValueError, IndexError):
-            pass
-
-        return 6 * 3600  # Default fallback
+    def _is_scan_due(self, folder: dict) -> bool:
+        """Check if a folder is due for scanning based on its cron schedule."""
+        due = self._next_due_ts(folder)
+        return due is not None and due <= time.time()
 
     async def _run_scan(self, folder: dict) -> dict:
-        """Run a folder scan in a thread pool to avoid blocking the event loop."""
+        """Run a folder scan in a thread pool to avoid blocking the event loop.
+
+        Takes a worker from the global budget for the duration of the scan
+        and stops the scan once it exceeds the per-root runtime limit.
+        """
         from watched_folders import scan_folder, mark_scanned, update_scan_watermarks
 
         folder_id = folder["id"]
         folder_path = folder["folder_path"]
+        if folder_id in self._scans:
+            return {"status": "failed", "error": "Scan already running"}
+
+        started_ts = time.time()
+        scan = {
+            "root_id": folder.get("root_id"),
+            "folder_path": folder_path,
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "started_ts": started_ts,
+            "files_done": 0,
+            "files_total": None,
+            "large_root": self._is_large_root(folder_id),
+        }
+        self._scans[folder_id] = scan
+        max_seconds = get_scan_max_seconds()
+        deadline = time.monotonic() + max_seconds if max_seconds else None
 
-        logger.info(
-            "Server scheduler: scanning root %s (%s)",
-            folder_id, folder_path,
-        )
+        def should_stop() -> bool:
+            return self._stopping or (deadline is not None and time.monotonic() >= deadline)
 
-        # 1. Update watermarks (started = True)
-        await asyncio.to_thread(update_scan_watermarks, folder_id, started=True)
-        self._active_scans += 1
+        def progress(done: int, total: int) -> None:
+            scan["files_done"] = done
+            scan["files_total"] = total
 
-        try:
-            result = await asyncio.to_thread(
-                scan_folder, folder_path, None, folder.get("root_id"),
-            )
+        checkpoints: List[Dict[str, Any]] = []
 
-            # Update watermarks based on result (Offload to thread)
-            scan_status = result.get("status", "failed")
-            await asyncio.to_thread(
-                update_scan_watermarks,
-                folder_id,
-                completed=True,
-                success=(scan_status in ("success", "partial")),
-                error=(scan_status == "failed"),
-            )
+        def on_checkpoint(checkpoint: Dict[str, Any]) -> None:
+            checkpoints[:] = [dict(checkpoint, state="running")]
+            update_scan_watermarks(folder_id, checkpoint=checkpoints[0])
 
-            # Update legacy last_scanned_at (Offload to thread)
-            if result.get("run_id"):
-                await asyncio.to_thread(
-                    mark_scanned, folder_id, run_id=result["run_id"]
+        result: Dict[str, Any] = {"status": "failed"}
+        try:
+            async with self._slots:
+                logger.info(
+                    "Server scheduler: scanning root %s (%s)",
+                    folder_id, folder_path,
                 )
 
+                # 1. Update watermarks (started = True)
+                await asyncio.to_thread(update_scan_watermarks, folder_id, started=True)
+
+                try:
+                    result = await asyncio.to_thread(
+                        scan_folder, folder_path, None, folder.get("root_id"),
+                        should_stop=should_stop, progress=progress,
+                        on_checkpoint=on_checkpoint, exclusive=True,
+                    )
+
+                    # Update watermarks based on result (Offload to thread).
+                    # A scan stopped by shutdown keeps its running checkpoint
+                    # so the next start resumes it; one stopped at the
+                    # runtime limit keeps its progress for display only.
+                    scan_status = result.get("status", "failed")
+                    checkpoint = None
+                    if result.get("stopped") and checkpoints:
+                        checkpoint = dict(
+                            checkpoints[0], state="running" if self._stopping else "stopped",
+                        )
+                    await asyncio.to_thread(
+                        update_scan_watermarks,
+                        folder_id,
+                        completed=True,
+                        success=(scan_status in ("success", "partial")),
+                        error=(scan_status == "failed"),
+                        checkpoint=checkpoint,
+                        clear_checkpoint=True,
+                    )
+
+                    # Update legacy last_scanned_at (Offload to thread)
+                    if result.get("run_id"):
+                        await asyncio.to_thread(
+                            mark_scanned, folder_id, run_id=result["run_id"]
+                        )
+
+                    logger.info(
+                        "Server scheduler: scan complete for %s — %s "
+                        "(files: %d scanned, %d added, %d failed%s)",
+                        folder_id, scan_status,
+                        result.get("files_scanned", 0),
+                        result.get("files_added", 0),
+                        result.get("files_failed", 0),
+                        ", stopped at the runtime limit" if result.get("stopped") else "",
+                    )
+                    return result
+                except Exception as e:
+                    logger.error(
+                        "Server scheduler: scan failed for %s: %s", folder_id, e
+                    )
+                    await asyncio.to_thread(
+                        update_scan_watermarks, folder_id, completed=True, error=True,
+                        clear_checkpoint=True,
+                    )
+                    result = {"status": "failed", "error": str(e)}
+                    return result
+        finally:
+            del self._scans[folder_id]
+            if self._synced_at is not None:
+                await self._refresh_folder(folder_id)
+            duration = time.time() - started_ts
+            files_scanned = result.get("files_scanned", 0) or 0
+            self._history[folder_id] = {
+                "root_id": scan["root_id"],
+                "status": result.get("status", "failed"),
+                "started_at": scan["started_at"],
+                "finished_at": datetime.now(timezone.utc).isoformat(),
+                "duration_seconds": round(duration, 1),
+                "files_scanned": files_scanned,
+                "files_per_second": round(files_scanned / duration, 2) if duration > 0 else 0.0,
+                "stopped": bool(result.get("stopped")),
+            }
+
+    async def _run_watch_batch(self, folder: dict, paths: Set[str]) -> dict:
+        """Index the paths a watched root reported as changed.
+
+        Takes a worker like a scan but leaves the root's watermarks and
+        cron schedule alone: the scheduled scan still reconciles the tree.
+        """
+        from watched_folders import scan_folder
+
+        folder_id = folder["id"]
+        scan = {
+            "root_id": folder.get("root_id"),
+            "folder_path": folder["folder_path"],
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "started_ts": time.time(),
+            "files_done": 0,
+            "files_total": None,
+            "large_root": False,
+            "kind": "watch",
+        }
+
+        def progress(done: int, total: int) -> None:
+            scan["files_done"] = done
+            scan["files_total"] = total
+
+        result: Dict[str, Any] = {"status": "failed"}
+        try:
+            async with self._slots:
+                self._scans[folder_id] = scan
+                result = await asyncio.to_thread(
+                    scan_folder, folder["folder_path"], None, folder.get("root_id"),
+                    should_stop=lambda: self._stopping, progress=progress, paths=paths,
+                )
             logger.info(
-                "Server scheduler: scan complete for %s — %s "
-                "(files: %d scanned, %d added, %d failed)",
-                folder_id, scan_status,
-                result.get("files_scanned", 0),
-                result.get("files_added", 0),
+                "Server scheduler: indexed %d changed path(s) under %s — %s "
+                "(%d added, %d updated, %d failed)",
+                len(paths), folder["folder_path"], result.get("status"),
+                result.get("files_added", 0), result.get("files_updated", 0),
                 result.get("files_failed", 0),
             )
-            return result
         except Exception as e:
-            logger.error(
-                "Server scheduler: scan failed for %s: %s", folder_id, e
-            )
-            await asyncio.to_thread(
-                update_scan_watermarks, folder_id, completed=True, error=True
+            logger.warning(
+                "Server scheduler: watch batch failed for %s: %s", folder_id, e
             )
-            return {"status": "failed", "error": str(e)}
+            result = {"status": "failed", "error": str(e)}
         finally:
-            self._active_scans -= 1
+            self._scans.pop(folder_id, None)
+            if self._synced_at is not None and folder_id not in self._due_at:
+                await self._refresh_folder(folder_id)
+        return result
 
     async def _maybe_purge_quarantine(self) -> None:
         """Purge expired quarantined chunks if enough time has elapsed."""
@@ -346,6 +905,8 @@ class ServerScheduler:
             return {"ok": False, "error": "Root not found"}
         if folder.get("execution_scope") != "server":
             return {"ok": False, "error": "Root is not server-scope"}
+        if folder["id"] in self._scans or folder["id"] in self._scan_tasks:
+            return {"ok": False, "error": "Root is already being scanned"}
 
         result = await self._run_scan(folder)
         return {"ok": True, "scan_result": result}
@@ -60,10 +60,18 @@ def get_lancedb_adapter() -> "BackendLanceDBAdapter":
         from lancedb_adapter import BackendLanceDBAdapter
         from config import get_config
         config = get_config()
-        lancedb_adapter = BackendLanceDBAdapter(
+        adapter = BackendLanceDBAdapter(
             db_path=config.retrieval.lancedb_storage_path,
             embedding_dimension=config.embedding.dimension
         )
+        # Tables that predate the owner_id/visibility columns hide their rows
+        # from non-admins until filled from Postgres.
+        try:
+            from document_visibility import backfill_lancedb_access
+            backfill_lancedb_access(adapter)
+        except Exception as e:
+            logger.warning(f"LanceDB access-column backfill failed: {e}")
+        lancedb_adapter = adapter
     return lancedb_adapter
 
 
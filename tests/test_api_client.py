@@ -381,6 +381,61 @@ def test_restore_documents(api_client):
             json={"backup_data": backup_data}
         )
 
+def test_export_documents_to_file_streams_to_disk(api_client, tmp_path):
+    """Streamed export is written to disk and only kept once the footer is complete."""
+    target = tmp_path / "backup.ndjson"
+    body = [
+        b'{"type":"header","format":"pgvector-rag-backup","version":1}\n{"type":"chu',
+        b'nk","document_id":"d1"}\n{"type":"footer","status":"complete","chunk_count":1,"document_count":1}\n',
+    ]
+    with patch.object(api_client._base, "request") as mock_request:
+        mock_response = MagicMock()
+        mock_response.iter_content.return_value = iter(body)
+        mock_request.return_value = mock_response
+
+        footer = api_client.export_documents_to_file({"type": "resume"}, str(target))
+
+        assert footer["chunk_count"] == 1
+        assert target.read_bytes() == b"".join(body)
+        assert not (tmp_path / "backup.ndjson.part").exists()
+        mock_request.assert_called_with(
+            "POST",
+            "http://test-api/api/v1/documents/export/stream",
+            json={"filters": {"type": "resume"}},
+            stream=True,
+        )
+
+def test_export_documents_to_file_rejects_incomplete_stream(api_client, tmp_path):
+    """An error footer (or none) must not leave a backup file behind."""
+    from desktop_app.utils.errors import APIError
+
+    target = tmp_path / "backup.ndjson"
+    body = [b'{"type":"header"}\n{"type":"footer","status":"error","error":"boom"}\n']
+    with patch.object(api_client._base, "request") as mock_request:
+        mock_response = MagicMock()
+        mock_response.iter_content.return_value = iter(body)
+        mock_request.return_value = mock_response
+
+        with pytest.raises(APIError, match="boom"):
+            api_client.export_documents_to_file({}, str(target))
+
+    assert not target.exists()
+    assert not (tmp_path / "backup.ndjson.part").exists()
+
+def test_restore_documents_from_file(api_client, tmp_path):
+    """Streamed restore posts the file body as NDJSON."""
+    source = tmp_path / "backup.ndjson"
+    source.write_bytes(b'{"type":"header"}\n')
+    with patch.object(api_client._base, "request") as mock_request:
+        mock_response = MagicMock()
+        mock_response.json.return_value = {"chunks_restored": 0}
+        mock_request.return_value = mock_response
+
+        assert api_client.restore_documents_from_file(str(source)) == {"chunks_restored": 0}
+        args, kwargs = mock_request.call_args
+        assert args == ("POST", "http://test-api/api/v1/documents/restore/stream")
+        assert kwargs["headers"] == {"Content-Type": "application/x-ndjson"}
+
 def test_get_metadata_keys(api_client):
     """Test get_metadata_keys."""
     with patch.object(api_client._base, "request") as mock_request:
@@ -415,6 +470,13 @@ def test_get_metadata_values(api_client):
             params={"key": "author"}
         )
 
+        api_client.get_metadata_values("author", prefix="Ja")
+        mock_request.assert_called_with(
+            "GET",
+            "http://test-api/api/v1/metadata/values",
+            params={"key": "author", "prefix": "Ja"}
+        )
+
 def test_register_client(api_client):
     """Test register_client routes correctly."""
     with patch.object(api_client._base, "request") as mock_request:
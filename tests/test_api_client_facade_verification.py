@@ -145,6 +145,28 @@ class TestErrorTranslation:
         assert mock_request.call_count == 2
         mock_sleep.assert_called_once_with(0.0)
 
+    def test_rate_limit_pauses_other_threads(self, base_client):
+        """A 429 seen by one upload holds back every rate-limit-aware request."""
+        ok = self._mock_response(200, {"ok": True})
+        base_client._pause_for_rate_limit(30.0)
+
+        with patch.object(base_client._session, "request", return_value=ok):
+            with patch("desktop_app.utils.api_client_core.base_client.time.sleep") as mock_sleep:
+                base_client.request("GET", "http://test/bulk", retry_on_rate_limit=True)
+                assert mock_sleep.call_count == 1
+                assert 29.0 < mock_sleep.call_args.args[0] <= 30.0
+
+                # Interactive requests are not held back
+                base_client.request("GET", "http://test/health")
+                assert mock_sleep.call_count == 1
+
+    def test_ensure_pool_size_only_grows(self, base_client):
+        base_client.ensure_pool_size(4)
+        assert base_client._session.get_adapter("http://test")._pool_maxsize == 10
+        base_client.ensure_pool_size(16)
+        assert base_client._session.get_adapter("http://test")._pool_maxsize == 16
+        assert base_client._session.get_adapter("https://test")._pool_maxsize == 16
+
     def test_request_rewinds_file_before_rate_limit_retry(self, base_client):
         """Multipart upload retries resend the file from the beginning."""
         limited = self._mock_response(429, {"detail": "Too many requests"})
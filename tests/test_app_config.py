@@ -24,6 +24,8 @@ from desktop_app.utils.app_config import (
     get_backend_url, set_backend_url,
     get_api_key, set_api_key,
     is_remote_mode,
+    get_upload_concurrency, set_upload_concurrency,
+    DEFAULT_UPLOAD_CONCURRENCY,
     BACKEND_MODE_LOCAL, BACKEND_MODE_REMOTE, DEFAULT_LOCAL_URL,
 )
 
@@ -133,6 +135,19 @@ class TestApiKey:
         assert get_api_key() is None
 
 
+class TestUploadConcurrency:
+    def test_default(self, config_dir):
+        assert get_upload_concurrency() == DEFAULT_UPLOAD_CONCURRENCY
+
+    def test_clamped(self, config_dir):
+        set_upload_concurrency(20)
+        assert get_upload_concurrency() == 8
+        set("upload_concurrency", 0)
+        assert get_upload_concurrency() == 1
+        set("upload_concurrency", "lots")
+        assert get_upload_concurrency() == DEFAULT_UPLOAD_CONCURRENCY
+
+
 
 
 # ===========================================================================
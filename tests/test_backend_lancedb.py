@@ -252,7 +252,9 @@ def test_ensure_tables_exist_opens_unlisted_existing_tables(tmp_path):
     created = []
 
     class FakeTable:
-        def create_scalar_index(self, _column):
+        schema = adapter.chunk_schema
+
+        def create_scalar_index(self, _column, **_kwargs):
             return None
 
     class FakeDB:
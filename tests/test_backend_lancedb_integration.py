@@ -40,13 +40,14 @@ class _FakeAdapter:
         self.upserts.append(kwargs)
 
     def add_documents_bulk(self, documents):
-        for doc_id, source_uri, chunks, aggregated_text, doc_metadata in documents:
+        for doc_id, source_uri, chunks, aggregated_text, doc_metadata, *access in documents:
             self.upserts.append({
                 "document_id": doc_id,
                 "source_uri": source_uri,
                 "chunks": chunks,
                 "aggregated_text": aggregated_text,
-                "doc_metadata": doc_metadata
+                "doc_metadata": doc_metadata,
+                "access": tuple(access),
             })
 
     def delete_document(self, doc_id):
@@ -202,6 +203,8 @@ async def test_restore_api_syncs_with_lancedb(monkeypatch):
             return len(data)
 
     monkeypatch.setattr(search_api, "DocumentRepository", lambda _db: FakeRepo())
+    synced = []
+    monkeypatch.setattr("document_visibility.sync_lancedb_access", synced.append)
 
     backup_data = [
         {
@@ -236,6 +239,7 @@ async def test_restore_api_syncs_with_lancedb(monkeypatch):
 
     assert response["chunks_restored"] == 3
     assert len(fake_adapter.upserts) == 2  # doc-1 and doc-2
+    assert synced == [["doc-1", "doc-2"]]
 
     # Check doc-1 upsert data
     doc1_upsert = next(x for x in fake_adapter.upserts if x["document_id"] == "doc-1")
@@ -272,8 +276,10 @@ def test_sync_lancedb_script(monkeypatch):
         def fetchall(self):
             if self.data_type == "docs":
                 return [
-                    {"document_id": "doc-a", "source_uri": "doca.txt"},
-                    {"document_id": "doc-b", "source_uri": "docb.txt"}
+                    {"document_id": "doc-a", "source_uri": "doca.txt",
+                     "owner_id": None, "visibility": "shared"},
+                    {"document_id": "doc-b", "source_uri": "docb.txt",
+                     "owner_id": "u1", "visibility": "private"}
                 ]
             else:  # chunks
                 return [
@@ -323,6 +329,7 @@ def test_sync_lancedb_script(monkeypatch):
     assert len(fake_adapter.upserts) == 2
     assert fake_adapter.upserts[0]["document_id"] == "doc-a"
     assert fake_adapter.upserts[1]["document_id"] == "doc-b"
+    assert fake_adapter.upserts[1]["access"] == ("u1", "private")
 
 
 def test_failed_lancedb_sync_guard_does_not_relaunch_same_drift(monkeypatch):
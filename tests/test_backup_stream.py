@@ -0,0 +1,258 @@
+"""
+Tests for the streaming NDJSON export/restore path.
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+import backup_stream
+from database import DocumentRepository
+
+
+def _ndjson(lines):
+    return [json.loads(line) for line in b"".join(lines).splitlines()]
+
+
+class TestBackupFormat:
+    """Tests for backup_stream encoding helpers."""
+
+    def test_embedding_round_trip_is_lossless_for_float32(self):
+        original = np.random.rand(384).astype("float32")
+        decoded = backup_stream.decode_embedding(backup_stream.encode_embedding(original))
+        assert np.array_equal(np.asarray(decoded, dtype="float32"), original)
+
+    def test_decode_embedding_accepts_legacy_vector_text(self):
+        assert backup_stream.decode_embedding("[1,2.5,-3]") == [1.0, 2.5, -3.0]
+
+    def test_decode_embedding_rejects_garbage(self):
+        with pytest.raises(backup_stream.BackupStreamError):
+            backup_stream.decode_embedding("not base64!")
+
+    def test_export_stream_has_header_chunks_and_footer(self):
+        chunks = [
+            {"document_id": "a", "chunk_index": 0, "text_content": "x", "source_uri": "/a",
+             "embedding": [0.5, 1.0], "metadata": {}},
+            {"document_id": "a", "chunk_index": 1, "text_content": "y", "source_uri": "/a",
+             "embedding": [0.25, 2.0], "metadata": {}},
+            {"document_id": "b", "chunk_index": 0, "text_content": "z", "source_uri": "/b",
+             "embedding": None, "metadata": {}},
+        ]
+        records = _ndjson(backup_stream.iter_export_ndjson(iter(chunks), {"type": "t"}))
+
+        backup_stream.validate_header(records[0])
+        assert [r["type"] for r in records[1:-1]] == ["chunk"] * 3
+        assert records[-1] == {
+            "type": "footer", "status": "complete", "chunk_count": 3, "document_count": 2
+        }
+        assert backup_stream.decode_chunk(records[1])["embedding"] == [0.5, 1.0]
+
+    def test_export_stream_failure_ends_with_error_footer(self):
+        def failing():
+            yield {"document_id": "a", "chunk_index": 0, "text_content": "x",
+                   "source_uri": "/a", "embedding": None, "metadata": {}}
+            raise RuntimeError("connection lost")
+
+        records = _ndjson(backup_stream.iter_export_ndjson(failing(), {}))
+        assert records[-1]["status"] == backup_stream.STATUS_ERROR
+        assert records[-1]["chunk_count"] == 1
+
+    def test_validate_header_rejects_unknown_version(self):
+        with pytest.raises(backup_stream.BackupStreamError):
+            backup_stream.validate_header({
+                "type": "header", "format": backup_stream.FORMAT_NAME, "version": 99
+            })
+
+    @pytest.mark.asyncio
+    async def test_restore_body_lines_split_across_pieces(self):
+        from unittest.mock import MagicMock
+        from routers.search_api import _iter_backup_records
+
+        pieces = [b'{"a": 1}\n{"a"', b': 2}\n\n{"a": 3}\n{"a": 4', b"}"]
+
+        async def stream():
+            for piece in pieces:
+                yield piece
+
+        request = MagicMock()
+        request.stream = stream
+        records = [record async for record in _iter_backup_records(request)]
+        assert records == [{"a": 1}, {"a": 2}, {"a": 3}, {"a": 4}]
+
+
+class TestStreamingRepository:
+    """Tests for keyset-paginated export and COPY-based restore."""
+
+    def _seed(self, repo, sample_embeddings):
+        chunks = []
+        for doc in ("doc-a", "doc-b", "doc-c"):
+            for index in range(3):
+                chunks.append((
+                    doc, index, f"{doc} chunk {index}\twith\ttabs\nand \\ slashes",
+                    f"/data/{doc}.txt", sample_embeddings[index], {"type": "note"},
+                ))
+        repo.insert_chunks(chunks)
+        return chunks
+
+    def test_iter_export_chunks_pages_in_key_order(self, db_manager, sample_embeddings):
+        repo = DocumentRepository(db_manager)
+        self._seed(repo, sample_embeddings)
+
+        exported = list(repo.iter_export_chunks({"type": "note"}, batch_size=2))
+
+        keys = [(c["document_id"], c["chunk_index"]) for c in exported]
+        assert keys == sorted(keys)
+        assert len(keys) == len(set(keys)) == 9
+
+    def test_iter_export_chunks_rejects_unknown_filter_key(self, db_manager):
+        repo = DocumentRepository(db_manager)
+        with pytest.raises(ValueError, match="Unsupported filter key"):
+            next(repo.iter_export_chunks({"bogus; DROP TABLE x": "1"}))
+
+    def test_restore_chunk_batch_round_trip(self, db_manager, sample_embeddings):
+        repo = DocumentRepository(db_manager)
+        self._seed(repo, sample_embeddings)
+        lines = list(backup_stream.iter_export_ndjson(repo.iter_export_chunks({}), {}))
+        original = {
+            (c["document_id"], c["chunk_index"]): c for c in repo.iter_export_chunks({})
+        }
+
+        with db_manager.get_cursor() as cursor:
+            cursor.execute("DELETE FROM document_chunks")
+
+        records = _ndjson(lines)
+        chunks = [backup_stream.decode_chunk(r) for r in records if r["type"] == "chunk"]
+        restored = repo.restore_chunk_batch(chunks[:5]) + repo.restore_chunk_batch(chunks[5:])
+        assert restored == 9
+
+        # Re-running is idempotent: existing chunks are left alone.
+        assert repo.restore_chunk_batch(chunks) == 0
+
+        for chunk in repo.iter_export_chunks({}):
+            before = original[(chunk["document_id"], chunk["chunk_index"])]
+            assert chunk["text_content"] == before["text_content"]
+            assert chunk["metadata"] == before["metadata"]
+            assert np.array_equal(chunk["embedding"], before["embedding"])
+
+    def test_restore_chunk_batch_skips_existing_documents(self, db_manager, sample_embeddings):
+        repo = DocumentRepository(db_manager)
+        repo.insert_chunks([("doc-a", 0, "kept", "/data/doc-a.txt", sample_embeddings[0], {})])
+        chunks = [
+            {"document_id": doc, "chunk_index": i, "text_content": f"{doc} {i}",
+             "source_uri": f"/data/{doc}.txt", "embedding": sample_embeddings[i], "metadata": {}}
+            for doc in ("doc-a", "doc-b") for i in range(2)
+        ]
+
+        created = set()
+        assert repo.restore_chunk_batch(chunks[:3], created) == 1
+        assert created == {"doc-b"}
+        # Later batches keep filling documents this restore created.
+        assert repo.restore_chunk_batch(chunks[3:], created) == 1
+        assert repo.get_document_by_id("doc-a")["chunk_count"] == 1
+
+
+class TestStreamingRoutes:
+    """End-to-end export/restore through the API."""
+
+    def test_export_then_restore_stream(self, db_manager, sample_embeddings):
+        from fastapi.testclient import TestClient
+        from api import app
+
+        repo = DocumentRepository(db_manager)
+        repo.insert_chunks([
+            ("doc-a", i, f"chunk {i}", "/data/doc-a.txt", sample_embeddings[i], {"type": "note"})
+            for i in range(3)
+        ])
+        client = TestClient(app)
+
+        export = client.post("/api/v1/documents/export/stream", json={"filters": {"type": "note"}})
+        assert export.status_code == 200
+        assert export.headers["content-type"].startswith(backup_stream.NDJSON_MEDIA_TYPE)
+        assert _ndjson([export.content])[-1]["status"] == "complete"
+
+        with db_manager.get_cursor() as cursor:
+            cursor.execute("DELETE FROM document_chunks")
+
+        restore = client.post(
+            "/api/v1/documents/restore/stream?batch_size=2",
+            content=export.content,
+            headers={"Content-Type": backup_stream.NDJSON_MEDIA_TYPE},
+        )
+        assert restore.status_code == 200
+        body = restore.json()
+        assert body["chunks_restored"] == 3
+        assert body["document_count"] == 1
+        assert body["complete"] is True
+
+    def test_restore_stream_requires_header(self, db_manager):
+        from fastapi.testclient import TestClient
+        from api import app
+
+        response = TestClient(app).post(
+            "/api/v1/documents/restore/stream",
+            content=b'{"type":"chunk","document_id":"x"}\n',
+        )
+        assert response.status_code == 400
+
+    def _restore(self, client, lines):
+        return client.post(
+            "/api/v1/documents/restore/stream?batch_size=2",
+            content=b"\n".join(json.dumps(r).encode() for r in lines) + b"\n",
+            headers={"Content-Type": backup_stream.NDJSON_MEDIA_TYPE},
+        )
+
+    def _export_records(self, db_manager, sample_embeddings):
+        repo = DocumentRepository(db_manager)
+        repo.insert_chunks([
+            (doc, i, f"{doc} {i}", f"/data/{doc}.txt", sample_embeddings[i], {})
+            for doc in ("doc-a", "doc-b") for i in range(3)
+        ])
+        records = _ndjson(backup_stream.iter_export_ndjson(repo.iter_export_chunks({}), {}))
+        with db_manager.get_cursor() as cursor:
+            cursor.execute("DELETE FROM document_chunks WHERE document_id = 'doc-b'")
+            cursor.execute(
+                "UPDATE document_chunks SET text_content = 'live' WHERE document_id = 'doc-a'"
+            )
+        return repo, records
+
+    @pytest.mark.parametrize("ending", ["truncated", "error_footer"])
+    def test_incomplete_stream_is_rejected_and_keeps_existing_documents(
+        self, db_manager, sample_embeddings, ending
+    ):
+        from fastapi.testclient import TestClient
+        from api import app
+
+        repo, records = self._export_records(db_manager, sample_embeddings)
+        if ending == "truncated":
+            records = records[:-1]
+        else:
+            records[-1] = {"type": "footer", "status": "error", "error": "boom"}
+
+        response = self._restore(TestClient(app), records)
+
+        assert response.status_code == 400
+        # doc-b was created by this restore and rolled back; doc-a existed
+        # before and is untouched.
+        assert repo.get_document_by_id("doc-b") is None
+        texts = {c["text_content"] for c in repo.iter_export_chunks({})}
+        assert texts == {"live"}
+
+    def test_restore_stream_skips_existing_documents(self, db_manager, sample_embeddings):
+        from fastapi.testclient import TestClient
+        from api import app
+
+        repo, records = self._export_records(db_manager, sample_embeddings)
+
+        response = self._restore(TestClient(app), records)
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["documents_created"] == 1
+        assert body["documents_skipped"] == 1
+        assert body["chunks_restored"] == 3
+        texts = {
+            c["text_content"] for c in repo.iter_export_chunks({})
+            if c["document_id"] == "doc-a"
+        }
+        assert texts == {"live"}
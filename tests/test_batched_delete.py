@@ -0,0 +1,135 @@
+"""
+Tests for batched, bounded-transaction deletes (batched_delete.py).
+
+Tests cover:
+- batching until a short batch, one commit per batch
+- the time budget leaving the remainder for the next run
+- per-job stats, the ANALYZE hint and failure accounting
+- retention jobs deleting real rows in batches (DB-backed)
+"""
+
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import batched_delete
+from batched_delete import delete_in_batches, get_last_stats
+
+
+def _factory(rowcounts):
+    """Connection factory whose DELETEs report the given rowcounts in turn."""
+    cursor = MagicMock()
+    conn = MagicMock()
+    conn.cursor.return_value = cursor
+    counts = iter(rowcounts)
+
+    def execute(sql, params=None):
+        cursor.rowcount = next(counts) if sql.startswith("DELETE") else -1
+
+    cursor.execute.side_effect = execute
+
+    @contextmanager
+    def factory():
+        yield conn
+
+    return factory, conn, cursor
+
+
+class TestDeleteInBatches:
+    def test_batches_until_short_batch(self):
+        factory, conn, cursor = _factory([3, 3, 1])
+        stats = delete_in_batches(
+            "job", "t", "ts < %s", ("x",), connection_factory=factory,
+            batch_size=3, pause_seconds=0,
+        )
+        assert stats["deleted"] == 7
+        assert stats["batches"] == 3
+        assert stats["complete"] is True
+        assert conn.commit.call_count == 3
+        sql, params = cursor.execute.call_args_list[0][0]
+        assert "LIMIT %s FOR UPDATE SKIP LOCKED" in sql
+        assert params == ("x", 3)
+
+    def test_time_budget_stops_early(self):
+        factory, _conn, _cursor = _factory([3, 3, 3])
+        with patch("batched_delete.time.monotonic", side_effect=[0, 0, 1, 100, 100, 100]):
+            stats = delete_in_batches(
+                "job", "t", "TRUE", connection_factory=factory,
+                batch_size=3, pause_seconds=0, max_seconds=10,
+            )
+        assert stats["batches"] == 1
+        assert stats["complete"] is False
+
+    def test_large_delete_analyzes_table(self, monkeypatch):
+        monkeypatch.setenv("RETENTION_ANALYZE_MIN_ROWS", "5")
+        factory, _conn, cursor = _factory([5, 2])
+        stats = delete_in_batches(
+            "job", "t", "TRUE", connection_factory=factory,
+            batch_size=5, pause_seconds=0,
+        )
+        assert stats["analyzed"] is True
+        assert stats["vacuum_recommended"] is True
+        assert cursor.execute.call_args[0][0] == "ANALYZE t"
+
+    def test_failure_keeps_partial_stats(self):
+        factory, _conn, cursor = _factory([2])
+        calls = {"n": 0}
+
+        def execute(sql, params=None):
+            calls["n"] += 1
+            if calls["n"] == 2:
+                raise RuntimeError("statement timeout")
+            cursor.rowcount = 2
+
+        cursor.execute.side_effect = execute
+        with pytest.raises(RuntimeError):
+            delete_in_batches("failing-job", "t", "TRUE", connection_factory=factory,
+                              batch_size=2, pause_seconds=0)
+        assert get_last_stats()["failing-job"]["deleted"] == 2
+
+    def test_env_batch_size(self, monkeypatch):
+        monkeypatch.setenv("RETENTION_DELETE_BATCH_SIZE", "250")
+        assert batched_delete.get_batch_size() == 250
+        monkeypatch.setenv("RETENTION_DELETE_BATCH_SIZE", "junk")
+        assert batched_delete.get_batch_size() == 5000
+
+
+@patch("quarantine.get_retention_days", return_value=30)
+@patch("saml_auth.cleanup_expired_sessions", return_value=0)
+@patch("indexing_runs.apply_retention", return_value=0)
+@patch("quarantine.purge_expired", return_value=0)
+@patch("activity_log.apply_retention", return_value=0)
+def test_retention_result_reports_batches(*_mocks):
+    from retention_policy import apply_retention
+
+    with patch("batched_delete.get_last_stats", return_value={"activity_log": {"batches": 2}}):
+        result = apply_retention()
+    assert result["batches"] == {"activity_log": {"batches": 2}}
+
+
+@pytest.mark.database
+def test_activity_retention_deletes_in_batches(db_manager, monkeypatch):
+    from activity_log import apply_retention
+
+    monkeypatch.setenv("RETENTION_DELETE_BATCH_SIZE", "4")
+    monkeypatch.setenv("RETENTION_DELETE_PAUSE_MS", "0")
+    with db_manager.get_cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO activity_log (ts, action) "
+            "SELECT now() - interval '400 days', 'bd.old' FROM generate_series(1, 10)"
+        )
+        cursor.execute("INSERT INTO activity_log (action) VALUES ('bd.new')")
+    try:
+        with patch("activity_log._get_db_connection", db_manager.get_connection):
+            assert apply_retention(365) >= 10
+        stats = get_last_stats()["activity_log"]
+        assert stats["batches"] >= 3
+        assert stats["complete"] is True
+
+        with db_manager.get_cursor() as cursor:
+            cursor.execute("SELECT action FROM activity_log WHERE action LIKE 'bd.%%'")
+            assert [r[0] for r in cursor.fetchall()] == ["bd.new"]
+    finally:
+        with db_manager.get_cursor() as cursor:
+            cursor.execute("DELETE FROM activity_log WHERE action LIKE 'bd.%%'")
@@ -16,6 +16,8 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
+from scan_manifest import FileStat
+
 # ── Canonical Identity ─────────────────────────────────────────────────────
 
 
@@ -305,22 +307,47 @@ class TestBulkSetCanonicalKeys:
 
         mock_cur = MagicMock()
         mock_cur.fetchall.return_value = [
-            (1, "/data/docs/readme.md"),
-            (2, "/data/docs/sub/notes.txt"),
+            ("/data/docs/readme.md",),
+            ("/data/docs/sub/notes.txt",),
         ]
-        mock_cur.rowcount = 1
+        mock_cur.rowcount = 5
         mock_conn.return_value.__enter__.return_value.cursor.return_value = mock_cur
 
-        count = bulk_set_canonical_keys(
-            root_id="root-1",
-            folder_path="/data/docs",
-            scope="server",
-            identity="root-1",
-        )
+        with patch("psycopg2.extras.execute_values") as mock_values:
+            count = bulk_set_canonical_keys(
+                root_id="root-1",
+                folder_path="/data/docs",
+                scope="server",
+                identity="root-1",
+            )
+
+        assert count == 5
+        # One SELECT of distinct sources, one UPDATE ... FROM (VALUES) batch
+        assert mock_cur.execute.call_count == 1
+        mock_values.assert_called_once()
+        assert mock_values.call_args[0][2] == [
+            ("/data/docs/readme.md", "server:root-1:/readme.md"),
+            ("/data/docs/sub/notes.txt", "server:root-1:/sub/notes.txt"),
+        ]
+
+    @patch("canonical_identity._get_db_connection")
+    def test_backfill_batches_and_commits_once(self, mock_conn):
+        from canonical_identity import bulk_set_canonical_keys
+
+        mock_cur = MagicMock()
+        mock_cur.fetchall.return_value = [(f"/data/docs/{i}.md",) for i in range(5)]
+        mock_cur.rowcount = 1
+        conn = mock_conn.return_value.__enter__.return_value
+        conn.cursor.return_value = mock_cur
 
-        assert count == 2
-        # Verify UPDATE calls were made
-        assert mock_cur.execute.call_count >= 3  # SELECT + 2 UPDATEs
+        with patch("psycopg2.extras.execute_values") as mock_values:
+            count = bulk_set_canonical_keys(
+                "root-1", "/data/docs", "server", "root-1", batch_size=2,
+            )
+
+        assert mock_values.call_count == 3
+        assert count == 3
+        conn.commit.assert_called_once()
 
     @patch("canonical_identity._get_db_connection")
     def test_backfill_no_chunks(self, mock_conn):
@@ -372,14 +399,20 @@ class TestFindByCanonicalKey:
 # ── Backfill in scan_folder ────────────────────────────────────────────────
 
 
+_WALK = {"f.txt": FileStat("/data/docs/f.txt", 10, 1, 7)}
+
+
 class TestScanFolderCanonicalBackfill:
     """scan_folder() triggers _backfill_canonical_keys when root_id is provided."""
 
     @patch("watched_folders._backfill_canonical_keys")
-    @patch("os.walk", return_value=[("/data/docs", [], ["f.txt"])])
+    @patch("scan_manifest.apply_scan")
+    @patch("scan_manifest._default_hasher", return_value="h1")
+    @patch("scan_manifest.load_manifest", return_value={})
+    @patch("scan_manifest.walk_root", return_value=_WALK)
     @patch("os.path.isdir", return_value=True)
     def test_backfill_called_with_root_id(
-        self, mock_isdir, mock_walk, mock_backfill,
+        self, mock_isdir, mock_walk, mock_load, mock_hash, mock_apply, mock_backfill,
     ):
         from watched_folders import scan_folder
 
@@ -387,23 +420,38 @@ class TestScanFolderCanonicalBackfill:
         mock_db = MagicMock()
         mock_embed = MagicMock()
         mock_indexer_cls = MagicMock()
+        mock_runs = MagicMock(start_run=MagicMock(return_value="run-1"))
+        mock_backfill.return_value = 4
 
         with patch.dict("sys.modules", {
-            "indexing_runs": MagicMock(start_run=MagicMock(return_value="run-1")),
+            "indexing_runs": mock_runs,
             "indexer_v2": MagicMock(DocumentIndexer=mock_indexer_cls),
             "database": MagicMock(get_db_manager=MagicMock(return_value=mock_db)),
             "embeddings": MagicMock(get_embedding_service=MagicMock(return_value=mock_embed)),
-        }):
+        }), patch("watched_folders._quarantine_missing_sources",
+                  return_value={"missing_sources": 1, "quarantined_chunks": 3}):
             result = scan_folder("/data/docs", root_id="root-1")
 
         assert result["status"] == "success"
         mock_backfill.assert_called_once_with("root-1", "/data/docs")
+        # Post-scan counts and timings land in the run, which completes last.
+        post_scan = mock_runs.complete_run.call_args.kwargs["metadata"]["post_scan"]
+        assert post_scan["canonical_keys"] == 4
+        assert post_scan["quarantined_chunks"] == 3
+        assert "canonical_keys_ms" in post_scan and "quarantine_ms" in post_scan
+        # First scan of the root: no manifest yet, every file is new.
+        scan = mock_runs.complete_run.call_args.kwargs["metadata"]["scan"]
+        assert scan["manifest"] == "initial"
+        assert scan["new"] == 1 and scan["hashed"] == 1
 
     @patch("watched_folders._backfill_canonical_keys")
-    @patch("os.walk", return_value=[("/data/docs", [], ["f.txt"])])
+    @patch("scan_manifest.apply_scan")
+    @patch("scan_manifest._default_hasher", return_value="h1")
+    @patch("scan_manifest.load_manifest", return_value={})
+    @patch("scan_manifest.walk_root", return_value=_WALK)
     @patch("os.path.isdir", return_value=True)
     def test_backfill_not_called_without_root_id(
-        self, mock_isdir, mock_walk, mock_backfill,
+        self, mock_isdir, mock_walk, mock_load, mock_hash, mock_apply, mock_backfill,
     ):
         from watched_folders import scan_folder
 
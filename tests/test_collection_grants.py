@@ -141,6 +141,38 @@ def test_postgres_cte_empty_allowlist_matches_nothing():
     assert params == []
 
 
+@pytest.mark.database
+def test_namespace_filters_follow_metadata_and_use_index(db_manager):
+    from database import DocumentRepository
+
+    repo = DocumentRepository(db_manager)
+    vec = [1.0] + [0.0] * 383
+    repo.insert_chunks([
+        ("ns-doc-fin", 0, "text", "ns/fin.txt", vec, {"namespace": "finance"}),
+        ("ns-doc-hr", 0, "text", "ns/hr.txt", vec, {"namespace": "hr"}),
+        ("ns-doc-none", 0, "text", "ns/none.txt", vec, {}),
+    ])
+    try:
+        with db_manager.get_cursor() as cursor:
+            cursor.execute(
+                "UPDATE document_chunks SET metadata = metadata || %s::jsonb "
+                "WHERE document_id = 'ns-doc-hr'",
+                ('{"namespace": "legal"}',),
+            )
+            cursor.execute(
+                "SELECT indexdef FROM pg_indexes WHERE indexname = 'idx_chunks_namespace'"
+            )
+            assert "metadata ->> 'namespace'" in cursor.fetchone()[0]
+
+        results = repo.search_similar(vec, top_k=10, filters={"allowed_namespaces": ["legal"]})
+        assert {r["document_id"] for r in results} == {"ns-doc-hr"}
+        exported = repo.export_documents({"namespace": "finance"})
+        assert {c["document_id"] for c in exported} == {"ns-doc-fin"}
+    finally:
+        with db_manager.get_cursor() as cursor:
+            cursor.execute("DELETE FROM document_chunks WHERE document_id LIKE 'ns-doc-%%'")
+
+
 def test_lancedb_search_respects_namespace_grants(adapter):
     """End-to-end: a namespace-restricted search only returns granted docs."""
     text = "quarterly budget overview report"
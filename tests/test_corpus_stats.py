@@ -0,0 +1,172 @@
+"""
+Tests for the write-time corpus statistics (migration 029).
+
+Tests cover:
+- document/chunk/quarantine totals maintained by inserts, deletes and quarantine
+- visibility buckets shared with document_visibility
+- rebuild_corpus_stats agreeing with incremental maintenance
+- indexing-run counters behind get_run_summary
+- /statistics, the tree totals and the admin recompute endpoint reading them
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+def _seed(db_manager, docs):
+    """Insert chunks per (document_id, chunk_count, metadata)."""
+    from database import DocumentRepository
+    repo = DocumentRepository(db_manager)
+    repo.insert_chunks([
+        (doc_id, i, f"{doc_id} {i}", f"stats/{doc_id}.txt", [0.0] * 384, metadata)
+        for doc_id, count, metadata in docs
+        for i in range(count)
+    ])
+    return repo
+
+
+def test_get_statistics_reads_totals_and_cached_size():
+    from database import DocumentRepository
+
+    db = MagicMock()
+    db.database_size_bytes.return_value = 4096
+    repo = DocumentRepository(db)
+    totals = {"total_documents": 4, "total_chunks": 10, "quarantined_documents": 0}
+    with patch.object(repo, "get_corpus_totals", return_value=totals) as mock_totals:
+        stats = repo.get_statistics(visibility=("owner_id = %s", ["u1"]))
+
+    mock_totals.assert_called_once_with(visibility=("owner_id = %s", ["u1"]))
+    assert stats == {
+        "total_chunks": 10,
+        "total_documents": 4,
+        "avg_chunks_per_document": 2,
+        "database_size_bytes": 4096,
+    }
+
+
+def test_database_size_is_cached():
+    from database import DatabaseManager
+
+    manager = DatabaseManager()
+    cursor = MagicMock()
+    cursor.fetchone.return_value = (1234,)
+    with patch.object(manager, "get_cursor") as mock_cursor:
+        mock_cursor.return_value.__enter__.return_value = cursor
+        assert manager.database_size_bytes() == 1234
+        assert manager.database_size_bytes() == 1234
+        assert cursor.execute.call_count == 1
+        with patch("database.time.monotonic", return_value=10 ** 9):
+            manager.database_size_bytes()
+        assert cursor.execute.call_count == 2
+
+
+@pytest.mark.database
+class TestCorpusStats:
+    DOCS = [
+        ("a", 3, {"namespace": "team-a"}),
+        ("b", 1, {"namespace": "team-a"}),
+        ("c", 2, {}),
+    ]
+
+    def test_inserts_and_deletes_adjust_totals(self, db_manager):
+        repo = _seed(db_manager, self.DOCS)
+        assert repo.get_corpus_totals() == {
+            "total_documents": 3, "total_chunks": 6, "quarantined_documents": 0,
+        }
+
+        repo.delete_document("a")
+        assert repo.get_corpus_totals()["total_documents"] == 2
+        assert repo.get_corpus_totals()["total_chunks"] == 3
+
+        with db_manager.get_cursor() as cursor:
+            cursor.execute("SELECT namespace, SUM(document_count) FROM corpus_stats GROUP BY 1 ORDER BY 1")
+            assert [(ns, int(n)) for ns, n in cursor.fetchall()] == [("team-a", 1), (None, 1)]
+
+    def test_quarantine_is_counted(self, db_manager):
+        repo = _seed(db_manager, self.DOCS)
+        with db_manager.get_cursor() as cursor:
+            cursor.execute(
+                "UPDATE document_chunks SET quarantined_at = now() WHERE document_id = 'c'"
+            )
+        totals = repo.get_corpus_totals()
+        assert totals["quarantined_documents"] == 1
+        assert totals["total_documents"] == 3
+
+    def test_visibility_buckets(self, db_manager):
+        from document_visibility import visibility_where_clause
+        repo = _seed(db_manager, self.DOCS)
+
+        with db_manager.get_cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO users (id, email) VALUES ('stats-u1', 'stats-u1@test.local') "
+                "ON CONFLICT (id) DO NOTHING"
+            )
+            cursor.execute(
+                "UPDATE document_chunks SET owner_id = 'stats-u1', visibility = 'private' "
+                "WHERE document_id = 'a'"
+            )
+        try:
+            stranger = visibility_where_clause("someone-else", False)
+            owner = visibility_where_clause("stats-u1", False)
+
+            assert repo.get_corpus_totals(visibility=stranger)["total_documents"] == 2
+            assert repo.get_corpus_totals(visibility=stranger)["total_chunks"] == 3
+            assert repo.get_corpus_totals(visibility=owner)["total_documents"] == 3
+            assert repo.get_statistics(visibility=stranger)["total_chunks"] == 3
+
+            from document_tree import get_tree_stats
+            assert get_tree_stats(visibility=stranger)["total_documents"] == 2
+        finally:
+            with db_manager.get_cursor() as cursor:
+                cursor.execute("DELETE FROM document_chunks WHERE owner_id = 'stats-u1'")
+                cursor.execute("DELETE FROM users WHERE id = 'stats-u1'")
+
+    def test_rebuild_matches_incremental(self, db_manager):
+        repo = _seed(db_manager, self.DOCS)
+        repo.delete_document("b")
+        incremental = repo.get_corpus_totals()
+
+        with db_manager.get_cursor() as cursor:
+            cursor.execute("UPDATE corpus_stats SET document_count = document_count + 5")
+        assert repo.rebuild_corpus_stats() == incremental
+
+    @pytest.mark.asyncio
+    async def test_recompute_endpoint(self, db_manager):
+        from routers.maintenance_api import recompute_corpus_stats
+
+        _seed(db_manager, self.DOCS)
+        with patch("routers.maintenance_api.get_db_manager", return_value=db_manager):
+            result = await recompute_corpus_stats()
+        assert result["recomputed"] is True
+        assert result["total_documents"] == 3
+        assert result["total_chunks"] == 6
+
+
+@pytest.mark.database
+def test_run_summary_reads_run_counters(db_manager):
+    from indexing_runs import get_run_summary
+
+    with db_manager.get_cursor() as cursor:
+        cursor.execute("DELETE FROM indexing_runs")
+        cursor.execute(
+            "INSERT INTO indexing_runs (status, files_added, files_updated) VALUES "
+            "('running', 0, 0), ('success', 3, 1), ('failed', 0, 0)"
+        )
+        cursor.execute("UPDATE indexing_runs SET status = 'partial', files_added = 2 WHERE status = 'running'")
+    try:
+        with patch("indexing_runs.get_db_manager", return_value=db_manager):
+            summary = get_run_summary()
+        assert summary["total_runs"] == 3
+        assert summary["successful"] == 1
+        assert summary["failed"] == 1
+        assert summary["partial"] == 1
+        assert summary["total_files_added"] == 5
+        assert summary["total_files_updated"] == 1
+        assert summary["last_run_at"] is not None
+    finally:
+        with db_manager.get_cursor() as cursor:
+            cursor.execute("DELETE FROM indexing_runs")
+        with db_manager.get_cursor() as cursor:
+            cursor.execute("SELECT COALESCE(SUM(run_count), 0) FROM indexing_run_stats")
+            assert cursor.fetchone()[0] == 0
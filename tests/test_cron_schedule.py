@@ -0,0 +1,105 @@
+"""
+Tests for the shared cron evaluator (cron_schedule.py).
+
+Tests cover:
+- field syntax: lists, ranges, steps, names, Sunday as 0 or 7, macros
+- next fire times across hour, day, month and leap-year boundaries
+- day-of-month / day-of-week OR semantics
+- invalid and impossible expressions, and the default-schedule fallback
+- server and desktop schedulers agreeing on due times
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from cron_schedule import (
+    CronError,
+    CronSchedule,
+    is_due,
+    next_due_time,
+    next_fire_time,
+    parse_cron,
+    validate_cron,
+)
+
+
+def _utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+class TestParse:
+    def test_lists_ranges_and_steps(self):
+        schedule = CronSchedule("5,10-12,*/20 8-18/4 * * *")
+        assert schedule.minutes == [0, 5, 10, 11, 12, 20, 40]
+        assert schedule.hours == [8, 12, 16]
+
+    def test_start_with_step(self):
+        assert CronSchedule("5/15 * * * *").minutes == [5, 20, 35, 50]
+
+    def test_names_and_sunday(self):
+        schedule = CronSchedule("0 0 * JAN,jul sun,7")
+        assert schedule.months == {1, 7}
+        assert schedule.weekdays == {0}
+
+    def test_macros(self):
+        assert CronSchedule("@daily").next_fire(_utc(2026, 10, 19, 12)) == _utc(2026, 10, 20)
+        assert CronSchedule("@weekly").next_fire(_utc(2026, 10, 19)) == _utc(2026, 10, 25)
+
+    @pytest.mark.parametrize("expr", [
+        "", "bad", "* * * *", "61 * * * *", "* 24 * * *", "* * 0 * *",
+        "*/0 * * * *", "5-1 * * * *", "* * * foo *", "1,,2 * * * *",
+    ])
+    def test_invalid_expressions(self, expr):
+        with pytest.raises(CronError):
+            validate_cron(expr)
+
+    def test_impossible_date_is_rejected(self):
+        with pytest.raises(CronError, match="never fires"):
+            parse_cron("0 0 30 2 *")
+
+
+class TestNextFire:
+    @pytest.mark.parametrize("expr, after, expected", [
+        ("0 */6 * * *", _utc(2026, 10, 19, 5, 59), _utc(2026, 10, 19, 6, 0)),
+        ("0 */6 * * *", _utc(2026, 10, 19, 6, 0), _utc(2026, 10, 19, 12, 0)),
+        ("*/15 8-18/2 * * *", _utc(2026, 10, 19, 18, 50), _utc(2026, 10, 20, 8, 0)),
+        ("30 2 * * 1-5", _utc(2026, 10, 17, 3, 0), _utc(2026, 10, 19, 2, 30)),
+        ("0 0 1 * *", _utc(2026, 12, 15), _utc(2027, 1, 1)),
+        ("0 0 31 * *", _utc(2026, 4, 1), _utc(2026, 5, 31)),
+        ("0 0 29 2 *", _utc(2026, 3, 1), _utc(2028, 2, 29)),
+    ])
+    def test_next_fire(self, expr, after, expected):
+        assert parse_cron(expr).next_fire(after) == expected
+
+    def test_day_of_month_or_day_of_week(self):
+        # The 13th, or any Friday
+        schedule = parse_cron("0 0 13 * fri")
+        assert schedule.next_fire(_utc(2026, 10, 19)) == _utc(2026, 10, 23)
+        assert schedule.next_fire(_utc(2026, 11, 7)) == _utc(2026, 11, 13)
+
+    def test_naive_times_are_utc(self):
+        assert parse_cron("0 * * * *").next_fire(datetime(2026, 1, 1, 10, 30)) == _utc(2026, 1, 1, 11)
+
+    def test_invalid_expression_falls_back_to_default(self):
+        assert next_fire_time("bad", _utc(2026, 10, 19, 5, 10)) == _utc(2026, 10, 19, 6)
+
+
+class TestIsDue:
+    def test_never_run_is_due(self):
+        assert is_due("@yearly", None) is True
+        assert next_due_time("@yearly", None) is None
+
+    def test_due_once_next_fire_passes(self):
+        last = "2026-10-16T20:00:00Z"
+        assert is_due("30 2 * * 1-5", last, now=_utc(2026, 10, 18, 12)) is False
+        assert is_due("30 2 * * 1-5", last, now=_utc(2026, 10, 19, 2, 30)) is True
+
+    def test_server_and_desktop_agree(self):
+        from server_scheduler import ServerScheduler
+
+        scheduler = ServerScheduler()
+        last = "2026-10-16T20:00:00+00:00"
+        for expr in ["30 2 * * 1-5", "*/10 * * * *", "@monthly", "bad"]:
+            folder = {"id": "f", "schedule_cron": expr, "last_scanned_at": last}
+            assert scheduler._next_due_ts(folder) == next_due_time(expr, last).timestamp()
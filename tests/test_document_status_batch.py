@@ -0,0 +1,154 @@
+"""
+Tests for batch document status checks (POST /documents/status:batch).
+
+Tests cover:
+- the route classifying paths as missing / unchanged / changed / present
+  from one repository call, with the caller's visibility
+- the request size cap
+- the desktop client parsing results and falling back on older servers
+- UploadWorker checking files a page at a time, and per file when the
+  server has no batch endpoint
+"""
+
+import hashlib
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+from pydantic import ValidationError
+
+from api_models import MAX_DOCUMENT_STATUS_BATCH, DocumentStatusBatchRequest
+
+VIS_SENTINEL = ("owner_id = %s OR visibility = 'shared'", ["u-sentinel"])
+
+
+def _doc_id(uri):
+    return hashlib.sha256(uri.encode()).hexdigest()[:16]
+
+
+@pytest.fixture
+def patched_search_api(monkeypatch):
+    from routers import search_api
+    fake_repo = MagicMock()
+    monkeypatch.setattr(search_api, "get_db_manager", lambda: MagicMock())
+    monkeypatch.setattr(search_api, "DocumentRepository", lambda dbm: fake_repo)
+    monkeypatch.setattr(
+        "document_visibility.visibility_clause_for_key_record", lambda kr: VIS_SENTINEL
+    )
+    return search_api, fake_repo
+
+
+class TestStatusRoute:
+    async def test_classifies_paths_in_one_query(self, patched_search_api):
+        search_api, repo = patched_search_api
+        repo.get_documents_status.return_value = {
+            _doc_id("/d/same.txt"): {"file_hash": "h1", "type": "report"},
+            _doc_id("/d/edited.txt"): {"file_hash": "old", "type": None},
+            _doc_id("/d/nohash.txt"): {"file_hash": "h3", "type": "note"},
+        }
+        request = DocumentStatusBatchRequest(items=[
+            {"source_uri": "/d/same.txt", "file_hash": "h1"},
+            {"source_uri": "/d/edited.txt", "file_hash": "new"},
+            {"source_uri": "/d/nohash.txt"},
+            {"source_uri": "/d/new.txt", "file_hash": "h4"},
+        ])
+
+        response = await search_api.get_documents_status(request, key_record={"id": 1})
+
+        assert [(r.source_uri, r.status) for r in response.results] == [
+            ("/d/same.txt", "unchanged"),
+            ("/d/edited.txt", "changed"),
+            ("/d/nohash.txt", "present"),
+            ("/d/new.txt", "missing"),
+        ]
+        assert response.results[0].document_type == "report"
+        assert response.results[3].document_id == _doc_id("/d/new.txt")
+        repo.get_documents_status.assert_called_once()
+        assert repo.get_documents_status.call_args.kwargs["visibility"] == VIS_SENTINEL
+
+    def test_request_size_is_capped(self):
+        items = [{"source_uri": f"/d/{i}"} for i in range(MAX_DOCUMENT_STATUS_BATCH + 1)]
+        with pytest.raises(ValidationError):
+            DocumentStatusBatchRequest(items=items)
+
+
+class TestDocumentClient:
+    def _client(self):
+        from desktop_app.utils.api_client_core.document_client import DocumentClient
+        base = MagicMock()
+        base.api_base = "http://api/api/v1"
+        return DocumentClient(base), base
+
+    def test_sends_hashes_and_keys_results_by_path(self):
+        client, base = self._client()
+        base.request.return_value.json.return_value = {"results": [
+            {"source_uri": "/d/a.txt", "status": "unchanged", "file_hash": "h1"},
+            {"source_uri": "/d/b.txt", "status": "missing", "file_hash": None},
+        ]}
+
+        statuses = client.get_documents_status(["/d/a.txt", "/d/b.txt"], {"/d/a.txt": "h1"})
+
+        assert statuses["/d/a.txt"]["status"] == "unchanged"
+        assert statuses["/d/b.txt"]["status"] == "missing"
+        args, kwargs = base.request.call_args
+        assert args == ("POST", "http://api/api/v1/documents/status:batch")
+        assert kwargs["json"] == {"items": [
+            {"source_uri": "/d/a.txt", "file_hash": "h1"},
+            {"source_uri": "/d/b.txt"},
+        ]}
+
+    def test_older_server_returns_none(self):
+        from desktop_app.utils.errors import APIError
+        client, base = self._client()
+        base.request.side_effect = APIError("Method Not Allowed", status_code=405)
+        assert client.get_documents_status(["/d/a.txt"]) is None
+
+
+def _files(count):
+    return [
+        {"path": Path(f"f{i}.txt"), "full_path": f"/d/f{i}.txt", "force_reindex": False}
+        for i in range(count)
+    ]
+
+
+class TestUploadWorkerPaging:
+    def _run(self, api_client, files_data):
+        from desktop_app.ui.workers import UploadWorker
+        worker = UploadWorker(api_client, files_data)
+        results = []
+        worker.file_finished.connect(lambda i, ok, msg: results.append((i, msg)))
+        with patch("desktop_app.ui.workers.calculate_file_hash", return_value="h"):
+            worker.run()
+        return results
+
+    def test_checks_files_a_page_at_a_time(self):
+        api_client = MagicMock()
+
+        def status(paths):
+            return {p: {"status": "present", "file_hash": "h"} for p in paths
+                    if p.endswith(("0.txt", "2.txt"))}
+
+        api_client.get_documents_status.side_effect = status
+        files = _files(5)
+        files[4]["force_reindex"] = True
+
+        with patch("desktop_app.ui.workers.UPLOAD_STATUS_PAGE_SIZE", 3):
+            results = self._run(api_client, files)
+
+        pages = [call.args[0] for call in api_client.get_documents_status.call_args_list]
+        assert sorted(pages) == [["/d/f0.txt", "/d/f1.txt", "/d/f2.txt"], ["/d/f3.txt"]]
+        api_client.get_document_metadata.assert_not_called()
+        assert [i for i, msg in results if "skipped" in msg] == [0, 2]
+        uploaded = {c.kwargs["custom_source_uri"] for c in api_client.upload_document.call_args_list}
+        assert uploaded == {"/d/f1.txt", "/d/f3.txt", "/d/f4.txt"}
+
+    def test_falls_back_to_per_file_lookups(self):
+        api_client = MagicMock()
+        api_client.get_documents_status.return_value = None
+        api_client.get_document_metadata.return_value = {"metadata": {"file_hash": "h"}}
+
+        results = self._run(api_client, _files(3))
+
+        api_client.get_documents_status.assert_called_once()
+        assert api_client.get_document_metadata.call_count == 3
+        assert all("skipped" in msg for _, msg in results)
@@ -3,7 +3,7 @@ Tests for Hierarchical Document Browser (#7).
 
 Tests cover:
 - _normalize_path helper
-- get_tree_children logic (with mocked DB)
+- get_tree_children / get_tree_stats over the materialized folder hierarchy
 - get_tree_stats resilience
 - search_tree resilience
 - API endpoint registration
@@ -58,69 +58,221 @@ class TestGetTreeChildren:
         assert result["children"] == []
         assert result["total"] == 0
 
-    @patch("document_tree._get_db_connection")
-    def test_root_level_with_files_and_folders(self, mock_conn):
-        now = datetime(2026, 2, 10, 12, 0, 0, tzinfo=timezone.utc)
-        mock_cur = MagicMock()
-        mock_cur.fetchall.return_value = [
-            ("docs/report.pdf", "doc-1", 3, now, now),
-            ("docs/notes.txt", "doc-2", 1, now, now),
-            ("images/photo.jpg", "doc-3", 1, now, now),
-            ("readme.md", "doc-4", 1, now, now),
-        ]
-        mock_conn.return_value.__enter__.return_value.cursor.return_value = mock_cur
+    def test_malformed_cursor_rejected(self):
+        from document_tree import get_tree_children
+        with pytest.raises(ValueError):
+            get_tree_children("", cursor="not-a-cursor")
 
+
+# ===========================================================================
+# Test: materialized folder hierarchy (DB-backed)
+# ===========================================================================
+
+
+def _seed(db_manager, docs):
+    """Insert one chunk per (document_id, source_uri, chunk_count)."""
+    from database import DocumentRepository
+    repo = DocumentRepository(db_manager)
+    repo.insert_chunks([
+        (doc_id, i, f"{doc_id} {i}", uri, [0.0] * 384, {})
+        for doc_id, uri, count in docs
+        for i in range(count)
+    ])
+    return repo
+
+
+@pytest.mark.database
+class TestDocumentFolders:
+    DOCS = [
+        ("doc-1", "docs/report.pdf", 3),
+        ("doc-2", "docs/notes.txt", 1),
+        ("doc-5", "docs/sub/deep.txt", 2),
+        ("doc-3", "images/photo.jpg", 1),
+        ("doc-4", "readme.md", 1),
+    ]
+
+    def test_root_level_with_files_and_folders(self, db_manager):
         from document_tree import get_tree_children
+        _seed(db_manager, self.DOCS)
+
         result = get_tree_children("")
 
         assert result["total_folders"] == 2  # docs, images
         assert result["total_files"] == 1    # readme.md
-        assert result["total"] == 3
-
-        # Check folder aggregation
-        folders = [c for c in result["children"] if c["type"] == "folder"]
-        docs_folder = next(f for f in folders if f["name"] == "docs")
-        assert docs_folder["document_count"] == 2
-
-    @patch("document_tree._get_db_connection")
-    def test_subfolder_level(self, mock_conn):
-        now = datetime(2026, 2, 10, 12, 0, 0, tzinfo=timezone.utc)
-        mock_cur = MagicMock()
-        mock_cur.fetchall.return_value = [
-            ("docs/report.pdf", "doc-1", 3, now, now),
-            ("docs/sub/deep.txt", "doc-5", 1, now, now),
-        ]
-        mock_conn.return_value.__enter__.return_value.cursor.return_value = mock_cur
+        assert [c["name"] for c in result["children"]] == ["docs", "images", "readme.md"]
+        docs_folder = result["children"][0]
+        assert docs_folder["document_count"] == 3
+        assert docs_folder["latest_indexed_at"] is not None
 
+    def test_subfolder_level(self, db_manager):
         from document_tree import get_tree_children
+        _seed(db_manager, self.DOCS)
+
         result = get_tree_children("docs")
 
         assert result["parent_path"] == "docs"
-        files = [c for c in result["children"] if c["type"] == "file"]
-        folders = [c for c in result["children"] if c["type"] == "folder"]
-        assert len(files) == 1
-        assert files[0]["name"] == "report.pdf"
-        assert len(folders) == 1
-        assert folders[0]["name"] == "sub"
+        children = [(c["type"], c["name"]) for c in result["children"]]
+        assert children == [("folder", "sub"), ("file", "notes.txt"), ("file", "report.pdf")]
+        report = result["children"][2]
+        assert report["document_id"] == "doc-1"
+        assert report["chunk_count"] == 3
 
-    @patch("document_tree._get_db_connection")
-    def test_pagination(self, mock_conn):
-        now = datetime(2026, 2, 10, 12, 0, 0, tzinfo=timezone.utc)
-        mock_cur = MagicMock()
-        mock_cur.fetchall.return_value = [
-            ("a.txt", "d1", 1, now, now),
-            ("b.txt", "d2", 1, now, now),
-            ("c.txt", "d3", 1, now, now),
-        ]
-        mock_conn.return_value.__enter__.return_value.cursor.return_value = mock_cur
+    def test_windows_and_absolute_paths(self, db_manager):
+        from document_tree import get_tree_children
+        _seed(db_manager, [
+            ("w", "C:\\Share\\a.pdf", 1),
+            ("l", "/home/user/b.txt", 1),
+        ])
+
+        root = {c["name"]: c for c in get_tree_children("")["children"]}
+        assert root["C:"]["path"] == "C:"
+        assert root["home"]["path"] == "/home"
 
+        share = get_tree_children("C:\\Share")["children"]
+        assert [(c["name"], c["path"]) for c in share] == [("a.pdf", "C:/Share/a.pdf")]
+
+    def test_keyset_pagination_walks_folders_then_files(self, db_manager):
         from document_tree import get_tree_children
-        result = get_tree_children("", limit=2, offset=0)
-        assert len(result["children"]) == 2
-        assert result["total"] == 3
+        _seed(db_manager, [
+            (f"f{i}", f"root/dir{i}/x.txt", 1) for i in range(3)
+        ] + [
+            (f"d{i}", f"root/file{i}.txt", 1) for i in range(3)
+        ])
+
+        names, cursor = [], None
+        while True:
+            page = get_tree_children("root", limit=2, cursor=cursor)
+            names += [c["name"] for c in page["children"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert names == ["dir0", "dir1", "dir2", "file0.txt", "file1.txt", "file2.txt"]
+
+        # Offset paging still works for older clients.
+        assert [c["name"] for c in get_tree_children("root", limit=2, offset=2)["children"]] == [
+            "dir2", "file0.txt",
+        ]
 
-        result2 = get_tree_children("", limit=2, offset=2)
-        assert len(result2["children"]) == 1
+    def test_counts_follow_deletes_and_visibility(self, db_manager):
+        from document_tree import get_tree_children, get_tree_stats
+        from document_visibility import visibility_where_clause
+        repo = _seed(db_manager, self.DOCS)
+
+        with db_manager.get_cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO users (id, email) VALUES ('tree-u1', 'tree-u1@test.local') "
+                "ON CONFLICT (id) DO NOTHING"
+            )
+            cursor.execute(
+                "UPDATE document_chunks SET owner_id = 'tree-u1', visibility = 'private' "
+                "WHERE document_id = 'doc-5'"
+            )
+        try:
+            stranger = visibility_where_clause("someone-else", False)
+            owner = visibility_where_clause("tree-u1", False)
+
+            def docs_count(visibility):
+                root = get_tree_children("", visibility=visibility)["children"]
+                return next(c for c in root if c["name"] == "docs")["document_count"]
+
+            assert docs_count(stranger) == 2
+            assert docs_count(owner) == 3
+            assert get_tree_children("docs", visibility=stranger)["total_folders"] == 0
+
+            repo.delete_document("doc-1")
+            assert docs_count(owner) == 2
+            stats = get_tree_stats(visibility=owner)
+            assert stats == {"total_documents": 4, "total_chunks": 5, "top_level_items": 3}
+        finally:
+            with db_manager.get_cursor() as cursor:
+                cursor.execute("DELETE FROM document_chunks WHERE owner_id = 'tree-u1'")
+                cursor.execute("DELETE FROM users WHERE id = 'tree-u1'")
+
+    def test_quarantined_documents_stay_counted_until_purged(self, db_manager):
+        from document_tree import get_tree_children
+        repo = _seed(db_manager, self.DOCS)
+
+        with db_manager.get_cursor() as cursor:
+            cursor.execute(
+                "UPDATE document_chunks SET quarantined_at = now() WHERE document_id = 'doc-2'"
+            )
+        root = {c["name"]: c for c in get_tree_children("")["children"]}
+        files = [c["name"] for c in get_tree_children("docs")["children"] if c["type"] == "file"]
+        # Folder counts agree with the files the level still lists.
+        assert root["docs"]["document_count"] == 3
+        assert "notes.txt" in files
+
+        repo.delete_document("doc-2")
+        root = {c["name"]: c for c in get_tree_children("")["children"]}
+        assert root["docs"]["document_count"] == 2
+
+    def test_latest_indexed_at_recomputed_when_newest_removed(self, db_manager):
+        _seed(db_manager, [("old", "box/old.txt", 1)])
+        _seed(db_manager, [("new", "box/inner/new.txt", 1)])
+
+        def latest():
+            with db_manager.get_cursor() as cursor:
+                cursor.execute(
+                    "SELECT MAX(latest_indexed_at) FROM document_folders WHERE path = 'box'"
+                )
+                return cursor.fetchone()[0]
+
+        with db_manager.get_cursor() as cursor:
+            cursor.execute("SELECT first_indexed FROM documents WHERE document_id = 'old'")
+            old_indexed = cursor.fetchone()[0]
+        with db_manager.get_cursor() as cursor:
+            cursor.execute("DELETE FROM document_chunks WHERE document_id = 'new'")
+        assert latest() == old_indexed
+        with db_manager.get_cursor() as cursor:
+            cursor.execute(
+                "SELECT COALESCE(SUM(doc_count), 0), MAX(latest_indexed_at) "
+                "FROM document_folders WHERE path = 'box/inner'"
+            )
+            assert cursor.fetchone() == (0, None)
+
+    def test_striped_folder_rows_are_summed(self, db_manager):
+        from document_tree import get_tree_children
+        _seed(db_manager, [("s-old", "stripe/a/old.txt", 1), ("s-new", "stripe/b/new.txt", 2)])
+
+        with db_manager.get_cursor() as cursor:
+            # Move the rows to another writer's slot, then delete from this
+            # backend: the -1 lands on a separate stripe.
+            cursor.execute(
+                "UPDATE document_folders SET slot = (pg_backend_pid() + 1) % 16 "
+                "WHERE path LIKE 'stripe%%'"
+            )
+            cursor.execute("DELETE FROM document_chunks WHERE document_id = 's-new'")
+            cursor.execute(
+                "SELECT COUNT(*) FROM document_folders WHERE path = 'stripe/b'"
+            )
+            assert cursor.fetchone()[0] == 2
+            cursor.execute(
+                "SELECT first_indexed FROM documents WHERE document_id = 's-old'"
+            )
+            old_indexed = cursor.fetchone()[0]
+
+        level = get_tree_children("stripe")
+        assert [c["name"] for c in level["children"]] == ["a"]
+        assert level["total_folders"] == 1
+        root = {c["name"]: c for c in get_tree_children("")["children"]}
+        assert root["stripe"]["document_count"] == 1
+        assert root["stripe"]["latest_indexed_at"] == old_indexed.isoformat()
+
+    def test_rebuild_matches_incremental(self, db_manager):
+        _seed(db_manager, self.DOCS)
+        # Incremental rows are striped by writer slot; compare the sums.
+        query = (
+            "SELECT path, owner_id, parent_path, name, depth, SUM(doc_count), "
+            "SUM(chunk_count), MAX(latest_indexed_at) FROM document_folders "
+            "GROUP BY path, owner_id, parent_path, name, depth "
+            "HAVING SUM(doc_count) > 0 ORDER BY path"
+        )
+        with db_manager.get_cursor() as cursor:
+            cursor.execute(query)
+            incremental = cursor.fetchall()
+            cursor.execute("SELECT rebuild_document_folders()")
+            cursor.execute(query)
+            assert cursor.fetchall() == incremental
 
 
 # ===========================================================================
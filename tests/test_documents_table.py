@@ -0,0 +1,152 @@
+"""
+Tests for the trigger-maintained ``documents`` table (migration 021).
+"""
+
+import pytest
+
+from database import DocumentRepository
+
+
+def _document_row(db_manager, document_id):
+    with db_manager.get_cursor(dict_cursor=True) as cursor:
+        cursor.execute("SELECT * FROM documents WHERE document_id = %s", (document_id,))
+        row = cursor.fetchone()
+        return dict(row) if row else None
+
+
+@pytest.mark.database
+class TestDocumentsTable:
+    def _insert(self, repo, sample_embeddings, document_id="doc1", count=3,
+                source_uri="C:\\docs\\report.pdf"):
+        repo.insert_chunks([
+            (document_id, i, f"chunk {i}", source_uri, sample_embeddings[i],
+             {"type": "report", "file_hash": "abc123"})
+            for i in range(count)
+        ])
+
+    def test_insert_creates_document_row(self, db_manager, sample_embeddings):
+        repo = DocumentRepository(db_manager)
+        self._insert(repo, sample_embeddings)
+
+        row = _document_row(db_manager, "doc1")
+        assert row["chunk_count"] == 3
+        assert row["source_uri"] == "C:\\docs\\report.pdf"
+        assert row["norm_uri"] == "C:/docs/report.pdf"
+        assert row["document_type"] == "report"
+        assert row["file_hash"] == "abc123"
+        assert row["visibility"] == "shared"
+        assert row["first_indexed"] is not None
+
+    def test_partial_delete_and_full_delete(self, db_manager, sample_embeddings):
+        repo = DocumentRepository(db_manager)
+        self._insert(repo, sample_embeddings)
+
+        with db_manager.get_cursor() as cursor:
+            cursor.execute(
+                "DELETE FROM document_chunks WHERE document_id = 'doc1' AND chunk_index = 2"
+            )
+        assert _document_row(db_manager, "doc1")["chunk_count"] == 2
+
+        repo.delete_document("doc1")
+        assert _document_row(db_manager, "doc1") is None
+
+    def test_visibility_update_is_reflected(self, db_manager, sample_embeddings):
+        repo = DocumentRepository(db_manager)
+        self._insert(repo, sample_embeddings)
+
+        with db_manager.get_cursor() as cursor:
+            cursor.execute(
+                "UPDATE document_chunks SET visibility = 'private' WHERE document_id = 'doc1'"
+            )
+        assert _document_row(db_manager, "doc1")["visibility"] == "private"
+
+    def test_content_only_update_does_not_reaggregate(self, db_manager, sample_embeddings):
+        repo = DocumentRepository(db_manager)
+        self._insert(repo, sample_embeddings)
+        with db_manager.get_cursor() as cursor:
+            # A stale aggregate makes a refresh observable.
+            cursor.execute("UPDATE documents SET chunk_count = 99 WHERE document_id = 'doc1'")
+        before = _document_row(db_manager, "doc1")["last_updated"]
+
+        with db_manager.get_cursor() as cursor:
+            cursor.execute(
+                "UPDATE document_chunks SET text_content = 'edited' WHERE document_id = 'doc1'"
+            )
+        row = _document_row(db_manager, "doc1")
+        assert row["chunk_count"] == 99
+        assert row["last_updated"] > before
+
+        with db_manager.get_cursor() as cursor:
+            cursor.execute(
+                "UPDATE document_chunks SET metadata = metadata || '{\"type\": \"memo\"}' "
+                "WHERE document_id = 'doc1' AND chunk_index = 0"
+            )
+        row = _document_row(db_manager, "doc1")
+        assert row["chunk_count"] == 3
+        assert row["document_type"] == "memo"
+
+    def test_moving_chunks_refreshes_both_documents(self, db_manager, sample_embeddings):
+        repo = DocumentRepository(db_manager)
+        self._insert(repo, sample_embeddings)
+
+        with db_manager.get_cursor() as cursor:
+            cursor.execute(
+                "UPDATE document_chunks SET document_id = 'doc2' "
+                "WHERE document_id = 'doc1' AND chunk_index = 2"
+            )
+        assert _document_row(db_manager, "doc1")["chunk_count"] == 2
+        assert _document_row(db_manager, "doc2")["chunk_count"] == 1
+
+    def test_rolled_back_insert_leaves_no_row(self, db_manager, sample_embeddings):
+        with db_manager.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT INTO document_chunks (document_id, chunk_index, text_content, source_uri) "
+                "VALUES ('ghost', 0, 'x', '/ghost.txt')"
+            )
+            conn.rollback()
+        assert _document_row(db_manager, "ghost") is None
+
+    def test_truncate_clears_documents(self, db_manager, sample_embeddings):
+        repo = DocumentRepository(db_manager)
+        self._insert(repo, sample_embeddings)
+
+        with db_manager.get_cursor() as cursor:
+            cursor.execute("TRUNCATE document_chunks")
+            cursor.execute("SELECT COUNT(*) FROM documents")
+            assert cursor.fetchone()[0] == 0
+
+    def test_document_readers_use_documents_table(self, db_manager, sample_embeddings):
+        repo = DocumentRepository(db_manager)
+        self._insert(repo, sample_embeddings, "doc1", 3, "/docs/a/one.txt")
+        self._insert(repo, sample_embeddings, "doc2", 2, "/docs/b/two.txt")
+
+        docs, total = repo.list_documents(
+            sort_by="chunk_count", sort_dir="desc", source_prefix="/docs", with_total=True
+        )
+        assert total == 2
+        assert [(d["document_id"], d["chunk_count"]) for d in docs] == [("doc1", 3), ("doc2", 2)]
+
+        stats = repo.get_statistics()
+        assert stats["total_documents"] == 2
+        assert stats["total_chunks"] == 5
+
+        doc = repo.get_document_by_id("doc2")
+        assert doc["chunk_count"] == 2
+        assert doc["metadata"]["type"] == "report"
+
+    def test_batch_status_reads_many_documents(self, db_manager, sample_embeddings):
+        repo = DocumentRepository(db_manager)
+        self._insert(repo, sample_embeddings, "doc1", 1, "/docs/a/one.txt")
+        self._insert(repo, sample_embeddings, "doc2", 1, "/docs/b/two.txt")
+
+        found = repo.get_documents_status(["doc1", "doc2", "missing"])
+        assert found == {
+            "doc1": {"document_id": "doc1", "source_uri": "/docs/a/one.txt",
+                     "file_hash": "abc123", "type": "report"},
+            "doc2": {"document_id": "doc2", "source_uri": "/docs/b/two.txt",
+                     "file_hash": "abc123", "type": "report"},
+        }
+        hidden = ("document_id <> %s", ["doc2"])
+        assert set(repo.get_documents_status(["doc1", "doc2"], visibility=hidden)) == {"doc1"}
+        assert repo.get_documents_status([]) == {}
@@ -224,7 +224,7 @@ async def test_bulk_delete_route_threads_visibility_to_both_stores(monkeypatch):
         "document_visibility.visibility_clause_for_key_record", lambda kr: VIS
     )
     monkeypatch.setattr(
-        "document_visibility.search_exclusions_for_key_record", lambda kr: ["hidden-1"]
+        "document_visibility.search_visibility_for_key_record", lambda kr: {"user_id": "u-1"}
     )
     monkeypatch.setattr(
         "config.get_config",
@@ -241,9 +241,9 @@ async def test_bulk_delete_route_threads_visibility_to_both_stores(monkeypatch):
 
     # Postgres delete got the visibility clause
     assert repo.bulk_delete.call_args.kwargs["visibility"] == VIS
-    # LanceDB delete got the hidden-id exclusion merged in (no drift)
+    # LanceDB delete got the same visibility predicate (no drift)
     lancedb_filters = fake_adapter.bulk_delete.call_args.args[0]
-    assert "hidden-1" in lancedb_filters["excluded_document_ids"]
+    assert lancedb_filters["visible_to"] == {"user_id": "u-1"}
     assert lancedb_filters["namespace"] == "finance"
 
 
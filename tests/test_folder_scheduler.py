@@ -2,7 +2,7 @@
 Tests for the in-app FolderScheduler (#6).
 
 Tests cover:
-- _cron_is_due helper (various cron patterns, never-scanned, edge cases)
+- _cron_is_due helper (cron patterns via the shared evaluator, never-scanned, edge cases)
 - FolderScheduler lifecycle (start/stop, is_running)
 - FolderScheduler._check_folders logic
 """
@@ -45,7 +45,8 @@ class TestCronIsDue:
 
     def test_every_hour_not_due(self):
         from desktop_app.utils.folder_scheduler import _cron_is_due
-        recent = (datetime.now(timezone.utc) - timedelta(minutes=30)).isoformat()
+        # Scanned after this hour's fire time: next due at the top of the next hour
+        recent = datetime.now(timezone.utc).replace(minute=0, second=1, microsecond=0).isoformat()
         assert _cron_is_due("0 * * * *", recent) is False
 
     def test_daily_midnight(self):
@@ -55,12 +56,18 @@ class TestCronIsDue:
 
     def test_daily_not_due(self):
         from desktop_app.utils.folder_scheduler import _cron_is_due
-        recent = (datetime.now(timezone.utc) - timedelta(hours=12)).isoformat()
-        assert _cron_is_due("0 0 * * *", recent) is False
+        today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=1, microsecond=0)
+        assert _cron_is_due("0 0 * * *", today.isoformat()) is False
 
-    def test_invalid_cron_returns_false(self):
+    def test_invalid_cron_uses_default_schedule(self):
         from desktop_app.utils.folder_scheduler import _cron_is_due
-        assert _cron_is_due("bad", "2026-01-01T00:00:00+00:00") is False
+        # Same fallback as the server scheduler: "0 */6 * * *"
+        assert _cron_is_due("bad", "2026-01-01T00:00:00+00:00") is True
+        assert _cron_is_due("bad", datetime.now(timezone.utc).isoformat()) is False
+
+    def test_unparseable_timestamp_is_not_due(self):
+        from desktop_app.utils.folder_scheduler import _cron_is_due
+        assert _cron_is_due("0 */6 * * *", "yesterday") is False
 
     def test_every_3_hours(self):
         from desktop_app.utils.folder_scheduler import _cron_is_due
@@ -69,8 +76,9 @@ class TestCronIsDue:
 
     def test_every_12_hours_not_due(self):
         from desktop_app.utils.folder_scheduler import _cron_is_due
-        recent = (datetime.now(timezone.utc) - timedelta(hours=6)).isoformat()
-        assert _cron_is_due("0 */12 * * *", recent) is False
+        now = datetime.now(timezone.utc)
+        last_fire = now.replace(hour=now.hour - now.hour % 12, minute=0, second=1, microsecond=0)
+        assert _cron_is_due("0 */12 * * *", last_fire.isoformat()) is False
 
     def test_z_suffix_timestamp(self):
         from desktop_app.utils.folder_scheduler import _cron_is_due
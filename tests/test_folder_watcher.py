@@ -0,0 +1,239 @@
+"""
+Tests for watch mode (folder_watcher.py).
+
+Tests cover:
+- coalescing changed paths, debounce and maximum delay
+- bursts over the pending cap and root removal turning into a full scan
+- translating watchdog events (moves, directories, paths outside the root)
+- watching a real directory through inotify
+- the server scheduler running ready batches, queueing full scans and
+  holding batches of roots that are being scanned
+"""
+
+import asyncio
+import sys
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from watchdog.events import (
+    DirDeletedEvent,
+    DirModifiedEvent,
+    FileClosedEvent,
+    FileCreatedEvent,
+    FileModifiedEvent,
+    FileMovedEvent,
+    FileOpenedEvent,
+)
+
+from folder_watcher import FolderWatcher, PendingChanges, _RootEventHandler
+
+
+class TestPendingChanges:
+    def test_coalesces_paths_and_reports_new_batches(self):
+        pending = PendingChanges(max_pending=10)
+        assert pending.add(["a.txt"], now=0.0) is True
+        assert pending.add(["a.txt", "b.txt"], now=1.0) is False
+        assert pending.drain() == ({"a.txt", "b.txt"}, False)
+        assert pending.ready_at(2.0, 30.0) is None
+
+    def test_debounce_and_max_delay(self):
+        pending = PendingChanges(max_pending=10)
+        pending.add(["a"], now=0.0)
+        assert pending.ready_at(2.0, 30.0) == 2.0
+        pending.add(["b"], now=1.5)
+        assert pending.ready_at(2.0, 30.0) == 3.5
+        # A continuous burst is flushed after the maximum delay
+        pending.add(["c"], now=29.0)
+        assert pending.ready_at(2.0, 30.0) == 30.0
+
+    def test_burst_over_cap_becomes_full_scan(self):
+        pending = PendingChanges(max_pending=2)
+        pending.add(["a", "b", "c"], now=0.0)
+        assert pending.ready_at(2.0, 30.0) == 0.0
+        assert pending.drain() == (set(), True)
+
+
+def _handler(tmp_path):
+    pending = PendingChanges(max_pending=10)
+    on_batch = MagicMock()
+    return _RootEventHandler(str(tmp_path), pending, on_batch), pending, on_batch
+
+
+class TestEventHandler:
+    def test_file_events(self, tmp_path):
+        handler, pending, on_batch = _handler(tmp_path)
+        handler.dispatch(FileCreatedEvent(str(tmp_path / "sub" / "a.txt")))
+        handler.dispatch(FileModifiedEvent(str(tmp_path / "sub" / "a.txt")))
+        handler.dispatch(FileClosedEvent(str(tmp_path / "c.txt")))
+        handler.dispatch(FileMovedEvent(str(tmp_path / "b.txt"), str(tmp_path / "d.txt")))
+        assert on_batch.call_count == 1
+        assert pending.drain() == ({"sub/a.txt", "c.txt", "b.txt", "d.txt"}, False)
+
+    def test_ignored_events(self, tmp_path):
+        handler, pending, on_batch = _handler(tmp_path)
+        handler.dispatch(FileOpenedEvent(str(tmp_path / "a.txt")))
+        handler.dispatch(DirModifiedEvent(str(tmp_path / "sub")))
+        handler.dispatch(FileCreatedEvent(str(tmp_path.parent / "elsewhere.txt")))
+        on_batch.assert_not_called()
+        assert len(pending) == 0
+
+    def test_moves_across_the_root_boundary(self, tmp_path):
+        handler, pending, _ = _handler(tmp_path / "root")
+        handler.dispatch(FileMovedEvent(str(tmp_path / "root" / "a.txt"), str(tmp_path / "out.txt")))
+        handler.dispatch(FileMovedEvent(str(tmp_path / "in.txt"), str(tmp_path / "root" / "b.txt")))
+        assert pending.drain() == ({"a.txt", "b.txt"}, False)
+
+    def test_directory_events_mark_the_subtree(self, tmp_path):
+        handler, pending, _ = _handler(tmp_path)
+        handler.dispatch(DirDeletedEvent(str(tmp_path / "old")))
+        assert pending.drain() == ({"old/"}, False)
+
+    def test_root_removal_requests_full_scan(self, tmp_path):
+        handler, pending, on_batch = _handler(tmp_path)
+        handler.dispatch(DirDeletedEvent(str(tmp_path)))
+        on_batch.assert_called_once()
+        assert pending.drain() == (set(), True)
+
+
+class TestFolderWatcher:
+    def test_sync_watches_and_unwatches(self):
+        observer = MagicMock()
+        watcher = FolderWatcher(on_batch=MagicMock(), observer_factory=lambda: observer)
+        assert watcher.start()
+
+        watcher.sync({"f1": "/a", "f2": "/b"})
+        assert watcher.watched() == {"f1": "/a", "f2": "/b"}
+        assert not watcher.needs_sync({"f1": "/a", "f2": "/b"})
+
+        watcher.sync({"f1": "/moved"})
+        assert watcher.watched() == {"f1": "/moved"}
+        assert observer.unschedule.call_count == 2
+
+    def test_unwatchable_root_is_not_retried_until_cleared(self):
+        observer = MagicMock()
+        observer.schedule.side_effect = OSError(28, "inotify watch limit reached")
+        watcher = FolderWatcher(on_batch=MagicMock(), observer_factory=lambda: observer)
+        watcher.start()
+
+        watcher.sync({"f1": "/a"})
+        assert watcher.watched() == {}
+        assert not watcher.needs_sync({"f1": "/a"})
+        watcher.clear_failures()
+        assert watcher.needs_sync({"f1": "/a"})
+
+    def test_unavailable_inotify_disables_watch_mode(self):
+        def factory():
+            raise ImportError("no inotify")
+
+        watcher = FolderWatcher(on_batch=MagicMock(), observer_factory=factory)
+        assert watcher.start() is False
+        assert watcher.watch("f1", "/a") is False
+
+    def test_busy_roots_keep_their_batch(self, tmp_path):
+        watcher = FolderWatcher(on_batch=MagicMock(), observer_factory=MagicMock(),
+                                debounce=0.0, max_delay=30.0)
+        watcher.start()
+        watcher.watch("f1", str(tmp_path))
+        pending = watcher._roots["f1"][2]
+        pending.add(["a.txt"], now=0.0)
+
+        assert watcher.next_ready(busy={"f1"}) is None
+        assert watcher.pop_ready(1.0, busy={"f1"}) == []
+        assert watcher.pop_ready(1.0) == [("f1", {"a.txt"}, False)]
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux-only")
+def test_watches_real_directory(tmp_path):
+    batches = []
+    watcher = FolderWatcher(on_batch=lambda: batches.append(time.monotonic()),
+                            debounce=0.2, max_delay=5.0)
+    assert watcher.start()
+    try:
+        (tmp_path / "sub").mkdir()
+        assert watcher.watch("f1", str(tmp_path))
+        (tmp_path / "sub" / "a.txt").write_text("alpha")
+        (tmp_path / "sub" / "a.txt").write_text("alpha, again")
+        (tmp_path / "b.txt").write_text("beta")
+        (tmp_path / "b.txt").rename(tmp_path / "c.txt")
+
+        deadline = time.monotonic() + 5
+        ready = []
+        while not ready and time.monotonic() < deadline:
+            time.sleep(0.1)
+            ready = watcher.pop_ready(time.monotonic())
+        assert batches
+        assert ready == [("f1", {"sub/a.txt", "b.txt", "c.txt"}, False)]
+    finally:
+        watcher.stop()
+
+
+def _folder(folder_id):
+    return {
+        "id": folder_id,
+        "root_id": f"root-{folder_id}",
+        "folder_path": f"/{folder_id}",
+        "paused": False,
+        "consecutive_failures": 0,
+        "last_scanned_at": "2099-01-01T00:00:00+00:00",
+        "schedule_cron": "0 */6 * * *",
+    }
+
+
+class TestSchedulerWatchBatches:
+    def _scheduler(self):
+        from server_scheduler import ServerScheduler
+
+        scheduler = ServerScheduler()
+        scheduler._watcher = FolderWatcher(on_batch=MagicMock(), observer_factory=MagicMock(),
+                                           debounce=0.0, max_delay=30.0)
+        scheduler._watcher.start()
+        return scheduler
+
+    @pytest.mark.asyncio
+    async def test_ready_batch_indexes_only_changed_paths(self):
+        scheduler = self._scheduler()
+        with patch("watched_folders.list_folders", return_value=[_folder("a")]), \
+             patch("watched_folders.get_folder", return_value=_folder("a")), \
+             patch("watched_folders.scan_folder",
+                   return_value={"status": "success", "files_added": 1}) as mock_scan, \
+             patch("watched_folders.mark_scanned") as mock_mark:
+            await scheduler._run_pending_scans()
+            assert scheduler._watcher.watched() == {"a": "/a"}
+
+            scheduler._watcher._roots["a"][2].add(["x.txt"], now=0.0)
+            await scheduler._run_pending_scans()
+            await asyncio.gather(*scheduler._scan_tasks.values())
+
+        assert mock_scan.call_args.kwargs["paths"] == {"x.txt"}
+        # The cron scan still runs on schedule
+        mock_mark.assert_not_called()
+        assert "a" in scheduler._due_at
+
+    @pytest.mark.asyncio
+    async def test_full_scan_request_queues_the_root(self):
+        scheduler = self._scheduler()
+        with patch("watched_folders.list_folders", return_value=[_folder("a")]), \
+             patch.object(scheduler, "_dispatch"):
+            await scheduler._run_pending_scans()
+            scheduler._watcher._roots["a"][2].request_full_scan(now=0.0)
+            await scheduler._run_pending_scans()
+
+        assert [f["id"] for f in scheduler._queue] == ["a"]
+        assert scheduler._scan_tasks == {}
+
+    @pytest.mark.asyncio
+    async def test_unscheduled_root_is_unwatched(self):
+        scheduler = self._scheduler()
+        paused = dict(_folder("a"), paused=True)
+        with patch("watched_folders.list_folders", return_value=[_folder("a")]), \
+             patch("watched_folders.get_folder", return_value=paused):
+            await scheduler._run_pending_scans()
+            assert scheduler._watcher.watched() == {"a": "/a"}
+            scheduler._on_folder_change({"a"})
+            await scheduler._run_pending_scans()
+
+        assert scheduler._watcher.watched() == {}
+        assert scheduler.get_status()["watch"] == {
+            "enabled": True, "watched_roots": 0, "pending_paths": 0,
+        }
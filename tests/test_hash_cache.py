@@ -0,0 +1,140 @@
+"""
+Tests for the desktop hash cache (desktop_app/utils/hash_cache.py) and
+file hashing.
+
+Tests cover:
+- memory-mapped and chunked hashing giving the same xxHash64
+- cache hits skipping the read, and changed files being re-hashed
+- files modified while being hashed not being cached
+- pruning the oldest entries past the size limit
+- an unusable cache database falling back to hashing
+- UploadWorker rescans of unchanged files hashing nothing
+"""
+
+import os
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import xxhash
+
+from desktop_app.utils.hash_cache import HashCache
+from desktop_app.utils.hashing import calculate_file_hash
+
+
+def _counting_hash():
+    calls = []
+
+    def hash_func(path):
+        calls.append(path)
+        return calculate_file_hash(path)
+
+    return hash_func, calls
+
+
+class TestCalculateFileHash:
+    def test_mmap_and_chunked_reads_agree(self, tmp_path):
+        path = tmp_path / "big.bin"
+        data = os.urandom(300_000)
+        path.write_bytes(data)
+        expected = xxhash.xxh64(data).hexdigest()
+
+        assert calculate_file_hash(path, chunk_size=4096) == expected
+        with patch("desktop_app.utils.hashing.MMAP_MIN_BYTES", 1):
+            assert calculate_file_hash(path) == expected
+
+    def test_empty_file(self, tmp_path):
+        path = tmp_path / "empty.txt"
+        path.write_bytes(b"")
+        with patch("desktop_app.utils.hashing.MMAP_MIN_BYTES", 0):
+            assert calculate_file_hash(path) == xxhash.xxh64(b"").hexdigest()
+
+
+class TestHashCache:
+    def test_unchanged_file_is_served_from_cache(self, tmp_path):
+        cache = HashCache(tmp_path / "cache.sqlite3")
+        path = tmp_path / "a.txt"
+        path.write_text("alpha")
+        hash_func, calls = _counting_hash()
+
+        first = cache.file_hash(path, hash_func)
+        assert cache.file_hash(path, hash_func) == first
+        assert len(calls) == 1
+
+        # Survives reopening
+        cache.close()
+        assert HashCache(tmp_path / "cache.sqlite3").file_hash(path, hash_func) == first
+        assert len(calls) == 1
+
+    def test_changed_file_is_rehashed(self, tmp_path):
+        cache = HashCache(tmp_path / "cache.sqlite3")
+        path = tmp_path / "a.txt"
+        path.write_text("alpha")
+        hash_func, calls = _counting_hash()
+        first = cache.file_hash(path, hash_func)
+
+        path.write_text("alpha, edited")
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        assert cache.file_hash(path, hash_func) != first
+        assert len(calls) == 2
+
+    def test_file_modified_while_hashing_is_not_cached(self, tmp_path):
+        cache = HashCache(tmp_path / "cache.sqlite3")
+        path = tmp_path / "a.txt"
+        path.write_text("alpha")
+
+        def hash_and_touch(p):
+            result = calculate_file_hash(p)
+            p.write_text("alpha, still being written")
+            return result
+
+        cache.file_hash(path, hash_and_touch)
+        stat = path.stat()
+        assert cache.get(str(path), stat.st_size, stat.st_mtime_ns) is None
+
+    def test_prunes_oldest_entries(self, tmp_path):
+        cache = HashCache(tmp_path / "cache.sqlite3", max_entries=10)
+        for i in range(20):
+            cache.put(f"/f{i}", 1, 1, f"h{i}")
+        cache.prune()
+
+        assert cache.get("/f0", 1, 1) is None
+        assert cache.get("/f19", 1, 1) == "h19"
+        count = cache._conn.execute("SELECT COUNT(*) FROM file_hashes").fetchone()[0]
+        assert count == 9
+
+    def test_unusable_database_falls_back_to_hashing(self, tmp_path):
+        blocker = tmp_path / "not-a-dir"
+        blocker.write_text("")
+        cache = HashCache(blocker / "cache.sqlite3")
+        path = tmp_path / "a.txt"
+        path.write_text("alpha")
+        hash_func, calls = _counting_hash()
+
+        assert cache.file_hash(path, hash_func) == calculate_file_hash(path)
+        cache.file_hash(path, hash_func)
+        assert len(calls) == 2
+
+
+def test_upload_worker_rescan_hashes_nothing(tmp_path):
+    from desktop_app.ui.workers import UploadWorker
+
+    path = tmp_path / "a.txt"
+    path.write_text("alpha")
+    api_client = MagicMock()
+    api_client.get_documents_status.return_value = {
+        str(path): {"status": "present", "file_hash": calculate_file_hash(path)},
+    }
+    files_data = [{"path": path, "full_path": str(path), "force_reindex": False}]
+    cache = HashCache(tmp_path / "cache.sqlite3")
+
+    with patch("desktop_app.ui.workers.calculate_file_hash",
+               side_effect=calculate_file_hash) as mock_hash:
+        for _ in range(2):
+            UploadWorker(api_client, files_data, concurrency=1, hash_cache=cache).run()
+    # Close here rather than leaving the connection to the garbage collector
+    cache.close()
+
+    assert mock_hash.call_count == 1
+    api_client.upload_document.assert_not_called()
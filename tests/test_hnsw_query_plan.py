@@ -0,0 +1,202 @@
+"""
+Tests for per-query HNSW planning (DocumentRepository.plan_vector_scan).
+
+Tests cover:
+- ef_search sizing from the LIMIT and the estimated filter selectivity
+- the exact-scan fallback for tiny filtered subsets
+- iterative scans on pgvector 0.8+ and the relaxed-order re-sort
+- vector_plan reported through search_similar / DocumentRetriever.search
+- set_config scoping and pgvector version detection (DB-backed)
+"""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from database import DocumentRepository, HNSW_MAX_EF_SEARCH, apply_vector_plan
+
+
+def _config(max_rows=10000, ef_search=40, iterative="relaxed_order"):
+    return SimpleNamespace(retrieval=SimpleNamespace(
+        prefilter_max_rows=max_rows, hnsw_ef_search=ef_search, hnsw_iterative_scan=iterative,
+    ))
+
+
+def _repo(iterative_supported=False):
+    db = MagicMock()
+    db.supports_hnsw_iterative_scan.return_value = iterative_supported
+    return DocumentRepository(db)
+
+
+class TestPlanVectorScan:
+    def test_unfiltered_query_sizes_ef_search_from_limit(self):
+        repo = _repo()
+        with patch("database.get_config", return_value=_config()):
+            assert repo.plan_vector_scan(None, [], [], 10)["ef_search"] == 40
+            assert repo.plan_vector_scan(None, [], [], 500)["ef_search"] == 500
+            assert repo.plan_vector_scan(None, [], [], 5000)["ef_search"] == HNSW_MAX_EF_SEARCH
+
+    def test_probe_within_max_rows_picks_exact_scan(self):
+        repo = _repo()
+        with patch("database.get_config", return_value=_config()), \
+             patch.object(repo, "_probe_filtered_rows", return_value=120):
+            plan = repo.plan_vector_scan({"type": "memo"}, ["x"], [], 10)
+        assert plan["strategy"] == "exact"
+        assert plan["ef_search"] is None
+        assert plan["matched_rows"] == 120
+
+    def test_ef_search_scales_with_estimated_selectivity(self):
+        repo = _repo()
+        with patch("database.get_config", return_value=_config(iterative="off")), \
+             patch.object(repo, "_probe_filtered_rows", return_value=None), \
+             patch.object(repo, "_estimate_filtered_rows", return_value=(20000, 200000)):
+            plan = repo.plan_vector_scan({"metadata.author": "bob"}, ["x"], [], 10)
+        assert plan["strategy"] == "hnsw"
+        assert plan["selectivity"] == 0.1
+        assert plan["ef_search"] == 100
+
+    def test_tiny_selectivity_falls_back_to_exact_scan(self):
+        repo = _repo()
+        with patch("database.get_config", return_value=_config(iterative="off")), \
+             patch.object(repo, "_probe_filtered_rows", return_value=None), \
+             patch.object(repo, "_estimate_filtered_rows", return_value=(50, 200000)):
+            plan = repo.plan_vector_scan({"metadata.author": "bob"}, ["x"], [], 10)
+        assert plan["strategy"] == "exact"
+        assert plan["matched_rows"] == 50
+
+    def test_probe_over_max_rows_overrides_small_estimate(self):
+        repo = _repo()
+        with patch("database.get_config", return_value=_config(max_rows=100, iterative="off")), \
+             patch.object(repo, "_probe_filtered_rows", return_value=101), \
+             patch.object(repo, "_estimate_filtered_rows", return_value=(50, 200000)):
+            plan = repo.plan_vector_scan({"metadata.author": "bob"}, ["x"], [], 10)
+        assert plan["strategy"] == "hnsw"
+        assert plan["ef_search"] == HNSW_MAX_EF_SEARCH
+
+    def test_large_subset_keeps_hnsw_at_max_ef_search(self):
+        repo = _repo()
+        with patch("database.get_config", return_value=_config(max_rows=100, iterative="off")), \
+             patch.object(repo, "_probe_filtered_rows", return_value=None), \
+             patch.object(repo, "_estimate_filtered_rows", return_value=(5000, 10_000_000)):
+            plan = repo.plan_vector_scan({"metadata.author": "bob"}, ["x"], [], 10)
+        assert plan["strategy"] == "hnsw"
+        assert plan["ef_search"] == HNSW_MAX_EF_SEARCH
+
+    def test_iterative_scan_used_when_supported(self):
+        repo = _repo(iterative_supported=True)
+        with patch("database.get_config", return_value=_config()), \
+             patch.object(repo, "_probe_filtered_rows", return_value=None), \
+             patch.object(repo, "_estimate_filtered_rows") as estimate:
+            plan = repo.plan_vector_scan({"metadata.author": "bob"}, ["x"], [], 10)
+        assert plan["iterative_scan"] == "relaxed_order"
+        assert plan["ef_search"] == 40
+        estimate.assert_not_called()
+
+    def test_failed_estimate_keeps_default_plan(self):
+        repo = _repo()
+        with patch("database.get_config", return_value=_config(iterative="off")), \
+             patch.object(repo, "_probe_filtered_rows", return_value=None), \
+             patch.object(repo, "_estimate_filtered_rows", side_effect=RuntimeError("boom")):
+            plan = repo.plan_vector_scan({"metadata.author": "bob"}, ["x"], [], 10)
+        assert plan["strategy"] == "hnsw"
+        assert plan["ef_search"] == 40
+
+
+class _RecordingCursor:
+    def __init__(self):
+        self.calls = []
+
+    def execute(self, sql, params=None):
+        self.calls.append((sql, params))
+
+    def fetchall(self):
+        return []
+
+
+def test_apply_vector_plan_sets_transaction_local_settings():
+    cursor = _RecordingCursor()
+    apply_vector_plan(cursor, {"ef_search": 200, "iterative_scan": "strict_order"})
+    assert cursor.calls == [
+        ("SELECT set_config('hnsw.ef_search', %s, true)", ("200",)),
+        ("SELECT set_config('hnsw.iterative_scan', %s, true)", ("strict_order",)),
+    ]
+    cursor = _RecordingCursor()
+    apply_vector_plan(cursor, {"strategy": "exact", "ef_search": None, "iterative_scan": None})
+    assert cursor.calls == []
+
+
+def test_relaxed_iterative_scan_is_resorted_and_reported():
+    cursor = _RecordingCursor()
+    db = MagicMock()
+    db.get_cursor.return_value.__enter__.return_value = cursor
+    repo = DocumentRepository(db)
+    plan = {"strategy": "hnsw", "ef_search": 40, "iterative_scan": "relaxed_order"}
+    diagnostics = {}
+    with patch.object(repo, "plan_vector_scan", return_value=plan):
+        repo.search_similar([0.1, 0.2], top_k=5, filters={"metadata.author": "bob"},
+                            diagnostics=diagnostics)
+    assert diagnostics == {"vector_plan": plan}
+    sql = cursor.calls[-1][0]
+    assert "WITH ann AS MATERIALIZED" in sql
+    assert sql.rstrip().endswith("ORDER BY distance")
+
+
+def test_retriever_search_no_longer_over_fetches():
+    from retriever_v2 import DocumentRetriever
+
+    retriever = DocumentRetriever.__new__(DocumentRetriever)
+    retriever.config = SimpleNamespace(retrieval=SimpleNamespace(
+        top_k=5, similarity_threshold=0.0, distance_metric="cosine",
+    ))
+    retriever.embedding_service = SimpleNamespace(encode=lambda _query: [0.1, 0.2])
+    retriever.repository = MagicMock()
+    retriever.repository.search_similar.return_value = []
+    retriever._should_use_lancedb = lambda source: False
+    diagnostics = {}
+
+    retriever.search("q", top_k=7, source="postgres", diagnostics=diagnostics)
+
+    kwargs = retriever.repository.search_similar.call_args.kwargs
+    assert kwargs["top_k"] == 7
+    assert kwargs["diagnostics"] is diagnostics
+
+
+@pytest.mark.database
+def test_pgvector_version_and_local_ef_search(db_manager):
+    version = db_manager.pgvector_version()
+    assert len(version) >= 2
+    assert db_manager.supports_hnsw_iterative_scan() == (version >= (0, 8, 0))
+
+    with db_manager.get_cursor() as cursor:
+        apply_vector_plan(cursor, {"ef_search": 321})
+        cursor.execute("SHOW hnsw.ef_search")
+        assert cursor.fetchone()[0] == "321"
+    with db_manager.get_cursor() as cursor:
+        cursor.execute("SELECT current_setting('hnsw.ef_search', true)")
+        assert cursor.fetchone()[0] != "321"
+
+
+@pytest.mark.database
+def test_filtered_search_reports_plan_and_fills_top_k(db_manager):
+    repo = DocumentRepository(db_manager)
+    repo.insert_chunks([
+        (f"hnsw-doc-{i}", 0, f"text {i}", f"hnsw/doc{i}.txt",
+         [0.1 * (i % 7)] + [0.01] * 383, {"author": "bob" if i % 4 == 0 else "eve"})
+        for i in range(40)
+    ])
+    try:
+        diagnostics = {}
+        results = repo.search_similar(
+            [0.3] + [0.01] * 383, top_k=5,
+            filters={"metadata.author": "bob", "path_prefixes": ["hnsw"]},
+            diagnostics=diagnostics,
+        )
+        assert len(results) == 5
+        assert all(r["metadata"]["author"] == "bob" for r in results)
+        plan = diagnostics["vector_plan"]
+        assert plan["strategy"] == "exact"
+        assert plan["matched_rows"] == 10
+    finally:
+        with db_manager.get_cursor() as cursor:
+            cursor.execute("DELETE FROM document_chunks WHERE document_id LIKE 'hnsw-doc-%%'")
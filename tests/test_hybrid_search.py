@@ -207,6 +207,7 @@ class TestHybridSearchSQLGeneration:
         )
         retriever.embedding_service = SimpleNamespace(encode=lambda _query: [0.1, 0.2])
         retriever.db_manager = SimpleNamespace(get_cursor=lambda dict_cursor=False: FakeCursorContext())
+        retriever.repository = SimpleNamespace(plan_vector_scan=lambda *_args: {"strategy": "hnsw"})
 
         results = retriever.search_hybrid(
             "EV6",
@@ -255,6 +256,7 @@ class TestHybridSearchSQLGeneration:
         )
         retriever.embedding_service = SimpleNamespace(encode=lambda _query: [0.1, 0.2])
         retriever.db_manager = SimpleNamespace(get_cursor=lambda dict_cursor=False: FakeCursorContext())
+        retriever.repository = SimpleNamespace(plan_vector_scan=lambda *_args: {"strategy": "hnsw"})
 
         results = retriever.search_hybrid("EV6", top_k=1)
 
@@ -358,6 +360,7 @@ class TestHybridSearchSQLGeneration:
         )
         retriever.embedding_service = SimpleNamespace(encode=lambda _query: [0.1, 0.2])
         retriever.db_manager = SimpleNamespace(get_cursor=lambda dict_cursor=False: FakeCursorContext())
+        retriever.repository = SimpleNamespace(plan_vector_scan=lambda *_args: {"strategy": "hnsw"})
 
         results, diagnostics = retriever.search_hybrid_fusion_v0(
             "EV6 charging",
@@ -375,7 +378,7 @@ class TestHybridSearchSQLGeneration:
         assert diagnostics["hybrid_fusion_v0"]["top_explanations"][0]["dense_rank"] == 2
         assert diagnostics["hybrid_fusion_v0"]["top_explanations"][0]["lexical_rank"] == 1
         assert "~* %s" in captured["calls"][4][0]
-        assert captured["calls"][0][1][0] == "%.txt"
+        assert captured["calls"][0][1][0] == [".txt"]
 
     def test_hybrid_fusion_v0_alpha_controls_dense_and_lexical_weights(self):
         """Alpha should map to dense weight, with lexical weight as the complement."""
@@ -449,6 +452,7 @@ class TestHybridSearchSQLGeneration:
             )
             retriever.embedding_service = SimpleNamespace(encode=lambda _query: [0.1, 0.2])
             retriever.db_manager = SimpleNamespace(get_cursor=lambda dict_cursor=False: FakeCursorContext())
+            retriever.repository = SimpleNamespace(plan_vector_scan=lambda *_args: {"strategy": "hnsw"})
             return retriever.search_hybrid_fusion_v0("EV6", top_k=2, alpha=alpha)
 
         dense_results, dense_diagnostics = run_with_alpha(1.0)
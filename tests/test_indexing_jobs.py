@@ -0,0 +1,343 @@
+"""
+Tests for background indexing jobs (indexing_jobs.py, ?background=true).
+
+Tests cover:
+- routes answering 202 with a queued job, storing uploads for the worker
+- job execution recording queue wait/depth on the indexing run and the
+  outcome (or HTTP error) on the job
+- per-stage durations in the run metadata
+- claiming by priority with SKIP LOCKED, stale job recovery, queue
+  position, cancellation and owner isolation (database)
+- a runner consuming a queued job end to end, and letting a running job
+  finish on stop (database)
+"""
+
+import asyncio
+import io
+import json
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import HTTPException
+
+import indexing_jobs
+
+
+@pytest.fixture
+def job_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("INDEXING_JOB_DIR", str(tmp_path / "jobs"))
+    return tmp_path / "jobs"
+
+
+def _queued(job_id="00000000-0000-0000-0000-000000000001", **extra):
+    job = {"job_id": job_id, "kind": "index", "status": "queued", "priority": 0,
+           "source_uri": "a.txt", "attempts": 0}
+    job.update(extra)
+    return job
+
+
+class TestRoutes:
+    async def test_index_in_background_answers_202(self, monkeypatch):
+        from api_models import IndexRequest
+        from routers import indexing_api
+        queued = {}
+
+        def fake_enqueue(kind, payload, **kwargs):
+            queued.update(kind=kind, payload=payload, **kwargs)
+            return _queued(priority=kwargs["priority"])
+
+        monkeypatch.setattr(indexing_jobs, "enqueue_job", fake_enqueue)
+        monkeypatch.setattr(indexing_api, "_index_source", MagicMock(side_effect=AssertionError))
+
+        response = await indexing_api.index_document(
+            IndexRequest(source_uri="a.txt"), background=True, priority=5, key_record={"id": 3},
+        )
+
+        assert response.status_code == 202
+        assert json.loads(response.body)["status"] == "queued"
+        assert queued["kind"] == "index" and queued["payload"]["source_uri"] == "a.txt"
+        assert queued["priority"] == 5 and queued["owner_key_id"] == 3
+
+        with pytest.raises(HTTPException) as exc:
+            await indexing_api.index_document(
+                IndexRequest(source_uri="a.txt"), background=True, priority=1000, key_record=None,
+            )
+        assert exc.value.status_code == 400
+
+    async def test_upload_in_background_stores_the_file(self, monkeypatch, job_dir):
+        from starlette.datastructures import UploadFile
+        from routers import indexing_api
+        queued = {}
+
+        def fake_enqueue(kind, payload, **kwargs):
+            queued.update(kind=kind, payload=payload)
+            return _queued(kind=kind)
+
+        monkeypatch.setattr(indexing_jobs, "enqueue_job", fake_enqueue)
+        upload = UploadFile(file=io.BytesIO(b"hello"), filename="notes.md")
+
+        response = await indexing_api.upload_and_index(
+            file=upload, force_reindex="true", custom_source_uri="/docs/notes.md",
+            document_type=None, metadata_json=None, ocr_mode=None,
+            background=True, priority=0, key_record=None,
+        )
+
+        assert response.status_code == 202
+        payload = queued["payload"]
+        assert payload["file_path"].startswith(str(job_dir)) and payload["file_path"].endswith(".md")
+        with open(payload["file_path"], "rb") as f:
+            assert f.read() == b"hello"
+        assert payload["bytes"] == 5 and payload["force_reindex"] is True
+        assert payload["custom_source_uri"] == "/docs/notes.md"
+
+    async def test_upload_job_indexes_stored_file(self, monkeypatch):
+        from api_models import IndexResponse
+        from routers import indexing_api
+        received = {}
+
+        async def fake_index_upload(*, receive, **kwargs):
+            received.update(kwargs)
+            received["file"] = await receive()
+            return IndexResponse(status="success", document_id="d1")
+
+        monkeypatch.setattr(indexing_api, "_index_upload", fake_index_upload)
+        payload = {"file_path": "/jobs/x.pdf", "bytes": 3, "file_hash": "ab",
+                   "filename": "x.pdf", "upload_method": "resumable_upload"}
+
+        result = await indexing_api._run_upload_job(payload, {"id": 2}, "run-1")
+
+        assert result["status"] == "success"
+        assert received["file"] == ("/jobs/x.pdf", 3, "ab")
+        assert received["run_id"] == "run-1" and received["key_record"] == {"id": 2}
+        assert received["upload_method"] == "resumable_upload"
+
+    async def test_index_records_stage_durations(self, monkeypatch):
+        from api_models import IndexRequest
+        from routers import indexing_api
+        completed = {}
+
+        def fake_index_document(timings=None, **kwargs):
+            timings.update(parse=0.5, embed=1.5, write=0.25)
+            return {"status": "skipped", "document_id": "d1"}
+
+        fake_idx = MagicMock()
+        fake_idx.index_document.side_effect = fake_index_document
+        monkeypatch.setattr(indexing_api, "get_indexer", lambda: fake_idx)
+        monkeypatch.setattr("indexing_runs.start_run", MagicMock(side_effect=AssertionError))
+        monkeypatch.setattr(
+            "indexing_runs.complete_run", lambda run_id, **kw: completed.update(kw, run_id=run_id)
+        )
+
+        await indexing_api._index_source(IndexRequest(source_uri="a.txt"), None, run_id="run-7")
+
+        assert completed["run_id"] == "run-7"
+        assert completed["metadata"] == {"stages": {"parse": 0.5, "embed": 1.5, "write": 0.25}}
+
+    async def test_cancel_running_job_conflicts(self, monkeypatch):
+        from routers import indexing_api
+        monkeypatch.setattr(indexing_jobs, "get_job", lambda job_id, owner: _queued(status="running"))
+        monkeypatch.setattr(indexing_jobs, "cancel_job", lambda job_id, owner: False)
+
+        with pytest.raises(HTTPException) as exc:
+            await indexing_api.cancel_indexing_job("j", key_record=None)
+        assert exc.value.status_code == 409
+
+        monkeypatch.setattr(indexing_jobs, "get_job", lambda job_id, owner: None)
+        with pytest.raises(HTTPException) as exc:
+            await indexing_api.cancel_indexing_job("j", key_record=None)
+        assert exc.value.status_code == 404
+
+
+class TestRunJob:
+    def _patch(self, monkeypatch):
+        calls = {}
+
+        def start_run(**kw):
+            calls["run"] = kw
+            return "run-1"
+
+        monkeypatch.setattr("indexing_runs.start_run", start_run)
+        monkeypatch.setattr(indexing_jobs, "attach_run", lambda job_id, run_id: None)
+        monkeypatch.setattr(
+            indexing_jobs, "finish_job",
+            lambda job_id, worker_id, status, **kw: calls.update(finish=(status, kw)),
+        )
+        return calls
+
+    def test_records_queue_metrics_and_result(self, monkeypatch):
+        calls = self._patch(monkeypatch)
+        seen = {}
+
+        async def handler(payload, key_record, run_id):
+            seen.update(payload=payload, key_record=key_record, run_id=run_id)
+            return {"status": "success"}
+
+        monkeypatch.setitem(indexing_jobs._handlers, "test", (handler, "api"))
+        job = _queued(kind="test", payload={"x": 1}, owner_key_id=4, attempts=1,
+                      queue_wait_seconds=2.5, queue_depth=7)
+
+        assert indexing_jobs._run_job(job, "w1") == "succeeded"
+
+        run_job = calls["run"]["metadata"]["job"]
+        assert run_job["queue_wait_seconds"] == 2.5 and run_job["queue_depth"] == 7
+        assert run_job["attempt"] == 1 and run_job["worker"] == "w1"
+        assert seen == {"payload": {"x": 1}, "key_record": {"id": 4}, "run_id": "run-1"}
+        assert calls["finish"] == ("succeeded", {"result": {"status": "success"}, "error": None})
+
+    def test_records_http_errors(self, monkeypatch):
+        calls = self._patch(monkeypatch)
+
+        async def handler(payload, key_record, run_id):
+            raise HTTPException(status_code=403, detail="not yours")
+
+        monkeypatch.setitem(indexing_jobs._handlers, "test", (handler, "api"))
+
+        assert indexing_jobs._run_job(_queued(kind="test"), "w1") == "failed"
+        status, kw = calls["finish"]
+        assert kw["error"] == {"status_code": 403, "detail": "not yours"}
+
+
+    def test_stored_upload_is_removed_only_with_a_recorded_outcome(self, monkeypatch, job_dir):
+        self._patch(monkeypatch)
+
+        async def handler(payload, key_record, run_id):
+            return {"status": "success"}
+
+        monkeypatch.setitem(indexing_jobs._handlers, "test", (handler, "api"))
+        for recorded in (False, True):
+            job_dir.mkdir(exist_ok=True)
+            stored = job_dir / "upload.pdf"
+            stored.write_bytes(b"x")
+            monkeypatch.setattr(indexing_jobs, "finish_job", lambda *a, **kw: recorded)
+
+            indexing_jobs._run_job(_queued(kind="test", payload={"file_path": str(stored)}), "w1")
+
+            # Not recorded: the job was released and another worker owns the file.
+            assert stored.exists() is not recorded
+
+
+@pytest.fixture
+def jobs_db(db_manager, monkeypatch, job_dir):
+    monkeypatch.setattr(indexing_jobs, "_get_db_connection", db_manager.get_connection)
+    with db_manager.get_cursor() as cursor:
+        cursor.execute("DELETE FROM indexing_jobs")
+    yield db_manager
+    with db_manager.get_cursor() as cursor:
+        cursor.execute("DELETE FROM indexing_jobs")
+
+
+@pytest.mark.database
+class TestQueue:
+    def test_claims_by_priority_skipping_locked_jobs(self, jobs_db):
+        low = indexing_jobs.enqueue_job("index", {}, priority=0, source_uri="low")
+        first = indexing_jobs.enqueue_job("index", {}, priority=5, source_uri="first")
+        second = indexing_jobs.enqueue_job("index", {}, priority=5, source_uri="second")
+
+        assert indexing_jobs.get_job(low["job_id"])["queue_position"] == 3
+        with jobs_db.get_connection() as conn:
+            with conn.cursor() as cur:
+                # Another worker is mid-claim on the first job
+                cur.execute("SELECT id FROM indexing_jobs WHERE id = %s FOR UPDATE",
+                            (first["job_id"],))
+                claimed = indexing_jobs.claim_next_job("w1")
+            conn.rollback()
+
+        assert claimed["job_id"] == second["job_id"]
+        assert claimed["status"] == "running" and claimed["attempts"] == 1
+        assert claimed["queue_depth"] == 2 and claimed["queue_wait_seconds"] >= 0
+        assert indexing_jobs.claim_next_job("w2")["job_id"] == first["job_id"]
+        assert indexing_jobs.claim_next_job("w3")["job_id"] == low["job_id"]
+        assert indexing_jobs.claim_next_job("w4") is None
+        assert indexing_jobs.queue_stats()["running"] == 3
+
+    def test_stale_jobs_are_requeued_then_failed(self, jobs_db, job_dir):
+        job_dir.mkdir()
+        stored = job_dir / "x.txt"
+        stored.write_text("x")
+        retry = indexing_jobs.enqueue_job("upload", {})
+        spent = indexing_jobs.enqueue_job("upload", {"file_path": str(stored)})
+        indexing_jobs.claim_next_job("w1")
+        indexing_jobs.claim_next_job("w1")
+        with jobs_db.get_cursor() as cursor:
+            cursor.execute(
+                "UPDATE indexing_jobs SET heartbeat_at = now() - interval '1 hour', "
+                "attempts = CASE WHEN id = %s THEN 3 ELSE 1 END",
+                (spent["job_id"],),
+            )
+
+        assert indexing_jobs.requeue_stale_jobs(60, 3) == {"requeued": 1, "failed": 1}
+        assert indexing_jobs.get_job(retry["job_id"])["status"] == "queued"
+        assert indexing_jobs.get_job(spent["job_id"])["status"] == "failed"
+        assert not stored.exists()
+
+    def test_owner_isolation_cancel_and_release(self, jobs_db):
+        mine = indexing_jobs.enqueue_job("index", {}, owner_key_id=1)
+        assert indexing_jobs.get_job(mine["job_id"], owner_key_id=2) is None
+        assert indexing_jobs.get_job("not-a-uuid") is None
+        assert [j["job_id"] for j in indexing_jobs.list_jobs(1)] == [mine["job_id"]]
+
+        claimed = indexing_jobs.claim_next_job("w1")
+        assert not indexing_jobs.cancel_job(mine["job_id"], 1)
+        indexing_jobs.release_job(claimed["job_id"])
+        released = indexing_jobs.get_job(mine["job_id"], 1)
+        assert released["status"] == "queued" and released["attempts"] == 0
+        # The released job did finish on the old worker: it is not run again
+        assert indexing_jobs.finish_job(mine["job_id"], "w1", "succeeded", result={})
+        assert indexing_jobs.get_job(mine["job_id"], 1)["status"] == "succeeded"
+
+        other = indexing_jobs.enqueue_job("index", {}, owner_key_id=1)
+        assert not indexing_jobs.cancel_job(other["job_id"], 2)
+        assert indexing_jobs.cancel_job(other["job_id"], 1)
+        assert indexing_jobs.get_job(other["job_id"], 1)["status"] == "cancelled"
+
+
+@pytest.mark.database
+async def test_runner_consumes_queued_job(jobs_db, monkeypatch):
+    monkeypatch.setenv("INDEXING_JOB_POLL_SECONDS", "1")
+    monkeypatch.setenv("INDEXING_JOB_WORKERS", "1")
+    monkeypatch.setattr("indexing_runs.start_run", lambda **kw: "00000000-0000-0000-0000-0000000000aa")
+
+    async def handler(payload, key_record, run_id):
+        return {"echo": payload["value"]}
+
+    monkeypatch.setitem(indexing_jobs._handlers, "test", (handler, "api"))
+    job = indexing_jobs.enqueue_job("test", {"value": 42})
+    runner = indexing_jobs.IndexingJobRunner()
+    await runner.start()
+    try:
+        for _ in range(50):
+            state = indexing_jobs.get_job(job["job_id"])
+            if state["status"] == "succeeded":
+                break
+            await asyncio.sleep(0.1)
+    finally:
+        await runner.stop()
+
+    assert state["status"] == "succeeded"
+    assert state["result"] == {"echo": 42}
+    assert state["run_id"] == "00000000-0000-0000-0000-0000000000aa"
+
+
+@pytest.mark.database
+async def test_runner_stop_lets_a_running_job_finish(jobs_db, monkeypatch):
+    monkeypatch.setenv("INDEXING_JOB_POLL_SECONDS", "1")
+    monkeypatch.setenv("INDEXING_JOB_WORKERS", "1")
+    monkeypatch.setattr("indexing_runs.start_run", lambda **kw: "00000000-0000-0000-0000-0000000000ab")
+    started = asyncio.Event()
+    loop = asyncio.get_running_loop()
+
+    async def handler(payload, key_record, run_id):
+        loop.call_soon_threadsafe(started.set)
+        await asyncio.sleep(0.5)
+        return {"done": True}
+
+    monkeypatch.setitem(indexing_jobs._handlers, "test", (handler, "api"))
+    job = indexing_jobs.enqueue_job("test", {})
+    runner = indexing_jobs.IndexingJobRunner()
+    await runner.start()
+    await asyncio.wait_for(started.wait(), timeout=10)
+    await runner.stop()
+
+    state = indexing_jobs.get_job(job["job_id"])
+    assert state["status"] == "succeeded"
+    assert state["attempts"] == 1
@@ -214,8 +214,7 @@ class TestApplyRetention:
 
         mock_db.get_connection.return_value.__enter__ = MagicMock(return_value=mock_conn)
         mock_db.get_connection.return_value.__exit__ = MagicMock(return_value=False)
-        mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cur)
-        mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
+        mock_conn.cursor.return_value = mock_cur
         mock_get_db.return_value = mock_db
 
         from indexing_runs import apply_retention
@@ -226,7 +225,8 @@ class TestApplyRetention:
         params = mock_cur.execute.call_args[0][1]
         assert "status IN ('success', 'partial', 'failed')" in sql
         assert "COALESCE(completed_at, started_at)" in sql
-        assert params == (365,)
+        # Days, then the batch LIMIT
+        assert params[0] == 365
 
 
 # ===========================================================================
@@ -0,0 +1,164 @@
+"""
+Tests for the owner_id / visibility columns mirrored into LanceDB.
+
+Tests cover:
+- the compact ``visible_to`` predicate on real LanceDB tables
+- set_document_access updates and the effective-visibility rule
+- tables created before the columns existed: migration and backfill
+- visibility writers mirroring Postgres changes into LanceDB (DB-backed)
+"""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from lancedb_adapter import CHUNK_TABLE, PARENT_TABLE, BackendLanceDBAdapter, lancedb_visibility
+
+VEC = [0.8, 0.6, 0.0, 0.0]
+TEXT = "EV6 charging port diagnostics manual"
+
+
+@pytest.fixture
+def adapter(tmp_path):
+    return BackendLanceDBAdapter(db_path=str(tmp_path / "lancedb"), embedding_dimension=4)
+
+
+def _index(adapter, doc_id, **access):
+    adapter.upsert_document(
+        document_id=doc_id,
+        source_uri=f"file:///{doc_id}.txt",
+        chunks=[(0, TEXT, VEC, {})],
+        aggregated_text=TEXT,
+        doc_metadata={},
+        **access,
+    )
+
+
+def _search(adapter, visible_to):
+    adapter.rebuild_fts_index()
+    results = adapter.search_parent_child(
+        query_text="EV6 charging",
+        query_vector=VEC,
+        parent_limit=5,
+        child_limit=10,
+        filters={"visible_to": visible_to},
+    )
+    return {r["document_id"] for r in results}
+
+
+def test_effective_visibility_follows_postgres_rules():
+    assert lancedb_visibility("u1", "private") == "private"
+    # An unowned private document is visible to everyone in Postgres.
+    assert lancedb_visibility(None, "private") == "shared"
+    assert lancedb_visibility("u1", "shared") == "shared"
+    assert lancedb_visibility(None, None) == "shared"
+
+
+def test_visible_to_predicate_on_real_tables(adapter):
+    _index(adapter, "doc-shared")
+    _index(adapter, "doc-u1", owner_id="u1", visibility="private")
+    _index(adapter, "doc-u2", owner_id="u2", visibility="private")
+
+    assert _search(adapter, {"user_id": "u1"}) == {"doc-shared", "doc-u1"}
+    assert _search(adapter, {"user_id": None}) == {"doc-shared"}
+    stats = adapter.get_statistics(visible_to={"user_id": "u2"})
+    assert stats["total_documents"] == 2
+    assert {d["document_id"] for d in adapter.list_documents(visible_to={"user_id": "u2"})} == {
+        "doc-shared", "doc-u2",
+    }
+
+
+def test_set_document_access_updates_both_tables(adapter):
+    _index(adapter, "doc-a")
+    _index(adapter, "doc-b")
+
+    adapter.set_document_access([("doc-a", "u1", "private"), ("doc-b", None, "private")])
+
+    assert _search(adapter, {"user_id": "u2"}) == {"doc-b"}
+    chunks = adapter.db.open_table(CHUNK_TABLE)
+    assert chunks.count_rows("owner_id = 'u1' AND visibility = 'private'") == 1
+
+
+def test_legacy_tables_gain_columns_and_stay_hidden_until_backfill(tmp_path):
+    import lancedb
+
+    path = tmp_path / "lancedb"
+    current = BackendLanceDBAdapter(db_path=str(path), embedding_dimension=4)
+    _index(current, "doc-private")
+    _index(current, "doc-shared")
+    # Rewrite both tables without the access columns, as older versions did.
+    db = lancedb.connect(str(path))
+    for name in (PARENT_TABLE, CHUNK_TABLE):
+        data = db.open_table(name).to_arrow().drop_columns(["owner_id", "visibility"])
+        db.drop_table(name)
+        db.create_table(name, data=data)
+
+    adapter = BackendLanceDBAdapter(db_path=str(path), embedding_dimension=4)
+    assert adapter.needs_access_backfill()
+    # Fail closed: non-admins see nothing until the columns are filled.
+    assert _search(adapter, {"user_id": "u1"}) == set()
+
+    adapter.backfill_access([("doc-private", "u1", "private")])
+
+    assert not adapter.needs_access_backfill()
+    assert _search(adapter, {"user_id": "u2"}) == {"doc-shared"}
+    assert _search(adapter, {"user_id": "u1"}) == {"doc-private", "doc-shared"}
+
+
+@pytest.mark.database
+def test_visibility_writers_mirror_into_lancedb(db_manager):
+    from database import DocumentRepository
+    import document_visibility
+
+    with db_manager.get_cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO users (id, email, role) VALUES ('lance-u1', 'lance-u1@example.com', 'user') "
+            "ON CONFLICT DO NOTHING"
+        )
+    DocumentRepository(db_manager).insert_chunks([
+        ("lance-doc", 0, "text", "lance/doc.txt", [0.0] * 384, {}),
+    ])
+    fake_adapter = MagicMock()
+    config = SimpleNamespace(retrieval=SimpleNamespace(lancedb_enabled=True))
+    try:
+        with patch("config.get_config", return_value=config), \
+             patch("services.get_lancedb_adapter", return_value=fake_adapter):
+            document_visibility.set_document_owner_and_visibility("lance-doc", "lance-u1", "private")
+            document_visibility.bulk_set_visibility(["lance-doc"], "shared")
+    finally:
+        with db_manager.get_cursor() as cursor:
+            cursor.execute("DELETE FROM document_chunks WHERE document_id = 'lance-doc'")
+            cursor.execute("DELETE FROM users WHERE id = 'lance-u1'")
+
+    calls = [list(c.args[0]) for c in fake_adapter.set_document_access.call_args_list]
+    assert calls == [
+        [("lance-doc", "lance-u1", "private")],
+        [("lance-doc", "lance-u1", "shared")],
+    ]
+
+
+@pytest.mark.database
+def test_lancedb_failure_rolls_back_visibility_change(db_manager):
+    from database import DocumentRepository
+    import document_visibility
+
+    DocumentRepository(db_manager).insert_chunks([
+        ("lance-doc-2", 0, "text", "lance/doc2.txt", [0.0] * 384, {}),
+    ])
+    fake_adapter = MagicMock()
+    fake_adapter.set_document_access.side_effect = RuntimeError("lance down")
+    config = SimpleNamespace(retrieval=SimpleNamespace(lancedb_enabled=True))
+    with patch("config.get_config", return_value=config), \
+         patch("services.get_lancedb_adapter", return_value=fake_adapter):
+        with pytest.raises(Exception):
+            document_visibility.set_document_visibility("lance-doc-2", "private")
+
+    assert document_visibility.get_document_visibility("lance-doc-2")["visibility"] == "shared"
+
+
+def test_restore_access_sync_failure_is_logged_not_raised():
+    import document_visibility
+
+    with patch("document_visibility._get_db_connection", side_effect=RuntimeError("db down")):
+        document_visibility.sync_lancedb_access(["doc-1"])
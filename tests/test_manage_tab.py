@@ -100,22 +100,23 @@ def test_preview_delete_with_results(manage_tab, mock_api_client):
     assert manage_tab.results_table.item(0, 2).text() == "/path/1"
 
 def test_export_backup(manage_tab, mock_api_client):
-    """Test export backup."""
+    """Test export backup streams to the chosen file."""
     manage_tab.type_combo.setCurrentText("resume")
-    mock_api_client.export_documents.return_value = {"backup_data": []}
+    mock_api_client.export_documents_to_file.return_value = {
+        "type": "footer", "status": "complete", "chunk_count": 3, "document_count": 1
+    }
     
-    with patch("desktop_app.ui.shared.pick_save_file", return_value="/tmp/backup.json"), \
-         patch("builtins.open", mock_open()) as mock_file, \
-         patch("json.dump") as mock_json_dump, \
+    with patch("desktop_app.ui.shared.pick_save_file", return_value="/tmp/backup.ndjson"), \
          patch("PySide6.QtWidgets.QMessageBox.information") as mock_info:
 
         manage_tab.export_backup()
 
-        mock_api_client.export_documents.assert_called_once()
-        mock_file.assert_called_once_with("/tmp/backup.json", 'w')
-        mock_json_dump.assert_called_once()
+        mock_api_client.export_documents_to_file.assert_called_once()
+        assert mock_api_client.export_documents_to_file.call_args[0][1] == "/tmp/backup.ndjson"
         mock_info.assert_called_once()
         assert manage_tab.undo_btn.isEnabled()
+        assert manage_tab.last_backup["file_path"] == "/tmp/backup.ndjson"
+        assert manage_tab.last_backup["document_count"] == 1
 
 def test_delete_documents(manage_tab, mock_api_client):
     """Test delete documents."""
@@ -146,6 +147,21 @@ def test_undo_delete(manage_tab, mock_api_client):
         assert manage_tab.last_backup is None
         assert not manage_tab.undo_btn.isEnabled()
 
+def test_undo_delete_streams_backup_file(manage_tab, mock_api_client):
+    """Undo after a streamed export restores from the backup file."""
+    manage_tab.last_backup = {"file_path": "/tmp/backup.ndjson", "document_count": 1}
+    mock_api_client.restore_documents_from_file.return_value = {"chunks_restored": 3}
+
+    with patch("PySide6.QtWidgets.QMessageBox.question", return_value=QMessageBox.Yes), \
+         patch("PySide6.QtWidgets.QMessageBox.information") as mock_info:
+
+        manage_tab.undo_delete()
+
+        mock_api_client.restore_documents_from_file.assert_called_once_with("/tmp/backup.ndjson")
+        mock_api_client.restore_documents.assert_not_called()
+        mock_info.assert_called_once()
+        assert manage_tab.last_backup is None
+
 def test_handle_results_cell_clicked(manage_tab, mock_source_manager):
     """Test clicking on results table cell."""
     # Setup table
@@ -81,6 +81,10 @@ class FakeMCPAPIClient:
         self.calls.append(("list_documents", kwargs))
         return self.list_response
 
+    def get_indexing_job(self, **kwargs):
+        self.calls.append(("get_indexing_job", kwargs))
+        return {"job_id": kwargs["job_id"], "status": "running", "source_uri": "/docs/big.pdf"}
+
 
 def test_load_config_uses_rest_env(monkeypatch):
     from mcp_server import load_config
@@ -174,11 +178,29 @@ def test_index_uploads_local_file(tmp_path: Path):
     assert fake.calls == [
         (
             "upload_and_index",
-            {"path": file_path, "force": True, "document_type": "note"},
+            {"path": file_path, "force": True, "document_type": "note", "background": False},
         )
     ]
 
 
+def test_index_in_background_returns_job(tmp_path: Path):
+    from mcp_server import get_indexing_job_impl, index_document_impl
+
+    file_path = tmp_path / "big.pdf"
+    file_path.write_bytes(b"%PDF")
+    fake = FakeMCPAPIClient()
+    fake.index_response = {"job_id": "j1", "status": "queued", "source_uri": str(file_path)}
+
+    with patch("mcp_server._get_api_client", return_value=fake):
+        queued = index_document_impl(str(file_path), background=True)
+        polled = get_indexing_job_impl("j1")
+
+    assert queued["ok"] is True and queued["job_id"] == "j1" and queued["status"] == "queued"
+    assert fake.calls[0][1]["background"] is True
+    assert polled["status"] == "running"
+    assert fake.calls[1] == ("get_indexing_job", {"job_id": "j1"})
+
+
 def test_index_missing_file_does_not_call_api(tmp_path: Path):
     from mcp_server import index_document_impl
 
@@ -0,0 +1,119 @@
+"""
+Tests for the write-time metadata catalog (migration 024).
+
+Tests cover:
+- document-level counts maintained by inserts, updates and deletes
+- visibility buckets
+- prefix search and the empty/oversized value bucket
+- rebuild_metadata_catalog agreeing with incremental maintenance
+"""
+
+import pytest
+
+
+def _seed(db_manager, docs):
+    """Insert chunks per (document_id, chunk_count, metadata)."""
+    from database import DocumentRepository
+    repo = DocumentRepository(db_manager)
+    repo.insert_chunks([
+        (doc_id, i, f"{doc_id} {i}", f"catalog/{doc_id}.txt", [0.0] * 384, metadata)
+        for doc_id, count, metadata in docs
+        for i in range(count)
+    ])
+    return repo
+
+
+@pytest.mark.database
+class TestMetadataCatalog:
+    DOCS = [
+        ("a", 3, {"type": "policy", "author": "Jane"}),
+        ("b", 1, {"type": "policy", "author": "John"}),
+        ("c", 2, {"type": "report"}),
+    ]
+
+    def test_counts_are_per_document(self, db_manager):
+        repo = _seed(db_manager, self.DOCS)
+
+        assert repo.get_metadata_keys() == ["author", "type"]
+        assert repo.get_metadata_value_counts("type") == [
+            {"value": "policy", "doc_count": 2},
+            {"value": "report", "doc_count": 1},
+        ]
+        assert repo.get_metadata_values("author") == ["Jane", "John"]
+
+    def test_prefix_search(self, db_manager):
+        repo = _seed(db_manager, self.DOCS + [("d", 1, {"author": "J_x"})])
+
+        assert repo.get_metadata_keys(pattern="a%") == ["author"]
+        assert repo.get_metadata_values("author", prefix="Ja") == ["Jane"]
+        # LIKE wildcards in the prefix are literal.
+        assert repo.get_metadata_values("author", prefix="J_") == ["J_x"]
+
+    def test_delete_and_update_adjust_counts(self, db_manager):
+        repo = _seed(db_manager, self.DOCS)
+
+        repo.delete_document("c")
+        assert repo.get_metadata_values("type") == ["policy"]
+
+        with db_manager.get_cursor() as cursor:
+            cursor.execute(
+                "UPDATE document_chunks SET metadata = '{\"type\": \"memo\"}'::jsonb "
+                "WHERE document_id = 'b'"
+            )
+        assert repo.get_metadata_value_counts("type") == [
+            {"value": "memo", "doc_count": 1},
+            {"value": "policy", "doc_count": 1},
+        ]
+        assert repo.get_metadata_values("author") == ["Jane"]
+
+    def test_null_and_long_values_only_record_the_key(self, db_manager):
+        repo = _seed(db_manager, [("n", 1, {"empty": None, "blob": "x" * 300})])
+
+        assert repo.get_metadata_keys() == ["blob", "empty"]
+        assert repo.get_metadata_values("empty") == []
+        assert repo.get_metadata_values("blob") == []
+
+    def test_visibility_buckets(self, db_manager):
+        from document_visibility import visibility_where_clause
+        repo = _seed(db_manager, self.DOCS)
+
+        with db_manager.get_cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO users (id, email) VALUES ('cat-u1', 'cat-u1@test.local') "
+                "ON CONFLICT (id) DO NOTHING"
+            )
+            cursor.execute(
+                "UPDATE document_chunks SET owner_id = 'cat-u1', visibility = 'private' "
+                "WHERE document_id = 'a'"
+            )
+        try:
+            stranger = visibility_where_clause("someone-else", False)
+            owner = visibility_where_clause("cat-u1", False)
+
+            assert repo.get_metadata_value_counts("type", visibility=stranger) == [
+                {"value": "policy", "doc_count": 1},
+                {"value": "report", "doc_count": 1},
+            ]
+            assert repo.get_metadata_value_counts("type", visibility=owner)[0] == {
+                "value": "policy", "doc_count": 2,
+            }
+            assert repo.get_metadata_values("author", visibility=stranger) == ["John"]
+        finally:
+            with db_manager.get_cursor() as cursor:
+                cursor.execute("DELETE FROM document_chunks WHERE owner_id = 'cat-u1'")
+                cursor.execute("DELETE FROM users WHERE id = 'cat-u1'")
+
+    def test_rebuild_matches_incremental(self, db_manager):
+        repo = _seed(db_manager, self.DOCS)
+        repo.delete_document("b")
+        query = (
+            "SELECT key, value, owner_id, visibility, doc_count "
+            "FROM metadata_catalog ORDER BY key, value"
+        )
+        with db_manager.get_cursor() as cursor:
+            cursor.execute(query)
+            incremental = cursor.fetchall()
+        assert repo.rebuild_metadata_catalog() == len(incremental)
+        with db_manager.get_cursor() as cursor:
+            cursor.execute(query)
+            assert cursor.fetchall() == incremental
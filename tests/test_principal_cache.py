@@ -0,0 +1,208 @@
+"""
+Tests for the in-process principal cache (principal_cache.py).
+
+Tests cover:
+- TTL, activation and invalidation-race rules of PrincipalCache
+- require_api_key / require_permission serving warm principals without queries
+- the search-path helpers reusing the cached user and collection grants
+- NOTIFY-driven invalidation from the auth_changed triggers (migration 025)
+"""
+
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from principal_cache import AuthChangeListener, PrincipalCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _active_cache(ttl=30, clock=None):
+    cache = PrincipalCache(ttl, clock=clock or time.monotonic)
+    cache.set_active(True)
+    return cache
+
+
+class TestPrincipalCache:
+    def test_inactive_cache_never_serves(self):
+        cache = PrincipalCache(30)
+        assert cache.put("h", {"id": 1}, cache.generation) is None
+        assert cache.get("h") is None
+
+    def test_entries_expire_after_ttl(self):
+        clock = FakeClock()
+        cache = _active_cache(ttl=30, clock=clock)
+        cache.put("h", {"id": 1}, cache.generation)
+        assert cache.get("h")["key_record"] == {"id": 1}
+        clock.now += 31
+        assert cache.get("h") is None
+
+    def test_lookup_racing_an_invalidation_is_not_stored(self):
+        cache = _active_cache()
+        generation = cache.generation
+        cache.invalidate()
+        assert cache.put("h", {"id": 1}, generation) is None
+        assert cache.get("h") is None
+
+    def test_deactivation_drops_entries(self):
+        cache = _active_cache()
+        cache.put("h", {"id": 1}, cache.generation)
+        cache.set_active(False)
+        cache.set_active(True)
+        assert cache.get("h") is None
+
+
+def _request():
+    request = MagicMock()
+    request.client.host = "192.168.1.1"
+    return request
+
+
+class TestWarmPrincipal:
+    @pytest.mark.asyncio
+    @patch("auth.update_last_used")
+    @patch("auth.lookup_api_key", return_value={"id": 7, "name": "k"})
+    @patch("auth.is_auth_required", return_value=True)
+    async def test_warm_key_costs_no_queries(self, _auth, mock_lookup, mock_update):
+        from auth import generate_api_key, require_api_key
+        key, _ = generate_api_key()
+        cache = _active_cache()
+
+        with patch("principal_cache._cache", cache):
+            first = await require_api_key(_request(), key)
+            second = await require_api_key(_request(), key)
+            assert first == second == {"id": 7, "name": "k"}
+            assert mock_lookup.call_count == 1
+            assert mock_update.call_count == 1
+
+            cache.invalidate()
+            await require_api_key(_request(), key)
+            assert mock_lookup.call_count == 2
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("field, age", [("expires_at", 1), ("revoked_at", 25)])
+    @patch("auth.update_last_used")
+    @patch("auth.lookup_api_key", return_value=None)
+    @patch("auth.is_auth_required", return_value=True)
+    async def test_cached_key_past_expiry_or_grace_is_looked_up_again(
+        self, _auth, mock_lookup, _update, field, age,
+    ):
+        from datetime import datetime, timedelta
+        from fastapi import HTTPException
+        from auth import generate_api_key, hash_api_key, require_api_key
+        key, _ = generate_api_key()
+        cache = _active_cache()
+        # Cached while valid; the expiry / grace period has passed since.
+        record = {"id": 7, "name": "k", "revoked_at": None, "expires_at": None}
+        record[field] = datetime.utcnow() - timedelta(hours=age)
+        cache.put(hash_api_key(key), record, cache.generation)
+
+        with patch("principal_cache._cache", cache):
+            with pytest.raises(HTTPException):
+                await require_api_key(_request(), key)
+        assert mock_lookup.call_count == 1
+        assert cache.get_by_key_id(7) is None
+
+    @pytest.mark.asyncio
+    @patch("auth.update_last_used")
+    @patch("auth.lookup_api_key", return_value={"id": 7, "name": "k"})
+    @patch("auth.is_auth_required", return_value=True)
+    async def test_permission_and_search_filters_reuse_principal(self, _auth, _lookup, _update):
+        from auth import generate_api_key, require_permission
+        from collection_grants import search_allowed_namespaces_for_key_record
+        from document_visibility import visibility_clause_for_key_record
+        key, _ = generate_api_key()
+        cache = _active_cache()
+        user = {"id": "u7", "role": "researcher"}
+        check = require_permission("documents.read")
+
+        with patch("principal_cache._cache", cache), \
+             patch("users.count_admins", return_value=1) as mock_admins, \
+             patch("users.get_user_by_api_key", return_value=user) as mock_user, \
+             patch("collection_grants.allowed_namespaces_for_role", return_value=["team-a"]) as mock_ns, \
+             patch("role_permissions.get_role_permissions", return_value=["documents.read"]):
+            for _ in range(2):
+                key_record = await check(_request(), key)
+                assert search_allowed_namespaces_for_key_record(key_record) == ["team-a"]
+                sql, params = visibility_clause_for_key_record(key_record)
+                assert params == ["u7"]
+
+            assert mock_admins.call_count == 1
+            assert mock_user.call_count == 1
+            assert mock_ns.call_count == 1
+
+    def test_role_grants_are_shared_across_keys_until_invalidated(self):
+        from collection_grants import search_allowed_namespaces_for_key_record
+        cache = _active_cache()
+        user = {"id": "u7", "role": "researcher"}
+
+        with patch("principal_cache._cache", cache), \
+             patch("users.get_user_by_api_key", return_value=user), \
+             patch("collection_grants.allowed_namespaces_for_role", return_value=["team-a"]) as mock_ns, \
+             patch("role_permissions.get_role_permissions", return_value=["documents.read"]):
+            for key_id in (1, 2, 3):
+                cache.put(f"h{key_id}", {"id": key_id}, cache.generation)
+                assert search_allowed_namespaces_for_key_record({"id": key_id}) == ["team-a"]
+            assert mock_ns.call_count == 1
+
+            cache.invalidate()
+            search_allowed_namespaces_for_key_record({"id": 1})
+            assert mock_ns.call_count == 2
+
+    def test_inactive_cache_queries_every_time(self):
+        from document_visibility import resolve_user_id_for_key_record
+        with patch("principal_cache._cache", PrincipalCache(30)), \
+             patch("users.get_user_by_api_key", return_value={"id": "u1"}) as mock_user:
+            resolve_user_id_for_key_record({"id": 1})
+            resolve_user_id_for_key_record({"id": 1})
+        assert mock_user.call_count == 2
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+@pytest.mark.database
+def test_listener_invalidates_on_revoke_from_another_process(db_manager):
+    cache = PrincipalCache(30)
+    listener = AuthChangeListener(cache, connect=db_manager.connect_dedicated, poll_interval=0.1)
+    listener.start()
+    try:
+        assert _wait_for(lambda: cache.enabled)
+        with db_manager.get_cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO api_keys (name, key_hash, key_prefix) "
+                "VALUES ('cache-test', 'cache-test-hash', 'pgv_sk_test') RETURNING id"
+            )
+            key_id = cursor.fetchone()[0]
+        try:
+            assert _wait_for(lambda: cache.invalidations >= 1)
+            baseline = cache.invalidations
+            cache.put("cache-test-hash", {"id": key_id}, cache.generation)
+
+            # Raw SQL, as another worker would do it: only the trigger can tell us.
+            with db_manager.get_cursor() as cursor:
+                cursor.execute("UPDATE api_keys SET last_used_at = NOW() WHERE id = %s", (key_id,))
+                cursor.execute("UPDATE api_keys SET revoked_at = NOW() WHERE id = %s", (key_id,))
+
+            assert _wait_for(lambda: cache.get("cache-test-hash") is None)
+            # last_used_at bookkeeping does not notify; only the revoke did.
+            assert cache.invalidations == baseline + 1
+        finally:
+            with db_manager.get_cursor() as cursor:
+                cursor.execute("DELETE FROM api_keys WHERE id = %s", (key_id,))
+    finally:
+        listener.stop()
+    assert not cache.enabled
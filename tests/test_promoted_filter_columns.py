@@ -0,0 +1,178 @@
+"""
+Tests for the expression-indexed type / namespace / category / extension
+filters (migrations 027-028) and the selectivity-aware prefilter.
+
+Tests cover:
+- the filter clause helpers shared by database.py and retriever_v2
+- the expression indexes and filters on real document_chunks rows (DB-backed)
+- the bounded prefilter probe choosing exact scan vs ANN post-filter
+- the LanceDB file_extension column, its legacy backfill and filter
+"""
+
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from database import (
+    DocumentRepository,
+    FILE_EXTENSION_EXPRESSION,
+    extension_filter_clause,
+    filter_is_indexable,
+    metadata_filter_clause,
+    promoted_filter_clause,
+)
+
+VEC = [1.0] + [0.0] * 383
+
+
+class TestFilterClauses:
+    def test_case_insensitive_match_uses_lowered_expression(self):
+        assert promoted_filter_clause("type", "Policy", case_insensitive=True) == (
+            "lower((metadata->>'type')) = lower(%s)", ["Policy"],
+        )
+
+    def test_explicit_wildcard_keeps_ilike(self):
+        assert promoted_filter_clause("category", "fin%", case_insensitive=True) == (
+            "(metadata->>'category') ILIKE %s", ["fin%"],
+        )
+
+    def test_exact_match_is_index_backed_and_rechecked(self):
+        sql, params = promoted_filter_clause("namespace", "HR")
+        assert sql == (
+            "(lower((metadata->>'namespace')) = lower(%s) "
+            "AND (metadata->>'namespace') = %s)"
+        )
+        assert params == ["HR", "HR"]
+
+    def test_metadata_prefix_maps_promoted_keys_only(self):
+        assert "lower((metadata->>'type'))" in metadata_filter_clause("type", "x")[0]
+        assert metadata_filter_clause("author", "x") == ("metadata->>%s = %s", ["author", "x"])
+
+    def test_extensions_use_expression_with_fallback_for_compound(self):
+        sql, params = extension_filter_clause(["PDF", ".txt", ".tar.gz"])
+        assert sql == f"({FILE_EXTENSION_EXPRESSION} = ANY(%s) OR source_uri ILIKE %s)"
+        assert params == [[".pdf", ".txt"], "%.tar.gz"]
+
+    def test_only_index_backed_clauses_are_indexable(self):
+        assert filter_is_indexable("type", "Policy")
+        assert not filter_is_indexable("category", "fin%")
+        assert filter_is_indexable("metadata.category", "fin%")
+        assert not filter_is_indexable("metadata.author", "x")
+        assert filter_is_indexable("extensions", ["pdf", ".TXT"])
+        assert not filter_is_indexable("extensions", [".pdf", ".tar.gz"])
+        assert not filter_is_indexable("path_prefixes", [])
+        assert filter_is_indexable("document_id", "abc")
+
+
+@pytest.fixture
+def promoted_docs(db_manager):
+    repo = DocumentRepository(db_manager)
+    repo.insert_chunks([
+        ("pf-doc-1", 0, "text", "pf/Report.PDF", VEC, {"type": "Policy", "category": "finance"}),
+        ("pf-doc-2", 0, "text", "pf/notes.txt", VEC, {"type": "memo"}),
+        ("pf-doc-3", 0, "text", "pf/archive.tar.gz", VEC, {}),
+    ])
+    yield repo
+    with db_manager.get_cursor() as cursor:
+        cursor.execute("DELETE FROM document_chunks WHERE document_id LIKE 'pf-doc-%%'")
+
+
+def _config(max_rows):
+    return SimpleNamespace(retrieval=SimpleNamespace(
+        prefilter_max_rows=max_rows, hnsw_ef_search=40, hnsw_iterative_scan="off",
+    ))
+
+
+@pytest.mark.database
+class TestPromotedColumns:
+    def test_filter_expressions_match_the_indexes(self, promoted_docs, db_manager):
+        with db_manager.get_cursor() as cursor:
+            cursor.execute(
+                f"SELECT document_id, lower((metadata->>'type')), {FILE_EXTENSION_EXPRESSION} "
+                "FROM document_chunks WHERE document_id LIKE 'pf-doc-%%' ORDER BY document_id"
+            )
+            assert cursor.fetchall() == [
+                ("pf-doc-1", "policy", ".pdf"),
+                ("pf-doc-2", "memo", ".txt"),
+                ("pf-doc-3", None, ".gz"),
+            ]
+            # No generated columns: the filters read metadata and source_uri.
+            cursor.execute(
+                "SELECT count(*) FROM information_schema.columns "
+                "WHERE table_name = 'document_chunks' "
+                "AND column_name IN ('namespace', 'doc_type', 'category', 'file_extension')"
+            )
+            assert cursor.fetchone()[0] == 0
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute(
+                f"EXPLAIN SELECT 1 FROM document_chunks "
+                f"WHERE lower((metadata->>'type')) = lower(%s) AND {FILE_EXTENSION_EXPRESSION} = ANY(%s)",
+                ("Policy", [".pdf"]),
+            )
+            plan = " ".join(row[0] for row in cursor.fetchall())
+            assert "idx_chunks_doc_type_lower" in plan or "idx_chunks_file_extension" in plan
+
+    def test_search_filters_read_promoted_columns(self, promoted_docs):
+        def ids(filters):
+            return {r["document_id"] for r in promoted_docs.search_similar(VEC, top_k=10, filters=filters)}
+
+        assert ids({"type": "policy", "path_prefixes": ["pf"]}) == {"pf-doc-1"}
+        assert ids({"extensions": [".pdf", "gz"], "path_prefixes": ["pf"]}) == {"pf-doc-1", "pf-doc-3"}
+        assert ids({"metadata.category": "finance", "path_prefixes": ["pf"]}) == {"pf-doc-1"}
+        assert ".pdf" in promoted_docs.get_indexed_extensions()
+
+    def test_prefilter_probe_is_bounded_by_max_rows(self, promoted_docs):
+        filters = {"path_prefixes": ["pf"]}
+        clauses, params = ["source_uri LIKE %s"], ["pf/%"]
+
+        with patch("database.get_config", return_value=_config(10)):
+            assert promoted_docs.prefilter_is_selective(filters, clauses, params)
+        with patch("database.get_config", return_value=_config(2)):
+            assert not promoted_docs.prefilter_is_selective(filters, clauses, params)
+        with patch("database.get_config", return_value=_config(0)):
+            assert not promoted_docs.prefilter_is_selective(filters, clauses, params)
+        # Filters without an index never trigger the probe.
+        with patch("database.get_config", return_value=_config(10)):
+            assert not promoted_docs.prefilter_is_selective(
+                {"metadata.author": "x"}, ["metadata->>%s = %s"], ["author", "x"]
+            )
+            assert not promoted_docs.prefilter_is_selective(
+                {"type": "pol%"}, ["(metadata->>'type') ILIKE %s"], ["pol%"]
+            )
+
+    def test_prefiltered_search_ranks_filtered_rows_exactly(self, promoted_docs):
+        diagnostics = {}
+        with patch("database.get_config", return_value=_config(10)):
+            results = promoted_docs.search_similar(
+                VEC, top_k=10, filters={"extensions": [".txt"]}, diagnostics=diagnostics,
+            )
+        assert [r["document_id"] for r in results if r["document_id"].startswith("pf-")] == ["pf-doc-2"]
+        assert diagnostics["vector_plan"]["strategy"] == "exact"
+
+
+def test_lancedb_file_extension_column_and_legacy_backfill(tmp_path):
+    import lancedb
+
+    from lancedb_adapter import CHUNK_TABLE, PARENT_TABLE, BackendLanceDBAdapter
+
+    path = tmp_path / "lancedb"
+    current = BackendLanceDBAdapter(db_path=str(path), embedding_dimension=4)
+    for doc_id, uri in (("doc-pdf", "a/Report.PDF"), ("doc-txt", "a/notes.txt")):
+        current.upsert_document(
+            document_id=doc_id, source_uri=uri, chunks=[(0, "text", [1.0, 0, 0, 0], {})],
+            aggregated_text="text", doc_metadata={},
+        )
+    # Rewrite both tables without the column, as older versions did.
+    db = lancedb.connect(str(path))
+    for name in (PARENT_TABLE, CHUNK_TABLE):
+        data = db.open_table(name).to_arrow().drop_columns(["file_extension"])
+        db.drop_table(name)
+        db.create_table(name, data=data)
+
+    adapter = BackendLanceDBAdapter(db_path=str(path), embedding_dimension=4)
+    chunks = adapter.db.open_table(CHUNK_TABLE)
+    clause = adapter._build_lancedb_filter_clause({"extensions": ["pdf", ".tar.gz"]})
+    assert clause == "(file_extension IN ('.pdf') OR lower(source_uri) LIKE '%.tar.gz')"
+    assert chunks.count_rows(clause) == 1
+    assert chunks.count_rows("file_extension = '.txt'") == 1
@@ -100,6 +100,52 @@ class TestQuarantineRoundTrip:
         assert restored == 5
 
 
+class TestReconcileSources:
+    """reconcile_sources() applies a quarantine/restore diff in batches."""
+
+    @patch("quarantine._get_db_connection")
+    def test_batches_share_one_transaction(self, mock_conn):
+        from quarantine import reconcile_sources
+
+        mock_cur = MagicMock()
+        mock_cur.rowcount = 2
+        conn = mock_conn.return_value.__enter__.return_value
+        conn.cursor.return_value = mock_cur
+
+        result = reconcile_sources(
+            [f"/data/docs/{i}.md" for i in range(5)], ["/data/docs/back.md"],
+            batch_size=2,
+        )
+
+        # 3 quarantine batches + 1 restore batch, committed once
+        assert mock_cur.execute.call_count == 4
+        assert mock_cur.execute.call_args_list[0][0][1][1] == ["/data/docs/0.md", "/data/docs/1.md"]
+        assert "ANY(%s)" in mock_cur.execute.call_args_list[3][0][0]
+        conn.commit.assert_called_once()
+        assert result == {"quarantined": 6, "restored": 2}
+
+    @patch("quarantine._get_db_connection")
+    def test_empty_diff_skips_database(self, mock_conn):
+        from quarantine import reconcile_sources
+
+        assert reconcile_sources([], []) == {"quarantined": 0, "restored": 0}
+        mock_conn.assert_not_called()
+
+    @patch("quarantine._get_db_connection", side_effect=RuntimeError("db down"))
+    def test_failure_reports_nothing_applied(self, _mock):
+        from quarantine import reconcile_sources
+
+        assert reconcile_sources(["/a.md"], []) == {"quarantined": 0, "restored": 0}
+
+    def test_batch_size_from_env(self, monkeypatch):
+        from quarantine import get_batch_size
+
+        monkeypatch.setenv("QUARANTINE_BATCH_SIZE", "250")
+        assert get_batch_size() == 250
+        monkeypatch.setenv("QUARANTINE_BATCH_SIZE", "nope")
+        assert get_batch_size() == 1000
+
+
 class TestPurgeExpired:
     """purge_expired() deletes old quarantined chunks."""
 
@@ -278,9 +324,14 @@ class TestQuarantineMissingSources:
         mock_conn.return_value.__enter__.return_value.cursor.return_value = mock_cur
         mock_isfile.return_value = False  # File doesn't exist
 
-        with patch("quarantine.quarantine_chunks") as mock_q:
-            _quarantine_missing_sources("/data/docs")
-            mock_q.assert_called_once_with("/data/docs/missing.md", "source_file_missing")
+        with patch("quarantine.reconcile_sources",
+                   return_value={"quarantined": 2, "restored": 0}) as mock_rec:
+            result = _quarantine_missing_sources("/data/docs")
+            mock_rec.assert_called_once_with(
+                ["/data/docs/missing.md"], [], "source_file_missing",
+            )
+        assert result["missing_sources"] == 1
+        assert result["quarantined_chunks"] == 2
 
     @patch("watched_folders._get_db_connection")
     @patch("os.path.isfile")
@@ -294,9 +345,32 @@ class TestQuarantineMissingSources:
         mock_conn.return_value.__enter__.return_value.cursor.return_value = mock_cur
         mock_isfile.return_value = True  # File reappeared
 
-        with patch("quarantine.restore_chunks") as mock_r:
+        with patch("quarantine.reconcile_sources",
+                   return_value={"quarantined": 0, "restored": 1}) as mock_rec:
+            result = _quarantine_missing_sources("/data/docs")
+            mock_rec.assert_called_once_with(
+                [], ["/data/docs/back.md"], "source_file_missing",
+            )
+        assert result["reappeared_sources"] == 1
+        assert result["restored_chunks"] == 1
+
+    @patch("watched_folders._get_db_connection")
+    @patch("os.path.isfile")
+    def test_diff_is_applied_in_one_call(self, mock_isfile, mock_conn):
+        from watched_folders import _quarantine_missing_sources
+
+        mock_cur = MagicMock()
+        mock_cur.fetchall.return_value = [
+            (f"/data/docs/gone{i}.md", False) for i in range(50)
+        ] + [("/data/docs/back.md", True)]
+        mock_conn.return_value.__enter__.return_value.cursor.return_value = mock_cur
+        mock_isfile.side_effect = lambda path: path.endswith("back.md")
+
+        with patch("quarantine.reconcile_sources",
+                   return_value={"quarantined": 50, "restored": 1}) as mock_rec:
             _quarantine_missing_sources("/data/docs")
-            mock_r.assert_called_once_with("/data/docs/back.md")
+        mock_rec.assert_called_once()
+        assert len(mock_rec.call_args[0][0]) == 50
 
     @patch("watched_folders._get_db_connection")
     @patch("os.path.isfile")
@@ -310,11 +384,9 @@ class TestQuarantineMissingSources:
         mock_conn.return_value.__enter__.return_value.cursor.return_value = mock_cur
         mock_isfile.return_value = True
 
-        with patch("quarantine.quarantine_chunks") as mock_q:
-            with patch("quarantine.restore_chunks") as mock_r:
-                _quarantine_missing_sources("/data/docs")
-                mock_q.assert_not_called()
-                mock_r.assert_not_called()
+        with patch("quarantine.reconcile_sources") as mock_rec:
+            _quarantine_missing_sources("/data/docs")
+            mock_rec.assert_not_called()
 
 
 # ── Server Scheduler Purge ─────────────────────────────────────────────────
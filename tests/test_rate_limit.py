@@ -1,13 +1,24 @@
+import pytest
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
 from rate_limit import (
+    PostgresTokenBucketRateLimiter,
     RateLimitMiddleware,
+    TokenBucketRateLimiter,
     TRUSTED_BULK_INDEXING_OPERATION,
     TRUSTED_OPERATION_HEADER,
 )
 
 
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
 def _make_client(limit: int) -> TestClient:
     app = FastAPI()
     app.add_middleware(RateLimitMiddleware, limit_per_minute=limit)
@@ -163,3 +174,79 @@ def test_health_probe_paths_bypass_rate_limit():
         r = client.get("/api/v1/health")
         assert r.status_code == 200
         assert "X-RateLimit-Limit" not in r.headers
+
+
+def test_token_bucket_refills_continuously_without_boundary_bursts():
+    clock = FakeClock()
+    limiter = TokenBucketRateLimiter(60, clock=clock)
+
+    assert all(limiter.check("k").allowed for _ in range(60))
+    denied = limiter.check("k")
+    assert not denied.allowed
+    assert denied.retry_after == 1
+
+    # A fixed window would reset here and allow another 60 at once.
+    clock.now += 10
+    assert sum(limiter.check("k").allowed for _ in range(60)) == 10
+
+
+def test_token_bucket_expires_idle_keys():
+    clock = FakeClock()
+    limiter = TokenBucketRateLimiter(10, clock=clock)
+    for i in range(100):
+        limiter.check(f"k{i}")
+    assert len(limiter) == 100
+
+    clock.now += 61
+    limiter.check("fresh")
+    assert len(limiter) == 1
+
+
+def test_route_costs_spend_more_budget():
+    app = FastAPI()
+    app.add_middleware(
+        RateLimitMiddleware, limit_per_minute=10, route_costs={"/search": 4}
+    )
+
+    @app.post("/api/v1/upload-and-index")
+    async def upload_and_index():
+        return {"ok": True}
+
+    @app.post("/api/v1/search")
+    async def search():
+        return {"ok": True}
+
+    client = TestClient(app)
+
+    assert client.post("/api/v1/upload-and-index").headers["X-RateLimit-Remaining"] == "5"
+    assert client.post("/api/v1/search").headers["X-RateLimit-Remaining"] == "1"
+    limited = client.post("/api/v1/search")
+    assert limited.status_code == 429
+    assert limited.json()["details"]["cost"] == 4
+
+
+def test_shared_limiter_falls_back_to_memory_when_db_is_down():
+    def broken():
+        raise RuntimeError("db down")
+
+    limiter = PostgresTokenBucketRateLimiter(1, connection_factory=broken)
+    assert limiter.check("k").allowed
+    assert not limiter.check("k").allowed
+
+
+@pytest.mark.database
+def test_shared_limiter_enforces_one_budget_across_workers(db_manager):
+    workers = [
+        PostgresTokenBucketRateLimiter(3, connection_factory=db_manager.get_connection)
+        for _ in range(2)
+    ]
+    try:
+        assert workers[0].check("shared-test").allowed
+        assert workers[1].check("shared-test", cost=2).allowed
+        denied = workers[0].check("shared-test")
+        assert not denied.allowed
+        assert denied.remaining == 0
+        assert denied.retry_after >= 1
+    finally:
+        with db_manager.get_cursor() as cursor:
+            cursor.execute("DELETE FROM rate_limit_buckets WHERE bucket_key = 'shared-test'")
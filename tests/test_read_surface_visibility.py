@@ -110,27 +110,47 @@ def _fake_adapter(docs):
     return adapter
 
 
+def _ctx(conn):
+    """Stand-in for ``with _get_db_connection() as conn``."""
+    manager = MagicMock()
+    manager.__enter__.return_value = conn
+    return manager
+
+
 _LANCEDB_DOCS = [
     {"source_uri": "secret/alpha.pdf", "document_id": "hidden-1", "chunk_count": 3, "indexed_at": None},
     {"source_uri": "shared/beta.txt", "document_id": "vis-1", "chunk_count": 2, "indexed_at": None},
 ]
 
 
-def test_tree_children_lancedb_hides_hidden_docs(monkeypatch):
+def test_tree_children_lancedb_reads_shared_hierarchy(monkeypatch):
     import document_tree
-    monkeypatch.setattr("services.get_lancedb_adapter", lambda: _fake_adapter(_LANCEDB_DOCS))
+    adapter = _fake_adapter(_LANCEDB_DOCS)
+    monkeypatch.setattr("services.get_lancedb_adapter", lambda: adapter)
+    conn = MagicMock()
+    conn.cursor.return_value.fetchone.return_value = (0, 0)
+    conn.cursor.return_value.fetchall.return_value = []
+    monkeypatch.setattr("document_tree._get_db_connection", lambda: _ctx(conn))
+
+    document_tree.get_tree_children(source="lancedb", visibility=VIS_SENTINEL)
 
-    result = document_tree.get_tree_children(source="lancedb", hidden_document_ids=["hidden-1"])
-    names = [c["name"] for c in result["children"]]
-    assert "secret" not in names
-    assert "shared" in names
+    adapter.list_documents.assert_not_called()
+    sql, params = conn.cursor.return_value.execute.call_args_list[0].args
+    assert "document_folders" in sql
+    assert VIS_SENTINEL[0] in sql
 
 
 def test_tree_stats_lancedb_counts_only_visible(monkeypatch):
     import document_tree
-    monkeypatch.setattr("services.get_lancedb_adapter", lambda: _fake_adapter(_LANCEDB_DOCS))
-
-    stats = document_tree.get_tree_stats(source="lancedb", hidden_document_ids=["hidden-1"])
+    adapter = _fake_adapter(_LANCEDB_DOCS)
+    adapter.get_statistics.return_value = {"total_documents": 1, "total_chunks": 2}
+    monkeypatch.setattr("services.get_lancedb_adapter", lambda: adapter)
+    conn = MagicMock()
+    conn.cursor.return_value.fetchone.side_effect = [(1, 0)]
+    monkeypatch.setattr("document_tree._get_db_connection", lambda: _ctx(conn))
+
+    stats = document_tree.get_tree_stats(source="lancedb", visible_to={"user_id": "u-1"})
+    adapter.get_statistics.assert_called_once_with(visible_to={"user_id": "u-1"})
     assert stats["total_documents"] == 1
     assert stats["total_chunks"] == 2
     assert stats["top_level_items"] == 1
@@ -138,11 +158,13 @@ def test_tree_stats_lancedb_counts_only_visible(monkeypatch):
 
 def test_tree_search_lancedb_hides_hidden_docs(monkeypatch):
     import document_tree
-    monkeypatch.setattr("services.get_lancedb_adapter", lambda: _fake_adapter(_LANCEDB_DOCS))
+    adapter = _fake_adapter([_LANCEDB_DOCS[1]])
+    monkeypatch.setattr("services.get_lancedb_adapter", lambda: adapter)
 
-    results = document_tree.search_tree("alpha", source="lancedb", hidden_document_ids=["hidden-1"])
+    results = document_tree.search_tree("alpha", source="lancedb", visible_to={"user_id": "u-1"})
     assert results == []
-    results = document_tree.search_tree("beta", source="lancedb", hidden_document_ids=["hidden-1"])
+    adapter.list_documents.assert_called_with(visible_to={"user_id": "u-1"})
+    results = document_tree.search_tree("beta", source="lancedb", visible_to={"user_id": "u-1"})
     assert len(results) == 1
 
 
@@ -218,7 +240,7 @@ async def test_tree_routes_pass_filters(monkeypatch):
         "document_visibility.visibility_clause_for_key_record", lambda kr: VIS_SENTINEL
     )
     monkeypatch.setattr(
-        "document_visibility.search_exclusions_for_key_record", lambda kr: ["hidden-1"]
+        "document_visibility.search_visibility_for_key_record", lambda kr: {"user_id": "u-1"}
     )
 
     captured = {}
@@ -239,21 +261,24 @@ async def test_tree_routes_pass_filters(monkeypatch):
     monkeypatch.setattr("document_tree.get_tree_stats", fake_stats)
     monkeypatch.setattr("document_tree.search_tree", fake_search)
 
-    # Postgres source: SQL clause, no hidden-id list
-    await search_api.get_document_tree(
-        parent_path="", limit=200, offset=0, source="postgres", key_record={"id": 1},
-    )
-    assert captured["children"]["visibility"] == VIS_SENTINEL
-    assert captured["children"]["hidden_document_ids"] is None
+    # Tree children: both sources read the shared folder hierarchy, which
+    # is filtered by the SQL clause alone.
+    for source in ("postgres", "lancedb"):
+        await search_api.get_document_tree(
+            parent_path="", limit=200, offset=0, source=source, cursor=None,
+            key_record={"id": 1},
+        )
+        assert captured["children"]["visibility"] == VIS_SENTINEL
+        assert "visible_to" not in captured["children"]
 
-    # LanceDB source: hidden-id exclusion list is computed
+    # LanceDB source: the visible_to predicate is computed
     await search_api.get_document_tree_stats(source="lancedb", key_record={"id": 1})
-    assert captured["stats"]["hidden_document_ids"] == ["hidden-1"]
+    assert captured["stats"]["visible_to"] == {"user_id": "u-1"}
 
     await search_api.search_document_tree(
         q="x", limit=50, source="lancedb", key_record={"id": 1},
     )
-    assert captured["search"]["hidden_document_ids"] == ["hidden-1"]
+    assert captured["search"]["visible_to"] == {"user_id": "u-1"}
 
 
 # ---------------------------------------------------------------------------
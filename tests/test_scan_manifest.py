@@ -0,0 +1,333 @@
+"""
+Tests for the stat-based scan manifest (scan_manifest.py, migration 030).
+
+Tests cover:
+- walk_root stats nested files with forward-slash relative paths
+- plan_scan classification: unchanged files are never hashed, touched files
+  only refresh their stat, modified/new/reappeared files are indexed,
+  vanished files are reported as deleted
+- entries whose document was purged are indexed again
+- scan_folder stopping early when asked (runtime limit)
+- stat_paths statting only the given files and subtrees
+- scan_folder indexing only changed files and quarantining from the
+  manifest across repeated scans, and watch batches touching only their
+  own paths (DB-backed)
+- a scan killed mid-way resuming from its checkpoint without re-indexing
+  the files it finished, and closing the dangling run (DB-backed)
+"""
+
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from scan_manifest import FileStat, plan_scan, stat_paths, walk_root
+
+
+def _entry(size=10, mtime_ns=1, inode=7, content_hash="h", document_id="d", missing=False):
+    return {
+        "size": size, "mtime_ns": mtime_ns, "inode": inode,
+        "content_hash": content_hash, "document_id": document_id, "missing": missing,
+    }
+
+
+def _stat(name, size=10, mtime_ns=1, inode=7):
+    return FileStat(f"/root/{name}", size, mtime_ns, inode)
+
+
+class _Hasher:
+    def __init__(self, digests):
+        self.digests = digests
+        self.calls = []
+
+    def __call__(self, path):
+        self.calls.append(path)
+        return self.digests[path]
+
+
+def test_walk_root_stats_nested_files(tmp_path):
+    (tmp_path / "sub" / "deeper").mkdir(parents=True)
+    (tmp_path / "a.txt").write_text("a")
+    (tmp_path / "sub" / "deeper" / "b.md").write_text("bb")
+
+    files = walk_root(str(tmp_path))
+
+    assert sorted(files) == ["a.txt", "sub/deeper/b.md"]
+    stat = files["sub/deeper/b.md"]
+    assert stat.size == 2
+    assert stat.path == os.path.join(str(tmp_path), "sub", "deeper", "b.md")
+    assert stat.mtime_ns == os.stat(stat.path).st_mtime_ns
+
+
+def test_stat_paths_only_stats_given_paths(tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "a.txt").write_text("a")
+    (tmp_path / "other.txt").write_text("o")
+    (tmp_path / "sub" / "b.md").write_text("bb")
+
+    files = stat_paths(str(tmp_path), ["a.txt", "gone.txt", "sub/", "nothere/"])
+
+    assert sorted(files) == ["a.txt", "sub/b.md"]
+    assert files["sub/b.md"].size == 2
+
+
+class TestPlanScan:
+    def test_unchanged_files_are_not_hashed(self):
+        hasher = _Hasher({})
+        plan = plan_scan({"a": _stat("a")}, {"a": _entry()}, hasher=hasher)
+        assert plan.unchanged == ["a"]
+        assert plan.to_index == []
+        assert hasher.calls == []
+
+    def test_touched_file_refreshes_stat_only(self):
+        hasher = _Hasher({"/root/a": "h"})
+        plan = plan_scan({"a": _stat("a", mtime_ns=2)}, {"a": _entry()}, hasher=hasher)
+        assert plan.to_index == []
+        assert plan.touched == {"a": (_stat("a", mtime_ns=2), "h")}
+        assert plan.counts()["unchanged"] == 1
+
+    def test_new_modified_and_deleted(self):
+        hasher = _Hasher({"/root/new": "n", "/root/mod": "h2"})
+        current = {"new": _stat("new"), "mod": _stat("mod", size=11), "same": _stat("same")}
+        manifest = {"mod": _entry(), "same": _entry(), "gone": _entry()}
+
+        plan = plan_scan(current, manifest, hasher=hasher)
+
+        assert [(rel, h, kind) for rel, _st, h, kind in plan.to_index] == [
+            ("mod", "h2", "modified"), ("new", "n", "new"),
+        ]
+        assert plan.deleted == ["gone"]
+        assert plan.counts() == {
+            "unchanged": 1, "new": 1, "modified": 1, "reappeared": 0,
+            "deleted": 1, "hashed": 2,
+        }
+
+    def test_reappeared_file(self):
+        manifest = {"back": _entry(missing=True), "changed": _entry(missing=True)}
+        current = {"back": _stat("back"), "changed": _stat("changed", size=3)}
+        hasher = _Hasher({"/root/changed": "other"})
+
+        plan = plan_scan(current, manifest, hasher=hasher)
+
+        assert plan.restored == ["back"]
+        assert [(rel, kind) for rel, _st, _h, kind in plan.to_index] == [("changed", "reappeared")]
+        assert plan.counts()["reappeared"] == 2
+
+    def test_missing_entries_stay_deleted_once(self):
+        plan = plan_scan({}, {"gone": _entry(missing=True)}, hasher=_Hasher({}))
+        assert plan.deleted == []
+
+    def test_purged_document_is_indexed_again(self):
+        hasher = _Hasher({"/root/a": "h"})
+        plan = plan_scan({"a": _stat("a")}, {"a": _entry(document_id="purged")},
+                         live_document_ids=set(), hasher=hasher)
+        assert [(rel, kind) for rel, _st, _h, kind in plan.to_index] == [("a", "new")]
+
+    def test_unreadable_file_is_left_to_the_indexer(self):
+        def hasher(path):
+            raise PermissionError(path)
+
+        plan = plan_scan({"a": _stat("a")}, {}, hasher=hasher)
+        assert plan.to_index[0][2] is None
+
+
+@patch("scan_manifest.apply_scan")
+@patch("scan_manifest._default_hasher", return_value="h")
+@patch("scan_manifest.load_manifest", return_value={})
+@patch("scan_manifest.walk_root", return_value={"a": _stat("a"), "b": _stat("b")})
+@patch("os.path.isdir", return_value=True)
+def test_scan_folder_stops_when_asked(_isdir, _walk, _load, _hash, mock_apply):
+    from watched_folders import scan_folder
+
+    indexer = MagicMock()
+    indexer.index_document.return_value = {"status": "success", "document_id": "d"}
+    indexer.config.retrieval.lancedb_enabled = False
+    runs = MagicMock(start_run=MagicMock(return_value="run-1"))
+    calls = iter([False, True])
+    seen = []
+
+    with patch.dict("sys.modules", {
+        "indexing_runs": runs,
+        "indexer_v2": MagicMock(DocumentIndexer=MagicMock(return_value=indexer)),
+    }), patch("watched_folders._quarantine_missing_sources", return_value={}):
+        result = scan_folder("/root", should_stop=lambda: next(calls),
+                             progress=lambda done, total: seen.append((done, total)))
+
+    assert result["status"] == "partial"
+    assert result["stopped"] is True
+    assert indexer.index_document.call_count == 1
+    assert seen == [(0, 2), (1, 2)]
+    # Only the indexed file is recorded; the other is picked up next scan
+    assert list(mock_apply.call_args[0][3]) == ["a"]
+
+
+@pytest.mark.database
+def test_scan_folder_only_indexes_changes(db_manager, tmp_path):
+    from database import DocumentRepository
+    from watched_folders import scan_folder
+
+    root = tmp_path / "docs"
+    root.mkdir()
+    (root / "a.txt").write_text("alpha")
+    (root / "b.txt").write_text("beta")
+    repo = DocumentRepository(db_manager)
+    indexed = []
+
+    def index_document(path, custom_metadata=None, rebuild_fts=True):
+        indexed.append(os.path.basename(path))
+        doc_id = "manifest-" + os.path.basename(path)
+        repo.delete_document(doc_id)
+        repo.insert_chunks([(doc_id, 0, "text", path, [0.0] * 384, {})])
+        return {"status": "success", "document_id": doc_id}
+
+    indexer = MagicMock()
+    indexer.index_document.side_effect = index_document
+    indexer.config.retrieval.lancedb_enabled = False
+
+    def scan(paths=None):
+        indexed.clear()
+        with patch("indexer_v2.DocumentIndexer", return_value=indexer), \
+             patch("indexing_runs.get_db_manager", return_value=db_manager), \
+             patch("scan_manifest._get_db_connection", db_manager.get_connection), \
+             patch("quarantine._get_db_connection", db_manager.get_connection), \
+             patch("watched_folders._get_db_connection", db_manager.get_connection):
+            return scan_folder(str(root), root_id="manifest-root", paths=paths)
+
+    try:
+        first = scan()
+        assert sorted(indexed) == ["a.txt", "b.txt"]
+        assert first["files_added"] == 2
+
+        second = scan()
+        assert indexed == []
+        assert second["files_skipped"] == 2
+
+        (root / "a.txt").write_text("alpha, edited")
+        (root / "b.txt").unlink()
+        third = scan()
+        assert indexed == ["a.txt"]
+        assert third["files_updated"] == 1
+
+        with db_manager.get_cursor() as cursor:
+            cursor.execute(
+                "SELECT document_id, quarantined_at IS NOT NULL FROM document_chunks "
+                "WHERE document_id LIKE 'manifest-%%' ORDER BY 1"
+            )
+            assert cursor.fetchall() == [("manifest-a.txt", False), ("manifest-b.txt", True)]
+            cursor.execute(
+                "SELECT metadata->'scan' FROM indexing_runs WHERE id = %s", (third["run_id"],)
+            )
+            scan_stats = cursor.fetchone()[0]
+        assert scan_stats["manifest"] == "incremental"
+        assert (scan_stats["modified"], scan_stats["deleted"], scan_stats["hashed"]) == (1, 1, 1)
+
+        # A watch batch only looks at the paths it was given
+        (root / "sub").mkdir()
+        (root / "sub" / "c.txt").write_text("gamma")
+        (root / "a.txt").unlink()
+        (root / "b.txt").write_text("beta, back")
+        watch = scan(paths={"sub/", "b.txt"})
+        assert sorted(indexed) == ["b.txt", "c.txt"]
+        assert (watch["files_added"], watch["files_updated"]) == (1, 1)  # b.txt reappeared
+
+        with db_manager.get_cursor() as cursor:
+            cursor.execute(
+                "SELECT trigger, metadata->'scan'->>'manifest' FROM indexing_runs WHERE id = %s",
+                (watch["run_id"],),
+            )
+            assert cursor.fetchone() == ("watch", "watch")
+            # a.txt is gone but was not in the batch; the next scan catches it
+            cursor.execute(
+                "SELECT quarantined_at IS NOT NULL FROM document_chunks "
+                "WHERE document_id = 'manifest-a.txt'"
+            )
+            assert cursor.fetchone() == (False,)
+
+        (root / "sub" / "c.txt").unlink()
+        (root / "sub").rmdir()
+        scan(paths={"sub"})
+        with db_manager.get_cursor() as cursor:
+            cursor.execute(
+                "SELECT rel_path FROM scan_manifest "
+                "WHERE root_key = 'manifest-root' AND missing_since IS NOT NULL"
+            )
+            assert cursor.fetchall() == [("sub/c.txt",)]
+    finally:
+        with db_manager.get_cursor() as cursor:
+            cursor.execute("DELETE FROM scan_manifest WHERE root_key = 'manifest-root'")
+            cursor.execute("DELETE FROM indexing_runs")
+
+
+class _Killed(BaseException):
+    """Stands in for the process dying mid-scan (escapes scan_folder's handlers)."""
+
+
+@pytest.mark.database
+def test_killed_scan_resumes_from_checkpoint(db_manager, tmp_path, monkeypatch):
+    from database import DocumentRepository
+    from watched_folders import scan_folder
+
+    monkeypatch.setenv("SCAN_CHECKPOINT_FILES", "1")
+    root = tmp_path / "share"
+    root.mkdir()
+    for i in range(5):
+        (root / f"f{i}.txt").write_text(f"file {i}")
+    repo = DocumentRepository(db_manager)
+    indexed = []
+    kill_after = [3]
+
+    def index_document(path, custom_metadata=None, rebuild_fts=True):
+        if len(indexed) == kill_after[0]:
+            raise _Killed()
+        indexed.append(os.path.basename(path))
+        doc_id = "resume-" + os.path.basename(path)
+        repo.delete_document(doc_id)
+        repo.insert_chunks([(doc_id, 0, "text", path, [0.0] * 384, {})])
+        return {"status": "success", "document_id": doc_id}
+
+    indexer = MagicMock()
+    indexer.index_document.side_effect = index_document
+    indexer.config.retrieval.lancedb_enabled = False
+
+    def scan(**kwargs):
+        with patch("indexer_v2.DocumentIndexer", return_value=indexer), \
+             patch("indexing_runs.get_db_manager", return_value=db_manager), \
+             patch("scan_manifest._get_db_connection", db_manager.get_connection), \
+             patch("quarantine._get_db_connection", db_manager.get_connection), \
+             patch("watched_folders._get_db_connection", db_manager.get_connection):
+            return scan_folder(str(root), root_id="resume-root", **kwargs)
+
+    checkpoints = []
+    try:
+        with pytest.raises(_Killed):
+            scan(on_checkpoint=checkpoints.append)
+        assert indexed == ["f0.txt", "f1.txt", "f2.txt"]
+        killed_run = checkpoints[-1]["run_id"]
+        assert {k: checkpoints[-1][k] for k in ("last_path", "files_done", "files_total")} == {
+            "last_path": "f2.txt", "files_done": 3, "files_total": 5,
+        }
+
+        indexed.clear()
+        kill_after[0] = None
+        resumed = scan(exclusive=True)
+        assert indexed == ["f3.txt", "f4.txt"]
+        assert (resumed["status"], resumed["files_added"], resumed["files_skipped"]) == ("success", 2, 3)
+
+        with db_manager.get_cursor() as cursor:
+            cursor.execute(
+                "SELECT status, files_added, metadata->>'interrupted', metadata->>'resumed_by' "
+                "FROM indexing_runs WHERE id = %s",
+                (killed_run,),
+            )
+            assert cursor.fetchone() == ("partial", 3, "true", resumed["run_id"])
+            cursor.execute(
+                "SELECT metadata->'scan'->>'resumed_from' FROM indexing_runs WHERE id = %s",
+                (resumed["run_id"],),
+            )
+            assert cursor.fetchone()[0] == killed_run
+            cursor.execute("SELECT count(*) FROM scan_manifest WHERE root_key = 'resume-root'")
+            assert cursor.fetchone()[0] == 5
+    finally:
+        with db_manager.get_cursor() as cursor:
+            cursor.execute("DELETE FROM scan_manifest WHERE root_key = 'resume-root'")
+            cursor.execute("DELETE FROM indexing_runs")
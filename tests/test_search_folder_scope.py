@@ -78,19 +78,22 @@ class TestPostgresPathPrefixFilters:
         from path_utils import NORMALIZED_URI_SQL
         cte, source, params = _cte({"path_prefixes": ["ProjectA"]})
         assert source == "filtered_docs"
-        assert f"{NORMALIZED_URI_SQL} LIKE ANY(%s)" in cte
-        assert params == [["ProjectA/%"]]
+        assert f"{NORMALIZED_URI_SQL} LIKE %s" in cte
+        assert params == ["ProjectA/%"]
 
-    def test_include_multiple_prefixes_single_any_param(self):
-        # LIKE ANY evaluates the normalization expression once per row
-        # regardless of prefix count.
+    def test_include_multiple_prefixes_are_indexable_or_arms(self):
+        # One plain LIKE per prefix: each arm can use idx_chunks_norm_uri
+        # (LIKE ANY(array) never can).
         cte, source, params = _cte({"path_prefixes": ["A", "B"]})
-        assert cte.count("LIKE ANY(%s)") == 1
-        assert params == [["A/%", "B/%"]]
+        assert "LIKE ANY" not in cte
+        assert cte.count("LIKE %s") == 2
+        assert " OR " in cte
+        assert params == ["A/%", "B/%"]
 
     def test_exclude_prefix_negated(self):
         cte, source, params = _cte({"excluded_path_prefixes": ["Archive"]})
         assert "NOT (" in cte
+        assert "LIKE ANY(%s)" in cte
         assert params == [["Archive/%"]]
 
     def test_include_and_exclude_combined(self):
@@ -100,7 +103,7 @@ class TestPostgresPathPrefixFilters:
         })
         assert "NOT (" in cte
         assert " AND " in cte
-        assert params == [["Docs/%"], ["Docs/old/%"]]
+        assert params == ["Docs/%", ["Docs/old/%"]]
 
     def test_empty_lists_are_noop(self):
         cte, source, params = _cte({
@@ -121,10 +124,11 @@ class TestPostgresPathPrefixFilters:
             "path_prefixes": ["Docs"],
             "extensions": [".pdf"],
         })
-        assert "source_uri ILIKE %s" in cte
-        assert "LIKE ANY(%s)" in cte
-        assert "%.pdf" in params
-        assert ["Docs/%"] in params
+        from database import FILE_EXTENSION_EXPRESSION
+        assert f"{FILE_EXTENSION_EXPRESSION} = ANY(%s)" in cte
+        assert "LIKE %s" in cte
+        assert [".pdf"] in params
+        assert "Docs/%" in params
 
     def test_unsupported_key_error_lists_new_keys(self):
         with pytest.raises(ValueError) as exc_info:
@@ -141,7 +145,7 @@ class TestPostgresPathPrefixFilters:
             {"path_prefixes": ["Docs"]}
         )
         assert len(clauses) == 1
-        assert params == [["Docs/%"]]
+        assert params == ["Docs/%"]
 
 
 # ===========================================================================
@@ -226,6 +230,17 @@ class TestSearchSimilarScopeFilters:
         with pytest.raises(ValueError):
             repo.search_similar([0.0] * 384, filters={"bogus": "x"})
 
+    def test_include_clause_can_use_norm_uri_index(self, db_manager):
+        from path_utils import normalized_uri_prefix_clause
+        clause, params = normalized_uri_prefix_clause(["A/%", "B/%"])
+        with db_manager.get_cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute(
+                f"EXPLAIN SELECT document_id FROM document_chunks WHERE {clause}", params
+            )
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+        assert "idx_chunks_norm_uri" in plan
+
 
 # ===========================================================================
 # Literal folder prefix for delete/preview/export (source_uri_prefix)
@@ -1,8 +1,9 @@
 """Tests for per-user document visibility filtering in search.
 
-Covers the reserved ``excluded_document_ids`` filter key across the LanceDB
-and Postgres filter builders, plus the identity-resolution helper that turns
-an API key record into an exclusion list.
+Covers the reserved ``excluded_document_ids`` and ``visible_to`` filter keys
+across the LanceDB and Postgres filter builders, plus the identity-resolution
+helpers that turn an API key record into an exclusion list or a visibility
+predicate.
 """
 
 import pytest
@@ -13,6 +14,7 @@ import document_visibility
 from document_visibility import (
     get_hidden_document_ids,
     search_exclusions_for_key_record,
+    search_visibility_for_key_record,
 )
 
 
@@ -53,6 +55,15 @@ def test_lancedb_clause_combines_with_other_filters(adapter):
     assert " AND " in clause
 
 
+def test_lancedb_clause_visible_to_is_compact(adapter):
+    assert adapter._build_lancedb_filter_clause({"visible_to": {"user_id": "u'1"}}) == (
+        "(visibility = 'shared' OR owner_id = 'u''1')"
+    )
+    assert adapter._build_lancedb_filter_clause({"visible_to": {"user_id": None}}) == (
+        "visibility = 'shared'"
+    )
+
+
 def test_lancedb_search_respects_exclusion(adapter):
     """End-to-end on real LanceDB tables: an excluded doc never returns chunks."""
     text = "EV6 charging port diagnostics manual"
@@ -115,6 +126,14 @@ def test_filtered_docs_cte_empty_exclusion_is_noop():
     assert params == []
 
 
+def test_filtered_docs_cte_visible_to_uses_owner_columns():
+    ret = _make_retriever()
+    cte, source, params = ret._build_filtered_docs_context({"visible_to": {"user_id": "u-1"}})
+    assert "owner_id = %s" in cte
+    assert source == "filtered_docs"
+    assert params == ["u-1"]
+
+
 def test_filtered_docs_cte_unknown_key_still_raises():
     ret = _make_retriever()
     with pytest.raises(ValueError, match="Unsupported filter key"):
@@ -161,6 +180,27 @@ def test_unlinked_key_hides_all_private_docs():
     assert result == ["doc-a", "doc-b"]
 
 
+def test_visible_to_follows_identity_rules():
+    assert search_visibility_for_key_record(None) is None
+    with patch("users.get_user_by_api_key", return_value={"id": "u-admin", "role": "admin"}), \
+         patch("role_permissions.has_permission", return_value=True):
+        assert search_visibility_for_key_record({"id": 1}) is None
+    with patch("users.get_user_by_api_key", return_value={"id": "u-1", "role": "user"}), \
+         patch("role_permissions.has_permission", return_value=False):
+        assert search_visibility_for_key_record({"id": 2}) == {"user_id": "u-1"}
+    with patch("users.get_user_by_api_key", return_value=None):
+        assert search_visibility_for_key_record({"id": 3}) == {"user_id": None}
+
+
+def test_apply_access_filters_overrides_client_visible_to():
+    from routers.search_api import _apply_access_filters
+
+    with patch("document_visibility.search_visibility_for_key_record", return_value={"user_id": "u-1"}), \
+         patch("collection_grants.search_allowed_namespaces_for_key_record", return_value=None):
+        result = _apply_access_filters({"id": 1}, {"visible_to": {"user_id": "u-2"}})
+    assert result == {"visible_to": {"user_id": "u-1"}}
+
+
 def test_get_hidden_document_ids_admin_short_circuits():
     """Admin path must not touch the database."""
     with patch.object(document_visibility, "_get_db_connection") as conn:
@@ -190,8 +230,8 @@ def test_context_endpoint_applies_access_filters():
     fake_ret.get_context.return_value = "ctx"
 
     with patch.object(search_api, "get_retriever", return_value=fake_ret), \
-         patch("document_visibility.search_exclusions_for_key_record",
-               return_value=["doc-hidden"]), \
+         patch("document_visibility.search_visibility_for_key_record",
+               return_value={"user_id": "u-1"}), \
          patch("collection_grants.search_allowed_namespaces_for_key_record",
                return_value=["finance"]):
         asyncio.run(
@@ -201,7 +241,7 @@ def test_context_endpoint_applies_access_filters():
 
     _, kwargs = fake_ret.get_context.call_args
     assert kwargs["filters"] == {
-        "excluded_document_ids": ["doc-hidden"],
+        "visible_to": {"user_id": "u-1"},
         "allowed_namespaces": ["finance"],
     }
 
@@ -228,7 +268,7 @@ def test_apply_access_filters_client_cannot_widen_namespaces():
     """A client-supplied allowed_namespaces must never survive unrestricted."""
     from routers.search_api import _apply_access_filters
 
-    with patch("document_visibility.search_exclusions_for_key_record", return_value=[]), \
+    with patch("document_visibility.search_visibility_for_key_record", return_value=None), \
          patch("collection_grants.search_allowed_namespaces_for_key_record", return_value=None):
         result = _apply_access_filters({"id": 1}, {"allowed_namespaces": ["anything"]})
     assert result is None
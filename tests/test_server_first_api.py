@@ -254,6 +254,14 @@ class TestFilesystemValidation:
         with pytest.raises(ValueError, match="executor_id"):
             add_folder("/test", execution_scope="client", client_id=None, executor_id=None)
 
+    def test_invalid_schedule_is_rejected(self):
+        """A cron expression that cannot be parsed should raise ValueError."""
+        from watched_folders import add_folder, update_folder
+        with pytest.raises(ValueError, match="cron"):
+            add_folder("/test", schedule_cron="every hour", client_id="c1")
+        with pytest.raises(ValueError, match="never fires"):
+            update_folder("some-id", schedule_cron="0 0 31 2 *")
+
 
 # ---------------------------------------------------------------------------
 # Add folder scope tests
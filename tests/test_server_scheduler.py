@@ -6,11 +6,15 @@ Covers:
 - Scope filtering (only scans server roots)
 - Async scan wrapper (doesn't block event loop)
 - Failure backoff logic
-- Cron-to-seconds conversion
+- Cron schedule: next-fire heap, change notifications, full reloads
 - Scan watermark updates
+- Concurrent scanning: worker budget, per-root isolation, large-root lane,
+  runtime limit, status
+- Scan checkpoints: interrupted roots resume at once, stopped ones wait
 """
 
 import asyncio
+import threading
 import time
 from datetime import datetime, timezone, timedelta
 from unittest.mock import MagicMock, patch, AsyncMock
@@ -55,23 +59,146 @@ class TestServerSchedulerInit:
         assert status["active_scans"] == 0
 
 
-class TestCronToSeconds:
-    """Tests for cron pattern parsing."""
+class TestSchedule:
+    """Next-fire heap, notifications and cron semantics."""
 
-    def test_every_6_hours(self):
-        assert ServerScheduler._cron_to_seconds("0 */6 * * *") == 6 * 3600
+    def test_due_time_follows_cron_not_an_interval(self):
+        scheduler = ServerScheduler()
+        last = datetime(2026, 10, 19, 5, 10, tzinfo=timezone.utc)
+        folder = {"id": "f", "last_scanned_at": last.isoformat(), "schedule_cron": "0 */6 * * *"}
+        due = scheduler._next_due_ts(folder)
+        assert due == datetime(2026, 10, 19, 6, 0, tzinfo=timezone.utc).timestamp()
+
+        folder["schedule_cron"] = "30 2 * * 1-5"  # weekdays at 02:30
+        saturday = datetime(2026, 10, 17, 3, 0, tzinfo=timezone.utc)
+        folder["last_scanned_at"] = saturday.isoformat()
+        assert scheduler._next_due_ts(folder) == datetime(
+            2026, 10, 19, 2, 30, tzinfo=timezone.utc).timestamp()
+
+    def test_invalid_cron_uses_default_schedule(self):
+        scheduler = ServerScheduler()
+        last = datetime(2026, 10, 19, 5, 10, tzinfo=timezone.utc)
+        folder = {"id": "f", "last_scanned_at": last.isoformat(), "schedule_cron": "invalid"}
+        assert scheduler._next_due_ts(folder) == datetime(
+            2026, 10, 19, 6, 0, tzinfo=timezone.utc).timestamp()
+
+    def test_paused_and_backoff_roots(self):
+        scheduler = ServerScheduler()
+        assert scheduler._next_due_ts({"id": "p", "paused": True}) is None
+        error_at = datetime.now(timezone.utc)
+        folder = {
+            "id": "b", "last_scanned_at": None,
+            "consecutive_failures": MAX_FAILURE_STREAK, "last_error_at": error_at.isoformat(),
+        }
+        assert scheduler._next_due_ts(folder) == pytest.approx(
+            error_at.timestamp() + FAILURE_BACKOFF_SECONDS)
+
+    def test_interrupted_scan_is_due_at_once(self):
+        scheduler = ServerScheduler()
+        folder = {
+            "id": "f", "last_scanned_at": datetime.now(timezone.utc).isoformat(),
+            "scan_checkpoint": {"state": "running", "files_done": 10},
+        }
+        assert scheduler._next_due_ts(folder) == 0.0
+        folder["scan_checkpoint"]["state"] = "stopped"
+        assert scheduler._next_due_ts(folder) > time.time()
+
+    @pytest.mark.asyncio
+    async def test_sleeps_until_earliest_root(self):
+        scheduler = ServerScheduler()
+        scheduler._last_purge_at = time.time()
+        now = datetime.now(timezone.utc).isoformat()
+        folders = [
+            {"id": "later", "last_scanned_at": now, "schedule_cron": "@yearly"},
+            {"id": "soon", "last_scanned_at": now, "schedule_cron": "*/10 * * * *"},
+        ]
+        with patch("watched_folders.list_folders", return_value=folders):
+            await scheduler._run_pending_scans()
 
-    def test_every_12_hours(self):
-        assert ServerScheduler._cron_to_seconds("0 */12 * * *") == 12 * 3600
+        assert scheduler._queue == []
+        assert [d["folder_id"] for d in scheduler.get_status()["next_due"]] == ["soon", "later"]
+        assert 1.0 <= scheduler._sleep_seconds() <= 600
 
-    def test_every_30_minutes(self):
-        assert ServerScheduler._cron_to_seconds("*/30 * * * *") == 30 * 60
+    @pytest.mark.asyncio
+    async def test_notification_reschedules_one_root(self):
+        scheduler = ServerScheduler()
+        now = datetime.now(timezone.utc).isoformat()
+        folder = {"id": "f", "last_scanned_at": now, "schedule_cron": "@daily"}
+        with patch("watched_folders.list_folders", return_value=[folder]) as mock_list:
+            await scheduler._run_pending_scans()
+
+            # Paused via the API: the trigger notifies, the root is dropped
+            scheduler._on_folder_change({"f"})
+            assert scheduler._wakeup.is_set()
+            with patch("watched_folders.get_folder", return_value=dict(folder, paused=True)):
+                await scheduler._run_pending_scans()
+            assert scheduler.get_status()["scheduled_roots"] == 0
 
-    def test_invalid_cron_defaults_6h(self):
-        assert ServerScheduler._cron_to_seconds("invalid") == 6 * 3600
+            # Resumed with a schedule that is due now
+            edited = dict(folder, last_scanned_at=None)
+            scheduler._on_folder_change({"f"})
+            with patch("watched_folders.get_folder", return_value=edited), \
+                 patch.object(scheduler, "_run_scan", new_callable=AsyncMock) as mock_scan:
+                await scheduler._run_pending_scans()
+                await asyncio.gather(*scheduler._scan_tasks.values())
+            mock_scan.assert_called_once_with(edited)
+        # One full load; the edits were applied per root
+        assert mock_list.call_count == 1
 
-    def test_empty_cron_defaults_6h(self):
-        assert ServerScheduler._cron_to_seconds("") == 6 * 3600
+    @pytest.mark.asyncio
+    async def test_empty_notification_reloads_everything(self):
+        scheduler = ServerScheduler()
+        with patch("watched_folders.list_folders", return_value=[]) as mock_list:
+            await scheduler._run_pending_scans()
+            scheduler._on_folder_change({""})
+            await scheduler._run_pending_scans()
+        assert mock_list.call_count == 2
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+@pytest.mark.database
+def test_listener_hears_schedule_edits(db_manager):
+    from server_scheduler import FolderChangeListener
+
+    changes = []
+    connects = []
+    listener = FolderChangeListener(changes.append, lambda: connects.append(1),
+                                    connect=db_manager.connect_dedicated, poll_interval=0.1)
+    listener.start()
+    try:
+        assert _wait_for(lambda: connects)
+        with db_manager.get_cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO watched_folders (folder_path, normalized_folder_path, "
+                "execution_scope) VALUES ('/notify-test', '/notify-test', 'server') "
+                "RETURNING id"
+            )
+            folder_id = str(cursor.fetchone()[0])
+        try:
+            assert _wait_for(lambda: changes)
+            changes.clear()
+
+            # Scan bookkeeping does not notify; a schedule edit does.
+            with db_manager.get_cursor() as cursor:
+                cursor.execute(
+                    "UPDATE watched_folders SET last_scanned_at = now() WHERE id = %s", (folder_id,))
+                cursor.execute(
+                    "UPDATE watched_folders SET schedule_cron = '@hourly' WHERE id = %s", (folder_id,))
+            assert _wait_for(lambda: changes)
+            assert changes == [{folder_id}]
+        finally:
+            with db_manager.get_cursor() as cursor:
+                cursor.execute("DELETE FROM watched_folders WHERE id = %s", (folder_id,))
+    finally:
+        listener.stop()
 
 
 class TestIsScanDue:
@@ -193,7 +320,10 @@ class TestAsyncScan:
                     result = await scheduler._run_scan(folder)
 
         assert result["status"] == "success"
-        mock_sf.assert_called_once_with("/test/path", None, None)
+        args, kwargs = mock_sf.call_args
+        assert args == ("/test/path", None, None)
+        assert callable(kwargs["should_stop"]) and callable(kwargs["progress"])
+        assert scheduler.get_status()["recent"][0]["files_scanned"] == 5
 
     @pytest.mark.asyncio
     async def test_scan_failure_updates_watermarks(self):
@@ -232,3 +362,179 @@ class TestScanRootNow:
             result = await scheduler.scan_root_now("nonexistent")
         assert result["ok"] is False
         assert "not found" in result["error"].lower()
+
+
+def _due(folder_id, last_scanned_at=None):
+    return {
+        "id": folder_id,
+        "root_id": f"root-{folder_id}",
+        "folder_path": f"/{folder_id}",
+        "paused": False,
+        "consecutive_failures": 0,
+        "last_scanned_at": last_scanned_at,
+        "schedule_cron": "0 */6 * * *",
+    }
+
+
+class TestConcurrentScans:
+    """Due roots share a bounded pool of scan workers."""
+
+    @pytest.mark.asyncio
+    async def test_budget_bounds_running_scans_and_queues_the_rest(self, monkeypatch):
+        monkeypatch.setenv("SERVER_SCHEDULER_MAX_CONCURRENT_SCANS", "2")
+        scheduler = ServerScheduler()
+        release = asyncio.Event()
+
+        async def slow_scan(folder):
+            scheduler._scans[folder["id"]] = {
+                "root_id": folder["root_id"], "folder_path": folder["folder_path"],
+                "started_at": "now", "started_ts": time.time(),
+                "files_done": 0, "files_total": None, "large_root": False,
+            }
+            await release.wait()
+            del scheduler._scans[folder["id"]]
+            return {"status": "success"}
+
+        old = "2020-01-01T00:00:00+00:00"
+        folders = [_due("c", "2024-01-01T00:00:00+00:00"), _due("a"), _due("b", old)]
+        with patch("watched_folders.list_folders", return_value=folders), \
+             patch.object(scheduler, "_run_scan", side_effect=slow_scan):
+            await scheduler._run_pending_scans()
+            await asyncio.sleep(0)
+
+            status = scheduler.get_status()
+            assert status["active_scans"] == 2
+            assert {s["folder_id"] for s in status["scans"]} == {"a", "b"}
+            assert status["queue"] == [{
+                "position": 1, "folder_id": "c", "root_id": "root-c",
+                "folder_path": "/c", "large_root": False,
+            }]
+
+            # Running roots are not queued again on the next poll
+            await scheduler._run_pending_scans()
+            assert [f["id"] for f in scheduler._queue] == ["c"]
+
+            # A freed worker goes to the queued root
+            release.set()
+            await asyncio.gather(*scheduler._scan_tasks.values())
+            await asyncio.sleep(0)
+            assert scheduler._scan_tasks == {}
+            scheduler._dispatch()
+            assert list(scheduler._scan_tasks) == ["c"]
+            await asyncio.gather(*scheduler._scan_tasks.values())
+
+    @pytest.mark.asyncio
+    async def test_slow_root_does_not_block_others(self, monkeypatch):
+        monkeypatch.setenv("SERVER_SCHEDULER_MAX_CONCURRENT_SCANS", "2")
+        scheduler = ServerScheduler()
+        unblock = threading.Event()
+
+        def scan_folder(path, client_id, root_id, should_stop=None, progress=None, **kwargs):
+            if path == "/slow":
+                unblock.wait(5)
+            progress(1, 1)
+            return {"run_id": None, "status": "success", "files_scanned": 1}
+
+        with patch("watched_folders.list_folders", return_value=[_due("slow"), _due("fast")]), \
+             patch("watched_folders.scan_folder", side_effect=scan_folder), \
+             patch("watched_folders.update_scan_watermarks"), \
+             patch("watched_folders.mark_scanned"):
+            await scheduler._run_pending_scans()
+            fast = scheduler._scan_tasks["fast"]
+            await asyncio.wait_for(fast, timeout=5)
+
+            status = scheduler.get_status()
+            assert [s["folder_id"] for s in status["scans"]] == ["slow"]
+            assert status["scans"][0]["started_at"]
+            assert status["recent"][0]["folder_id"] == "fast"
+
+            unblock.set()
+            await asyncio.wait_for(scheduler._scan_tasks["slow"], timeout=5)
+        assert scheduler.get_status()["active_scans"] == 0
+
+    @pytest.mark.asyncio
+    async def test_large_roots_leave_a_worker_for_small_ones(self, monkeypatch):
+        monkeypatch.setenv("SERVER_SCHEDULER_MAX_CONCURRENT_SCANS", "2")
+        monkeypatch.setenv("SERVER_SCHEDULER_LONG_SCAN_SECONDS", "60")
+        scheduler = ServerScheduler()
+        scheduler._history = {
+            "big1": {"duration_seconds": 3600},
+            "big2": {"duration_seconds": 7200},
+        }
+        folders = [_due("big1"), _due("big2"), _due("small", "2024-01-01T00:00:00+00:00")]
+
+        with patch("watched_folders.list_folders", return_value=folders), \
+             patch.object(scheduler, "_run_scan", new_callable=AsyncMock) as mock_scan:
+            await scheduler._run_pending_scans()
+            started = [c.args[0]["id"] for c in mock_scan.call_args_list]
+            await asyncio.gather(*scheduler._scan_tasks.values())
+
+        assert started == ["big1", "small"]
+        assert [f["id"] for f in scheduler._queue] == ["big2"]
+
+    @pytest.mark.asyncio
+    async def test_runtime_limit_stops_scan(self, monkeypatch):
+        monkeypatch.setenv("SERVER_SCHEDULER_SCAN_MAX_SECONDS", "60")
+        scheduler = ServerScheduler()
+        checks = []
+
+        def scan_folder(path, client_id, root_id, should_stop=None, progress=None,
+                        on_checkpoint=None, exclusive=False):
+            assert exclusive is True
+            checks.append(should_stop())
+            on_checkpoint({"run_id": "run-1", "last_path": "a.txt", "files_done": 1})
+            with patch("server_scheduler.time.monotonic", return_value=time.monotonic() + 61):
+                checks.append(should_stop())
+            return {"run_id": None, "status": "partial", "stopped": True}
+
+        with patch("watched_folders.scan_folder", side_effect=scan_folder), \
+             patch("watched_folders.update_scan_watermarks") as mock_wm:
+            await scheduler._run_scan(_due("r"))
+
+        assert checks == [False, True]
+        assert scheduler.get_status()["recent"][0]["stopped"] is True
+        assert mock_wm.call_args_list[1].kwargs["checkpoint"]["state"] == "running"
+        # Stopped at the runtime limit: progress is kept, but the root waits
+        # for its next fire time instead of resuming at once
+        final = mock_wm.call_args_list[-1].kwargs
+        assert final["checkpoint"] == {
+            "run_id": "run-1", "last_path": "a.txt", "files_done": 1, "state": "stopped",
+        }
+
+    @pytest.mark.asyncio
+    async def test_shutdown_leaves_checkpoint_to_resume(self):
+        scheduler = ServerScheduler()
+
+        def scan_folder(path, client_id, root_id, should_stop=None, progress=None,
+                        on_checkpoint=None, exclusive=False):
+            on_checkpoint({"run_id": "run-1", "last_path": "a.txt", "files_done": 1})
+            scheduler._stopping = True
+            return {"run_id": None, "status": "partial", "stopped": should_stop()}
+
+        with patch("watched_folders.scan_folder", side_effect=scan_folder), \
+             patch("watched_folders.update_scan_watermarks") as mock_wm:
+            await scheduler._run_scan(_due("r"))
+
+        assert mock_wm.call_args_list[-1].kwargs["checkpoint"]["state"] == "running"
+
+    @pytest.mark.asyncio
+    async def test_finished_scan_clears_checkpoint(self):
+        scheduler = ServerScheduler()
+        with patch("watched_folders.scan_folder",
+                   return_value={"run_id": None, "status": "success"}), \
+             patch("watched_folders.update_scan_watermarks") as mock_wm:
+            await scheduler._run_scan(_due("r"))
+
+        final = mock_wm.call_args_list[-1].kwargs
+        assert final["checkpoint"] is None and final["clear_checkpoint"] is True
+
+    @pytest.mark.asyncio
+    async def test_scan_now_rejects_root_already_scanning(self):
+        scheduler = ServerScheduler()
+        folder = dict(_due("busy"), execution_scope="server")
+        scheduler._scans["busy"] = {}
+
+        with patch("watched_folders.get_folder_by_root_id", return_value=folder):
+            result = await scheduler.scan_root_now("root-busy")
+        assert result["ok"] is False
+        assert "already" in result["error"]
@@ -0,0 +1,259 @@
+"""
+Tests for resumable chunked uploads (/uploads).
+
+Tests cover:
+- sessions receiving ranged chunks, hashing incrementally and rejecting
+  chunks that do not start at the current offset
+- resuming in a process that lost the running hash
+- garbage collection of abandoned sessions and per-key isolation
+- the routes parsing Content-Range and finalizing through the shared
+  upload indexing path
+- the desktop client resuming from the server's offset after a failure
+"""
+
+import io
+import os
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+import xxhash
+from fastapi import HTTPException
+from starlette.requests import Request
+
+import upload_sessions
+
+CONTENT = b"0123456789abcdefghij"
+
+
+@pytest.fixture(autouse=True)
+def session_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("UPLOAD_SESSION_DIR", str(tmp_path / "sessions"))
+    monkeypatch.setattr(upload_sessions, "_hashers", {})
+    monkeypatch.setattr(upload_sessions, "_session_locks", {})
+    monkeypatch.setattr(upload_sessions, "_last_purge", 0.0)
+    return tmp_path / "sessions"
+
+
+class TestSessions:
+    def test_chunks_assemble_and_hash_incrementally(self):
+        session = upload_sessions.create_session("big.pdf", len(CONTENT))
+        upload_id = session["upload_id"]
+
+        upload_sessions.append_chunk(upload_id, 0, CONTENT[:8])
+        state = upload_sessions.append_chunk(upload_id, 8, CONTENT[8:])
+        data_path, file_hash, stored = upload_sessions.finalize_session(upload_id)
+
+        assert state["offset"] == len(CONTENT) and state["complete"]
+        assert data_path.endswith("data.pdf")
+        assert Path(data_path).read_bytes() == CONTENT
+        assert file_hash == xxhash.xxh64(CONTENT).hexdigest()
+        assert stored["filename"] == "big.pdf"
+
+    def test_chunk_at_wrong_offset_reports_offset(self):
+        upload_id = upload_sessions.create_session("a.txt", len(CONTENT))["upload_id"]
+        upload_sessions.append_chunk(upload_id, 0, CONTENT[:5])
+
+        with pytest.raises(upload_sessions.UploadOffsetMismatch) as exc:
+            upload_sessions.append_chunk(upload_id, 0, CONTENT[:5])
+        assert exc.value.offset == 5
+        with pytest.raises(ValueError):
+            upload_sessions.append_chunk(upload_id, 5, CONTENT[5:] + b"extra")
+        with pytest.raises(upload_sessions.UploadOffsetMismatch):
+            upload_sessions.finalize_session(upload_id)
+
+    def test_resume_without_in_memory_hash(self):
+        upload_id = upload_sessions.create_session("a.txt", len(CONTENT))["upload_id"]
+        upload_sessions.append_chunk(upload_id, 0, CONTENT[:7])
+        upload_sessions._hashers.clear()  # e.g. the server restarted
+
+        assert upload_sessions.get_session(upload_id)["offset"] == 7
+        upload_sessions.append_chunk(upload_id, 7, CONTENT[7:])
+        _, file_hash, _ = upload_sessions.finalize_session(upload_id)
+
+        assert file_hash == xxhash.xxh64(CONTENT).hexdigest()
+
+    def test_sessions_are_private_to_their_key(self):
+        upload_id = upload_sessions.create_session("a.txt", 3, owner_key_id=1)["upload_id"]
+
+        with pytest.raises(upload_sessions.UploadSessionNotFound):
+            upload_sessions.get_session(upload_id, owner_key_id=2)
+        with pytest.raises(upload_sessions.UploadSessionNotFound):
+            upload_sessions.get_session("../../etc", owner_key_id=1)
+
+    def test_purges_abandoned_sessions(self, session_dir):
+        stale = upload_sessions.create_session("old.txt", 3)["upload_id"]
+        fresh = upload_sessions.create_session("new.txt", 3)["upload_id"]
+        old = os.path.getmtime(session_dir / fresh) - 2 * 86400
+        for path in (session_dir / stale, *(session_dir / stale).iterdir()):
+            os.utime(path, (old, old))
+
+        assert upload_sessions.purge_expired(force=True) == 1
+        assert not (session_dir / stale).exists()
+        assert (session_dir / fresh).exists()
+
+
+def _put_request(body, content_range):
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return Request(
+        {"type": "http", "method": "PUT", "path": "/",
+         "headers": [(b"content-range", content_range.encode())]},
+        receive,
+    )
+
+
+class TestRoutes:
+    async def test_put_parses_content_range_and_conflicts(self):
+        from routers import indexing_api
+        upload_id = upload_sessions.create_session("a.txt", len(CONTENT), owner_key_id=1)["upload_id"]
+
+        state = await indexing_api.upload_chunk(
+            upload_id, _put_request(CONTENT[:4], f"bytes 0-3/{len(CONTENT)}"), key_record={"id": 1}
+        )
+        assert state["offset"] == 4
+
+        with pytest.raises(HTTPException) as exc:
+            await indexing_api.upload_chunk(
+                upload_id, _put_request(CONTENT[:4], f"bytes 0-3/{len(CONTENT)}"), key_record={"id": 1}
+            )
+        assert exc.value.status_code == 409 and exc.value.detail["offset"] == 4
+
+        with pytest.raises(HTTPException) as exc:
+            await indexing_api.upload_chunk(upload_id, _put_request(b"x", ""), key_record={"id": 1})
+        assert exc.value.status_code == 400
+
+        with pytest.raises(HTTPException) as exc:
+            await indexing_api.upload_chunk(
+                upload_id, _put_request(CONTENT[4:8], "bytes 4-7/20"), key_record={"id": 2}
+            )
+        assert exc.value.status_code == 404
+
+    async def test_oversized_chunk_is_rejected(self, monkeypatch):
+        from routers import indexing_api
+        monkeypatch.setenv("UPLOAD_CHUNK_MAX_BYTES", "4")
+        upload_id = upload_sessions.create_session("a.txt", len(CONTENT))["upload_id"]
+
+        with pytest.raises(HTTPException) as exc:
+            await indexing_api.upload_chunk(
+                upload_id, _put_request(CONTENT[:5], "bytes 0-4/20"), key_record=None
+            )
+        assert exc.value.status_code == 413
+
+    async def test_body_past_content_range_or_wrong_total_is_rejected(self):
+        from routers import indexing_api
+        upload_id = upload_sessions.create_session("a.txt", len(CONTENT))["upload_id"]
+
+        with pytest.raises(HTTPException) as exc:
+            await indexing_api.upload_chunk(
+                upload_id, _put_request(CONTENT[:6], "bytes 0-3/20"), key_record=None
+            )
+        assert exc.value.status_code == 413
+
+        with pytest.raises(HTTPException) as exc:
+            await indexing_api.upload_chunk(
+                upload_id, _put_request(CONTENT[:4], "bytes 0-3/21"), key_record=None
+            )
+        assert exc.value.status_code == 400
+        assert upload_sessions.get_session(upload_id)["offset"] == 0
+
+    async def test_finalize_indexes_without_rereading(self, monkeypatch, session_dir):
+        from api_models import IndexResponse
+        from routers import indexing_api
+        session = upload_sessions.create_session(
+            "report.pdf", len(CONTENT),
+            params={"custom_source_uri": "/docs/report.pdf", "metadata": {"team": "a"}},
+        )
+        upload_id = session["upload_id"]
+        upload_sessions.append_chunk(upload_id, 0, CONTENT)
+        received = {}
+
+        async def fake_index_upload(*, receive, **kwargs):
+            received.update(kwargs)
+            received["file"] = await receive()
+            return IndexResponse(status="success", document_id="d1")
+
+        monkeypatch.setattr(indexing_api, "_index_upload", fake_index_upload)
+
+        response = await indexing_api.finalize_upload(upload_id, key_record=None)
+
+        assert response.status == "success"
+        path, size, file_hash = received["file"]
+        assert path.endswith("data.pdf") and size == len(CONTENT)
+        assert file_hash == xxhash.xxh64(CONTENT).hexdigest()
+        assert received["custom_source_uri"] == "/docs/report.pdf"
+        assert received["metadata_json"] == '{"team": "a"}'
+        assert received["upload_method"] == "resumable_upload"
+        assert not (session_dir / upload_id).exists()
+
+    async def test_finalize_incomplete_upload_conflicts(self):
+        from routers import indexing_api
+        upload_id = upload_sessions.create_session("a.txt", len(CONTENT))["upload_id"]
+
+        with pytest.raises(HTTPException) as exc:
+            await indexing_api.finalize_upload(upload_id, key_record=None)
+        assert exc.value.status_code == 409 and exc.value.detail["offset"] == 0
+
+
+class TestResumableClient:
+    def _client(self):
+        from desktop_app.utils.api_client_core.document_client import DocumentClient
+        base = MagicMock()
+        base.api_base = "http://api/api/v1"
+        return DocumentClient(base), base
+
+    def test_resumes_from_server_offset_after_failure(self, tmp_path):
+        from desktop_app.utils.errors import APIConnectionError
+        client, base = self._client()
+        file_path = tmp_path / "big.pdf"
+        file_path.write_bytes(CONTENT)
+        server = io.BytesIO()
+        puts = []
+
+        def request(method, url, **kwargs):
+            response = MagicMock()
+            if method == "POST" and url.endswith("/uploads"):
+                response.json.return_value = {
+                    "upload_id": "u1", "offset": 0, "chunk_size": 8, "max_chunk_size": 64,
+                }
+            elif method == "PUT":
+                puts.append(kwargs["headers"]["Content-Range"])
+                server.write(kwargs["data"])
+                if len(puts) == 2:
+                    # Chunk stored but the response was lost
+                    raise APIConnectionError("connection reset")
+                response.json.return_value = {"offset": server.tell()}
+            elif method == "GET":
+                response.json.return_value = {"offset": server.tell()}
+            else:
+                response.json.return_value = {"status": "success", "url": url}
+            return response
+
+        base.request.side_effect = request
+
+        result = client.upload_document_resumable(file_path, custom_source_uri="/d/big.pdf")
+
+        assert puts == ["bytes 0-7/20", "bytes 8-15/20", "bytes 16-19/20"]
+        assert server.getvalue() == CONTENT
+        assert result == {"status": "success", "url": "http://api/api/v1/uploads/u1/finalize"}
+
+    def test_older_server_falls_back_to_multipart(self, tmp_path, monkeypatch):
+        from desktop_app.utils.api_client_core import document_client
+        from desktop_app.utils.errors import APIError
+        client, base = self._client()
+        monkeypatch.setattr(document_client, "RESUMABLE_UPLOAD_MIN_BYTES", 1)
+        file_path = tmp_path / "a.txt"
+        file_path.write_bytes(CONTENT)
+
+        def request(method, url, **kwargs):
+            if url.endswith("/uploads"):
+                raise APIError("Not Found", status_code=404)
+            response = MagicMock()
+            response.json.return_value = {"status": "success"}
+            return response
+
+        base.request.side_effect = request
+
+        assert client.upload_document(file_path) == {"status": "success"}
+        assert base.request.call_args.args[1] == "http://api/api/v1/upload-and-index"
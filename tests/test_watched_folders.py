@@ -134,6 +134,23 @@ class TestMarkScanned:
         assert mark_scanned("some-id") is False
 
 
+class TestUpdateScanWatermarks:
+    @patch("watched_folders._get_db_connection")
+    def test_stores_and_clears_checkpoint(self, mock_conn):
+        from watched_folders import update_scan_watermarks
+        cur = mock_conn.return_value.__enter__.return_value.cursor.return_value
+
+        assert update_scan_watermarks("f1", checkpoint={"files_done": 3, "state": "running"})
+        sql, params = cur.execute.call_args[0]
+        assert "scan_checkpoint = %s::jsonb" in sql
+        assert params == ('{"files_done": 3, "state": "running"}', "f1")
+
+        assert update_scan_watermarks("f1", completed=True, clear_checkpoint=True)
+        sql, params = cur.execute.call_args[0]
+        assert "scan_checkpoint = NULL" in sql and "last_scan_completed_at" in sql
+        assert params == ("f1",)
+
+
 # ===========================================================================
 # Test: API endpoint registration
 # ===========================================================================
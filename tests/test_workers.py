@@ -191,3 +191,53 @@ def test_upload_worker_cancellation(qapp, mock_api_client):
     # Should not process any files
     assert len(file_finished_signals) == 0
     assert mock_api_client.upload_document.call_count == 0
+
+
+def test_upload_worker_parallel_keeps_file_order(qapp, mock_api_client):
+    """Parallel uploads finish out of order but are reported by index."""
+    import threading
+
+    release_first = threading.Event()
+
+    def upload(**kwargs):
+        if kwargs["custom_source_uri"] == "/p/f0":
+            assert release_first.wait(5)
+        elif kwargs["custom_source_uri"] == "/p/f2":
+            release_first.set()
+        return {"status": "success"}
+
+    mock_api_client.get_documents_status.return_value = {}
+    mock_api_client.upload_document.side_effect = upload
+    files_data = [
+        {"path": Path(f"f{i}"), "full_path": f"/p/f{i}", "force_reindex": False}
+        for i in range(4)
+    ]
+
+    worker = UploadWorker(mock_api_client, files_data, concurrency=3)
+    finished = []
+    worker.file_finished.connect(lambda i, s, m: finished.append((i, s)))
+    worker.run()
+
+    assert finished == [(0, True), (1, True), (2, True), (3, True)]
+    mock_api_client.ensure_connection_pool.assert_called_once_with(5)
+
+
+def test_upload_worker_cancel_drains_in_flight_uploads(qapp, mock_api_client):
+    """Cancelling mid-run finishes uploads in flight and starts no more."""
+    files_data = [
+        {"path": Path(f"f{i}"), "full_path": f"/p/f{i}", "force_reindex": True}
+        for i in range(10)
+    ]
+    worker = UploadWorker(mock_api_client, files_data, concurrency=2)
+    mock_api_client.upload_document.side_effect = lambda **kwargs: worker.cancel()
+
+    finished = []
+    all_finished = []
+    worker.file_finished.connect(lambda i, s, m: finished.append(i))
+    worker.all_finished.connect(lambda: all_finished.append(True))
+    worker.run()
+
+    assert 1 <= len(finished) <= 2
+    assert finished == sorted(finished)
+    assert mock_api_client.upload_document.call_count == len(finished)
+    assert all_finished == [True]
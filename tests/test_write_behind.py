@@ -0,0 +1,128 @@
+"""
+Tests for the write-behind bookkeeping buffer (write_behind.py).
+
+Tests cover:
+- last_used_at coalescing and the pending bound
+- dropped-event counters for a full buffer and a failed flush
+- a failure in one event kind not dropping the others
+- batched writes to api_keys and activity_log (DB-backed)
+- log_activity routing through a running buffer; indexing runs written directly
+"""
+
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+
+from write_behind import WriteBehindBuffer
+
+
+def _activity(action="test.action", client_id=None):
+    return (str(uuid.uuid4()), datetime.now(timezone.utc), client_id, None, action,
+            "{}", None, None, None, None)
+
+
+class TestBuffering:
+    def test_last_used_touches_coalesce_per_key(self):
+        buffer = WriteBehindBuffer()
+        for _ in range(100):
+            buffer.touch_api_key(1)
+        buffer.touch_api_key(2)
+        assert buffer.pending == 2
+        assert buffer.stats()["recorded"] == 2
+
+    def test_full_buffer_drops_and_counts(self):
+        buffer = WriteBehindBuffer(max_pending=2)
+        assert buffer.add_activity(_activity())
+        assert buffer.add_activity(_activity())
+        assert not buffer.add_activity(_activity())
+        buffer.touch_api_key(9)
+        stats = buffer.stats()
+        assert stats["pending"] == 2
+        assert stats["dropped_full"] == 2
+
+    def test_failed_flush_counts_dropped_events(self):
+        @contextmanager
+        def broken():
+            raise RuntimeError("db down")
+            yield
+
+        buffer = WriteBehindBuffer(connection_factory=broken)
+        buffer.add_activity(_activity())
+        buffer.touch_api_key(1)
+        assert buffer.flush() == 0
+        stats = buffer.stats()
+        assert stats["dropped_error"] == 2
+        assert stats["flush_errors"] == 2
+        assert stats["pending"] == 0
+
+    def test_failed_kind_does_not_drop_the_others(self):
+        buffer = WriteBehindBuffer()
+        buffer.touch_api_key(1)
+        buffer.touch_api_key(2)
+        buffer.add_activity(_activity())
+        with patch.object(buffer, "_write_last_used") as write_last_used, \
+                patch.object(buffer, "_write_activity", side_effect=RuntimeError("bad row")):
+            assert buffer.flush() == 2
+        write_last_used.assert_called_once()
+        stats = buffer.stats()
+        assert stats["written"] == 2
+        assert stats["dropped_error"] == 1
+        assert stats["flush_errors"] == 1
+
+
+@pytest.mark.database
+class TestFlush:
+    def test_flush_writes_each_kind_in_one_batch(self, db_manager):
+        buffer = WriteBehindBuffer(connection_factory=db_manager.get_connection)
+        with db_manager.get_cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO api_keys (name, key_hash, key_prefix) "
+                "VALUES ('wb-test', 'wb-test-hash', 'pgv_sk_wb') RETURNING id"
+            )
+            key_id = cursor.fetchone()[0]
+        try:
+            buffer.touch_api_key(key_id)
+            first = _activity("wb.first")
+            # An unregistered client_id must not sink the whole batch.
+            second = _activity("wb.second", client_id="no-such-client")
+            buffer.add_activity(first)
+            buffer.add_activity(second)
+
+            assert buffer.flush() == 3
+
+            with db_manager.get_cursor() as cursor:
+                cursor.execute("SELECT last_used_at FROM api_keys WHERE id = %s", (key_id,))
+                assert cursor.fetchone()[0] is not None
+                cursor.execute(
+                    "SELECT action, client_id FROM activity_log WHERE id IN (%s, %s) ORDER BY action",
+                    (first[0], second[0]),
+                )
+                assert cursor.fetchall() == [("wb.first", None), ("wb.second", None)]
+        finally:
+            with db_manager.get_cursor() as cursor:
+                cursor.execute("DELETE FROM api_keys WHERE id = %s", (key_id,))
+                cursor.execute("DELETE FROM activity_log WHERE action LIKE 'wb.%%'")
+
+    def test_activity_is_buffered_and_runs_are_written_directly(self, db_manager):
+        import activity_log
+        import indexing_runs
+
+        buffer = WriteBehindBuffer(connection_factory=db_manager.get_connection)
+        with patch("write_behind._buffer", buffer):
+            entry_id = activity_log.log_activity("wb.routed")
+            run_id = indexing_runs.start_run(trigger="api", source_uri="b.txt")
+            indexing_runs.complete_run(run_id, status="success", files_scanned=1)
+            assert buffer.pending == 1
+
+            try:
+                # The run row exists before any flush, so FK references to it hold.
+                assert indexing_runs.get_run_by_id(run_id)["status"] == "success"
+                assert [e["id"] for e in activity_log.get_recent(action="wb.routed")] == [entry_id]
+                assert buffer.pending == 0
+            finally:
+                with db_manager.get_cursor() as cursor:
+                    cursor.execute("DELETE FROM activity_log WHERE action = 'wb.routed'")
+                    cursor.execute("DELETE FROM indexing_runs WHERE id = %s", (run_id,))
@@ -0,0 +1,300 @@
+"""
+Resumable chunked uploads.
+
+``/upload-and-index`` takes a whole file in one request, so a connection
+dropped near the end of a large PDF means sending it all again. An upload
+session instead receives the file in ranged chunks:
+
+1. ``POST /uploads`` creates a session for a file of known size.
+2. ``PUT /uploads/{id}`` appends the chunk at the current offset
+   (``Content-Range: bytes start-end/size``). A chunk that does not start
+   at the offset is rejected with 409 and the current offset, which is
+   also what ``GET /uploads/{id}`` returns, so a client that lost its
+   connection resumes from there.
+3. ``POST /uploads/{id}/finalize`` indexes the assembled file through the
+   same path as ``/upload-and-index`` and removes the session.
+
+Chunks are written to ``<UPLOAD_SESSION_DIR>/<id>/data<ext>`` (the
+original extension, which the document processor dispatches on) and hashed
+(xxHash64) as they arrive, so finalizing does not read the file again.
+The running hash is kept in process memory; if a chunk arrives at a worker
+that does not have it (after a restart, or with several workers), the
+bytes received so far are re-hashed once.
+
+Sessions untouched for ``UPLOAD_SESSION_TTL_SECONDS`` are abandoned and
+deleted, at most once a minute, when a new session is created.
+
+Environment:
+    UPLOAD_SESSION_DIR          (default <system temp>/pgvector_upload_sessions)
+    UPLOAD_SESSION_TTL_SECONDS  (default 86400)
+    UPLOAD_CHUNK_MAX_BYTES      (default 67108864; larger chunks get 413)
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import xxhash
+
+logger = logging.getLogger(__name__)
+
+SESSION_DIR_ENV = "UPLOAD_SESSION_DIR"
+SESSION_TTL_SECONDS_ENV = "UPLOAD_SESSION_TTL_SECONDS"
+CHUNK_MAX_BYTES_ENV = "UPLOAD_CHUNK_MAX_BYTES"
+
+DEFAULT_SESSION_TTL_SECONDS = 24 * 3600
+DEFAULT_CHUNK_MAX_BYTES = 64 * 1024 * 1024
+# Chunk size suggested to clients
+RECOMMENDED_CHUNK_BYTES = 8 * 1024 * 1024
+PURGE_INTERVAL_SECONDS = 60
+
+_DATA_FILE = "data"
+_SESSION_FILE = "session.json"
+_UPLOAD_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+_SUFFIX_RE = re.compile(r"^\.[A-Za-z0-9_-]{1,16}$")
+
+_lock = threading.Lock()
+# upload_id -> (offset, running hash) of sessions this process has received
+_hashers: Dict[str, Tuple[int, Any]] = {}
+# upload_id -> lock serializing chunks of one session
+_session_locks: Dict[str, threading.Lock] = {}
+_last_purge = 0.0
+
+
+class UploadSessionNotFound(KeyError):
+    """No such session (or it belongs to another API key)."""
+
+
+class UploadOffsetMismatch(ValueError):
+    """A chunk did not start at the session's current offset."""
+
+    def __init__(self, message: str, offset: int):
+        super().__init__(message)
+        self.offset = offset
+
+
+def _int_env(name: str, default: int) -> int:
+    try:
+        value = int(os.environ.get(name, default))
+        return value if value > 0 else default
+    except (ValueError, TypeError):
+        return default
+
+
+def get_session_dir() -> Path:
+    """Directory holding upload sessions."""
+    configured = os.environ.get(SESSION_DIR_ENV)
+    if configured:
+        return Path(configured)
+    return Path(tempfile.gettempdir()) / "pgvector_upload_sessions"
+
+
+def get_session_ttl_seconds() -> int:
+    """Idle time after which a session is abandoned, default 24h."""
+    return _int_env(SESSION_TTL_SECONDS_ENV, DEFAULT_SESSION_TTL_SECONDS)
+
+
+def get_chunk_max_bytes() -> int:
+    """Largest chunk accepted by one PUT, default 64 MB."""
+    return _int_env(CHUNK_MAX_BYTES_ENV, DEFAULT_CHUNK_MAX_BYTES)
+
+
+def _session_path(upload_id: str) -> Path:
+    if not _UPLOAD_ID_RE.match(upload_id or ""):
+        raise UploadSessionNotFound(upload_id)
+    return get_session_dir() / upload_id
+
+
+def _data_path(path: Path, session: Dict[str, Any]) -> Path:
+    suffix = os.path.splitext(session["filename"] or "")[1]
+    return path / (_DATA_FILE + (suffix if _SUFFIX_RE.match(suffix) else ""))
+
+
+def _describe(session: Dict[str, Any], offset: int) -> Dict[str, Any]:
+    return {
+        "upload_id": session["upload_id"],
+        "filename": session["filename"],
+        "size": session["size"],
+        "offset": offset,
+        "complete": offset == session["size"],
+        "chunk_size": RECOMMENDED_CHUNK_BYTES,
+        "max_chunk_size": get_chunk_max_bytes(),
+        "expires_in_seconds": get_session_ttl_seconds(),
+    }
+
+
+def create_session(
+    filename: str,
+    size: int,
+    params: Optional[Dict[str, Any]] = None,
+    owner_key_id: Optional[Any] = None,
+) -> Dict[str, Any]:
+    """Start an upload session for a file of ``size`` bytes.
+
+    ``params`` holds the indexing options applied at finalize
+    (custom_source_uri, document_type, metadata, ocr_mode, force_reindex).
+    """
+    if size < 0:
+        raise ValueError("size must not be negative")
+    purge_expired()
+    upload_id = uuid.uuid4().hex
+    path = get_session_dir() / upload_id
+    path.mkdir(parents=True)
+    session = {
+        "upload_id": upload_id,
+        "filename": filename,
+        "size": size,
+        "params": params or {},
+        "owner_key_id": owner_key_id,
+        "created_at": time.time(),
+    }
+    _data_path(path, session).touch()
+    (path / _SESSION_FILE).write_text(json.dumps(session), encoding="utf-8")
+    with _lock:
+        _hashers[upload_id] = (0, xxhash.xxh64())
+    logger.info("Upload session %s started for %s (%d bytes)", upload_id, filename, size)
+    return _describe(session, 0)
+
+
+def _load(upload_id: str, owner_key_id: Optional[Any]) -> Tuple[Path, Dict[str, Any]]:
+    path = _session_path(upload_id)
+    try:
+        session = json.loads((path / _SESSION_FILE).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        raise UploadSessionNotFound(upload_id)
+    if session.get("owner_key_id") != owner_key_id:
+        raise UploadSessionNotFound(upload_id)
+    if not _data_path(path, session).exists():
+        raise UploadSessionNotFound(upload_id)
+    return path, session
+
+
+def get_session(upload_id: str, owner_key_id: Optional[Any] = None) -> Dict[str, Any]:
+    """Session status, including the offset to resume from."""
+    path, session = _load(upload_id, owner_key_id)
+    return _describe(session, _data_path(path, session).stat().st_size)
+
+
+def _session_lock(upload_id: str) -> threading.Lock:
+    with _lock:
+        return _session_locks.setdefault(upload_id, threading.Lock())
+
+
+def _hasher_at(upload_id: str, data_path: Path, offset: int):
+    """Running hash of the first ``offset`` bytes, re-hashing if not in memory."""
+    with _lock:
+        state = _hashers.get(upload_id)
+    if state is not None and state[0] == offset:
+        return state[1]
+    hasher = xxhash.xxh64()
+    with open(data_path, "rb") as f:
+        remaining = offset
+        while remaining > 0:
+            chunk = f.read(min(remaining, 1024 * 1024))
+            if not chunk:
+                break
+            hasher.update(chunk)
+            remaining -= len(chunk)
+    return hasher
+
+
+def append_chunk(
+    upload_id: str,
+    start: int,
+    data: bytes,
+    owner_key_id: Optional[Any] = None,
+) -> Dict[str, Any]:
+    """Append ``data`` at byte ``start``, which must be the current offset."""
+    path, session = _load(upload_id, owner_key_id)
+    data_path = _data_path(path, session)
+    with _session_lock(upload_id):
+        offset = data_path.stat().st_size
+        if start != offset:
+            raise UploadOffsetMismatch(
+                f"Chunk starts at {start} but the upload is at {offset}", offset
+            )
+        if offset + len(data) > session["size"]:
+            raise ValueError(
+                f"Chunk ends at {offset + len(data)}, past the file size {session['size']}"
+            )
+
+        hasher = _hasher_at(upload_id, data_path, offset)
+        with open(data_path, "ab") as f:
+            f.write(data)
+        hasher.update(data)
+        offset += len(data)
+        with _lock:
+            _hashers[upload_id] = (offset, hasher)
+    return _describe(session, offset)
+
+
+def finalize_session(
+    upload_id: str, owner_key_id: Optional[Any] = None,
+) -> Tuple[str, str, Dict[str, Any]]:
+    """(data path, xxh64 hex digest, session) of a fully received upload.
+
+    The caller indexes the file and then calls ``delete_session``.
+    """
+    path, session = _load(upload_id, owner_key_id)
+    data_path = _data_path(path, session)
+    offset = data_path.stat().st_size
+    if offset != session["size"]:
+        raise UploadOffsetMismatch(
+            f"Upload incomplete: {offset} of {session['size']} bytes received", offset
+        )
+    hasher = _hasher_at(upload_id, data_path, offset)
+    return str(data_path), hasher.hexdigest(), session
+
+
+def delete_session(upload_id: str) -> bool:
+    """Remove a session and its data. Returns False if it did not exist."""
+    try:
+        path = _session_path(upload_id)
+    except UploadSessionNotFound:
+        return False
+    with _lock:
+        _hashers.pop(upload_id, None)
+        _session_locks.pop(upload_id, None)
+    if not path.exists():
+        return False
+    shutil.rmtree(path, ignore_errors=True)
+    return True
+
+
+def purge_expired(now: Optional[float] = None, force: bool = False) -> int:
+    """Delete sessions idle for longer than the TTL. Returns how many.
+
+    Runs at most once a minute unless ``force``.
+    """
+    global _last_purge
+    now = time.time() if now is None else now
+    with _lock:
+        if not force and now - _last_purge < PURGE_INTERVAL_SECONDS:
+            return 0
+        _last_purge = now
+    root = get_session_dir()
+    if not root.is_dir():
+        return 0
+    cutoff = now - get_session_ttl_seconds()
+    purged = 0
+    for path in root.iterdir():
+        if not _UPLOAD_ID_RE.match(path.name):
+            continue
+        try:
+            last_used = max(p.stat().st_mtime for p in (path, *path.iterdir()))
+        except (OSError, ValueError):
+            continue
+        if last_used < cutoff:
+            delete_session(path.name)
+            purged += 1
+    if purged:
+        logger.info("Purged %d abandoned upload session(s)", purged)
+    return purged
@@ -54,6 +54,12 @@ def _get_db_connection():
     return get_db_manager().get_connection()
 
 
+def _invalidate_principals() -> None:
+    """Drop cached API key principals after a user change (see principal_cache)."""
+    from principal_cache import invalidate_principals
+    invalidate_principals()
+
+
 def _row_to_dict(row) -> Dict[str, Any]:
     """Convert a DB row tuple to a dict with ISO timestamps."""
     d = dict(zip(_COLUMNS, row))
@@ -104,7 +110,8 @@ def create_user(
             )
             row = cursor.fetchone()
             conn.commit()
-            return _row_to_dict(row) if row else None
+        _invalidate_principals()
+        return _row_to_dict(row) if row else None
     except Exception as e:
         logger.error("Failed to create user: %s", e)
         return None
@@ -230,7 +237,8 @@ def update_user(
             )
             row = cursor.fetchone()
             conn.commit()
-            return _row_to_dict(row) if row else None
+        _invalidate_principals()
+        return _row_to_dict(row) if row else None
     except Exception as e:
         logger.error("Failed to update user %s: %s", user_id, e)
         return None
@@ -243,7 +251,9 @@ def delete_user(user_id: str) -> bool:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM users WHERE id = %s", (user_id,))
             conn.commit()
-            return cursor.rowcount > 0
+            deleted = cursor.rowcount > 0
+        _invalidate_principals()
+        return deleted
     except Exception as e:
         logger.error("Failed to delete user %s: %s", user_id, e)
         return False
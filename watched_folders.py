@@ -12,9 +12,12 @@ normalized paths, scan watermarks, failure tracking, and scope transitions.
 import json
 import logging
 import os
+import time
 import uuid
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from cron_schedule import validate_cron
 
 logger = logging.getLogger(__name__)
 
@@ -70,6 +73,7 @@ _COLUMNS = (
     "root_id", "last_scan_started_at", "last_scan_completed_at",
     "last_successful_scan_at", "last_error_at",
     "consecutive_failures", "paused", "max_concurrency",
+    "scan_checkpoint",
 )
 
 
@@ -112,6 +116,7 @@ def add_folder(
     """
     if execution_scope not in ("client", "server"):
         raise ValueError(f"Invalid execution_scope: {execution_scope!r}")
+    validate_cron(schedule_cron)
 
     norm_path = normalize_folder_path(folder_path)
 
@@ -231,6 +236,7 @@ def update_folder(
         sets.append("enabled = %s")
         params.append(enabled)
     if schedule_cron is not None:
+        validate_cron(schedule_cron)
         sets.append("schedule_cron = %s")
         params.append(schedule_cron)
     if paused is not None:
@@ -373,6 +379,8 @@ def update_scan_watermarks(
     success: bool = False,
     error: bool = False,
     reset_failures: bool = False,
+    checkpoint: Optional[Dict[str, Any]] = None,
+    clear_checkpoint: bool = False,
 ) -> bool:
     """Update scan timing watermarks and failure counters.
 
@@ -383,8 +391,12 @@ def update_scan_watermarks(
         success: Set last_successful_scan_at to now() and reset consecutive_failures.
         error: Set last_error_at to now() and increment consecutive_failures.
         reset_failures: Reset consecutive_failures to 0.
+        checkpoint: Store the progress of the scan in scan_checkpoint
+            (see scan_folder); "state" is "running" while it goes on.
+        clear_checkpoint: Clear scan_checkpoint (the scan finished).
     """
     sets = []
+    params: List[Any] = []
     if started:
         sets.append("last_scan_started_at = now()")
     if completed:
@@ -397,6 +409,11 @@ def update_scan_watermarks(
         sets.append("consecutive_failures = consecutive_failures + 1")
     if reset_failures:
         sets.append("consecutive_failures = 0")
+    if checkpoint is not None:
+        sets.append("scan_checkpoint = %s::jsonb")
+        params.append(json.dumps(checkpoint, default=str))
+    elif clear_checkpoint:
+        sets.append("scan_checkpoint = NULL")
     if not sets:
         return True
 
@@ -409,7 +426,7 @@ def update_scan_watermarks(
                 "UPDATE watched_folders SET {sets} WHERE id = %s".format(
                     sets=", ".join(sets)
                 ),
-                (folder_id,),
+                (*params, folder_id),
             )
             conn.commit()
             return True
@@ -525,17 +542,49 @@ def scan_folder(
     client_id: Optional[str] = None,
     root_id: Optional[str] = None,
     dry_run: bool = False,
+    should_stop: Optional[Callable[[], bool]] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+    paths: Optional[Iterable[str]] = None,
+    on_checkpoint: Optional[Callable[[Dict[str, Any]], None]] = None,
+    exclusive: bool = False,
 ) -> Dict[str, Any]:
     """Trigger an indexing scan of a folder.
 
-    Uses the existing indexer to walk the folder and index new/changed files.
-    Returns a summary dict with counts.
+    Stats the folder against its scan manifest and hands only new, modified
+    and reappeared files to the indexer (see scan_manifest). Returns a
+    summary dict with counts.
+
+    With ``paths`` (watch mode, see folder_watcher) only those relative
+    paths are statted, indexed and quarantined, and the run is recorded
+    with trigger "watch". A root without a manifest yet gets a full scan
+    instead, so files indexed before the manifest existed are still
+    reconciled.
+
+    Scans checkpoint while indexing (see scan_manifest): the manifest rows
+    of files done so far are written and the run's counters and
+    ``metadata.checkpoint`` updated. A full scan first closes runs of the
+    same folder left running by a scan that died and resumes from their
+    checkpoint: files they recorded are unchanged in the manifest and are
+    not indexed again.
 
     Args:
         folder_path: Directory to scan.
         client_id: Optional client identifier.
         root_id: Optional watched-folder root_id for canonical key backfill.
         dry_run: If True, report what would happen without making changes.
+        should_stop: Optional callback checked before each file is indexed;
+            when it returns True the scan stops early and the run is
+            recorded as partial. Files not reached are indexed next scan.
+        progress: Optional callback called with (files_done, files_to_index)
+            as files are indexed.
+        paths: Optional relative paths (forward slashes) that changed; a
+            path ending in "/" stands for a directory subtree.
+        on_checkpoint: Optional callback called with each checkpoint dict
+            (run_id, last_path, files_done, files_total, at).
+        exclusive: The caller guarantees no other scan of this folder is
+            running (the server scheduler), so any run of it still marked
+            running was interrupted. Otherwise only runs whose last
+            checkpoint is stale are.
     """
     import os
 
@@ -543,12 +592,31 @@ def scan_folder(
     if dry_run:
         return _dry_run_scan(folder_path)
 
-    from indexing_runs import start_run, complete_run
-
-    run_id = start_run(trigger="scheduled", source_uri=folder_path, client_id=client_id)
+    from indexing_runs import start_run, complete_run, checkpoint_run
+    import scan_manifest
+
+    root_key = scan_manifest.get_root_key(folder_path, root_id)
+    if paths is not None and not scan_manifest.has_manifest(root_key):
+        logger.info("No scan manifest for %s yet; scanning the whole folder", folder_path)
+        paths = None
+
+    run_id = start_run(
+        trigger="scheduled" if paths is None else "watch",
+        source_uri=folder_path,
+        client_id=client_id,
+    )
+    resumed = None
+    if paths is None:
+        from indexing_runs import close_interrupted_runs
+        resumed = close_interrupted_runs(
+            folder_path, run_id, 0 if exclusive else scan_manifest.get_stale_run_seconds(),
+        )
     scanned = 0
     added = 0
+    updated = 0
+    skipped = 0
     failed = 0
+    stopped = False
     errors = []
 
     try:
@@ -568,19 +636,119 @@ def scan_folder(
                 "error": f"Directory not found: {folder_path}",
             }
 
-        for root, _dirs, files in os.walk(folder_path):
-            for fname in files:
-                fpath = os.path.join(root, fname)
-                scanned += 1
-                try:
-                    indexer.index_document(fpath, rebuild_fts=False)
+        # Stat the tree and compare with the manifest; only new, modified
+        # and reappeared files are read and handed to the indexer.
+        started = time.monotonic()
+        if paths is None:
+            current = scan_manifest.walk_root(folder_path)
+        else:
+            paths = set(paths)
+            current = scan_manifest.stat_paths(folder_path, paths)
+            # A path that is gone may have been a directory
+            paths |= {p.rstrip("/") + "/" for p in paths if p not in current}
+        scanned = len(current)
+        walk_ms = round((time.monotonic() - started) * 1000, 1)
+
+        started = time.monotonic()
+        manifest = scan_manifest.load_manifest(root_key, paths)
+        live_ids = None
+        if manifest:
+            live_ids = scan_manifest.existing_document_ids(
+                entry["document_id"] for entry in manifest.values()
+            )
+        plan = scan_manifest.plan_scan(current, manifest or {}, live_ids)
+        scan_stats: Dict[str, Any] = dict(plan.counts())
+        scan_stats["walk_ms"] = walk_ms
+        scan_stats["plan_ms"] = round((time.monotonic() - started) * 1000, 1)
+        if paths is not None:
+            scan_stats["manifest"] = "unavailable" if manifest is None else "watch"
+        else:
+            scan_stats["manifest"] = (
+                "unavailable" if manifest is None else "incremental" if manifest else "initial"
+            )
+        skipped = len(plan.unchanged) + len(plan.touched) + len(plan.restored)
+
+        # A resumed initial scan still owes the document_chunks quarantine
+        # pass, which a non-empty manifest would otherwise skip.
+        initial = not manifest
+        if resumed is not None:
+            checkpoint = resumed["checkpoint"]
+            initial = initial or bool(checkpoint.get("initial"))
+            scan_stats["resumed_from"] = resumed["run_id"]
+            logger.info(
+                "Resuming scan of %s interrupted after %s of %s files (last: %s)",
+                folder_path, checkpoint.get("files_done", 0),
+                checkpoint.get("files_total", "?"), checkpoint.get("last_path"),
+            )
+
+        # Files indexed since the last checkpoint, awaiting their manifest rows
+        indexed = {}
+        total = len(plan.to_index)
+        checkpoint_files = scan_manifest.get_checkpoint_files()
+        checkpoint_seconds = scan_manifest.get_checkpoint_seconds()
+        last_checkpoint = time.monotonic()
+
+        def write_checkpoint(last_path: str, done: int) -> None:
+            if manifest is not None and indexed and scan_manifest.record_indexed(root_key, indexed):
+                indexed.clear()
+            checkpoint = {
+                "run_id": run_id,
+                "last_path": last_path,
+                "files_done": done,
+                "files_total": total,
+                "initial": initial,
+                "at": datetime.now(timezone.utc).isoformat(),
+            }
+            checkpoint_run(
+                run_id,
+                files_scanned=scanned,
+                files_added=added,
+                files_updated=updated,
+                files_skipped=skipped,
+                files_failed=failed,
+                checkpoint=checkpoint,
+            )
+            if on_checkpoint:
+                on_checkpoint(checkpoint)
+
+        if progress:
+            progress(0, total)
+        for done, (rel_path, stat, content_hash, kind) in enumerate(plan.to_index, start=1):
+            if should_stop and should_stop():
+                stopped = True
+                logger.info("Scan of %s stopped early with %d of %d files indexed",
+                            folder_path, done - 1, total)
+                break
+            custom_metadata = {"file_hash": content_hash} if content_hash else None
+            try:
+                result = indexer.index_document(
+                    stat.path, custom_metadata=custom_metadata, rebuild_fts=False,
+                )
+            except Exception as e:
+                result = {"status": "error", "message": str(e)}
+            status = result.get("status")
+            if status == "error":
+                failed += 1
+                errors.append({"source_uri": stat.path, "error": result.get("message")})
+            else:
+                indexed[rel_path] = (stat, content_hash, result.get("document_id"))
+                if status == "skipped":
+                    skipped += 1
+                elif kind == "new":
                     added += 1
-                except Exception as e:
-                    failed += 1
-                    errors.append({"source_uri": fpath, "error": str(e)})
+                else:
+                    updated += 1
+            if progress:
+                progress(done, total)
+            if done % checkpoint_files == 0 or (
+                time.monotonic() - last_checkpoint >= checkpoint_seconds
+            ):
+                write_checkpoint(rel_path, done)
+                last_checkpoint = time.monotonic()
+        scan_stats["stopped"] = stopped
 
         # Amortize FTS index rebuild to the end of the folder scan
-        if getattr(indexer.config.retrieval, "lancedb_enabled", False):
+        if (added or updated) and getattr(indexer.config.retrieval, "lancedb_enabled", False):
             try:
                 from services import get_lancedb_adapter
                 logger.info("Rebuilding LanceDB FTS index after folder scan...")
@@ -589,29 +757,55 @@ def scan_folder(
             except Exception as e:
                 logger.warning("Failed to rebuild LanceDB FTS index after folder scan: %s", e, exc_info=True)
 
-        final_status = "success" if failed == 0 else "partial"
+        if manifest is not None:
+            scan_manifest.apply_scan(
+                root_key, run_id, plan, indexed,
+                seen=None if paths is None else list(current),
+            )
+
+        # Post-scan bookkeeping; each step is one set-based pass whose
+        # timing is recorded in the run metadata.
+        post_scan: Dict[str, Any] = {}
+
+        # Backfill canonical source keys if root_id is known
+        if root_id:
+            started = time.monotonic()
+            post_scan["canonical_keys"] = _backfill_canonical_keys(root_id, folder_path)
+            post_scan["canonical_keys_ms"] = round((time.monotonic() - started) * 1000, 1)
+
+        # Quarantine/restore stale chunks. The manifest already knows which
+        # files vanished or came back; a root without one yet (first scan,
+        # or the manifest is unreadable) is reconciled against document_chunks.
+        # A watch batch only reconciles its own paths.
+        started = time.monotonic()
+        if (manifest and not initial) or paths is not None:
+            post_scan.update(_reconcile_manifest_sources(folder_path, plan))
+        else:
+            post_scan.update(_quarantine_missing_sources(folder_path))
+        post_scan["quarantine_ms"] = round((time.monotonic() - started) * 1000, 1)
+
+        final_status = "success" if failed == 0 and not stopped else "partial"
         complete_run(
             run_id,
             status=final_status,
             files_scanned=scanned,
             files_added=added,
+            files_updated=updated,
+            files_skipped=skipped,
             files_failed=failed,
             errors=errors if errors else None,
+            metadata={"scan": scan_stats, "post_scan": post_scan},
         )
 
-        # Backfill canonical source keys if root_id is known
-        if root_id:
-            _backfill_canonical_keys(root_id, folder_path)
-
-        # Quarantine/restore stale chunks
-        _quarantine_missing_sources(folder_path)
-
         return {
             "run_id": run_id,
             "status": final_status,
             "files_scanned": scanned,
             "files_added": added,
+            "files_updated": updated,
+            "files_skipped": skipped,
             "files_failed": failed,
+            "stopped": stopped,
         }
     except Exception as e:
         logger.error("Scan of %s failed: %s", folder_path, e)
@@ -620,6 +814,8 @@ def scan_folder(
             status="failed",
             files_scanned=scanned,
             files_added=added,
+            files_updated=updated,
+            files_skipped=skipped,
             files_failed=failed,
             errors=[{"source_uri": folder_path, "error": str(e)}] + errors,
         )
@@ -629,6 +825,8 @@ def scan_folder(
             "error": str(e),
             "files_scanned": scanned,
             "files_added": added,
+            "files_updated": updated,
+            "files_skipped": skipped,
             "files_failed": failed,
         }
 
@@ -680,13 +878,17 @@ def _dry_run_scan(folder_path: str) -> Dict[str, Any]:
     }
 
 
-def _backfill_canonical_keys(root_id: str, folder_path: str) -> None:
-    """Backfill canonical_source_key for chunks under a watched root."""
+def _backfill_canonical_keys(root_id: str, folder_path: str) -> int:
+    """Backfill canonical_source_key for chunks under a watched root.
+
+    Returns:
+        Number of chunks updated.
+    """
     try:
         folder = get_folder_by_root_id(root_id)
         if not folder:
             logger.warning("Cannot backfill canonical keys: root %s not found", root_id)
-            return
+            return 0
 
         scope = folder.get("execution_scope", "client")
         identity = folder.get("executor_id") if scope == "client" else root_id
@@ -695,15 +897,62 @@ def _backfill_canonical_keys(root_id: str, folder_path: str) -> None:
         count = bulk_set_canonical_keys(root_id, folder_path, scope, identity)
         if count > 0:
             logger.info("Backfilled %d canonical keys for root %s", count, root_id)
+        return count
     except Exception as e:
         logger.warning("Canonical key backfill failed for root %s: %s", root_id, e)
+        return 0
+
 
+def _reconcile_manifest_sources(folder_path: str, plan) -> Dict[str, int]:
+    """Quarantine sources the manifest saw vanish and restore reappeared ones.
 
-def _quarantine_missing_sources(folder_path: str) -> None:
+    Returns:
+        Same shape as _quarantine_missing_sources.
+    """
+    from scan_manifest import source_path
+
+    to_quarantine = [source_path(folder_path, rel) for rel in plan.deleted]
+    to_restore = [source_path(folder_path, rel) for rel in plan.restored]
+    to_restore += [
+        stat.path for _rel, stat, _hash, kind in plan.to_index if kind == "reappeared"
+    ]
+    result = {
+        "missing_sources": len(to_quarantine),
+        "reappeared_sources": len(to_restore),
+        "quarantined_chunks": 0,
+        "restored_chunks": 0,
+    }
+    if not to_quarantine and not to_restore:
+        return result
+
+    from quarantine import reconcile_sources
+    reconciled = reconcile_sources(to_quarantine, to_restore, "source_file_missing")
+    result["quarantined_chunks"] = reconciled["quarantined"]
+    result["restored_chunks"] = reconciled["restored"]
+    if to_quarantine:
+        logger.info("Quarantined %d missing sources under %s", len(to_quarantine), folder_path)
+    if to_restore:
+        logger.info("Restored %d reappeared sources under %s", len(to_restore), folder_path)
+    return result
+
+
+def _quarantine_missing_sources(folder_path: str) -> Dict[str, int]:
     """After a scan, quarantine chunks whose source files no longer exist
-    and restore chunks whose source files have reappeared."""
-    import os
+    and restore chunks whose source files have reappeared.
+
+    The diff is computed here; quarantine.reconcile_sources applies it in
+    one transaction.
 
+    Returns:
+        Dict with missing_sources / reappeared_sources (the diff) and
+        quarantined_chunks / restored_chunks (what was applied).
+    """
+    result = {
+        "missing_sources": 0,
+        "reappeared_sources": 0,
+        "quarantined_chunks": 0,
+        "restored_chunks": 0,
+    }
     try:
         with _get_db_connection() as conn:
             cur = conn.cursor()
@@ -715,23 +964,30 @@ def _quarantine_missing_sources(folder_path: str) -> None:
             )
             rows = cur.fetchall()
 
-        from quarantine import quarantine_chunks, restore_chunks
-
-        quarantined_count = 0
-        restored_count = 0
+        to_quarantine = []
+        to_restore = []
         for source_uri, is_quarantined in rows:
             file_exists = os.path.isfile(source_uri)
             if not file_exists and not is_quarantined:
-                quarantine_chunks(source_uri, "source_file_missing")
-                quarantined_count += 1
+                to_quarantine.append(source_uri)
             elif file_exists and is_quarantined:
-                restore_chunks(source_uri)
-                restored_count += 1
+                to_restore.append(source_uri)
+
+        result["missing_sources"] = len(to_quarantine)
+        result["reappeared_sources"] = len(to_restore)
+        if not to_quarantine and not to_restore:
+            return result
+
+        from quarantine import reconcile_sources
+        reconciled = reconcile_sources(to_quarantine, to_restore, "source_file_missing")
+        result["quarantined_chunks"] = reconciled["quarantined"]
+        result["restored_chunks"] = reconciled["restored"]
 
-        if quarantined_count > 0:
-            logger.info("Quarantined %d missing sources under %s", quarantined_count, folder_path)
-        if restored_count > 0:
-            logger.info("Restored %d reappeared sources under %s", restored_count, folder_path)
+        if to_quarantine:
+            logger.info("Quarantined %d missing sources under %s", len(to_quarantine), folder_path)
+        if to_restore:
+            logger.info("Restored %d reappeared sources under %s", len(to_restore), folder_path)
 
     except Exception as e:
         logger.warning("Quarantine scan failed for %s: %s", folder_path, e)
+    return result
@@ -0,0 +1,305 @@
+"""
+Write-behind buffer for request bookkeeping.
+
+``auth.update_last_used`` and ``activity_log.log_activity`` each used to
+run their own UPDATE/INSERT + commit on the request path. While the API
+server runs a WriteBehindBuffer (started in the app lifespan), they only
+append to it:
+
+- last_used_at is coalesced: one pending timestamp per API key, written as
+  a single ``UPDATE ... FROM (VALUES ...)`` per flush.
+- activity_log rows are written with a multi-row INSERT per flush.
+
+Each kind is written in its own transaction, so a failure drops only the
+events of that kind. Indexing runs are not buffered: they are rare, and
+``watched_folders.last_run_id`` and activity rows reference them as soon
+as ``start_run`` returns.
+
+Timestamps (activity ts, last_used_at) are captured when the event is
+recorded, not when it is flushed. Reads of the activity log flush this
+process's buffer first, so a worker always sees its own writes.
+
+A flush runs every API_WRITE_BEHIND_FLUSH_SECONDS (default 1), as soon as
+``batch_size`` events are pending, and at shutdown.
+
+Loss bounds (per worker process):
+
+- At most API_WRITE_BEHIND_MAX_PENDING events (default 10,000) are held.
+  Events recorded while the buffer is full are dropped and counted in
+  ``dropped_full``; last_used_at touches for keys already pending are
+  merged and never dropped.
+- A flush that fails is not retried; the events of the failed kind are
+  counted in ``dropped_error``.
+- A hard crash (SIGKILL, OOM) loses whatever was pending, i.e. at most one
+  flush interval of events or ``max_pending``, whichever is smaller. A
+  clean shutdown flushes.
+
+Counters are exposed by ``stats()`` and reported in ``/health`` under
+``system.write_behind``.
+"""
+
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """Background buffer that batches bookkeeping writes."""
+
+    def __init__(
+        self,
+        flush_interval: float = 1.0,
+        max_pending: int = 10000,
+        batch_size: int = 500,
+        connection_factory=None,
+    ):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self._connection_factory = connection_factory or _default_connection
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._reset_pending()
+        self.recorded = 0
+        self.written = 0
+        self.dropped_full = 0
+        self.dropped_error = 0
+        self.flushes = 0
+        self.flush_errors = 0
+        self.last_flush_at: Optional[str] = None
+
+    def _reset_pending(self) -> None:
+        self._last_used: Dict[Any, datetime] = {}
+        self._activity: List[tuple] = []
+
+    def _pending_locked(self) -> int:
+        return len(self._last_used) + len(self._activity)
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return self._pending_locked()
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+
+    def _admit_locked(self) -> bool:
+        if self._pending_locked() >= self.max_pending:
+            self.dropped_full += 1
+            return False
+        self.recorded += 1
+        return True
+
+    def _maybe_wake_locked(self) -> None:
+        if self._pending_locked() >= self.batch_size:
+            self._wakeup.set()
+
+    def touch_api_key(self, key_id: Any) -> None:
+        """Record a use of an API key (coalesced per key)."""
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            if key_id in self._last_used:
+                self._last_used[key_id] = now
+                return
+            if self._admit_locked():
+                self._last_used[key_id] = now
+                self._maybe_wake_locked()
+
+    def add_activity(self, row: tuple) -> bool:
+        """Queue an activity_log row (id, ts, client_id, user_id, action,
+        details_json, executor_scope, executor_id, root_id, run_id)."""
+        with self._lock:
+            if not self._admit_locked():
+                return False
+            self._activity.append(row)
+            self._maybe_wake_locked()
+            return True
+
+    # ------------------------------------------------------------------
+    # Flushing
+    # ------------------------------------------------------------------
+
+    def flush(self) -> int:
+        """Write everything pending; returns events written.
+
+        Each event kind is written in its own transaction, so a failure
+        drops only the events of that kind.
+        """
+        with self._flush_lock:
+            with self._lock:
+                last_used = sorted(self._last_used.items())
+                activity = self._activity
+                self._reset_pending()
+            written = 0
+            for kind, rows, writer in (
+                ("last_used_at", last_used, self._write_last_used),
+                ("activity", activity, self._write_activity),
+            ):
+                if not rows:
+                    continue
+                try:
+                    writer(rows)
+                except Exception as e:
+                    with self._lock:
+                        self.dropped_error += len(rows)
+                        self.flush_errors += 1
+                    logger.warning(
+                        "Write-behind flush of %s failed, dropped %d events: %s",
+                        kind, len(rows), e,
+                    )
+                    continue
+                written += len(rows)
+            if written:
+                with self._lock:
+                    self.written += written
+                    self.flushes += 1
+                    self.last_flush_at = datetime.now(timezone.utc).isoformat()
+            return written
+
+    def _write_last_used(self, rows) -> None:
+        from psycopg2.extras import execute_values
+
+        with self._connection_factory() as conn:
+            cur = conn.cursor()
+            execute_values(
+                cur,
+                """
+                UPDATE api_keys AS k
+                SET last_used_at = GREATEST(k.last_used_at, v.ts::timestamp)
+                FROM (VALUES %s) AS v(id, ts)
+                WHERE k.id = v.id
+                """,
+                rows,
+                template="(%s::int, %s::timestamptz)",
+            )
+            conn.commit()
+
+    def _write_activity(self, rows) -> None:
+        from psycopg2.extras import execute_values
+
+        with self._connection_factory() as conn:
+            cur = conn.cursor()
+            # Unregistered client_ids are dropped rather than failing the
+            # batch on activity_log_client_id_fkey (log_activity used to
+            # retry without the client_id).
+            execute_values(
+                cur,
+                """
+                INSERT INTO activity_log
+                    (id, ts, client_id, user_id, action, details,
+                     executor_scope, executor_id, root_id, run_id)
+                SELECT v.id, v.ts, c.id, v.user_id, v.action, v.details,
+                       v.executor_scope, v.executor_id, v.root_id, v.run_id
+                FROM (VALUES %s) AS v(id, ts, client_id, user_id, action, details,
+                                      executor_scope, executor_id, root_id, run_id)
+                LEFT JOIN clients c ON c.id = v.client_id
+                """,
+                rows,
+                template="(%s::uuid, %s::timestamptz, %s, %s, %s, %s::jsonb, %s, %s, %s, %s)",
+            )
+            conn.commit()
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the flush thread and write whatever is still pending."""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.flush()
+            except Exception as e:  # pragma: no cover - flush() handles DB errors
+                logger.warning("Write-behind flush loop error: %s", e)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pending": self._pending_locked(),
+                "recorded": self.recorded,
+                "written": self.written,
+                "dropped_full": self.dropped_full,
+                "dropped_error": self.dropped_error,
+                "flushes": self.flushes,
+                "flush_errors": self.flush_errors,
+                "last_flush_at": self.last_flush_at,
+                "flush_interval_seconds": self.flush_interval,
+                "max_pending": self.max_pending,
+            }
+
+
+def _default_connection():
+    from database import get_db_manager
+    return get_db_manager().get_connection()
+
+
+# ---------------------------------------------------------------------------
+# Process-wide buffer
+# ---------------------------------------------------------------------------
+
+_buffer: Optional[WriteBehindBuffer] = None
+_buffer_lock = threading.Lock()
+
+
+def get_active_write_behind() -> Optional[WriteBehindBuffer]:
+    """Return the running buffer, or None when writes should go straight to the DB."""
+    return _buffer
+
+
+def flush_pending() -> None:
+    """Flush this process's buffer so a following read sees its writes."""
+    buffer = _buffer
+    if buffer is not None and buffer.pending:
+        buffer.flush()
+
+
+def start_write_behind() -> Optional[WriteBehindBuffer]:
+    """Start the process-wide buffer; no-op when disabled by config."""
+    global _buffer
+    from config import get_config
+
+    api_config = get_config().api
+    if api_config.write_behind_flush_seconds <= 0:
+        return None
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = WriteBehindBuffer(
+                flush_interval=api_config.write_behind_flush_seconds,
+                max_pending=api_config.write_behind_max_pending,
+            )
+            _buffer.start()
+    return _buffer
+
+
+def stop_write_behind() -> None:
+    """Stop the buffer and flush it; later writes go straight to the DB."""
+    global _buffer
+    with _buffer_lock:
+        buffer, _buffer = _buffer, None
+    if buffer is not None:
+        buffer.stop()